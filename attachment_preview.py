@@ -0,0 +1,477 @@
+import io
+import os
+import json
+import pickle
+import base64
+import hashlib
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+import blob_store
+
+# 미리보기 결과(앞부분 행, 슬라이드 텍스트, 페이지 등) 캐시 디렉터리 - 원본 SHA-256 기준
+PREVIEW_CACHE_DIR = os.getenv('PREVIEW_CACHE_DIR', './preview_cache')
+
+# 캐시 형식이 바뀌면 올려서 이전 결과를 무시
+PREVIEW_VERSION = 1
+
+# 표 형식 미리보기 최대 행 수
+PREVIEW_ROWS = 100
+
+# 텍스트 미리보기에 읽는 최대 크기 (bytes)
+TEXT_PREVIEW_BYTES = 200 * 1024
+
+# PowerPoint/Word 미리보기 상한
+MAX_PREVIEW_SLIDES = 50
+MAX_PREVIEW_PARAGRAPHS = 300
+
+# 이미지 미리보기 최대 변 길이 (px) - Pillow가 있을 때만 축소
+IMAGE_PREVIEW_MAX_PX = 1600
+
+IMAGE_TYPES = ('jpg', 'jpeg', 'png', 'gif')
+TEXT_TYPES = ('txt', 'md', 'markdown', 'xml', 'html')
+
+MIME_TO_TYPE = {
+    'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif',
+    'application/pdf': 'pdf', 'text/csv': 'csv', 'application/json': 'json',
+    'text/plain': 'txt', 'text/markdown': 'md', 'text/html': 'html', 'text/xml': 'xml',
+    'application/excel': 'xlsx',
+    'application/vnd.ms-excel': 'xls',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+}
+
+
+def normalize_type(file_type, filename=''):
+    """확장자 또는 MIME 타입을 미리보기 종류(확장자)로 통일"""
+    file_type = (file_type or '').lower()
+    if '/' in file_type:
+        file_type = MIME_TO_TYPE.get(file_type, '')
+    if not file_type and '.' in (filename or ''):
+        file_type = filename.rsplit('.', 1)[-1].lower()
+    return 'jpg' if file_type == 'jpeg' else file_type
+
+
+def make_source(filename, file_type, file_size=None, blob_sha256=None, loader=None):
+    """첨부파일 원본을 가리키는 핸들 - 원본은 필요할 때만 읽음
+
+    blob_sha256이 있으면 blob 저장소에서, 없으면 loader()로 (이전 전 DB 행) 읽습니다.
+    """
+    return {
+        'filename': filename,
+        'file_type': normalize_type(file_type, filename),
+        'file_size': file_size,
+        'blob_sha256': blob_sha256,
+        'loader': loader,
+    }
+
+
+def read_bytes(source):
+    """원본 전체 - 실제로 다운로드할 때만 호출"""
+    if source.get('blob_sha256'):
+        data = blob_store.read(source['blob_sha256'])
+        if data is not None:
+            return data
+    if source.get('loader'):
+        if '_data' not in source:
+            source['_data'] = source['loader']()
+        return source['_data']
+    return None
+
+
+def open_stream(source):
+    """읽기용 파일 객체 - blob 저장소 파일은 메모리에 올리지 않고 디스크에서 바로 읽음"""
+    if source.get('blob_sha256'):
+        stream = blob_store.open_blob(source['blob_sha256'])
+        if stream is not None:
+            return stream
+    data = read_bytes(source)
+    return io.BytesIO(data) if data is not None else None
+
+
+def content_hash(source):
+    """미리보기 캐시 키 - blob 해시, 없으면 원본을 읽어 계산 (원본이 없으면 None)"""
+    if source.get('blob_sha256') and blob_store.exists(source['blob_sha256']):
+        return source['blob_sha256']
+    if '_hash' not in source:
+        data = read_bytes(source)
+        source['_hash'] = hashlib.sha256(data).hexdigest() if data is not None else None
+    return source['_hash']
+
+
+def has_content(source):
+    """원본이 있는지 (blob 파일은 존재 여부만 확인)"""
+    return content_hash(source) is not None
+
+
+def _artefact_path(sha256, name):
+    return os.path.join(PREVIEW_CACHE_DIR, sha256[:2], sha256, f"v{PREVIEW_VERSION}_{name}.pkl")
+
+
+def cached_artefact(source, name, build):
+    """원본 해시 기준으로 미리보기 결과를 디스크에 캐시 (없을 때만 build 실행)"""
+    sha256 = content_hash(source)
+    if sha256 is None:
+        return None
+    path = _artefact_path(sha256, name)
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+    value = build(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        # 저장하지 못한 결과는 캐시하지 않고 반환 (임시 파일은 남기지 않음)
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return value
+
+
+# ---- 미리보기 결과 생성 (원본을 스트림으로 열어 필요한 부분만 읽음) ----
+
+def _thumbnail(data):
+    """IMAGE_PREVIEW_MAX_PX보다 큰 이미지는 축소 (Pillow가 없으면 원본 그대로)"""
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+        if max(image.size) <= IMAGE_PREVIEW_MAX_PX or getattr(image, 'is_animated', False):
+            return data
+        image.thumbnail((IMAGE_PREVIEW_MAX_PX, IMAGE_PREVIEW_MAX_PX))
+        out = io.BytesIO()
+        image.save(out, format='PNG' if image.mode in ('RGBA', 'P', 'LA') else 'JPEG')
+        return out.getvalue()
+    except ImportError:
+        return data
+
+
+def _build_image(source):
+    return _thumbnail(read_bytes(source))
+
+
+def _build_pdf_info(source):
+    from PyPDF2 import PdfReader
+    with open_stream(source) as stream:
+        return {'pages': len(PdfReader(stream).pages)}
+
+
+def _build_pdf_page(page):
+    def build(source):
+        from PyPDF2 import PdfReader, PdfWriter
+        with open_stream(source) as stream:
+            writer = PdfWriter()
+            writer.add_page(PdfReader(stream).pages[page])
+            out = io.BytesIO()
+            writer.write(out)
+            return out.getvalue()
+    return build
+
+
+def _build_excel(source):
+    import openpyxl
+    sheets = []
+    with open_stream(source) as stream:
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = []
+                for row in sheet.iter_rows(values_only=True):
+                    rows.append(row)
+                    if len(rows) > PREVIEW_ROWS:
+                        break
+                if rows:
+                    header = [str(c) if c is not None else f"열{i + 1}" for i, c in enumerate(rows[0])]
+                    df = pd.DataFrame(rows[1:], columns=header).fillna('')
+                else:
+                    df = pd.DataFrame()
+                sheets.append({
+                    'name': sheet.title,
+                    'data': df,
+                    'total_rows': max((sheet.max_row or len(rows)) - 1, 0),
+                    'total_cols': sheet.max_column or len(df.columns),
+                })
+        finally:
+            workbook.close()
+    return sheets
+
+
+def _build_xls(source):
+    """구형 .xls (xlrd) - 시트별로 상위 PREVIEW_ROWS행만 DataFrame으로 변환"""
+    sheets = []
+    with open_stream(source) as stream:
+        with pd.ExcelFile(stream) as workbook:
+            for name in workbook.sheet_names:
+                df = pd.read_excel(workbook, sheet_name=name, nrows=PREVIEW_ROWS).fillna('')
+                sheet = workbook.book.sheet_by_name(name)
+                sheets.append({
+                    'name': name,
+                    'data': df,
+                    'total_rows': max(sheet.nrows - 1, 0),
+                    'total_cols': sheet.ncols,
+                })
+    return sheets
+
+
+def _build_csv(source):
+    with open_stream(source) as stream:
+        df = pd.read_csv(stream, nrows=PREVIEW_ROWS)
+    return df
+
+
+def _build_text(source):
+    with open_stream(source) as stream:
+        raw = stream.read(TEXT_PREVIEW_BYTES + 1)
+    truncated = len(raw) > TEXT_PREVIEW_BYTES
+    return {'text': raw[:TEXT_PREVIEW_BYTES].decode('utf-8', errors='replace'), 'truncated': truncated}
+
+
+def _build_json(source):
+    with open_stream(source) as stream:
+        return json.loads(stream.read().decode('utf-8'))
+
+
+def _build_pptx(source):
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+    with open_stream(source) as stream:
+        prs = Presentation(stream)
+    slides = []
+    for index, slide in enumerate(prs.slides, 1):
+        if index > MAX_PREVIEW_SLIDES:
+            break
+        shapes = sorted(slide.shapes, key=lambda shape: getattr(shape, 'top', 0) or 0)
+        elements = []
+        for shape in shapes:
+            if hasattr(shape, "text") and shape.text.strip():
+                is_title = False
+                try:
+                    if getattr(shape, 'is_placeholder', False) and shape.placeholder_format:
+                        is_title = shape.placeholder_format.type == 1
+                    elif len(shape.text.strip()) < 100 and '\n' not in shape.text.strip():
+                        is_title = True
+                except Exception:
+                    pass
+                elements.append(('title' if is_title else 'text', shape.text))
+            try:
+                if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                    elements.append(('image', _thumbnail(shape.image.blob)))
+            except Exception:
+                pass
+        slides.append(elements)
+    return {'total': len(prs.slides), 'slides': slides}
+
+
+def _build_docx(source):
+    import docx
+    with open_stream(source) as stream:
+        doc = docx.Document(stream)
+    paragraphs = []
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
+        if not text:
+            continue
+        style_name = getattr(getattr(paragraph, 'style', None), 'name', '') or ''
+        is_heading = style_name.startswith('Heading') or (
+            len(text) < 100 and (text.isupper() or any(k in text.lower() for k in ['제목', '장', '절', 'chapter', 'section']))
+        )
+        paragraphs.append((text, is_heading))
+    tables = [[[cell.text.strip() for cell in row.cells] for row in table.rows] for table in doc.tables]
+    return {
+        'total': len(paragraphs),
+        'paragraphs': paragraphs[:MAX_PREVIEW_PARAGRAPHS],
+        'tables': tables,
+    }
+
+
+# ---- 화면 표시 ----
+
+def _pdf_iframe(pdf_bytes):
+    pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+    st.markdown(f"""
+    <iframe src=\"data:application/pdf;base64,{pdf_base64}\"
+            width=\"100%\" height=\"600px\" type=\"application/pdf\">
+        <p>PDF를 표시할 수 없습니다.
+        <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
+        여기를 클릭하여 새 탭에서 열어보세요.</a></p>
+    </iframe>
+    """, unsafe_allow_html=True)
+
+
+def _render_pdf(source, key):
+    info = cached_artefact(source, 'pdf_info', _build_pdf_info)
+    total_pages = info['pages']
+    if total_pages == 0:
+        st.info("빈 PDF입니다.")
+        return True
+    page_key = f"{key}_pdf_page"
+    page = min(st.session_state.get(page_key, 0), total_pages - 1)
+    col_prev, col_next = st.columns([1, 1])
+    with col_prev:
+        if st.button("⬅️ 이전", disabled=page == 0, key=f"{key}_pdf_prev"):
+            st.session_state[page_key] = max(0, page - 1)
+            st.rerun()
+    with col_next:
+        if st.button("다음 ➡️", disabled=page >= total_pages - 1, key=f"{key}_pdf_next"):
+            st.session_state[page_key] = min(total_pages - 1, page + 1)
+            st.rerun()
+    st.markdown(f"**페이지 {page + 1} / {total_pages}**")
+    _pdf_iframe(cached_artefact(source, f'pdf_page_{page}', _build_pdf_page(page)))
+    return True
+
+
+def _render_excel(source, key, filename, name='excel', build=_build_excel):
+    sheets = cached_artefact(source, name, build)
+    st.subheader(f"📊 Excel 미리보기: {filename}")
+    if not sheets:
+        st.info("빈 통합 문서입니다.")
+        return True
+    names = [sheet['name'] for sheet in sheets]
+    selected = st.selectbox("시트 선택", names, key=f"{key}_sheet") if len(names) > 1 else names[0]
+    sheet = sheets[names.index(selected)]
+    st.write(f"**시트: {sheet['name']}**")
+    st.write(f"행 수: {sheet['total_rows']}, 열 수: {sheet['total_cols']}")
+    if sheet['total_rows'] > PREVIEW_ROWS:
+        st.warning(f"⚠️ 데이터가 많아서 상위 {PREVIEW_ROWS}행만 표시합니다.")
+    if sheet['data'].empty:
+        st.info("빈 시트입니다.")
+    else:
+        st.dataframe(sheet['data'], use_container_width=True)
+    return True
+
+
+def _render_pptx(source, filename):
+    preview = cached_artefact(source, 'pptx', _build_pptx)
+    st.subheader(f"📋 PowerPoint 미리보기: {filename}")
+    st.write(f"총 슬라이드 수: {preview['total']}")
+    if preview['total'] > MAX_PREVIEW_SLIDES:
+        st.warning(f"⚠️ 앞의 {MAX_PREVIEW_SLIDES}개 슬라이드만 표시합니다.")
+    st.markdown("---")
+    for index, elements in enumerate(preview['slides'], 1):
+        st.markdown(f"## 📋 슬라이드 {index}")
+        if not elements:
+            st.info("이 슬라이드에는 내용이 없습니다.")
+        for kind, content in elements:
+            if kind == 'title':
+                st.markdown(f"### 🎯 {content}")
+            elif kind == 'text':
+                for line in content.split('\n'):
+                    if line.strip():
+                        st.markdown(f"• {line.strip()}")
+            else:
+                st.image(content, caption=f"📷 슬라이드 {index} 이미지", use_container_width=True)
+        if index < len(preview['slides']):
+            st.markdown("---")
+    return True
+
+
+def _render_docx(source, filename):
+    preview = cached_artefact(source, 'docx', _build_docx)
+    st.subheader(f"📝 Word 문서 미리보기: {filename}")
+    st.write(f"총 단락 수: {preview['total']}")
+    for text, is_heading in preview['paragraphs']:
+        st.markdown(f"### {text}" if is_heading else text)
+    if preview['total'] > MAX_PREVIEW_PARAGRAPHS:
+        st.info(f"앞의 {MAX_PREVIEW_PARAGRAPHS}개 단락만 표시합니다. 전체 내용은 다운로드하여 확인하세요.")
+    if preview['tables']:
+        st.subheader("📊 문서 내 표")
+        for index, table in enumerate(preview['tables'], 1):
+            st.write(f"**표 {index}**")
+            st.dataframe(pd.DataFrame(table), use_container_width=True)
+    return True
+
+
+def _render_text(source, file_type, filename):
+    preview = cached_artefact(source, 'text', _build_text)
+    st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
+    text = preview['text']
+    if file_type in ('md', 'markdown'):
+        st.markdown(text)
+    elif file_type in ('html', 'xml'):
+        # HTML은 보안상 렌더링하지 않고 코드로 표시
+        st.code(text, language=file_type)
+    else:
+        st.text_area("파일 내용", value=text, height=400, disabled=True)
+    if preview['truncated']:
+        st.caption(f"앞의 {TEXT_PREVIEW_BYTES // 1024}KB만 표시합니다. 전체 내용은 다운로드하여 확인하세요.")
+    return True
+
+
+def render_preview(source, key='preview'):
+    """첨부파일 미리보기 - 요청한 파일만, 캐시된 결과가 있으면 원본을 읽지 않음
+
+    지원하지 않는 형식이면 False를 반환합니다 (호출한 쪽에서 추출 텍스트 등을 표시).
+    """
+    file_type = source['file_type']
+    filename = source['filename']
+    if not has_content(source):
+        st.error("파일 데이터를 불러올 수 없습니다.")
+        return False
+    try:
+        if file_type in IMAGE_TYPES:
+            st.image(cached_artefact(source, 'image', _build_image), caption=f"🖼️ {filename}", use_container_width=True)
+            return True
+        if file_type == 'pdf':
+            return _render_pdf(source, key)
+        if file_type in ('xlsx', 'xlsm'):
+            return _render_excel(source, key, filename)
+        if file_type == 'xls':
+            return _render_excel(source, key, filename, 'xls', _build_xls)
+        if file_type == 'csv':
+            df = cached_artefact(source, 'csv', _build_csv)
+            st.subheader(f"📈 CSV 파일 미리보기: {filename}")
+            st.dataframe(df, use_container_width=True)
+            st.caption(f"상위 {PREVIEW_ROWS}행까지 표시합니다.")
+            return True
+        if file_type == 'json':
+            st.subheader(f"📋 JSON 파일 미리보기: {filename}")
+            st.json(cached_artefact(source, 'json', _build_json))
+            return True
+        if file_type in TEXT_TYPES:
+            return _render_text(source, file_type, filename)
+        if file_type == 'pptx':
+            return _render_pptx(source, filename)
+        if file_type == 'docx':
+            return _render_docx(source, filename)
+        st.info(f"📁 {file_type.upper() or '이'} 파일은 미리보기를 지원하지 않습니다. 다운로드 후 확인하세요.")
+        return False
+    except Exception as e:
+        st.error(f"파일 미리보기 오류: {str(e)}")
+        return False
+
+
+def download_button(source, label="💾 다운로드", key=None, mime=None, **kwargs):
+    """누를 때만 원본을 읽는 다운로드 버튼
+
+    목록을 그릴 때마다 모든 파일을 읽지 않도록, 먼저 '준비' 버튼을 보여주고
+    누른 파일만 원본을 읽어 실제 다운로드 버튼을 만듭니다. 전송은 Streamlit
+    미디어 엔드포인트가 조각(Range) 단위로 처리합니다.
+    """
+    ready_key = f"{key}_ready"
+    if not st.session_state.get(ready_key):
+        if st.button(label, key=f"{key}_prepare", **kwargs):
+            st.session_state[ready_key] = True
+            st.rerun()
+        return False
+    data = read_bytes(source)
+    if data is None:
+        st.error("원본 파일을 찾을 수 없습니다.")
+        st.session_state.pop(ready_key, None)
+        return False
+    return st.download_button(
+        label=f"⬇️ {source['filename']}" if len(source['filename']) <= 30 else "⬇️ 저장",
+        data=data,
+        file_name=source['filename'],
+        mime=mime or 'application/octet-stream',
+        key=key,
+        on_click=lambda: st.session_state.pop(ready_key, None),
+        **kwargs
+    )
@@ -0,0 +1,297 @@
+import os
+import time
+import base64
+import hashlib
+import tempfile
+import threading
+
+import schema_catalogue
+
+# 첨부파일 원본 저장 디렉터리 (SHA-256 내용 주소)
+DEFAULT_ROOT = os.getenv('BLOB_STORE_DIR', './blob_store')
+
+# 스트리밍 읽기/쓰기 단위 (bytes)
+CHUNK_SIZE = 1024 * 1024
+
+# 첨부파일 테이블에 추가하는 해시 컬럼
+HASH_COLUMN = 'blob_sha256'
+
+# 첨부파일 테이블: (테이블, PK 컬럼, 기존 원본 컬럼, 기존 원본이 base64 텍스트인지)
+ATTACHMENT_TABLES = [
+    ('file_storage_files', 'file_data_id', 'file_binary_data', True),
+    ('project_review_files', 'file_id', 'file_binary_data', True),
+    ('work_diary_files', 'file_id', 'file_content', False),
+    ('supplier_files', 'file_id', 'file_binary_data', False),
+]
+
+# 기존 행 이전 시 한 번에 읽는 행 수 (원본을 메모리에 올리므로 작게 유지)
+MIGRATION_BATCH_SIZE = 20
+
+# 이 시간(초)보다 최근에 만든 blob은 참조가 없어도 지우지 않음 (업로드 중인 파일 보호)
+GC_GRACE_SECONDS = 3600
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def blob_path(sha256, root=DEFAULT_ROOT):
+    """해시에 해당하는 파일 경로 (앞 4자리로 2단계 디렉터리 분산)"""
+    return os.path.join(root, sha256[:2], sha256[2:4], sha256)
+
+
+def exists(sha256, root=DEFAULT_ROOT):
+    return bool(sha256) and os.path.exists(blob_path(sha256, root))
+
+
+def put_stream(fileobj, root=DEFAULT_ROOT):
+    """파일 객체를 조각 단위로 해시하며 저장하고 (sha256, 크기)를 반환
+
+    같은 내용이 이미 있으면 새로 쓰지 않습니다 (중복 제거).
+    """
+    tmp_dir = os.path.join(root, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp_file.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256, root)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return sha256, size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def put(data, root=DEFAULT_ROOT):
+    """바이트를 저장하고 sha256을 반환"""
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(sha256, root)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    return sha256
+
+
+def open_blob(sha256, root=DEFAULT_ROOT):
+    """읽기용 파일 객체 (없으면 None)"""
+    if not exists(sha256, root):
+        return None
+    return open(blob_path(sha256, root), 'rb')
+
+
+def read(sha256, root=DEFAULT_ROOT):
+    """원본 바이트 전체 (없으면 None)"""
+    blob = open_blob(sha256, root)
+    if blob is None:
+        return None
+    with blob:
+        return blob.read()
+
+
+def iter_chunks(sha256, chunk_size=CHUNK_SIZE, root=DEFAULT_ROOT):
+    """원본을 chunk_size 단위로 읽는 제너레이터"""
+    blob = open_blob(sha256, root)
+    if blob is None:
+        return
+    with blob:
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def size(sha256, root=DEFAULT_ROOT):
+    return os.path.getsize(blob_path(sha256, root)) if exists(sha256, root) else None
+
+
+def decode_legacy(value, base64_encoded):
+    """기존 DB 컬럼에 저장된 원본을 바이트로 변환"""
+    if value is None:
+        return None
+    if base64_encoded:
+        return base64.b64decode(value)
+    return bytes(value) if not isinstance(value, bytes) else value
+
+
+def read_attachment(row, legacy_column, base64_encoded, root=DEFAULT_ROOT):
+    """첨부파일 행의 원본 - 해시가 있으면 blob 저장소에서, 없으면 이전 전 DB 컬럼에서"""
+    if row.get(HASH_COLUMN):
+        data = read(row[HASH_COLUMN], root)
+        if data is not None:
+            return data
+    return decode_legacy(row.get(legacy_column), base64_encoded)
+
+
+def _table_spec(table):
+    for spec in ATTACHMENT_TABLES:
+        if spec[0] == table:
+            return spec
+    raise ValueError(f"첨부파일 테이블이 아닙니다: {table}")
+
+
+def ensure_schema(cursor, table, force=False):
+    """첨부파일 테이블에 해시 컬럼/인덱스 추가, 기존 원본 컬럼은 NULL 허용으로 변경
+
+    데이터베이스/테이블별로 프로세스당 한 번 확인합니다 (force=True면 항상 확인).
+    """
+    _, _, legacy_column, _ = _table_spec(table)
+    cursor.execute("SELECT DATABASE()")
+    row = cursor.fetchone()
+    database = row['DATABASE()'] if isinstance(row, dict) else row[0]
+    with _schema_lock:
+        if (database, table) in _schema_ready and not force:
+            return
+    cursor.execute("""
+        SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    columns = {}
+    for column in cursor.fetchall():
+        if isinstance(column, dict):
+            columns[column['COLUMN_NAME']] = (column['COLUMN_TYPE'], column['IS_NULLABLE'])
+        else:
+            columns[column[0]] = (column[1], column[2])
+    if not columns:
+        return
+    changed = False
+    if HASH_COLUMN not in columns:
+        cursor.execute(f"""
+            ALTER TABLE {table}
+            ADD COLUMN {HASH_COLUMN} CHAR(64) NULL,
+            ADD INDEX idx_{HASH_COLUMN} ({HASH_COLUMN})
+        """)
+        changed = True
+    if legacy_column in columns and columns[legacy_column][1] == 'NO':
+        cursor.execute(f"ALTER TABLE {table} MODIFY COLUMN {legacy_column} {columns[legacy_column][0]} NULL")
+        changed = True
+    if changed:
+        schema_catalogue.invalidate()
+    with _schema_lock:
+        _schema_ready.add((database, table))
+
+
+def _existing_tables(cursor):
+    cursor.execute("""
+        SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    return {row['TABLE_NAME'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+
+
+def migrate_table(conn, table, batch_size=MIGRATION_BATCH_SIZE, root=DEFAULT_ROOT):
+    """기존 행의 원본을 blob 저장소로 옮기고 DB 컬럼은 비움 (여러 번 실행해도 안전)"""
+    _, id_column, legacy_column, base64_encoded = _table_spec(table)
+    cursor = conn.cursor(dictionary=True)
+    result = {'table': table, 'rows': 0, 'bytes': 0, 'new_blobs': 0}
+    try:
+        ensure_schema(cursor, table, force=True)
+        cursor.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (legacy_column,))
+        if not cursor.fetchall():
+            return result
+        cursor.execute(f"""
+            SELECT {id_column} AS row_id FROM {table}
+            WHERE {HASH_COLUMN} IS NULL AND {legacy_column} IS NOT NULL
+            ORDER BY {id_column}
+        """)
+        row_ids = [row['row_id'] for row in cursor.fetchall()]
+        for start in range(0, len(row_ids), batch_size):
+            batch = row_ids[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"""
+                SELECT {id_column} AS row_id, {legacy_column} AS data FROM {table}
+                WHERE {id_column} IN ({placeholders})
+            """, batch)
+            updates = []
+            for row in cursor.fetchall():
+                data = decode_legacy(row['data'], base64_encoded)
+                if data is None:
+                    continue
+                if not exists(hashlib.sha256(data).hexdigest(), root):
+                    result['new_blobs'] += 1
+                updates.append((put(data, root), row['row_id']))
+                result['bytes'] += len(data)
+            if updates:
+                cursor.executemany(f"""
+                    UPDATE {table} SET {HASH_COLUMN} = %s, {legacy_column} = NULL
+                    WHERE {id_column} = %s
+                """, updates)
+            conn.commit()
+            result['rows'] += len(updates)
+        return result
+    finally:
+        cursor.close()
+
+
+def migrate_all(conn, root=DEFAULT_ROOT):
+    """모든 첨부파일 테이블 이전 (없는 테이블은 건너뜀)"""
+    cursor = conn.cursor()
+    try:
+        tables = _existing_tables(cursor)
+    finally:
+        cursor.close()
+    return [migrate_table(conn, spec[0], root=root) for spec in ATTACHMENT_TABLES if spec[0] in tables]
+
+
+def referenced_hashes(conn):
+    """첨부파일 테이블이 참조하는 모든 해시"""
+    cursor = conn.cursor()
+    try:
+        tables = _existing_tables(cursor)
+        hashes = set()
+        for table, *_ in ATTACHMENT_TABLES:
+            if table not in tables:
+                continue
+            cursor.execute(f"SHOW COLUMNS FROM {table} LIKE %s", (HASH_COLUMN,))
+            if not cursor.fetchall():
+                continue
+            cursor.execute(f"SELECT DISTINCT {HASH_COLUMN} FROM {table} WHERE {HASH_COLUMN} IS NOT NULL")
+            hashes.update(row[0] for row in cursor.fetchall())
+        return hashes
+    finally:
+        cursor.close()
+
+
+def collect_garbage(conn, root=DEFAULT_ROOT, grace_seconds=GC_GRACE_SECONDS):
+    """어느 행도 참조하지 않는 blob 삭제 - (삭제 개수, 확보한 bytes)"""
+    referenced = referenced_hashes(conn)
+    cutoff = time.time() - grace_seconds
+    removed, freed = 0, 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if filename in referenced or os.path.getmtime(path) > cutoff:
+                continue
+            freed += os.path.getsize(path)
+            os.remove(path)
+            removed += 1
+    return removed, freed
+
+
+def get_stats(root=DEFAULT_ROOT):
+    count, total = 0, 0
+    for dirpath, _, filenames in os.walk(root):
+        if os.path.basename(dirpath) == 'tmp':
+            continue
+        for filename in filenames:
+            count += 1
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return {'root': root, 'blobs': count, 'size_bytes': total}
@@ -1,5 +1,33 @@
+import re
+import time
+import random
+
 import streamlit as st
 
+from parallel_search import run_parallel
+
+# 동시에 처리하는 청크 수 (API 속도 제한을 고려하여 작게 유지)
+MAX_CONCURRENT_CHUNKS = 4
+
+# 한 번에 종합하는 청크 답변 수 - 이보다 많으면 단계적으로(트리 형태) 종합
+REDUCE_FAN_IN = 8
+
+# 속도 제한 오류 시 재시도 횟수 및 기본 대기 시간 (초)
+MAX_RETRIES = 3
+BACKOFF_BASE = 2.0
+
+_RATE_LIMIT_PATTERN = re.compile(r"rate.?limit|429|529|overloaded|too many requests", re.IGNORECASE)
+
+# 응답 함수가 예외 대신 돌려주는 오류 문자열의 접두어 - 이 접두어로 시작하는 응답만 속도 제한 여부를 확인
+ERROR_PREFIXES = ("오류가 발생했습니다:", "오류 발생:")
+
+class ChunkProcessingError(Exception):
+    """모든 청크(또는 중간 종합 그룹) 처리가 실패해 종합할 답변이 없음"""
+
+
+CHUNK_SYSTEM_PROMPT = "당신은 RAG 기반 AI 어시스턴트입니다. 제공된 청크 데이터만을 기반으로 부분적 답변을 제공해주세요."
+SYNTHESIS_SYSTEM_PROMPT = "당신은 여러 부분적 답변을 종합하여 완전한 최종 답변을 생성하는 전문가입니다."
+
 def split_rag_data_into_chunks(mysql_data=None, website_data=None, files_data=None, model_name=None, max_chunk_size=800000):
     """RAG 데이터를 청크로 분할하여 반환"""
     chunks = []
@@ -166,8 +194,123 @@ def create_chunk_context(chunk_data, model_name=None):
     
     return context_text, rag_sources
 
-def process_chunked_rag(user_query, mysql_data=None, website_data=None, files_data=None, model_name=None, get_ai_response_func=None):
-    """청크 기반 RAG 처리"""
+def _response_content(response):
+    return response.get('content', '') if isinstance(response, dict) else str(response or '')
+
+def _is_error_response(response):
+    """응답 함수가 예외 대신 돌려준 오류 응답인지"""
+    return _response_content(response).lstrip().startswith(ERROR_PREFIXES)
+
+def _is_rate_limit_error(response):
+    """오류 접두어로 시작하는 응답 중 속도 제한 오류인지 (정상 답변 본문은 검사하지 않음)"""
+    return _is_error_response(response) and bool(_RATE_LIMIT_PATTERN.search(_response_content(response)))
+
+def _call_with_backoff(get_ai_response_func, **kwargs):
+    """속도 제한 오류(예외 또는 오류 응답)면 지수 백오프 후 재시도"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = get_ai_response_func(**kwargs)
+        except Exception as e:
+            if attempt == MAX_RETRIES or not _RATE_LIMIT_PATTERN.search(str(e)):
+                raise
+        else:
+            if attempt == MAX_RETRIES or not _is_rate_limit_error(response):
+                return response
+        time.sleep(BACKOFF_BASE * (2 ** attempt) + random.uniform(0, 1))
+
+def build_synthesis_prompt(user_query, chunk_responses, final=True):
+    """청크별 답변을 종합하는 프롬프트 생성 (final=False면 중간 단계 요약)"""
+    synthesis_prompt = f"""
+다음은 동일한 질문에 대해 서로 다른 데이터 청크로부터 얻은 부분적 답변들입니다:
+
+질문: {user_query}
+
+청크별 답변들:
+"""
+    
+    for chunk_resp in chunk_responses:
+        synthesis_prompt += f"\n--- 청크 {chunk_resp['chunk_id']} 답변 ---\n{chunk_resp['content']}\n"
+    
+    if final:
+        synthesis_prompt += """
+위의 모든 청크 답변들을 종합하여 완전하고 일관된 최종 답변을 작성해주세요:
+1. 중복된 정보는 통합하기
+2. 서로 다른 관점이 있다면 모두 포함하기  
+3. 전체적인 인사이트와 결론 제시하기
+4. 청크별 세부 정보를 체계적으로 정리하기
+"""
+    else:
+        synthesis_prompt += """
+위 청크 답변들을 하나의 중간 답변으로 통합해주세요. 이 결과는 다른 그룹의 답변과 다시 종합됩니다:
+1. 중복된 정보는 통합하기
+2. 구체적인 수치, 출처, 세부 정보는 빠짐없이 유지하기
+3. 결론을 성급하게 내리지 말고 근거 위주로 정리하기
+"""
+    return synthesis_prompt
+
+def _run_concurrently(tasks, max_concurrency, on_done=None):
+    """{id: callable}를 동시에 실행하고 ({id: 응답}, {id: 오류 메시지}) 반환
+
+    예외와 오류 응답은 실패로 따로 모아 종합에 쓰이지 않게 합니다.
+    on_done(id, 응답, 소요시간, 완료 수, 전체 수, 오류 메시지 또는 None)은 완료될 때마다 호출됩니다.
+    """
+    results, failures = {}, {}
+    for task_id, status, result, elapsed in run_parallel(tasks, max_workers=max_concurrency, time_budget=None):
+        if status != 'ok':
+            failures[task_id] = str(result)
+        elif _is_error_response(result):
+            failures[task_id] = _response_content(result).strip()
+        else:
+            results[task_id] = result
+        if on_done:
+            on_done(task_id, result, elapsed, len(results) + len(failures), len(tasks), failures.get(task_id))
+    return results, failures
+
+def reduce_chunk_responses(user_query, chunk_responses, model_name, get_ai_response_func,
+                           max_concurrency=MAX_CONCURRENT_CHUNKS, fan_in=REDUCE_FAN_IN):
+    """청크 답변이 fan_in보다 많으면 그룹별로 동시에 중간 종합 (최종 종합 직전까지 반복)"""
+    level = 0
+    while len(chunk_responses) > fan_in:
+        level += 1
+        groups = [chunk_responses[i:i + fan_in] for i in range(0, len(chunk_responses), fan_in)]
+        st.write(f"**🔄 {level}단계 중간 종합: {len(chunk_responses)}개 답변 → {len(groups)}개 그룹**")
+        
+        tasks = {
+            group_id: (lambda group=group: _call_with_backoff(
+                get_ai_response_func,
+                prompt=build_synthesis_prompt(user_query, group, final=False),
+                model_name=model_name,
+                system_prompt=SYNTHESIS_SYSTEM_PROMPT,
+                enable_thinking=False
+            ))
+            for group_id, group in enumerate(groups, 1)
+        }
+        results, failures = _run_concurrently(tasks, max_concurrency)
+        if not results:
+            raise ChunkProcessingError(f"{level}단계 중간 종합이 모두 실패했습니다: {next(iter(failures.values()))}")
+        for group_id, error in failures.items():
+            group = groups[group_id - 1]
+            st.warning(f"⚠️ 청크 {group[0]['chunk_id']}~{group[-1]['chunk_id']} 중간 종합 실패 - 제외됨: {error}")
+        
+        chunk_responses = [
+            {
+                'chunk_id': f"{group[0]['chunk_id']}~{group[-1]['chunk_id']}",
+                'content': results[group_id]['content']
+            }
+            for group_id, group in enumerate(groups, 1)
+            if group_id in results
+        ]
+    return chunk_responses
+
+def process_chunked_rag(user_query, mysql_data=None, website_data=None, files_data=None, model_name=None, get_ai_response_func=None,
+                        max_concurrency=MAX_CONCURRENT_CHUNKS, reduce_fan_in=REDUCE_FAN_IN):
+    """청크 기반 RAG 처리
+    
+    청크별 부분 답변은 최대 max_concurrency개씩 동시에 생성하고(속도 제한 시 백오프 재시도),
+    완료되는 대로 진행 상황을 표시합니다. 답변이 reduce_fan_in개를 넘으면
+    그룹별 중간 종합을 거쳐 최종 답변을 만듭니다. 실패한 청크는 종합에서 빼고
+    'failed_chunks'로 따로 반환하며, 모든 청크가 실패하면 ChunkProcessingError를 올립니다.
+    """
     
     # 데이터를 청크로 분할
     chunks = split_rag_data_into_chunks(mysql_data, website_data, files_data, model_name)
@@ -176,18 +319,18 @@ def process_chunked_rag(user_query, mysql_data=None, website_data=None, files_da
         # 청크가 1개 이하면 일반 처리
         return None
     
-    st.info(f"🔄 **청크 분할 모드**: 데이터가 크기 제한을 초과하여 {len(chunks)}개 청크로 나누어 처리합니다.")
+    st.info(f"🔄 **청크 분할 모드**: 데이터가 크기 제한을 초과하여 {len(chunks)}개 청크로 나누어 "
+            f"최대 {max_concurrency}개씩 동시에 처리합니다.")
     
-    chunk_responses = []
     all_rag_sources = []
+    chunk_sources = {}
+    tasks = {}
     
-    # 각 청크별 처리
+    # 청크별 컨텍스트/프롬프트 준비
     for i, chunk in enumerate(chunks):
-        st.write(f"**청크 {i+1}/{len(chunks)} 처리 중...**")
-        
-        # 청크 컨텍스트 생성
-        chunk_context, chunk_sources = create_chunk_context(chunk, model_name)
-        all_rag_sources.extend(chunk_sources)
+        chunk_context, sources = create_chunk_context(chunk, model_name)
+        all_rag_sources.extend(sources)
+        chunk_sources[i + 1] = sources
         
         # 청크별 프롬프트 구성
         chunk_prompt = f"""
@@ -199,51 +342,58 @@ def process_chunked_rag(user_query, mysql_data=None, website_data=None, files_da
 
 이 청크의 데이터만을 기반으로 답변해주세요. 다른 청크의 결과와 나중에 종합될 예정입니다.
 """
-        
-        # AI 응답 생성
-        response = get_ai_response_func(
+        tasks[i + 1] = (lambda chunk_prompt=chunk_prompt: _call_with_backoff(
+            get_ai_response_func,
             prompt=chunk_prompt,
             model_name=model_name,
-            system_prompt="당신은 RAG 기반 AI 어시스턴트입니다. 제공된 청크 데이터만을 기반으로 부분적 답변을 제공해주세요.",
+            system_prompt=CHUNK_SYSTEM_PROMPT,
             enable_thinking=False  # 청크 처리 시 thinking 비활성화
-        )
-        
-        chunk_responses.append({
-            'chunk_id': i+1,
-            'content': response['content'],
-            'sources': chunk_sources
-        })
-        
-        # 진행 상황 표시
-        progress = (i + 1) / len(chunks)
-        st.progress(progress)
+        ))
     
-    # 최종 종합 답변 생성
-    st.write("**🔄 청크 결과를 종합하는 중...**")
+    # 청크별 동시 처리 (완료 순서대로 진행 상황 표시)
+    progress_bar = st.progress(0.0)
+    status_area = st.empty()
+    completed = []
     
-    synthesis_prompt = f"""
-다음은 동일한 질문에 대해 서로 다른 데이터 청크로부터 얻은 부분적 답변들입니다:
-
-질문: {user_query}
-
-청크별 답변들:
-"""
+    def show_progress(chunk_id, response, elapsed, done, total, error):
+        if error is None:
+            completed.append(f"✅ 청크 {chunk_id} 완료 ({elapsed:.1f}초)")
+        else:
+            completed.append(f"❌ 청크 {chunk_id} 실패 ({elapsed:.1f}초): {error[:200]}")
+        progress_bar.progress(done / total)
+        status_area.markdown(f"**청크 {done}/{total} 처리 완료**  \n" + "  \n".join(completed))
     
-    for i, chunk_resp in enumerate(chunk_responses):
-        synthesis_prompt += f"\n--- 청크 {chunk_resp['chunk_id']} 답변 ---\n{chunk_resp['content']}\n"
+    results, failures = _run_concurrently(tasks, max_concurrency, on_done=show_progress)
+    if not results:
+        raise ChunkProcessingError(f"모든 청크({len(chunks)}개) 처리에 실패했습니다: {next(iter(failures.values()))}")
+    failed_chunks = [{'chunk_id': chunk_id, 'error': failures[chunk_id]} for chunk_id in sorted(failures)]
+    if failed_chunks:
+        st.warning(f"⚠️ {len(failed_chunks)}개 청크 처리에 실패하여 종합에서 제외합니다: "
+                   + ", ".join(str(c['chunk_id']) for c in failed_chunks))
     
-    synthesis_prompt += """
-위의 모든 청크 답변들을 종합하여 완전하고 일관된 최종 답변을 작성해주세요:
-1. 중복된 정보는 통합하기
-2. 서로 다른 관점이 있다면 모두 포함하기  
-3. 전체적인 인사이트와 결론 제시하기
-4. 청크별 세부 정보를 체계적으로 정리하기
-"""
+    chunk_responses = [
+        {
+            'chunk_id': chunk_id,
+            'content': results[chunk_id]['content'],
+            'sources': chunk_sources[chunk_id]
+        }
+        for chunk_id in sorted(results)
+    ]
+    
+    # 답변이 많으면 단계적으로 중간 종합
+    reduced_responses = reduce_chunk_responses(
+        user_query, chunk_responses, model_name, get_ai_response_func,
+        max_concurrency=max_concurrency, fan_in=reduce_fan_in
+    )
+    
+    # 최종 종합 답변 생성
+    st.write("**🔄 청크 결과를 종합하는 중...**")
     
-    final_response = get_ai_response_func(
-        prompt=synthesis_prompt,
+    final_response = _call_with_backoff(
+        get_ai_response_func,
+        prompt=build_synthesis_prompt(user_query, reduced_responses),
         model_name=model_name,
-        system_prompt="당신은 여러 부분적 답변을 종합하여 완전한 최종 답변을 생성하는 전문가입니다.",
+        system_prompt=SYNTHESIS_SYSTEM_PROMPT,
         enable_thinking=st.session_state.get('enable_sidebar_reasoning', False)
     )
     
@@ -253,5 +403,6 @@ def process_chunked_rag(user_query, mysql_data=None, website_data=None, files_da
         'has_thinking': final_response.get('has_thinking', False),
         'chunk_count': len(chunks),
         'chunk_responses': chunk_responses,
+        'failed_chunks': failed_chunks,
         'rag_sources_used': all_rag_sources
-    } 
\ No newline at end of file
+    }
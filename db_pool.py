@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from collections import defaultdict
+
+import streamlit as st
+import mysql.connector
+from mysql.connector import pooling, errors
+
+# 풀 크기 (mysql-connector 최대값 32)
+DEFAULT_POOL_SIZE = min(int(os.getenv('SQL_POOL_SIZE', '10')), pooling.CNX_POOL_MAXSIZE)
+
+
+def _caller_page(depth=2):
+    """connect()를 호출한 페이지 파일 이름 (페이지별 사용량 집계용)"""
+    try:
+        frame = sys._getframe(depth)
+    except ValueError:
+        return "unknown"
+    return os.path.basename(frame.f_globals.get('__file__', 'unknown'))
+
+
+class _PooledConnection:
+    """풀에서 꺼낸 연결 - close() 때 풀의 체크아웃 수를 줄이고 나머지는 원래 연결에 위임"""
+
+    def __init__(self, conn, release):
+        self._conn = conn
+        self._release = release
+
+    def close(self):
+        release, self._release = self._release, None
+        try:
+            self._conn.close()
+        finally:
+            if release is not None:
+                release()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """연결 설정 하나에 대응하는 MySQL 커넥션 풀 + 사용량 지표
+
+    풀에서 꺼낸 연결의 close()는 실제 연결을 끊지 않고 풀로 반환하므로
+    기존 페이지 코드의 conn.close() 호출은 그대로 동작합니다.
+    체크아웃 시 mysql-connector 풀이 연결 상태를 확인하고 끊긴 연결은 재접속합니다.
+    """
+
+    def __init__(self, config, pool_size=DEFAULT_POOL_SIZE):
+        self.config = config
+        self.pool_size = pool_size
+        key = repr(sorted(config.items())).encode('utf-8')
+        self.pool = pooling.MySQLConnectionPool(
+            pool_name=f"portal_{hashlib.sha1(key).hexdigest()[:16]}",
+            pool_size=pool_size,
+            pool_reset_session=True,
+            **config
+        )
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self.metrics = defaultdict(lambda: {
+            'checkouts': 0,
+            'overflow': 0,
+            'errors': 0,
+            'wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+        })
+
+    def _record(self, page, field, wait_ms=None):
+        with self._lock:
+            stats = self.metrics[page]
+            stats[field] += 1
+            if wait_ms is not None:
+                stats['wait_ms'] += wait_ms
+                stats['max_wait_ms'] = max(stats['max_wait_ms'], wait_ms)
+
+    def get_connection(self, page="unknown"):
+        """풀에서 연결을 가져옴 (풀이 고갈되면 단발성 연결로 대체)"""
+        start = time.perf_counter()
+        try:
+            conn = _PooledConnection(self.pool.get_connection(), self._checkin)
+            with self._lock:
+                self._checked_out += 1
+            field = 'checkouts'
+        except errors.PoolError:
+            # 모든 연결이 사용 중 - 요청을 실패시키지 않고 일반 연결 생성
+            try:
+                conn = mysql.connector.connect(**self.config)
+            except mysql.connector.Error:
+                self._record(page, 'errors')
+                raise
+            field = 'overflow'
+        except mysql.connector.Error:
+            self._record(page, 'errors')
+            raise
+        self._record(page, field, (time.perf_counter() - start) * 1000)
+        return conn
+
+    def _checkin(self):
+        with self._lock:
+            self._checked_out -= 1
+
+    def in_use(self):
+        """현재 체크아웃된 풀 연결 수 (단발성 연결 제외)"""
+        with self._lock:
+            return self._checked_out
+
+    def health_check(self):
+        """SELECT 1 왕복으로 풀 상태 확인"""
+        start = time.perf_counter()
+        try:
+            conn = self.get_connection(page="health_check")
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            finally:
+                conn.close()
+            return {'ok': True, 'latency_ms': (time.perf_counter() - start) * 1000}
+        except mysql.connector.Error as e:
+            return {'ok': False, 'error': str(e)}
+
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_pool(config_items, pool_size):
+    """프로세스 전역 커넥션 풀 (설정별로 한 번만 생성)"""
+    pool = ConnectionPool(dict(config_items), pool_size)
+    with _registry_lock:
+        _registry.append(pool)
+    return pool
+
+
+def connect(**config):
+    """mysql.connector.connect()와 같은 인자로 풀링된 연결 반환
+
+    각 페이지의 connect_to_db()는 이 함수로 위임합니다.
+    """
+    pool = _get_pool(tuple(sorted(config.items())), DEFAULT_POOL_SIZE)
+    return pool.get_connection(page=_caller_page())
+
+
+def get_pool_stats():
+    """풀별/페이지별 사용량 지표 목록"""
+    rows = []
+    with _registry_lock:
+        pools = list(_registry)
+    for pool in pools:
+        with pool._lock:
+            metrics = {page: dict(stats) for page, stats in pool.metrics.items()}
+        for page, stats in metrics.items():
+            calls = stats['checkouts'] + stats['overflow']
+            rows.append({
+                'pool': pool.pool.pool_name,
+                'database': pool.config.get('database'),
+                'page': page,
+                'pool_size': pool.pool_size,
+                'in_use': pool.in_use(),
+                **stats,
+                'avg_wait_ms': stats['wait_ms'] / calls if calls else 0.0,
+            })
+    return rows
+
+
+def health_check():
+    """모든 풀의 상태 확인 결과"""
+    with _registry_lock:
+        pools = list(_registry)
+    return {pool.pool.pool_name: pool.health_check() for pool in pools}
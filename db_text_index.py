@@ -0,0 +1,470 @@
+import os
+import time
+import pickle
+import threading
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from rag_search_index import tokenize
+from schema_catalogue import TEXT_TYPES
+
+# 인덱스 저장 경로
+DEFAULT_INDEX_PATH = "./db_text_index/index.pkl"
+
+# 증분 갱신 기준 컬럼 (앞에 있을수록 우선)
+WATERMARK_COLUMNS = ('updated_at', 'created_at')
+
+# 테이블당 최대 색인 행 수 (최신 행 우선)
+MAX_ROWS_PER_TABLE = int(os.getenv('DB_TEXT_INDEX_MAX_ROWS', '20000'))
+
+# 증분 갱신으로 수정 여부를 알 수 없는 테이블(created_at/정수 기본키만 있는 경우)의 전체 재색인 주기 (시간)
+# 이런 테이블은 새 행만 바로 반영되고, 기존 행 수정은 최대 이 주기만큼 늦게 반영됩니다
+FULL_REFRESH_HOURS = 24
+
+# refresh() 최소 간격 (초)
+MIN_REFRESH_INTERVAL = 60
+
+FETCH_BATCH_SIZE = 1000
+
+INDEX_VERSION = 1
+
+
+def _row_content(row, text_columns):
+    """행의 텍스트 컬럼을 'col: value' 줄로 결합 (값만 색인)"""
+    lines, values = [], []
+    for col in text_columns:
+        value = row.get(col)
+        if value:
+            lines.append(f"{col}: {value}")
+            values.append(str(value))
+    return "\n".join(lines), " ".join(values)
+
+
+class DBTextIndex:
+    """DB 전체 테이블의 텍스트 행을 하나의 어휘로 색인하는 영구 증분 인덱스
+
+    행마다 (term id, 빈도) 희소 벡터와 텍스트를 보관하고, 질의 시에는 전체 문서 빈도로
+    계산한 TF-IDF 코사인 유사도로 순위를 매깁니다. refresh()는 테이블별 워터마크
+    (updated_at / created_at / 최대 정수 기본키) 이후의 행만 다시 읽습니다.
+
+    updated_at이 없는 테이블은 워터마크로 기존 행 수정을 알 수 없으므로, 수정 내용은
+    FULL_REFRESH_HOURS마다 하는 전체 재색인 때 반영됩니다. 워터마크 컬럼도 정수 기본키도
+    없는 테이블은 새 행도 찾을 수 없으므로 refresh()마다 전체 재색인합니다.
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self.vocab = {}
+        self.doc_freq = np.zeros(0, dtype=np.float32)
+        self.tables = {}
+        self.last_refresh = 0.0
+        self._version = 0
+        self._matrix_cache = {}
+        self._load()
+
+    # ----- 저장/로드 -----
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            return
+        if data.get('version') != INDEX_VERSION:
+            return
+        self.vocab = data['vocab']
+        self.doc_freq = data['doc_freq']
+        self.tables = data['tables']
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp{os.getpid()}"
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'version': INDEX_VERSION,
+                    'vocab': self.vocab,
+                    'doc_freq': self.doc_freq,
+                    'tables': self.tables
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.index_path)
+
+    # ----- 행 단위 갱신 -----
+    def _vectorize(self, text):
+        """(term id 배열, 빈도 배열) - 새 어휘는 추가"""
+        counts = Counter(tokenize(text))
+        ids, tfs = [], []
+        for term, tf in counts.items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self.vocab[term] = len(self.vocab)
+            ids.append(term_id)
+            tfs.append(tf)
+        if len(self.vocab) > len(self.doc_freq):
+            self.doc_freq = np.concatenate([
+                self.doc_freq,
+                np.zeros(len(self.vocab) - len(self.doc_freq), dtype=np.float32)
+            ])
+        return np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32)
+
+    def _remove_row(self, state, key):
+        entry = state['rows'].pop(key, None)
+        if entry is not None:
+            self.doc_freq[entry[0]] -= 1
+
+    def _upsert_row(self, state, key, row):
+        """행 색인 (내용이 바뀌었으면 True)"""
+        content, text = _row_content(row, state['text_columns'])
+        entry = state['rows'].get(key)
+        if entry is not None and entry[2] == content:
+            return False
+        self._remove_row(state, key)
+        if not text.strip():
+            return entry is not None
+        ids, tfs = self._vectorize(text)
+        self.doc_freq[ids] += 1
+        state['rows'][key] = (ids, tfs, content)
+        return True
+
+    # ----- DB 동기화 -----
+    def _describe(self, cursor, catalogue=None):
+        """테이블별 텍스트 컬럼, 단일 기본키, 워터마크 컬럼 (catalogue: schema_catalogue.SchemaCatalogue)"""
+        if catalogue is not None:
+            snapshot = catalogue.snapshot()
+            columns = [col for table in snapshot.values() for col in table['columns']]
+        else:
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_KEY
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            columns = cursor.fetchall()
+
+        schema = {}
+        for row in columns:
+            info = schema.setdefault(row['TABLE_NAME'], {'text_columns': [], 'primary_keys': [], 'columns': []})
+            info['columns'].append(row['COLUMN_NAME'])
+            if row['DATA_TYPE'] in TEXT_TYPES:
+                info['text_columns'].append(row['COLUMN_NAME'])
+            if row['COLUMN_KEY'] == 'PRI':
+                info['primary_keys'].append(row['COLUMN_NAME'])
+
+        result = {}
+        for table, info in schema.items():
+            if not info['text_columns']:
+                continue
+            result[table] = {
+                'text_columns': info['text_columns'],
+                'pk': info['primary_keys'][0] if len(info['primary_keys']) == 1 else None,
+                'watermark_column': next((c for c in WATERMARK_COLUMNS if c in info['columns']), None)
+            }
+        return result
+
+    def _new_state(self, spec):
+        return {
+            'text_columns': spec['text_columns'],
+            'pk': spec['pk'],
+            'watermark_column': spec['watermark_column'],
+            'watermark': None,
+            'max_pk': None,
+            'row_count': 0,
+            'full_refreshed_at': 0.0,
+            'rows': {}
+        }
+
+    def _select_columns(self, state):
+        columns = list(state['text_columns'])
+        for col in (state['pk'], state['watermark_column']):
+            if col and col not in columns:
+                columns.append(col)
+        return ", ".join(f"`{c}`" for c in columns)
+
+    def _ingest(self, cursor, table, state, where="", params=(), seen=None):
+        """조건에 맞는 행을 읽어 색인 (워터마크 갱신, seen에 읽은 행 키 추가)"""
+        order_col = state['watermark_column'] or state['pk']
+        order_sql = f"ORDER BY `{order_col}` DESC" if order_col else ""
+        cursor.execute(
+            f"SELECT {self._select_columns(state)} FROM `{table}` {where} {order_sql} LIMIT {MAX_ROWS_PER_TABLE}",
+            params
+        )
+        changed = 0
+        position = len(state['rows'])
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                break
+            for row in batch:
+                if state['pk']:
+                    key = row[state['pk']]
+                else:
+                    key = position
+                    position += 1
+                if self._upsert_row(state, key, row):
+                    changed += 1
+                if seen is not None:
+                    seen.add(key)
+                wm_col = state['watermark_column']
+                if wm_col and row.get(wm_col) is not None:
+                    if state['watermark'] is None or row[wm_col] > state['watermark']:
+                        state['watermark'] = row[wm_col]
+                if state['pk'] and isinstance(key, int):
+                    state['max_pk'] = key if state['max_pk'] is None else max(state['max_pk'], key)
+        return changed
+
+    def _full_refresh(self, cursor, table, state):
+        """테이블 전체를 다시 읽고, 더 이상 없는 행은 색인에서 제거"""
+        if not state['pk']:
+            # 기본키가 없으면 읽은 순서가 키이므로 기존 행을 모두 비우고 다시 색인
+            for key in list(state['rows']):
+                self._remove_row(state, key)
+        state['watermark'] = None
+        state['max_pk'] = None
+        seen = set()
+        changed = self._ingest(cursor, table, state, seen=seen)
+        for key in [k for k in state['rows'] if k not in seen]:
+            self._remove_row(state, key)
+            changed += 1
+        state['full_refreshed_at'] = time.time()
+        return changed
+
+    def _refresh_table(self, cursor, table, spec):
+        """테이블 하나를 워터마크 이후 변경분만 반영 (필요 시 전체 재색인)"""
+        state = self.tables.get(table)
+        if state is None or state['text_columns'] != spec['text_columns'] or state['pk'] != spec['pk'] \
+                or state['watermark_column'] != spec['watermark_column']:
+            if state is not None:
+                for key in list(state['rows']):
+                    self._remove_row(state, key)
+            state = self.tables[table] = self._new_state(spec)
+
+        cursor.execute(f"SELECT COUNT(*) AS cnt FROM `{table}`")
+        row_count = cursor.fetchone()['cnt']
+
+        # 처음이거나 재색인 주기가 지났으면 전체 재색인 (워터마크로 잡히지 않는 수정/삭제 반영)
+        needs_full = time.time() - state['full_refreshed_at'] > FULL_REFRESH_HOURS * 3600
+        if state['pk'] and not state['watermark_column'] and state['max_pk'] is None:
+            # 정수가 아닌 기본키는 최대값 워터마크로 새 행을 찾을 수 없으므로 매번 전체 재색인
+            needs_full = True
+        if not state['pk']:
+            # 기본키가 없으면 행을 구분할 수 없으므로 행 수가 바뀔 때마다 전체 재색인
+            needs_full = needs_full or row_count != state['row_count']
+            if not needs_full:
+                return 0
+        if needs_full:
+            changed = self._full_refresh(cursor, table, state)
+            state['row_count'] = row_count
+            return changed
+
+        changed = 0
+        if state['watermark_column'] and state['watermark'] is not None:
+            # 같은 시각에 기록된 행을 놓치지 않도록 >= 사용 (내용이 같으면 건너뜀)
+            changed += self._ingest(cursor, table, state, f"WHERE `{state['watermark_column']}` >= %s",
+                                    (state['watermark'],))
+        elif state['max_pk'] is not None:
+            changed += self._ingest(cursor, table, state, f"WHERE `{state['pk']}` > %s", (state['max_pk'],))
+
+        # 행 수가 줄었으면 삭제된 행 반영
+        if row_count < state['row_count'] or row_count < len(state['rows']):
+            cursor.execute(f"SELECT `{state['pk']}` AS pk FROM `{table}`")
+            existing = {row['pk'] for row in cursor.fetchall()}
+            for key in [k for k in state['rows'] if k not in existing]:
+                self._remove_row(state, key)
+                changed += 1
+        state['row_count'] = row_count
+        return changed
+
+    def refresh(self, connect, force=False, catalogue=None):
+        """DB와 동기화 (connect: 인자 없이 MySQL 연결을 반환하는 함수)
+
+        catalogue를 주면 INFORMATION_SCHEMA 대신 공유 스키마 카탈로그에서 컬럼 정보를 읽습니다.
+
+        Returns:
+            dict: 갱신된 테이블별 변경 행 수
+        """
+        with self._lock:
+            if not force and time.time() - self.last_refresh < MIN_REFRESH_INTERVAL:
+                return {}
+            conn = connect()
+            cursor = conn.cursor(dictionary=True)
+            changes = {}
+            try:
+                specs = self._describe(cursor, catalogue)
+                for table in [t for t in self.tables if t not in specs]:
+                    for key in list(self.tables[table]['rows']):
+                        self._remove_row(self.tables[table], key)
+                    del self.tables[table]
+                    changes[table] = -1
+                for table, spec in specs.items():
+                    try:
+                        changed = self._refresh_table(cursor, table, spec)
+                    except Exception as e:
+                        print(f"Error indexing table {table}: {e}")
+                        continue
+                    if changed:
+                        changes[table] = changed
+            finally:
+                cursor.close()
+                conn.close()
+
+            self.last_refresh = time.time()
+            if changes:
+                self._version += 1
+                for table in changes:
+                    self._matrix_cache.pop(table, None)
+                self.save()
+            elif not os.path.exists(self.index_path):
+                self.save()
+            return changes
+
+    # ----- 검색 -----
+    def _idf(self):
+        num_docs = sum(len(state['rows']) for state in self.tables.values())
+        return np.log((1.0 + num_docs) / (1.0 + self.doc_freq)).astype(np.float32) + 1.0
+
+    def _table_matrix(self, table, idf):
+        """(행 키 목록, 행 x 어휘 빈도 CSR, TF-IDF 노름)
+
+        빈도 행렬은 테이블이 바뀔 때까지, 노름은 인덱스 전체가 바뀔 때까지 캐시합니다.
+        """
+        cached = self._matrix_cache.get(table)
+        if cached is None:
+            rows = self.tables[table]['rows']
+            keys = list(rows)
+            indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+            for i, key in enumerate(keys):
+                indptr[i + 1] = indptr[i] + len(rows[key][0])
+            indices = np.concatenate([rows[k][0] for k in keys]) if keys else np.zeros(0, dtype=np.int32)
+            data = np.concatenate([rows[k][1] for k in keys]) if keys else np.zeros(0, dtype=np.float32)
+            matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(keys), len(self.vocab)))
+            cached = self._matrix_cache[table] = {'keys': keys, 'matrix': matrix, 'norms': None, 'version': None}
+
+        if cached['version'] != self._version:
+            weighted = cached['matrix'].multiply(idf[:cached['matrix'].shape[1]]).tocsr()
+            cached['norms'] = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+            cached['version'] = self._version
+        return cached['keys'], cached['matrix'], cached['norms']
+
+    def search(self, query, k=10, tables=None, min_score=0.0, per_table=None):
+        """쿼리와 TF-IDF 코사인 유사도가 높은 행
+
+        Args:
+            tables: 검색할 테이블 목록 (None이면 전체)
+            per_table: 테이블별 최대 결과 수
+
+        Returns:
+            [{'table', 'key', 'score', 'content'}] 점수 내림차순
+        """
+        with self._lock:
+            if not self.vocab:
+                return []
+            counts = Counter(t for t in tokenize(query) if t in self.vocab)
+            if not counts:
+                return []
+            idf = self._idf()
+            q_ids = np.asarray([self.vocab[t] for t in counts], dtype=np.int32)
+            q_weights = np.asarray(list(counts.values()), dtype=np.float32) * idf[q_ids]
+            q_norm = float(np.linalg.norm(q_weights))
+
+            results = []
+            for table in (tables if tables is not None else list(self.tables)):
+                state = self.tables.get(table)
+                if not state or not state['rows']:
+                    continue
+                keys, matrix, norms = self._table_matrix(table, idf)
+                # 이 테이블 행렬이 만들어진 뒤 추가된 어휘는 이 테이블에 없음
+                in_vocab = q_ids < matrix.shape[1]
+                if not in_vocab.any():
+                    continue
+                ids = q_ids[in_vocab]
+                scores = matrix[:, ids] @ (q_weights[in_vocab] * idf[ids])
+                scores = np.asarray(scores).ravel() / np.maximum(norms * q_norm, 1e-9)
+                hits = np.flatnonzero(scores > min_score)
+                limit = per_table or k
+                if len(hits) > limit:
+                    hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+                for i in hits:
+                    results.append({
+                        'table': table,
+                        'key': keys[i],
+                        'score': float(scores[i]),
+                        'content': state['rows'][keys[i]][2]
+                    })
+
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results[:k]
+
+    def primary_key(self, table):
+        state = self.tables.get(table)
+        return state['pk'] if state else None
+
+    def match(self, keyword, tables=None, per_table=None):
+        """키워드가 포함된 행 (LIKE '%keyword%' 대체, 대소문자 무시)
+
+        Returns:
+            [{'table', 'key', 'score', 'content'}] - score는 키워드 출현 횟수, 내림차순
+        """
+        needle = keyword.lower()
+        results = []
+        with self._lock:
+            for table in (tables if tables is not None else list(self.tables)):
+                state = self.tables.get(table)
+                if not state:
+                    continue
+                table_hits = []
+                for key, (_, _, content) in state['rows'].items():
+                    count = content.lower().count(needle)
+                    if count:
+                        table_hits.append({'table': table, 'key': key, 'score': count, 'content': content})
+                if per_table:
+                    # 색인 순서가 아니라 출현 횟수가 많은 행부터 per_table개
+                    table_hits.sort(key=lambda x: x['score'], reverse=True)
+                    table_hits = table_hits[:per_table]
+                results.extend(table_hits)
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    def fetch_rows(self, connect, hits):
+        """검색 결과의 원본 행을 기본키로 조회 (hit['row']에 추가, 기본키가 없는 테이블은 None)"""
+        by_table = {}
+        for hit in hits:
+            hit.setdefault('row', None)
+            if self.primary_key(hit['table']):
+                by_table.setdefault(hit['table'], []).append(hit)
+        if not by_table:
+            return hits
+
+        conn = connect()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for table, table_hits in by_table.items():
+                pk = self.primary_key(table)
+                for start in range(0, len(table_hits), FETCH_BATCH_SIZE):
+                    batch = table_hits[start:start + FETCH_BATCH_SIZE]
+                    placeholders = ", ".join(["%s"] * len(batch))
+                    cursor.execute(f"SELECT * FROM `{table}` WHERE `{pk}` IN ({placeholders})",
+                                   [hit['key'] for hit in batch])
+                    rows = {row[pk]: row for row in cursor.fetchall()}
+                    for hit in batch:
+                        hit['row'] = rows.get(hit['key'])
+        finally:
+            cursor.close()
+            conn.close()
+        return hits
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'tables': len(self.tables),
+                'rows': sum(len(state['rows']) for state in self.tables.values()),
+                'vocabulary': len(self.vocab),
+                'last_refresh': self.last_refresh,
+                'watermarks': {
+                    table: state['watermark_column'] or (f"max({state['pk']})" if state['pk'] else 'full')
+                    for table, state in self.tables.items()
+                }
+            }
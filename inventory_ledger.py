@@ -0,0 +1,429 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import schema_catalogue
+
+# 재고의 원본은 inventory_transactions (추가만 하는 원장, quantity는 부호 있는 변동량)
+# inventory_daily_snapshots는 원장에서 계산한 일별 마감 재고로, 해당 일에 변동이 있던 제품만 저장
+# 특정 시점 재고 = 그 시점 이전 마지막 스냅샷의 마감 재고 + 이후 원장 변동량 합계
+SNAPSHOT_TABLE = "inventory_daily_snapshots"
+
+# 원장 전환(migrate) 완료 기록 - 행이 있어야 원장 합계를 재고로 사용
+MIGRATION_TABLE = "inventory_ledger_migrations"
+
+# 원장 전환을 여러 세션이 동시에 실행하지 않도록 잡는 MySQL 이름 잠금
+_MIGRATION_LOCK_NAME = "inventory_ledger_migration"
+_MIGRATION_LOCK_TIMEOUT = 60
+
+# 원장 변동 유형 ('조정'은 원장 전환 시 기초 재고 보정용)
+CHANGE_TYPES = ('입고', '출고', '폐기', '조정')
+
+# 스냅샷 기록 시 한 번에 INSERT하는 행 수
+SNAPSHOT_BATCH_SIZE = 1000
+
+_schema_ready = set()
+_migrated = set()
+_schema_lock = threading.Lock()
+
+
+def _current_database(cursor):
+    cursor.execute("SELECT DATABASE()")
+    row = cursor.fetchone()
+    return row['DATABASE()'] if isinstance(row, dict) else row[0]
+
+
+def ensure_schema(cursor, force=False):
+    """스냅샷 테이블 생성 (없을 때만, 데이터베이스별로 프로세스당 한 번 확인 - force=True면 항상 확인)"""
+    database = _current_database(cursor)
+    with _schema_lock:
+        if database in _schema_ready and not force:
+            return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+            snapshot_date DATE NOT NULL,
+            product_id INT NOT NULL,
+            stock INT NOT NULL,
+            in_qty INT NOT NULL DEFAULT 0,
+            out_qty INT NOT NULL DEFAULT 0,
+            net_qty INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (snapshot_date, product_id),
+            INDEX idx_snapshot_product_date (product_id, snapshot_date)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+    """)
+    schema_catalogue.invalidate()
+    with _schema_lock:
+        _schema_ready.add(database)
+
+
+def record_change(cursor, product_id, change_type, quantity, reference_number, notes='', destination=''):
+    """원장에 재고 변동 추가 (호출한 쪽의 트랜잭션 안에서 실행, 커밋은 호출한 쪽에서)
+
+    inventory_logistics.stock은 다른 화면 호환을 위해 같은 트랜잭션에서 함께 갱신하지만,
+    재고 조회는 원장과 스냅샷으로 계산합니다. 원장 행의 date는 항상 현재 시각이어야
+    이미 기록된 스냅샷이 바뀌지 않습니다.
+    """
+    cursor.execute("""
+        INSERT INTO inventory_transactions
+        (product_id, change_type, quantity,
+         destination, notes, reference_number, date)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    """, (
+        product_id, change_type, quantity,
+        destination, notes, reference_number
+    ))
+    cursor.execute("""
+        INSERT INTO inventory_logistics
+        (product_id, stock, is_certified)
+        VALUES (%s, %s, TRUE)
+        ON DUPLICATE KEY UPDATE
+        stock = stock + %s
+    """, (product_id, quantity, quantity))
+
+
+def record_changes(cursor, changes, change_type, reference_number, notes='', destination=''):
+    """같은 참조 번호의 여러 재고 변동을 다중 행 INSERT 두 번으로 기록 (record_change의 일괄 버전)
+
+    changes: [{'product_id', 'quantity'}]
+    """
+    if not changes:
+        return
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, NOW())"] * len(changes))
+    cursor.execute(f"""
+        INSERT INTO inventory_transactions
+        (product_id, change_type, quantity,
+         destination, notes, reference_number, date)
+        VALUES {placeholders}
+    """, [
+        value
+        for change in changes
+        for value in (change['product_id'], change_type, change['quantity'], destination, notes, reference_number)
+    ])
+    placeholders = ", ".join(["(%s, %s, TRUE)"] * len(changes))
+    # 같은 제품이 여러 행이면 행 순서대로 누적됨
+    cursor.execute(f"""
+        INSERT INTO inventory_logistics
+        (product_id, stock, is_certified)
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE
+        stock = stock + VALUES(stock)
+    """, [value for change in changes for value in (change['product_id'], change['quantity'])])
+
+
+def _last_snapshot_date(cursor):
+    cursor.execute(f"SELECT MAX(snapshot_date) AS last_date FROM {SNAPSHOT_TABLE}")
+    return cursor.fetchone()['last_date']
+
+
+def _snapshot_stock(cursor, until, product_ids=None):
+    """until 이전(포함) 제품별 마지막 스냅샷의 마감 재고"""
+    query = f"""
+        SELECT s.product_id, s.stock
+        FROM {SNAPSHOT_TABLE} s
+        JOIN (
+            SELECT product_id, MAX(snapshot_date) AS snapshot_date
+            FROM {SNAPSHOT_TABLE}
+            WHERE snapshot_date <= %s
+            GROUP BY product_id
+        ) latest ON s.product_id = latest.product_id AND s.snapshot_date = latest.snapshot_date
+    """
+    params = [until]
+    if product_ids:
+        query += f" WHERE s.product_id IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+    cursor.execute(query, params)
+    return {row['product_id']: int(row['stock']) for row in cursor.fetchall()}
+
+
+def _daily_deltas(cursor, start=None, end=None, product_ids=None):
+    """[start, end) 기간 원장을 일자/제품별로 집계 (start, end는 date, None이면 제한 없음)"""
+    query = """
+        SELECT
+            DATE(date) AS day,
+            product_id,
+            SUM(CASE WHEN change_type = '입고' THEN quantity ELSE 0 END) AS in_qty,
+            SUM(CASE WHEN change_type = '출고' THEN quantity ELSE 0 END) AS out_qty,
+            SUM(quantity) AS net_qty
+        FROM inventory_transactions
+        WHERE 1=1
+    """
+    params = []
+    if start is not None:
+        query += " AND date >= %s"
+        params.append(start)
+    if end is not None:
+        query += " AND date < %s"
+        params.append(end)
+    if product_ids:
+        query += f" AND product_id IN ({', '.join(['%s'] * len(product_ids))})"
+        params.extend(product_ids)
+    query += " GROUP BY DATE(date), product_id ORDER BY day, product_id"
+    cursor.execute(query, params)
+    return [
+        {
+            'day': row['day'],
+            'product_id': row['product_id'],
+            'in_qty': int(row['in_qty'] or 0),
+            'out_qty': int(row['out_qty'] or 0),
+            'net_qty': int(row['net_qty'] or 0)
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+def is_migrated(cursor):
+    """원장 전환이 끝난 데이터베이스인지 (완료되면 데이터베이스별로 프로세스당 한 번만 확인)"""
+    database = _current_database(cursor)
+    with _schema_lock:
+        if database in _migrated:
+            return True
+    cursor.execute("""
+        SELECT COUNT(*) AS table_count
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (MIGRATION_TABLE,))
+    if not cursor.fetchone()['table_count']:
+        return False
+    cursor.execute(f"SELECT COUNT(*) AS run_count FROM {MIGRATION_TABLE}")
+    if not cursor.fetchone()['run_count']:
+        return False
+    with _schema_lock:
+        _migrated.add(database)
+    return True
+
+
+def migration_pending(conn):
+    """원장 전환(migrate)을 아직 실행하지 않았는지 - 화면에서 경고 표시용
+
+    전환 전 원장 합계는 기존 카운터와 다를 수 있으므로 조회 결과가 틀릴 수 있습니다.
+    전환은 조회 경로에서 실행하지 않고 DB 생성 페이지에서 명시적으로 실행합니다.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return not is_migrated(cursor)
+    finally:
+        cursor.close()
+
+
+def refresh_snapshots(conn, until=None):
+    """마지막 스냅샷 다음 날부터 until(기본: 어제)까지의 일별 마감 재고 기록
+
+    이미 기록된 날짜는 다시 계산하지 않으므로, 매일 처음 조회할 때만 하루치 원장을 읽습니다.
+    원장 전환 전에는 보정 전 원장으로 스냅샷을 남기지 않습니다 (조회는 원장에서 직접 계산).
+    반환값은 기록한 (일자, 제품) 행 수입니다.
+    """
+    until = until or date.today() - timedelta(days=1)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        ensure_schema(cursor)
+        if not is_migrated(cursor):
+            return 0
+        last_date = _last_snapshot_date(cursor)
+        if last_date is not None and last_date >= until:
+            return 0
+
+        balances = _snapshot_stock(cursor, last_date) if last_date is not None else {}
+        start = last_date + timedelta(days=1) if last_date is not None else None
+        rows = []
+        for delta in _daily_deltas(cursor, start, until + timedelta(days=1)):
+            stock = balances.get(delta['product_id'], 0) + delta['net_qty']
+            balances[delta['product_id']] = stock
+            rows.append((
+                delta['day'], delta['product_id'], stock,
+                delta['in_qty'], delta['out_qty'], delta['net_qty']
+            ))
+
+        for i in range(0, len(rows), SNAPSHOT_BATCH_SIZE):
+            # 다른 세션이 같은 날짜를 먼저 기록해도 원장에서 계산한 값은 같음
+            cursor.executemany(f"""
+                INSERT INTO {SNAPSHOT_TABLE}
+                (snapshot_date, product_id, stock, in_qty, out_qty, net_qty)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                stock = VALUES(stock), in_qty = VALUES(in_qty),
+                out_qty = VALUES(out_qty), net_qty = VALUES(net_qty)
+            """, rows[i:i + SNAPSHOT_BATCH_SIZE])
+        conn.commit()
+        return len(rows)
+    finally:
+        cursor.close()
+
+
+def stock_levels(conn, product_ids=None, as_of=None):
+    """제품별 재고 {product_id: 재고} (as_of: 해당 시각 직전 재고, None이면 현재)
+
+    원장에 기록이 없는 제품은 결과에 포함되지 않습니다 (재고 0).
+    """
+    refresh_snapshots(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        boundary = _last_snapshot_date(cursor)
+        if as_of is not None:
+            if not isinstance(as_of, datetime):
+                as_of = datetime.combine(as_of, datetime.min.time())
+            if boundary is not None and boundary >= as_of.date():
+                boundary = as_of.date() - timedelta(days=1)
+
+        levels = _snapshot_stock(cursor, boundary, product_ids) if boundary is not None else {}
+        start = boundary + timedelta(days=1) if boundary is not None else None
+        for delta in _daily_deltas(cursor, start, as_of, product_ids):
+            levels[delta['product_id']] = levels.get(delta['product_id'], 0) + delta['net_qty']
+        return levels
+    finally:
+        cursor.close()
+
+
+def daily_movements(conn, start_date, end_date=None):
+    """일자/제품별 입출고량과 마감 재고 (스냅샷 + 아직 스냅샷이 없는 최근 원장)
+
+    반환: [{'date', 'product_id', 'in_qty', 'out_qty', 'net_qty', 'stock'}] (일자 오름차순)
+    """
+    end_date = end_date or date.today()
+    refresh_snapshots(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        boundary = _last_snapshot_date(cursor)
+        movements = []
+        if boundary is not None and boundary >= start_date:
+            cursor.execute(f"""
+                SELECT snapshot_date, product_id, stock, in_qty, out_qty, net_qty
+                FROM {SNAPSHOT_TABLE}
+                WHERE snapshot_date >= %s AND snapshot_date <= %s
+                ORDER BY snapshot_date, product_id
+            """, (start_date, min(boundary, end_date)))
+            movements = [
+                {
+                    'date': row['snapshot_date'],
+                    'product_id': row['product_id'],
+                    'in_qty': row['in_qty'],
+                    'out_qty': row['out_qty'],
+                    'net_qty': row['net_qty'],
+                    'stock': row['stock']
+                }
+                for row in cursor.fetchall()
+            ]
+
+        live_start = max(start_date, boundary + timedelta(days=1)) if boundary is not None else start_date
+        if live_start <= end_date:
+            recent = _daily_deltas(cursor, live_start, end_date + timedelta(days=1))
+            if recent:
+                balances = stock_levels(conn, sorted({d['product_id'] for d in recent}), as_of=live_start)
+                for delta in recent:
+                    stock = balances.get(delta['product_id'], 0) + delta['net_qty']
+                    balances[delta['product_id']] = stock
+                    movements.append({
+                        'date': delta['day'],
+                        'product_id': delta['product_id'],
+                        'in_qty': delta['in_qty'],
+                        'out_qty': delta['out_qty'],
+                        'net_qty': delta['net_qty'],
+                        'stock': stock
+                    })
+        return movements
+    finally:
+        cursor.close()
+
+
+def sync_stock_counters(conn):
+    """inventory_logistics.stock을 원장 기준 재고로 맞춤 (누락된 제품 행도 0으로 추가)
+
+    원장 전환 전에는 보정 전 원장 합계로 카운터를 덮어써 전환에 필요한 차이가 사라지므로
+    실행하지 않습니다. 반환값은 값이 바뀐 제품 수입니다.
+    """
+    if migration_pending(conn):
+        raise RuntimeError("재고 원장 전환 전에는 재고 값을 동기화할 수 없습니다. "
+                           "DB 생성 페이지에서 '물류 재고 원장 전환'을 먼저 실행하세요.")
+    levels = stock_levels(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            INSERT INTO inventory_logistics (product_id, stock, is_certified)
+            SELECT p.product_id, 0, FALSE
+            FROM products_logistics p
+            LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
+            WHERE i.product_id IS NULL
+        """)
+        cursor.execute("SELECT product_id, stock FROM inventory_logistics")
+        updates = [
+            (levels.get(row['product_id'], 0), row['product_id'])
+            for row in cursor.fetchall()
+            if int(row['stock']) != levels.get(row['product_id'], 0)
+        ]
+        if updates:
+            cursor.executemany("UPDATE inventory_logistics SET stock = %s WHERE product_id = %s", updates)
+        conn.commit()
+        return len(updates)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def migrate(conn):
+    """기존 재고 카운터를 원장 기준으로 전환
+
+    1. change_type에 '조정' 추가, inventory_transactions.date 인덱스 추가
+    2. 카운터와 원장 합계가 다른 제품은 차이만큼 '조정' 행을 원장에 추가 (현재 재고 유지)
+    3. 같은 트랜잭션에서 MIGRATION_TABLE에 완료 기록 추가
+    4. 스냅샷 테이블 생성 후 어제까지의 스냅샷 기록
+
+    여러 세션이 동시에 실행하면 차이를 두 번 보정하므로 MySQL 이름 잠금으로 순서대로 실행합니다.
+
+    반환: {'adjusted': 조정 행 수, 'snapshot_rows': 기록한 스냅샷 행 수}
+    """
+    cursor = conn.cursor(dictionary=True)
+    database = _current_database(cursor)
+    cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (_MIGRATION_LOCK_NAME, _MIGRATION_LOCK_TIMEOUT))
+    if not cursor.fetchone()['acquired']:
+        cursor.close()
+        raise RuntimeError("다른 세션에서 재고 원장 전환이 진행 중입니다. 잠시 후 다시 시도하세요.")
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} (
+                migration_id INT AUTO_INCREMENT PRIMARY KEY,
+                adjusted INT NOT NULL DEFAULT 0,
+                migrated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+        """)
+        cursor.execute(f"""
+            ALTER TABLE inventory_transactions
+            MODIFY change_type ENUM({', '.join(f"'{t}'" for t in CHANGE_TYPES)}) NOT NULL
+        """)
+        cursor.execute("SHOW INDEX FROM inventory_transactions WHERE Key_name = 'idx_transactions_date'")
+        if not cursor.fetchall():
+            cursor.execute("ALTER TABLE inventory_transactions ADD INDEX idx_transactions_date (date)")
+        schema_catalogue.invalidate()
+
+        cursor.execute("""
+            SELECT i.product_id, i.stock AS counter_stock, COALESCE(t.ledger_stock, 0) AS ledger_stock
+            FROM inventory_logistics i
+            LEFT JOIN (
+                SELECT product_id, SUM(quantity) AS ledger_stock
+                FROM inventory_transactions
+                GROUP BY product_id
+            ) t ON i.product_id = t.product_id
+        """)
+        adjusted = 0
+        for row in cursor.fetchall():
+            diff = int(row['counter_stock']) - int(row['ledger_stock'])
+            if diff:
+                cursor.execute("""
+                    INSERT INTO inventory_transactions
+                    (product_id, change_type, quantity, reference_number, notes, date)
+                    VALUES (%s, '조정', %s, 'LEDGER_MIGRATION', %s, NOW())
+                """, (row['product_id'], diff, '원장 전환 시 기존 재고 카운터와의 차이 보정'))
+                adjusted += 1
+        cursor.execute(f"INSERT INTO {MIGRATION_TABLE} (adjusted) VALUES (%s)", (adjusted,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s) AS released", (_MIGRATION_LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+
+    with _schema_lock:
+        _migrated.add(database)
+    return {'adjusted': adjusted, 'snapshot_rows': refresh_snapshots(conn)}
@@ -0,0 +1,443 @@
+import time
+import threading
+
+import numpy as np
+from scipy import stats
+
+import schema_catalogue
+
+# 리드타임 팩트: 입고된 CI 항목 하나당 한 행 (PI 발행일 -> CI 도착일)
+# PI/CI가 바뀔 때 해당 CI의 행만 다시 계산하고, 공급업체 x 제품 x 월 집계도 해당 쌍만 갱신
+FACT_TABLE = "lead_time_facts"
+MONTHLY_TABLE = "lead_time_monthly"
+
+# 예측에 사용하는 제품별 최근 주문 수
+FORECAST_RECENT = 20
+
+# 변경분 동기화 최소 간격 (초)
+MIN_SYNC_INTERVAL = 60
+
+# 동기화 시 변경 시각 비교 여유 (DB 시각과 커밋 시점 차이 보정, 다시 계산해도 결과는 같음)
+SYNC_OVERLAP_MINUTES = 10
+
+_lock = threading.Lock()
+_tables_ready = set()
+_last_sync = {}
+_forecast_cache = {}
+
+
+def _database(cursor):
+    cursor.execute("SELECT DATABASE()")
+    row = cursor.fetchone()
+    return row['DATABASE()'] if isinstance(row, dict) else row[0]
+
+
+def ensure_schema(cursor, force=False):
+    """팩트/월별 집계 테이블 생성 (DDL이므로 트랜잭션 밖에서 호출)"""
+    database = _database(cursor)
+    with _lock:
+        if database in _tables_ready and not force:
+            return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FACT_TABLE} (
+            ci_item_id INT PRIMARY KEY,
+            ci_id INT NOT NULL,
+            pi_id INT NOT NULL,
+            pi_item_id INT NOT NULL,
+            pi_number VARCHAR(50) NOT NULL,
+            supplier_id INT NOT NULL,
+            product_id INT NOT NULL,
+            issue_date DATE NOT NULL,
+            issue_month CHAR(7) NOT NULL,
+            expected_delivery_date DATE,
+            expected_production_date DATE,
+            ordered_qty INT,
+            shipping_date DATE,
+            arrival_date DATE NOT NULL,
+            actual_lead_time INT NOT NULL,
+            expected_lead_time INT,
+            delay_days INT,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_ltf_ci (ci_id),
+            INDEX idx_ltf_pi (pi_id),
+            INDEX idx_ltf_issue (issue_date),
+            INDEX idx_ltf_supplier_issue (supplier_id, issue_date),
+            INDEX idx_ltf_pair_issue (supplier_id, product_id, issue_date),
+            INDEX idx_ltf_refreshed (refreshed_at)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MONTHLY_TABLE} (
+            supplier_id INT NOT NULL,
+            product_id INT NOT NULL,
+            month CHAR(7) NOT NULL,
+            order_count INT NOT NULL,
+            sum_lead_time BIGINT NOT NULL,
+            sum_sq_lead_time BIGINT NOT NULL,
+            min_lead_time INT NOT NULL,
+            max_lead_time INT NOT NULL,
+            sum_delay BIGINT,
+            delay_count INT NOT NULL DEFAULT 0,
+            on_time_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (supplier_id, product_id, month),
+            INDEX idx_ltm_month (month)
+        ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+    """)
+    schema_catalogue.invalidate()
+    with _lock:
+        _tables_ready.add(database)
+
+
+def _tables_exist(cursor):
+    """스키마가 준비되었는지 (DDL 없이 확인 - 트랜잭션 안의 갱신 훅에서 사용)"""
+    database = _database(cursor)
+    with _lock:
+        if database in _tables_ready:
+            return True
+    cursor.execute("SHOW TABLES LIKE %s", (FACT_TABLE,))
+    exists = cursor.fetchone() is not None
+    cursor.execute("SHOW TABLES LIKE %s", (MONTHLY_TABLE,))
+    exists = exists and cursor.fetchone() is not None
+    if exists:
+        with _lock:
+            _tables_ready.add(database)
+    return exists
+
+
+def _in_clause(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _fact_pairs(cursor, column, values):
+    cursor.execute(
+        f"SELECT DISTINCT supplier_id, product_id FROM {FACT_TABLE} WHERE {column} IN ({_in_clause(values)})",
+        list(values)
+    )
+    return {
+        (row['supplier_id'], row['product_id']) if isinstance(row, dict) else (row[0], row[1])
+        for row in cursor.fetchall()
+    }
+
+
+def _refresh_monthly(cursor, pairs=None):
+    """공급업체/제품 쌍의 월별 집계 재계산 (pairs=None이면 전체)"""
+    if pairs is not None and not pairs:
+        return
+    where, params = "", []
+    if pairs is not None:
+        pairs = sorted(pairs)
+        where = f"WHERE (supplier_id, product_id) IN ({', '.join(['(%s, %s)'] * len(pairs))})"
+        params = [value for pair in pairs for value in pair]
+    cursor.execute(f"DELETE FROM {MONTHLY_TABLE} {where}", params)
+    cursor.execute(f"""
+        INSERT INTO {MONTHLY_TABLE}
+        (supplier_id, product_id, month, order_count, sum_lead_time, sum_sq_lead_time,
+         min_lead_time, max_lead_time, sum_delay, delay_count, on_time_count)
+        SELECT
+            supplier_id, product_id, issue_month,
+            COUNT(*),
+            SUM(actual_lead_time),
+            SUM(actual_lead_time * actual_lead_time),
+            MIN(actual_lead_time),
+            MAX(actual_lead_time),
+            SUM(delay_days),
+            COUNT(delay_days),
+            SUM(CASE WHEN delay_days <= 0 THEN 1 ELSE 0 END)
+        FROM {FACT_TABLE}
+        {where}
+        GROUP BY supplier_id, product_id, issue_month
+    """, params)
+
+
+def _insert_facts(cursor, where, params):
+    cursor.execute(f"""
+        INSERT INTO {FACT_TABLE}
+        (ci_item_id, ci_id, pi_id, pi_item_id, pi_number, supplier_id, product_id,
+         issue_date, issue_month, expected_delivery_date, expected_production_date, ordered_qty,
+         shipping_date, arrival_date, actual_lead_time, expected_lead_time, delay_days)
+        SELECT
+            ci_items.ci_item_id,
+            ci.ci_id,
+            pi.pi_id,
+            pi_items.pi_item_id,
+            pi.pi_number,
+            pi.supplier_id,
+            pi_items.product_id,
+            pi.issue_date,
+            LEFT(pi.issue_date, 7),
+            pi.expected_delivery_date,
+            pi_items.expected_production_date,
+            pi_items.quantity,
+            ci.shipping_date,
+            ci.arrival_date,
+            DATEDIFF(ci.arrival_date, pi.issue_date),
+            DATEDIFF(pi.expected_delivery_date, pi.issue_date),
+            DATEDIFF(ci.arrival_date, pi.expected_delivery_date)
+        FROM ci_items
+        JOIN commercial_invoices ci ON ci_items.ci_id = ci.ci_id
+        JOIN pi_items ON ci_items.pi_item_id = pi_items.pi_item_id
+        JOIN proforma_invoices pi ON pi_items.pi_id = pi.pi_id
+        WHERE ci.arrival_date IS NOT NULL
+        AND pi.issue_date IS NOT NULL
+        {where}
+    """, params)
+
+
+def refresh_cis(cursor, ci_ids):
+    """CI의 팩트 행과 관련 월별 집계 재계산 (CI 등록/삭제와 같은 트랜잭션에서 호출)
+
+    테이블이 아직 없으면 아무것도 하지 않습니다 (다음 sync()에서 전체 생성).
+    """
+    ci_ids = sorted({ci_id for ci_id in ci_ids if ci_id is not None})
+    if not ci_ids or not _tables_exist(cursor):
+        return
+    pairs = _fact_pairs(cursor, "ci_id", ci_ids)
+    cursor.execute(f"DELETE FROM {FACT_TABLE} WHERE ci_id IN ({_in_clause(ci_ids)})", ci_ids)
+    _insert_facts(cursor, f"AND ci.ci_id IN ({_in_clause(ci_ids)})", ci_ids)
+    pairs |= _fact_pairs(cursor, "ci_id", ci_ids)
+    _refresh_monthly(cursor, pairs)
+
+
+def refresh_pis(cursor, pi_ids):
+    """PI 발행일/납기일 등이 바뀐 경우 해당 PI로 입고된 CI의 팩트 재계산"""
+    pi_ids = sorted({pi_id for pi_id in pi_ids if pi_id is not None})
+    if not pi_ids or not _tables_exist(cursor):
+        return
+    cursor.execute(f"""
+        SELECT DISTINCT ci_items.ci_id
+        FROM ci_items
+        JOIN pi_items ON ci_items.pi_item_id = pi_items.pi_item_id
+        WHERE pi_items.pi_id IN ({_in_clause(pi_ids)})
+    """, pi_ids)
+    ci_ids = [row['ci_id'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+    refresh_cis(cursor, ci_ids)
+
+
+def rebuild(conn):
+    """팩트/월별 집계 전체 재계산"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        ensure_schema(cursor)
+        cursor.execute(f"DELETE FROM {FACT_TABLE}")
+        _insert_facts(cursor, "", [])
+        _refresh_monthly(cursor)
+        conn.commit()
+        cursor.execute(f"SELECT COUNT(*) AS cnt FROM {FACT_TABLE}")
+        return cursor.fetchone()['cnt']
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def sync(conn, force=False):
+    """갱신 훅을 거치지 않은 변경 반영 (MIN_SYNC_INTERVAL마다 한 번)
+
+    팩트가 비어 있으면 전체를 만들고, 아니면 마지막 갱신 이후 수정된 CI/PI/항목의 CI만 다시 계산합니다.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        ensure_schema(cursor)
+        database = _database(cursor)
+        now = time.time()
+        with _lock:
+            if not force and now - _last_sync.get(database, 0) < MIN_SYNC_INTERVAL:
+                return
+            _last_sync[database] = now
+
+        cursor.execute(f"SELECT MAX(refreshed_at) AS watermark FROM {FACT_TABLE}")
+        watermark = cursor.fetchone()['watermark']
+    finally:
+        cursor.close()
+
+    if watermark is None:
+        rebuild(conn)
+        return
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        params = [watermark, SYNC_OVERLAP_MINUTES]
+        since = "DATE_SUB(%s, INTERVAL %s MINUTE)"
+        cursor.execute(f"""
+            SELECT ci_id FROM commercial_invoices
+            WHERE arrival_date IS NOT NULL AND updated_at >= {since}
+            UNION
+            SELECT ci_id FROM ci_items WHERE updated_at >= {since}
+            UNION
+            SELECT ci_items.ci_id
+            FROM ci_items
+            JOIN pi_items ON ci_items.pi_item_id = pi_items.pi_item_id
+            JOIN proforma_invoices pi ON pi_items.pi_id = pi.pi_id
+            WHERE pi.updated_at >= {since} OR pi_items.updated_at >= {since}
+        """, params * 4)
+        ci_ids = [row['ci_id'] for row in cursor.fetchall()]
+        if ci_ids:
+            refresh_cis(cursor, ci_ids)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def get_facts(conn, supplier_id=None, start_date=None, end_date=None):
+    """팩트 행 + 공급업체/제품 이름 (PI 발행일 내림차순)"""
+    sync(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query = f"""
+            SELECT
+                f.pi_id,
+                f.pi_number,
+                f.issue_date,
+                f.expected_delivery_date,
+                s.supplier_name,
+                f.supplier_id,
+                p.model_name,
+                f.product_id,
+                f.ordered_qty,
+                f.expected_production_date,
+                f.shipping_date,
+                f.arrival_date,
+                f.actual_lead_time,
+                f.expected_lead_time,
+                f.delay_days
+            FROM {FACT_TABLE} f
+            JOIN suppliers s ON f.supplier_id = s.supplier_id
+            JOIN products_logistics p ON f.product_id = p.product_id
+            WHERE 1=1
+        """
+        params = []
+        if supplier_id:
+            query += " AND f.supplier_id = %s"
+            params.append(supplier_id)
+        if start_date:
+            query += " AND f.issue_date >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND f.issue_date <= %s"
+            params.append(end_date)
+        query += " ORDER BY f.issue_date DESC"
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def get_monthly(conn, supplier_id=None, since_month=None):
+    """공급업체 x 제품 x 월 집계 (월 내림차순, 평균 리드타임 내림차순)"""
+    sync(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query = f"""
+            SELECT
+                m.month,
+                s.supplier_name,
+                p.model_name,
+                m.sum_lead_time / m.order_count as avg_lead_time,
+                m.order_count,
+                m.sum_delay / NULLIF(m.delay_count, 0) as avg_delay,
+                m.min_lead_time,
+                m.max_lead_time,
+                m.on_time_count
+            FROM {MONTHLY_TABLE} m
+            JOIN suppliers s ON m.supplier_id = s.supplier_id
+            JOIN products_logistics p ON m.product_id = p.product_id
+            WHERE 1=1
+        """
+        params = []
+        if supplier_id:
+            query += " AND m.supplier_id = %s"
+            params.append(supplier_id)
+        if since_month:
+            query += " AND m.month >= %s"
+            params.append(since_month)
+        query += " ORDER BY m.month DESC, avg_lead_time DESC"
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _compute_forecasts(rows, confidence_level, recent):
+    """(supplier_id, product_id, 최근 순번, 리드타임) 행으로 모든 쌍의 예측을 한 번에 계산"""
+    if not rows:
+        return {}
+    pairs = np.array([(row['supplier_id'], row['product_id']) for row in rows], dtype=np.int64)
+    ranks = np.array([row['rn'] - 1 for row in rows], dtype=np.int64)
+    values = np.array([row['actual_lead_time'] for row in rows], dtype=np.float64)
+
+    keys, pair_index = np.unique(pairs, axis=0, return_inverse=True)
+    pair_index = pair_index.reshape(-1)
+    matrix = np.full((len(keys), recent), np.nan)
+    matrix[pair_index, ranks] = values  # 0열이 가장 최근 주문
+
+    counts = np.sum(~np.isnan(matrix), axis=1)
+    mean = np.nanmean(matrix, axis=1)
+    std = np.nanstd(matrix, axis=1)
+    # 평균의 신뢰구간 (기존 predict_lead_time과 같은 정규 근사)
+    z = stats.norm.ppf(0.5 + confidence_level / 2)
+    half_width = z * std / np.sqrt(counts)
+    # 개별 주문의 예측 구간 (경험적 분위수)
+    lower_q, median, upper_q = np.nanquantile(
+        matrix, [0.5 - confidence_level / 2, 0.5, 0.5 + confidence_level / 2], axis=1
+    )
+    minimum = np.nanmin(matrix, axis=1)
+    maximum = np.nanmax(matrix, axis=1)
+
+    forecasts = {}
+    for i, (supplier_id, product_id) in enumerate(keys.tolist()):
+        history = matrix[i, :counts[i]]
+        forecasts[(supplier_id, product_id)] = {
+            'expected_lead_time': round(float(mean[i]), 1),
+            'confidence_interval': (round(float(mean[i] - half_width[i]), 1), round(float(mean[i] + half_width[i]), 1)),
+            'std_deviation': round(float(std[i]), 1),
+            'median_lead_time': round(float(median[i]), 1),
+            'prediction_interval': (round(float(lower_q[i]), 1), round(float(upper_q[i]), 1)),
+            'data_points': int(counts[i]),
+            'min_historical': int(minimum[i]),
+            'max_historical': int(maximum[i]),
+            'recent_trend': [int(v) for v in history[:5]]
+        }
+    return forecasts
+
+
+def get_forecasts(conn, confidence_level=0.8, supplier_id=None, recent=FORECAST_RECENT):
+    """공급업체/제품 쌍별 리드타임 예측 {(supplier_id, product_id): 예측 dict}
+
+    쌍마다 최근 recent건을 한 번의 쿼리로 읽어 벡터 연산으로 계산하고,
+    팩트가 바뀌지 않았으면 이전 결과를 재사용합니다.
+    """
+    sync(conn)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT COUNT(*) AS cnt, MAX(refreshed_at) AS refreshed FROM {FACT_TABLE}")
+        version = tuple(cursor.fetchone().values())
+        cache_key = (_database(cursor), supplier_id, round(confidence_level, 4), recent)
+        with _lock:
+            cached = _forecast_cache.get(cache_key)
+            if cached and cached[0] == version:
+                return cached[1]
+
+        query = f"""
+            SELECT supplier_id, product_id, actual_lead_time, rn
+            FROM (
+                SELECT supplier_id, product_id, actual_lead_time,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY supplier_id, product_id
+                           ORDER BY issue_date DESC, ci_item_id DESC
+                       ) AS rn
+                FROM {FACT_TABLE}
+                {"WHERE supplier_id = %s" if supplier_id else ""}
+            ) ranked
+            WHERE rn <= %s
+        """
+        cursor.execute(query, ([supplier_id] if supplier_id else []) + [recent])
+        forecasts = _compute_forecasts(cursor.fetchall(), confidence_level, recent)
+        with _lock:
+            _forecast_cache[cache_key] = (version, forecasts)
+        return forecasts
+    finally:
+        cursor.close()
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import functools
+import inspect
+
+# LLM 응답 캐시 SQLite 파일 경로
+DEFAULT_DB_PATH = "./llm_cache.db"
+
+# 캐시 유효 기간 (시간)
+DEFAULT_TTL_HOURS = float(os.getenv('LLM_CACHE_TTL_HOURS', '168'))
+
+# 캐시 최대 크기 (MB) - 넘으면 오래 사용하지 않은 항목부터 삭제
+DEFAULT_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '200'))
+
+# 정리 후 목표 크기 비율 (매번 정리하지 않도록 여유를 둠)
+EVICT_TARGET_RATIO = 0.9
+
+# 키 계산에서 제외하는 인자 (응답 내용과 무관)
+_KEY_IGNORED_ARGS = {'prompt', 'model_name', 'system_prompt', 'placeholder'}
+
+
+def make_key(model_name, system_prompt, prompt, temperature=None, **options):
+    """모델/시스템 프롬프트/프롬프트/온도/기타 옵션으로 캐시 키 생성"""
+    payload = json.dumps({
+        'model': model_name,
+        'system': system_prompt or "",
+        'prompt': prompt,
+        'temperature': temperature,
+        'options': options
+    }, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """내용 주소 기반 LLM 응답 캐시 (SQLite)
+
+    같은 모델, 시스템 프롬프트, 프롬프트, 온도 조합의 응답을 재사용합니다.
+    유효 기간이 지난 항목은 조회 시 무시되고, 전체 크기가 한도를 넘으면
+    마지막 사용 시각이 오래된 항목부터 삭제합니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_hours=DEFAULT_TTL_HOURS, max_mb=DEFAULT_MAX_MB):
+        self.db_path = db_path
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses (last_access)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.saved_bytes = 0
+
+    def get(self, key):
+        """캐시된 응답 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_responses SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_bytes += row[1]
+        return json.loads(row[0])
+
+    def set(self, key, model_name, response):
+        """응답 저장 (JSON 직렬화 가능한 값만)"""
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(cache_key, model, response, size, created_at, last_access, hit_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model_name, data, len(data.encode('utf-8')), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """만료 항목 삭제 후 크기 한도를 넘으면 LRU 순으로 삭제"""
+        self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        removed = []
+        for key, size in self._conn.execute(
+                "SELECT cache_key, size FROM llm_responses ORDER BY last_access"):
+            if total <= target:
+                break
+            removed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_responses WHERE cache_key = ?", removed)
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def get_stats(self):
+        """캐시 크기 및 적중률"""
+        with self._lock:
+            entries, total, stored_hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hit_count), 0) FROM llm_responses"
+            ).fetchone()
+            by_model = self._conn.execute(
+                "SELECT model, COUNT(*), SUM(hit_count) FROM llm_responses GROUP BY model ORDER BY COUNT(*) DESC"
+            ).fetchall()
+        requests = self.hits + self.misses
+        return {
+            'entries': entries,
+            'size_bytes': total,
+            'max_bytes': self.max_bytes,
+            'ttl_hours': self.ttl / 3600,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'saved_bytes': self.saved_bytes,
+            'total_hits': stored_hits,
+            'by_model': [
+                {'model': model, 'entries': count, 'hits': hits or 0}
+                for model, count, hits in by_model
+            ]
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 전역 캐시 인스턴스"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
+
+
+def is_cacheable(response, error_prefixes=()):
+    """정상 응답인지 확인 (오류 응답은 캐시하지 않음)"""
+    if response is None:
+        return False
+    if isinstance(response, dict):
+        if response.get('success') is False or response.get('error'):
+            return False
+        content = response.get('content')
+    else:
+        content = response
+    if not isinstance(content, str) or not content.strip():
+        return False
+    return not content.startswith(tuple(error_prefixes))
+
+
+def cached(temperature=None, error_prefixes=()):
+    """get_ai_response(prompt, model_name, system_prompt, ...) 함수에 응답 캐시 적용
+
+    prompt, model_name, system_prompt 외의 인자(enable_thinking 등)도 키에 포함됩니다.
+    use_cache=False 키워드 인자로 호출하면 캐시를 건너뛰고 새 응답으로 갱신합니다.
+    환경 변수 LLM_CACHE_DISABLED=1 이면 캐시를 사용하지 않습니다.
+
+    Args:
+        temperature: 함수 내부에서 사용하는 온도 (키에 포함)
+        error_prefixes: 이 문자열로 시작하는 응답은 오류로 보고 저장하지 않음
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, use_cache=True, **kwargs):
+            if os.getenv('LLM_CACHE_DISABLED') == '1':
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            options = {k: v for k, v in arguments.items() if k not in _KEY_IGNORED_ARGS}
+            key = make_key(
+                arguments.get('model_name'),
+                arguments.get('system_prompt'),
+                arguments.get('prompt'),
+                temperature,
+                **options
+            )
+
+            cache = get_cache()
+            if use_cache:
+                response = cache.get(key)
+                if response is not None:
+                    # 스트리밍 표시 대상이 있으면 캐시된 응답을 바로 표시
+                    placeholder = arguments.get('placeholder')
+                    if placeholder is not None:
+                        placeholder.markdown(response['content'] if isinstance(response, dict) else response)
+                    return response
+
+            response = func(*args, **kwargs)
+            if is_cacheable(response, error_prefixes):
+                try:
+                    cache.set(key, arguments.get('model_name') or "", response)
+                except (TypeError, ValueError, sqlite3.Error):
+                    # 직렬화할 수 없는 응답이나 DB 오류는 캐시 없이 진행
+                    pass
+            return response
+
+        return wrapper
+    return decorator
+
+
+def get_stats():
+    """전역 캐시 통계"""
+    return get_cache().get_stats()
@@ -0,0 +1,324 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+
+# 최근 호출 지표 보관 수
+METRICS_HISTORY = 500
+
+# 스트리밍 중 placeholder 갱신 최소 간격 (초) - 너무 잦은 갱신은 화면 렌더링 부담
+STREAM_UPDATE_INTERVAL = 0.05
+
+# 요청 타임아웃 (초)
+REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '600'))
+
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+# get_ai_response()에서 extended thinking을 사용하는 Claude 모델
+THINKING_MODELS = ('claude-3-7-sonnet-latest', 'claude-3-5-sonnet-latest')
+
+# get_ai_response() 오류 응답 content의 접두어
+ERROR_PREFIX = "오류가 발생했습니다:"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+_metrics = deque(maxlen=METRICS_HISTORY)
+_metrics_lock = threading.Lock()
+
+
+def get_provider(model_name):
+    """모델 이름으로 제공자 판단"""
+    if model_name.startswith('claude'):
+        return 'anthropic'
+    if model_name.startswith('sonar') or model_name.startswith('llama-'):
+        return 'perplexity'
+    return 'openai'
+
+
+def _api_key(provider):
+    env_name = {
+        'openai': 'OPENAI_API_KEY',
+        'anthropic': 'ANTHROPIC_API_KEY',
+        'perplexity': 'PERPLEXITY_API_KEY',
+    }[provider]
+    key = os.getenv(env_name)
+    if not key or key.strip() == '' or key == 'NA':
+        raise ValueError(f"{env_name}가 설정되지 않았습니다.")
+    return key
+
+
+def get_client(provider):
+    """제공자별 장기 실행 클라이언트 (HTTP 연결 풀을 호출 간에 재사용)
+
+    API 키가 바뀌면 새 클라이언트를 만듭니다. 클라이언트는 스레드 간에 공유해도 안전합니다.
+    """
+    key = _api_key(provider)
+    with _clients_lock:
+        client = _clients.get((provider, key))
+        if client is None:
+            if provider == 'anthropic':
+                import anthropic
+                client = anthropic.Anthropic(api_key=key, timeout=REQUEST_TIMEOUT)
+            else:
+                from openai import OpenAI
+                client = OpenAI(
+                    api_key=key,
+                    base_url=PERPLEXITY_BASE_URL if provider == 'perplexity' else None,
+                    timeout=REQUEST_TIMEOUT
+                )
+            _clients[(provider, key)] = client
+        return client
+
+
+def _caller_page():
+    """이 모듈 밖에서 호출한 페이지 파일 이름 (페이지별 지표 집계용)"""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return os.path.basename(frame.f_globals.get('__file__', 'unknown'))
+
+
+def _record(metric):
+    with _metrics_lock:
+        _metrics.append(metric)
+
+
+def _is_reasoning_openai_model(model_name):
+    return model_name.startswith('o1') or model_name.startswith('o3')
+
+
+def _chat_openai(provider, model_name, system_prompt, prompt, temperature, max_tokens, on_delta, metric):
+    client = get_client(provider)
+    if _is_reasoning_openai_model(model_name):
+        # o1 계열은 system 메시지/temperature를 지원하지 않음
+        kwargs = {
+            'messages': [{"role": "user", "content": f"{system_prompt}\n\n{prompt}" if system_prompt else prompt}],
+            'max_completion_tokens': max_tokens
+        }
+    else:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        kwargs = {'messages': messages, 'max_tokens': max_tokens, 'temperature': temperature}
+
+    if on_delta is None:
+        response = client.chat.completions.create(model=model_name, **kwargs)
+        if response.usage:
+            metric['input_tokens'] = response.usage.prompt_tokens
+            metric['output_tokens'] = response.usage.completion_tokens
+        return response.choices[0].message.content or "", ""
+
+    if provider == 'openai':
+        kwargs['stream_options'] = {"include_usage": True}
+    parts = []
+    for chunk in client.chat.completions.create(model=model_name, stream=True, **kwargs):
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            on_delta(chunk.choices[0].delta.content, "")
+        if getattr(chunk, 'usage', None):
+            metric['input_tokens'] = chunk.usage.prompt_tokens
+            metric['output_tokens'] = chunk.usage.completion_tokens
+    return "".join(parts), ""
+
+
+def _chat_anthropic(model_name, system_prompt, prompt, temperature, max_tokens, thinking_budget, on_delta, metric):
+    client = get_client('anthropic')
+    kwargs = {
+        'model': model_name,
+        'max_tokens': max_tokens,
+        'messages': [{"role": "user", "content": prompt}]
+    }
+    if system_prompt:
+        kwargs['system'] = system_prompt
+    if thinking_budget:
+        # extended thinking 사용 시 temperature는 지정할 수 없음
+        kwargs['thinking'] = {"type": "enabled", "budget_tokens": thinking_budget}
+    else:
+        kwargs['temperature'] = temperature
+
+    if on_delta is None:
+        response = client.messages.create(**kwargs)
+        blocks = response.content
+    else:
+        with client.messages.stream(**kwargs) as stream:
+            for event in stream:
+                if event.type != 'content_block_delta':
+                    continue
+                if event.delta.type == 'text_delta':
+                    on_delta(event.delta.text, "")
+                elif event.delta.type == 'thinking_delta':
+                    on_delta("", event.delta.thinking)
+            response = stream.get_final_message()
+            blocks = response.content
+
+    metric['input_tokens'] = response.usage.input_tokens
+    metric['output_tokens'] = response.usage.output_tokens
+    text, thinking = "", ""
+    for block in blocks:
+        if block.type == 'text':
+            text += block.text
+        elif block.type == 'thinking':
+            thinking += block.thinking
+        elif block.type == 'redacted_thinking':
+            thinking += "\n[일부 사고 과정이 보안상 암호화되었습니다]"
+    return text, thinking
+
+
+def chat(prompt, model_name, system_prompt="", temperature=0.7, max_tokens=8192,
+         thinking_budget=None, placeholder=None, on_delta=None):
+    """LLM 호출 (placeholder를 주면 토큰 단위로 스트리밍 표시)
+
+    Args:
+        placeholder: st.empty() 등 - 생성 중인 응답을 실시간으로 표시
+        on_delta: (텍스트 조각, 사고 과정 조각)을 받는 콜백 - 스트리밍 모드로 호출
+        thinking_budget: Claude extended thinking 토큰 예산 (None이면 사용 안 함)
+
+    Returns:
+        dict: content, thinking, model, input_tokens, output_tokens, first_token_ms, total_ms
+
+    Raises:
+        API 오류는 그대로 전달 (각 페이지에서 처리)
+    """
+    provider = get_provider(model_name)
+    metric = {
+        'page': _caller_page(),
+        'provider': provider,
+        'model': model_name,
+        'streamed': placeholder is not None or on_delta is not None,
+        'input_tokens': None,
+        'output_tokens': None,
+        'first_token_ms': None,
+        'total_ms': None,
+        'error': None,
+        'timestamp': time.time()
+    }
+    start = time.perf_counter()
+    state = {'text': "", 'last_update': 0.0}
+
+    def handle_delta(text, thinking):
+        if metric['first_token_ms'] is None:
+            metric['first_token_ms'] = (time.perf_counter() - start) * 1000
+        if on_delta is not None:
+            on_delta(text, thinking)
+        if placeholder is not None and text:
+            state['text'] += text
+            now = time.perf_counter()
+            if now - state['last_update'] >= STREAM_UPDATE_INTERVAL:
+                placeholder.markdown(state['text'] + "▌")
+                state['last_update'] = now
+
+    delta_callback = handle_delta if metric['streamed'] else None
+    try:
+        if provider == 'anthropic':
+            content, thinking = _chat_anthropic(
+                model_name, system_prompt, prompt, temperature, max_tokens,
+                thinking_budget, delta_callback, metric
+            )
+        else:
+            content, thinking = _chat_openai(
+                provider, model_name, system_prompt, prompt, temperature, max_tokens,
+                delta_callback, metric
+            )
+    except Exception as e:
+        metric['error'] = str(e)
+        raise
+    finally:
+        metric['total_ms'] = (time.perf_counter() - start) * 1000
+        if metric['first_token_ms'] is None and metric['error'] is None:
+            metric['first_token_ms'] = metric['total_ms']
+        _record(metric)
+
+    if placeholder is not None:
+        placeholder.markdown(content)
+
+    return {
+        'content': content,
+        'thinking': thinking,
+        'model': model_name,
+        'input_tokens': metric['input_tokens'],
+        'output_tokens': metric['output_tokens'],
+        'first_token_ms': metric['first_token_ms'],
+        'total_ms': metric['total_ms']
+    }
+
+
+def complete(prompt, model_name, system_prompt="", temperature=0.7, max_tokens=8192, placeholder=None):
+    """응답 텍스트만 반환하는 chat()"""
+    return chat(prompt, model_name, system_prompt, temperature, max_tokens, placeholder=placeholder)['content']
+
+
+def get_ai_response(prompt, model_name, system_prompt="", enable_thinking=False, thinking_budget=4000, placeholder=None):
+    """페이지 표시용 응답 {'content', 'thinking', 'has_thinking'} (reasoning 과정 표시 지원)
+
+    enable_thinking이면 지원하는 Claude 모델에서 extended thinking을 사용합니다.
+    오류는 예외 대신 ERROR_PREFIX로 시작하는 content와 'error' 키로 반환합니다
+    (llm_cache.cached의 error_prefixes에 ERROR_PREFIX를 주면 캐시하지 않음).
+    """
+    try:
+        use_thinking = model_name in THINKING_MODELS and enable_thinking
+        response = chat(
+            prompt, model_name, system_prompt,
+            max_tokens=8192,
+            thinking_budget=thinking_budget if use_thinking else None,
+            placeholder=placeholder
+        )
+    except Exception as e:
+        return {
+            "content": f"{ERROR_PREFIX} {str(e)}",
+            "thinking": "",
+            "has_thinking": False,
+            "error": str(e)
+        }
+
+    if use_thinking:
+        return {"content": response['content'], "thinking": response['thinking'], "has_thinking": True}
+    if model_name.startswith('o1'):
+        return {
+            "content": response['content'],
+            "thinking": "🧠 이 모델은 내부적으로 복잡한 reasoning 과정을 거쳐 답변을 생성했습니다.",
+            "has_thinking": True
+        }
+    return {"content": response['content'], "thinking": "", "has_thinking": False}
+
+
+def get_metrics():
+    """최근 호출 지표 목록 (최신순)"""
+    with _metrics_lock:
+        return list(reversed(_metrics))
+
+
+def get_metrics_summary():
+    """모델별 호출 수, 평균 첫 토큰/전체 지연 시간, 토큰 합계"""
+    summary = {}
+    for metric in get_metrics():
+        row = summary.setdefault(metric['model'], {
+            'model': metric['model'],
+            'provider': metric['provider'],
+            'calls': 0,
+            'errors': 0,
+            'first_token_ms': 0.0,
+            'total_ms': 0.0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+        })
+        row['calls'] += 1
+        if metric['error']:
+            row['errors'] += 1
+            continue
+        row['first_token_ms'] += metric['first_token_ms'] or 0.0
+        row['total_ms'] += metric['total_ms'] or 0.0
+        row['input_tokens'] += metric['input_tokens'] or 0
+        row['output_tokens'] += metric['output_tokens'] or 0
+
+    rows = []
+    for row in summary.values():
+        succeeded = row['calls'] - row['errors']
+        row['avg_first_token_ms'] = row.pop('first_token_ms') / succeeded if succeeded else 0.0
+        row['avg_total_ms'] = row.pop('total_ms') / succeeded if succeeded else 0.0
+        rows.append(row)
+    return rows
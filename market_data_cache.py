@@ -0,0 +1,363 @@
+import os
+import time
+import pickle
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# 시세/재무제표 캐시 SQLite 파일 경로
+DEFAULT_DB_PATH = "./market_data_cache.db"
+
+# 마지막 수집 후 이 시간(초) 안에는 같은 종목을 다시 수집하지 않음
+QUOTE_TTL = int(os.getenv('MARKET_QUOTE_TTL', '300'))
+
+# 재무제표 유효 기간 (시간)
+FINANCIALS_TTL_HOURS = float(os.getenv('MARKET_FINANCIALS_TTL_HOURS', '24'))
+
+# 외부 API 요청 한도 - 초당 토큰 수와 최대 버스트 (모든 세션이 공유)
+DEFAULT_RATE = float(os.getenv('MARKET_FETCH_RATE', '0.2'))
+DEFAULT_BURST = int(os.getenv('MARKET_FETCH_BURST', '3'))
+
+# 연속 실패 시 재시도까지 대기 시간 (초)
+FAILURE_BACKOFF = (60, 300, 900)
+
+# yfinance 기간 문자열 → 조회 일수
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366,
+    '2y': 731, '5y': 1827, '10y': 3653, 'ytd': 366, 'max': 36500
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def period_start(period, today=None):
+    """기간 문자열에 해당하는 조회 시작일 (YYYY-MM-DD)"""
+    today = today or datetime.now().date()
+    if period == 'ytd':
+        return today.replace(month=1, day=1).isoformat()
+    days = PERIOD_DAYS.get(period, PERIOD_DAYS['1y'])
+    # 주말/휴일 앞뒤로 한 거래일이 빠지지 않도록 '1d'/'5d'는 여유를 둠
+    if days <= 5:
+        days += 4
+    return (today - timedelta(days=days)).isoformat()
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 - 초당 rate개씩 채워지고 최대 capacity개까지 모임"""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def acquire(self, timeout=None):
+        """토큰 하나를 얻을 때까지 대기 (timeout 초 안에 못 얻으면 False)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class MarketDataStore:
+    """종목별 일봉(OHLCV)과 재무제표를 보관하는 디스크 캐시 (SQLite)
+
+    일봉은 (종목, 날짜) 단위로 저장하므로 새로 수집할 때는 비어 있는
+    날짜 구간만 요청해 덧붙입니다. 프로세스를 다시 시작해도 유지됩니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ohlcv (
+                symbol TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fetch_log (
+                symbol TEXT PRIMARY KEY,
+                source TEXT,
+                requested_from TEXT,
+                first_date TEXT,
+                last_date TEXT,
+                fetched_at REAL,
+                failures INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS financials (
+                symbol TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def coverage(self, symbol):
+        """종목의 저장 범위와 수집 상태"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source, requested_from, first_date, last_date, fetched_at, failures, last_error "
+                "FROM fetch_log WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('source', 'requested_from', 'first_date', 'last_date', 'fetched_at', 'failures', 'last_error')
+        return dict(zip(keys, row))
+
+    def get_history(self, symbol, start=None):
+        """저장된 일봉을 yfinance history()와 같은 형태의 DataFrame으로 반환"""
+        sql = "SELECT date, open, high, low, close, volume FROM ohlcv WHERE symbol = ?"
+        params = [symbol]
+        if start:
+            sql += " AND date >= ?"
+            params.append(start)
+        sql += " ORDER BY date"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if not rows:
+            return None
+        df = pd.DataFrame(rows, columns=['Date'] + OHLCV_COLUMNS)
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df.set_index('Date')
+
+    def append_history(self, symbol, hist, source, requested_from):
+        """수집한 일봉을 저장하고 수집 범위를 갱신 (같은 날짜는 덮어씀)"""
+        rows = []
+        if hist is not None and not hist.empty:
+            index = pd.DatetimeIndex(hist.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            for day, (_, record) in zip(index.strftime('%Y-%m-%d'), hist.iterrows()):
+                rows.append((
+                    symbol, day,
+                    *(None if pd.isna(record.get(col)) else float(record.get(col)) for col in OHLCV_COLUMNS)
+                ))
+        with self._lock:
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ohlcv (symbol, date, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            first_date, last_date = self._conn.execute(
+                "SELECT MIN(date), MAX(date) FROM ohlcv WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            self._conn.execute("""
+                INSERT INTO fetch_log (symbol, source, requested_from, first_date, last_date, fetched_at, failures)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    source = excluded.source,
+                    requested_from = MIN(COALESCE(fetch_log.requested_from, excluded.requested_from),
+                                         excluded.requested_from),
+                    first_date = excluded.first_date,
+                    last_date = excluded.last_date,
+                    fetched_at = excluded.fetched_at,
+                    failures = 0,
+                    last_error = NULL
+            """, (symbol, source, requested_from, first_date, last_date, time.time()))
+            self._conn.commit()
+        return len(rows)
+
+    def record_failure(self, symbol, error):
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO fetch_log (symbol, fetched_at, failures, last_error)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(symbol) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    failures = fetch_log.failures + 1,
+                    last_error = excluded.last_error
+            """, (symbol, time.time(), str(error)[:500]))
+            self._conn.commit()
+
+    def get_financials(self, symbol, ttl_hours=FINANCIALS_TTL_HOURS):
+        """유효 기간 안의 재무제표 {이름: DataFrame} (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM financials WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > ttl_hours * 3600:
+            return None
+        # 인덱스/컬럼 타입(연도 문자열, Timestamp)을 그대로 보존하려고 pickle로 저장
+        return pickle.loads(row[0])
+
+    def put_financials(self, symbol, frames):
+        payload = pickle.dumps({
+            name: None if df is None or df.empty else df
+            for name, df in frames.items()
+        })
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO financials (symbol, payload, fetched_at) VALUES (?, ?, ?)",
+                (symbol, payload, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ohlcv")
+            self._conn.execute("DELETE FROM fetch_log")
+            self._conn.execute("DELETE FROM financials")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            symbols, rows = self._conn.execute(
+                "SELECT COUNT(DISTINCT symbol), COUNT(*) FROM ohlcv"
+            ).fetchone()
+            financials = self._conn.execute("SELECT COUNT(*) FROM financials").fetchone()[0]
+        return {'symbols': symbols, 'rows': rows, 'financials': financials}
+
+
+def yahoo_history(symbol, start, end):
+    """Yahoo Finance 일봉 수집 [start, end)"""
+    import yfinance as yf
+    return yf.Ticker(symbol).history(start=start, end=end)
+
+
+class BackgroundFetcher:
+    """공유 토큰 버킷으로 요청 속도를 제한하며 일봉을 수집하는 백그라운드 작업자
+
+    같은 종목 요청은 하나로 합치고, 저장된 범위 밖의 날짜(앞쪽 과거 구간과
+    마지막 저장일 이후)만 요청합니다. 화면 스레드는 기다리지 않습니다.
+    """
+
+    def __init__(self, store, fetch_history=yahoo_history, bucket=None, source='yahoo'):
+        self.store = store
+        self.fetch_history = fetch_history
+        self.bucket = bucket or TokenBucket()
+        self.source = source
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='market-data-fetcher', daemon=True)
+            self._worker.start()
+
+    def needs_fetch(self, symbol, start):
+        """수집이 필요한지 판단 (최근에 수집했거나 실패 후 대기 중이면 False)"""
+        coverage = self.store.coverage(symbol)
+        if coverage is None:
+            return True
+        age = time.time() - (coverage['fetched_at'] or 0)
+        if coverage['failures']:
+            backoff = FAILURE_BACKOFF[min(coverage['failures'], len(FAILURE_BACKOFF)) - 1]
+            return age >= backoff
+        if coverage['requested_from'] is None or coverage['requested_from'] > start:
+            return True
+        return age >= QUOTE_TTL
+
+    def request(self, symbol, period='1y'):
+        """종목 수집을 예약하고 대기 이벤트를 반환 (수집이 필요 없으면 None)"""
+        start = period_start(period)
+        with self._lock:
+            job = self._pending.get(symbol)
+            if job is not None:
+                job['start'] = min(job['start'], start)
+                return job['done']
+            if not self.needs_fetch(symbol, start):
+                return None
+            job = {'start': start, 'done': threading.Event()}
+            self._pending[symbol] = job
+            self._ensure_worker()
+        self._queue.put(symbol)
+        return job['done']
+
+    def is_pending(self, symbol):
+        with self._lock:
+            return symbol in self._pending
+
+    def _missing_ranges(self, symbol, start):
+        """저장된 범위 밖의 [시작, 끝) 구간 목록"""
+        tomorrow = (datetime.now().date() + timedelta(days=1)).isoformat()
+        coverage = self.store.coverage(symbol)
+        if coverage is None or coverage['last_date'] is None:
+            return [(start, tomorrow)]
+        ranges = []
+        requested_from = coverage['requested_from'] or coverage['first_date']
+        if start < requested_from:
+            ranges.append((start, requested_from))
+        # 마지막 저장일은 장중 값일 수 있으므로 다시 받음
+        ranges.append((coverage['last_date'], tomorrow))
+        return ranges
+
+    def _run(self):
+        while True:
+            symbol = self._queue.get()
+            with self._lock:
+                job = self._pending.get(symbol)
+                start = job['start'] if job else None
+            try:
+                if start is not None:
+                    for range_start, range_end in self._missing_ranges(symbol, start):
+                        self.bucket.acquire()
+                        hist = self.fetch_history(symbol, range_start, range_end)
+                        self.store.append_history(symbol, hist, self.source, min(start, range_start))
+            except Exception as e:
+                self.store.record_failure(symbol, e)
+            finally:
+                with self._lock:
+                    job = self._pending.pop(symbol, None)
+                if job is not None:
+                    job['done'].set()
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {'pending': pending, 'tokens': round(self.bucket.available(), 2)}
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    """프로세스 전역 수집기 (모든 세션이 같은 저장소와 토큰 버킷을 공유)"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = BackgroundFetcher(MarketDataStore())
+        return _fetcher
+
+
+def get_store():
+    return get_fetcher().store
@@ -3,7 +3,7 @@ import pandas as pd
 import os
 import re
 from datetime import datetime
-import mysql.connector
+import db_pool
 from dotenv import load_dotenv
 from openai import OpenAI
 import anthropic
@@ -77,7 +77,7 @@ if selected_model != st.session_state.selected_model:
 
 # DB 연결 함수
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,5 +1,5 @@
 import streamlit as st
-import mysql.connector
+import db_pool
 from mysql.connector import Error
 import os
 from dotenv import load_dotenv
@@ -25,7 +25,7 @@ st.title("🎵 독서 경영-이야기 재생 전용")
 # DB 연결 함수
 def connect_to_db():
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
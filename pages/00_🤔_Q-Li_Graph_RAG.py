@@ -53,13 +53,19 @@ except ImportError:
     DOCX_AVAILABLE = False
 
 # langchain 및 FAISS 관련
+import faiss
 from langchain.vectorstores import FAISS
+from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.document_loaders import (
     PyPDFLoader, UnstructuredPowerPointLoader, UnstructuredExcelLoader, 
     UnstructuredWordDocumentLoader, UnstructuredMarkdownLoader, UnstructuredFileLoader
 )
 from langchain.schema import Document as LangchainDocument
+from rag_index_store import RAGIndexStore
+from rag_search_index import BM25Index, EntityIndex
+import llm_cache
+import llm_service
 
 # 페이지 설정
 st.set_page_config(
@@ -525,6 +531,9 @@ class FileRAGSystem:
         self.vectorstore = None
         self.docs = []
         self.is_loaded = False
+        self.index_store = None
+        self.keyword_index = None
+        self.entity_index = None
         self.embeddings = self._setup_embeddings()
         self.load_files_and_build_index()
 
@@ -572,19 +581,10 @@ class FileRAGSystem:
         self.current_folder_path = folder_path
         self.load_files_and_build_index()
 
-    def load_files_and_build_index(self):
-        """폴더 내 모든 지원 파일을 읽어 벡터 인덱스 구축 (개선된 청킹)"""
-        loaders = [
-            ("*.pdf", None),  # PDF는 별도 처리
-            ("*.pptx", UnstructuredPowerPointLoader),
-            ("*.xlsx", None),  # Excel은 별도 처리
-            ("*.docx", UnstructuredWordDocumentLoader),
-            ("*.md", UnstructuredMarkdownLoader),
-            ("*.gdoc", UnstructuredFileLoader),  # Google Docs (HTML 형식)
-            ("*.gsheet", UnstructuredFileLoader), # Google Sheets (HTML 형식)
-            ("*.gslides", UnstructuredFileLoader), # Google Slides (HTML 형식)
-        ]
-        all_docs = []
+    def _collect_files(self):
+        """현재 검색 폴더에서 인덱싱 대상 파일 목록 수집"""
+        patterns = ["*.pdf", "*.pptx", "*.xlsx", "*.docx", "*.md", "*.gdoc", "*.gsheet", "*.gslides"]
+        file_paths = []
         
         # 전체 검색인 경우 finance 폴더 제외
         if self.current_folder_path == "./pages/rag_files":
@@ -594,78 +594,116 @@ class FileRAGSystem:
                 if "finance" in dirs:
                     dirs.remove("finance")
                 
-                for pattern, loader_cls in loaders:
-                    for file in glob.glob(os.path.join(root, pattern)):
-                        try:
-                            if pattern == "*.xlsx":
-                                # Excel 파일은 모든 시트를 별도로 처리
-                                excel_docs = self._load_excel_with_all_sheets(file)
-                                if excel_docs:
-                                    all_docs.extend(excel_docs)
-                                    # st.success(f"Excel 파일 로드 성공: {file} ({len(excel_docs)}개 문서)")
-                            elif pattern == "*.pdf":
-                                # PDF 파일은 개선된 로더로 처리
-                                pdf_docs = self._load_pdf_with_improved_parser(file)
-                                if pdf_docs:
-                                    all_docs.extend(pdf_docs)
-                                    # st.success(f"PDF 파일 로드 성공: {file} ({len(pdf_docs)}개 문서)")
-                            elif loader_cls:
-                                loader = loader_cls(file)
-                                docs = loader.load()
-                                if docs:
-                                    all_docs.extend(docs)
-                                    # st.success(f"파일 로드 성공: {file} ({len(docs)}개 문서)")
-                        except Exception as e:
-                            st.warning(f"{file} 로딩 실패: {e}")
-                            continue
+                for pattern in patterns:
+                    file_paths.extend(glob.glob(os.path.join(root, pattern)))
         else:
             # 특정 폴더만 검색
-            for pattern, loader_cls in loaders:
-                for file in glob.glob(os.path.join(self.current_folder_path, pattern)):
-                    try:
-                        if pattern == "*.xlsx":
-                            # Excel 파일은 모든 시트를 별도로 처리
-                            excel_docs = self._load_excel_with_all_sheets(file)
-                            if excel_docs:
-                                all_docs.extend(excel_docs)
-                                # st.success(f"Excel 파일 로드 성공: {file} ({len(excel_docs)}개 문서)")
-                        elif pattern == "*.pdf":
-                            # PDF 파일은 개선된 로더로 처리
-                            pdf_docs = self._load_pdf_with_improved_parser(file)
-                            if pdf_docs:
-                                all_docs.extend(pdf_docs)
-                                # st.success(f"PDF 파일 로드 성공: {file} ({len(pdf_docs)}개 문서)")
-                        elif loader_cls:
-                            loader = loader_cls(file)
-                            docs = loader.load()
-                            if docs:
-                                all_docs.extend(docs)
-                                # st.success(f"파일 로드 성공: {file} ({len(docs)}개 문서)")
-                    except Exception as e:
-                        st.warning(f"{file} 로딩 실패: {e}")
-                        continue
+            for pattern in patterns:
+                file_paths.extend(glob.glob(os.path.join(self.current_folder_path, pattern)))
+        
+        return file_paths
+
+    def _load_file(self, file):
+        """단일 파일을 로드하고 청킹하여 문서 목록 반환"""
+        loaders = {
+            ".pptx": UnstructuredPowerPointLoader,
+            ".docx": UnstructuredWordDocumentLoader,
+            ".md": UnstructuredMarkdownLoader,
+            ".gdoc": UnstructuredFileLoader,  # Google Docs (HTML 형식)
+            ".gsheet": UnstructuredFileLoader, # Google Sheets (HTML 형식)
+            ".gslides": UnstructuredFileLoader, # Google Slides (HTML 형식)
+        }
+        ext = os.path.splitext(file)[1].lower()
+        
+        if ext == ".xlsx":
+            # Excel 파일은 모든 시트를 별도로 처리
+            docs = self._load_excel_with_all_sheets(file)
+        elif ext == ".pdf":
+            # PDF 파일은 개선된 로더로 처리
+            docs = self._load_pdf_with_improved_parser(file)
+        elif ext in loaders:
+            docs = loaders[ext](file).load()
+        else:
+            docs = []
+        
+        # 개선된 청킹 적용
+        return self._improved_chunking(docs) if docs else []
+
+    def load_files_and_build_index(self):
+        """폴더 내 지원 파일을 증분 인덱싱하여 벡터 인덱스 구축
+
+        변경되지 않은 파일은 디스크에 저장된 청크/벡터를 재사용하고,
+        새로 추가되거나 수정된 파일만 파싱 및 임베딩합니다.
+        """
+        if self.index_store is None:
+            self.index_store = RAGIndexStore(embedding_model=getattr(self.embeddings, 'model', ''))
+        
+        file_paths = self._collect_files()
+        
+        try:
+            sync_stats = self.index_store.sync(
+                file_paths,
+                load_func=self._load_file,
+                embed_func=self.embeddings.embed_documents
+            )
+        except Exception as e:
+            st.error(f"인덱스 저장소 동기화 실패: {e}")
+            self.is_loaded = False
+            return
+        
+        for file, error in sync_stats['failed']:
+            st.warning(f"{file} 로딩 실패: {error}")
+        
+        texts, metadatas, vectors = self.index_store.load(file_paths)
         
         # 문서가 로드되었는지 확인
-        if not all_docs:
+        if not texts:
             st.warning("로드된 문서가 없습니다.")
+            self.docs = []
+            self.vectorstore = None
+            self.keyword_index = None
+            self.entity_index = None
             self.is_loaded = False
             return
         
-        # 개선된 청킹 적용
-        all_docs = self._improved_chunking(all_docs)
+        self.docs = [
+            LangchainDocument(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
         
-        self.docs = all_docs
-        if all_docs:
-            # FAISS 벡터스토어 생성
-            try:
-                self.vectorstore = FAISS.from_documents(all_docs, self.embeddings)
-                self.is_loaded = True
-                st.success(f"RAG 시스템 초기화 완료: {len(all_docs)}개 문서 로드됨")
-            except Exception as e:
-                st.error(f"FAISS 벡터스토어 생성 실패: {e}")
-                self.is_loaded = False
-        else:
-            self.vectorstore = None
+        # 키워드 검색용 역색인 (청크 구성이 같으면 저장된 인덱스 재사용)
+        signature = self.index_store.signature(file_paths)
+        scope = hashlib.md5(self.current_folder_path.encode('utf-8')).hexdigest()[:12]
+        self.keyword_index = self.index_store.load_artifact(f"bm25_{scope}", signature)
+        if self.keyword_index is None:
+            self.keyword_index = BM25Index.build(texts)
+            self.index_store.save_artifact(f"bm25_{scope}", signature, self.keyword_index)
+        
+        # Graph RAG용 개체-문서 인덱스
+        self.entity_index = self.index_store.load_artifact(f"entity_{scope}", signature)
+        if self.entity_index is None:
+            self.entity_index = EntityIndex.build(texts)
+            self.index_store.save_artifact(f"entity_{scope}", signature, self.entity_index)
+        
+        # 저장된 벡터 배열을 그대로 FAISS 인덱스에 추가 (임베딩 API 재호출, 파이썬 리스트 변환 없음)
+        try:
+            index = faiss.IndexFlatL2(vectors.shape[1])
+            index.add(vectors)
+            doc_ids = [str(i) for i in range(len(self.docs))]
+            self.vectorstore = FAISS(
+                self.embeddings,
+                index,
+                InMemoryDocstore(dict(zip(doc_ids, self.docs))),
+                dict(enumerate(doc_ids))
+            )
+            self.is_loaded = True
+            st.success(
+                f"RAG 시스템 초기화 완료: {len(self.docs)}개 문서 로드됨 "
+                f"(신규 {sync_stats['added']}, 변경 {sync_stats['updated']}, "
+                f"재사용 {sync_stats['unchanged']}, 삭제 {sync_stats['removed']})"
+            )
+        except Exception as e:
+            st.error(f"FAISS 벡터스토어 생성 실패: {e}")
             self.is_loaded = False
 
     def _improved_chunking(self, docs):
@@ -726,7 +764,8 @@ class FileRAGSystem:
             'is_loaded': self.is_loaded,
             'docs_count': len(self.docs) if hasattr(self, 'docs') else 0,
             'vectorstore_exists': hasattr(self, 'vectorstore') and self.vectorstore is not None,
-            'current_folder': self.current_folder_path
+            'current_folder': self.current_folder_path,
+            'index_store': self.index_store.get_stats() if self.index_store else None
         }
         
         if self.is_loaded and hasattr(self, 'docs') and self.docs:
@@ -1013,52 +1052,20 @@ class FileRAGSystem:
             st.error(f"Excel 파일 '{file_path}' 로딩 실패: {e}")
             return []
 
-    def _build_knowledge_graph(self):
-        """문서 내 개체/키워드/문장 간 관계를 추출하여 지식 그래프를 구축합니다."""
-        import networkx as nx
-        from collections import defaultdict
-        import re
-        self.knowledge_graph = nx.Graph()
-        self.entity_to_docs = defaultdict(set)
-        # 간단한 개체 추출(명사/고유명사/이름/키워드 등)
-        for idx, doc in enumerate(self.docs):
-            content = doc.page_content
-            # 예시: 한글 이름, 팀, 부서, 주요 키워드 등 추출
-            entities = set(re.findall(r"[가-힣]{2,4}님|[가-힣]{2,4}팀|[가-힣]{2,4}부서|[가-힣]{2,4}|팀|부서|담당|책임|프로세스|상담|문의|업무|절차|과정|방법|정보|내용", content))
-            for entity in entities:
-                self.knowledge_graph.add_node(entity, type='entity')
-                self.knowledge_graph.add_edge(entity, f'doc_{idx}')
-                self.entity_to_docs[entity].add(idx)
-            self.knowledge_graph.add_node(f'doc_{idx}', type='doc', doc=doc)
-        # 문서 간 유사 개체 연결
-        for entity, doc_idxs in self.entity_to_docs.items():
-            for idx1 in doc_idxs:
-                for idx2 in doc_idxs:
-                    if idx1 != idx2:
-                        self.knowledge_graph.add_edge(f'doc_{idx1}', f'doc_{idx2}', via=entity)
-
     def _graph_search(self, query, k=5):
-        """Graph RAG: 쿼리와 연관된 개체/문서/문장까지 그래프를 따라 확장 검색"""
-        import re
-        if not hasattr(self, 'knowledge_graph'):
-            self._build_knowledge_graph()
-        # 쿼리에서 개체/키워드 추출
-        query_entities = set(re.findall(r"[가-힣]{2,4}님|[가-힣]{2,4}팀|[가-힣]{2,4}부서|[가-힣]{2,4}|팀|부서|담당|책임|프로세스|상담|문의|업무|절차|과정|방법|정보|내용", query))
-        doc_scores = {}
-        for entity in query_entities:
-            if entity in self.entity_to_docs:
-                for idx in self.entity_to_docs[entity]:
-                    doc_scores[idx] = doc_scores.get(idx, 0) + 1
-                    # 그래프에서 연결된 문서까지 확장(1-hop)
-                    for neighbor in self.knowledge_graph.neighbors(f'doc_{idx}'):
-                        if neighbor.startswith('doc_'):
-                            doc_scores[int(neighbor.split('_')[1])] = doc_scores.get(int(neighbor.split('_')[1]), 0) + 0.5
-        # 스코어 기준 상위 k개 문서 반환
-        ranked = sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)[:k]
-        results = [self.docs[idx] for idx, _ in ranked]
-        # 메타데이터에 graph_score 추가
-        for doc in results:
-            doc.metadata['graph_score'] = 1
+        """Graph RAG: 쿼리 개체와 연결된 문서 및 1-hop 이웃 문서까지 확장 검색"""
+        if self.entity_index is None:
+            return []
+        results = []
+        for doc_id, score in self.entity_index.search(query, k=k):
+            doc = self.docs[doc_id]
+            # 메타데이터에 graph_score 추가
+            metadata_copy = doc.metadata.copy()
+            metadata_copy['graph_score'] = 1
+            results.append(LangchainDocument(
+                page_content=doc.page_content,
+                metadata=metadata_copy
+            ))
         return results
 
     def search(self, query, k=5):
@@ -1314,27 +1321,26 @@ class FileRAGSystem:
         return scored_results
     
     def _keyword_search(self, query, k=5):
-        """키워드 기반 검색 (부분 일치 지원)"""
+        """키워드 기반 검색 (bigram 역색인 + BM25)"""
         try:
+            if self.keyword_index is None:
+                return []
+            
             # 검색어 전처리
             query_terms = self._extract_keywords(query)
             
             keyword_results = []
-            for doc in self.docs:
-                score = self._calculate_keyword_score(doc.page_content, query_terms)
-                if score > 0:
-                    # 원본 문서를 복사하여 스코어 추가
-                    metadata_copy = doc.metadata.copy()
-                    metadata_copy['keyword_score'] = score
-                    doc_copy = LangchainDocument(
-                        page_content=doc.page_content,
-                        metadata=metadata_copy
-                    )
-                    keyword_results.append(doc_copy)
-            
-            # 스코어 기준으로 정렬
-            keyword_results.sort(key=lambda x: x.metadata.get('keyword_score', 0), reverse=True)
-            return keyword_results[:k]
+            for doc_id, score in self.keyword_index.search(query_terms, k=k):
+                doc = self.docs[doc_id]
+                # 원본 문서를 복사하여 스코어 추가
+                metadata_copy = doc.metadata.copy()
+                metadata_copy['keyword_score'] = score
+                keyword_results.append(LangchainDocument(
+                    page_content=doc.page_content,
+                    metadata=metadata_copy
+                ))
+            
+            return keyword_results
             
         except Exception as e:
             st.warning(f"키워드 검색 오류: {e}")
@@ -1424,37 +1430,16 @@ class FileRAGSystem:
                         keywords.append(keyword.lower())
         
         return list(set(keywords))  # 중복 제거
-    
-    def _calculate_keyword_score(self, content, keywords):
-        """키워드 매칭 스코어 계산"""
-        content_lower = content.lower()
-        score = 0
-        
-        for keyword in keywords:
-            if keyword in content_lower:
-                # 키워드 길이에 따른 가중치
-                weight = len(keyword) / max(len(max(keywords, key=len)), 1)
-                score += weight
-                
-                # 정확한 일치에 더 높은 가중치
-                if keyword == content_lower or f" {keyword} " in f" {content_lower} ":
-                    score += 2
-                
-                # 부분 일치도 점수 부여 (한국어 복합명사 처리)
-                if len(keyword) >= 2:
-                    # 키워드의 일부가 포함되어도 점수 부여
-                    for i in range(1, len(keyword)):
-                        part1 = keyword[:i]
-                        part2 = keyword[i:]
-                        if part1 in content_lower and part2 in content_lower:
-                            score += 0.5  # 부분 일치 점수
-        
-        return score
+
+@st.cache_resource(show_spinner=False)
+def get_llm_client():
+    """공유 LLMClient (제공자 설정/연결 확인을 호출마다 반복하지 않도록 캐시)"""
+    return LLMClient()
 
 # ===== 챗봇 클래스 (FAISS 기반) =====
 class FileRAGChatbot:
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.llm_client = get_llm_client()
         self.rag_system = FileRAGSystem()
         self.conversation_history = []
 
@@ -2200,11 +2185,12 @@ def synthesize_finance_analysis(user_query, persona_analyses, rag_context="", ma
         return None
 
 # ===== AI 응답 생성 함수 =====
+@llm_cache.cached(temperature=0.7, error_prefixes=("사용 가능한 LLM 제공자가 없습니다", "지원하는 모델이 없습니다", "응답 생성 오류:", "AI 응답 생성 중 오류:"))
 def get_ai_response(prompt, model_name, system_prompt=""):
     """AI 응답 생성 (LLMClient 활용)"""
     try:
-        # LLMClient 인스턴스 생성
-        llm_client = LLMClient()
+        # 공유 LLMClient 인스턴스
+        llm_client = get_llm_client()
         
         # 사용 가능한 제공자 확인
         available_providers = llm_client.get_available_providers()
@@ -2248,8 +2234,15 @@ def get_ai_response(prompt, model_name, system_prompt=""):
         # 디버깅 정보
         st.info(f"AI 응답 생성 - 제공자: {provider}, 모델: {model_name}")
         
-        # 응답 생성
-        response, error = llm_client.generate_response(provider, model_name, messages, temperature=0.7)
+        # 응답 생성 (OpenAI/Anthropic/Perplexity는 공유 클라이언트 사용)
+        if provider in ('openai', 'anthropic', 'perplexity'):
+            try:
+                response = llm_service.complete(prompt, model_name, system_prompt, temperature=0.7, max_tokens=2000)
+                error = None
+            except Exception as e:
+                response, error = None, str(e)
+        else:
+            response, error = llm_client.generate_response(provider, model_name, messages, temperature=0.7)
         
         if error:
             st.error(f"LLM 응답 오류: {error}")
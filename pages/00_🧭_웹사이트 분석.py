@@ -6,8 +6,6 @@ import seaborn as sns
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import anthropic
 import json
 import base64
 import requests
@@ -15,6 +13,8 @@ import graphviz
 import plotly.express as px
 import plotly.graph_objects as go
 import mysql.connector
+import db_pool
+import web_crawler
 import concurrent.futures
 import time
 import re
@@ -34,6 +34,9 @@ import time
 import math
 from PyPDF2 import PdfReader, PdfWriter
 import tempfile
+import llm_cache
+import llm_service
+import attachment_preview
 
 # 환경 변수 로드
 load_dotenv()
@@ -65,10 +68,6 @@ if not st.session_state.authenticated:
             st.error("관리자 권한이 필요합니다")
         st.stop()
 
-# API 클라이언트 초기화
-openai = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-
 # MySQL Database configuration
 db_config = {
     'user': os.getenv('SQL_USER'),
@@ -383,15 +382,15 @@ def analyze_website_security(url):
 def scrape_website_content(url, max_pages=20):
     """웹사이트 전체 콘텐츠 스크래핑 (모든 페이지 포함)"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        # 공유 비동기 크롤러 (동시 요청 + 호스트별 요청 간격, 변경되지 않은 페이지는 304로 재사용)
+        crawler = web_crawler.Crawler()
         
         # 메인 페이지 스크래핑
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        main_page = crawler.fetch(url)
+        if main_page['error'] is not None:
+            raise Exception(main_page['error'])
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = main_page['soup']
         
         # 모든 내부 링크 수집
         base_url = url.rstrip('/')
@@ -438,8 +437,8 @@ def scrape_website_content(url, max_pages=20):
             'word_count': 0,
             'sentence_count': 0,
             'paragraph_count': 0,
-            'status_code': response.status_code,
-            'response_time': response.elapsed.total_seconds(),
+            'status_code': main_page['status'],
+            'response_time': main_page['elapsed_ms'] / 1000,
             'scraped_pages': [],
             'total_pages': len(links_to_scrape) + 1,
             'product_info': [],  # 제품 정보 수집
@@ -464,23 +463,24 @@ def scrape_website_content(url, max_pages=20):
         
         with st.spinner("내부 페이지들을 수집하고 있습니다..."):
             progress_bar = st.progress(0)  # 하나의 프로그레스바만 사용
-            for i, link_url in enumerate(links_to_scrape):
+            # 완료되는 순서대로 처리
+            for i, page in enumerate(crawler.iter_fetch(links_to_scrape)):
+                if page['error'] is not None:
+                    st.warning(f"페이지 스크래핑 실패: {page['url']} - {page['error']}")
+                    continue
                 try:
-                    page_response = requests.get(link_url, headers=headers, timeout=5)
-                    if page_response.status_code == 200:
-                        page_soup = BeautifulSoup(page_response.content, 'html.parser')
-                        page_content = extract_page_content(page_soup, link_url)
-                        all_content['scraped_pages'].append(page_content)
-                        
-                        # 제품/솔루션 관련 정보 추가 추출
-                        extract_product_solution_info(page_soup, link_url, all_content)
-                        
-                        # 진행률 표시 (하나의 프로그레스바만 갱신)
-                        progress = (i + 1) / len(links_to_scrape)
-                        progress_bar.progress(progress)
-                        
+                    page_content = extract_page_content(page['soup'], page['url'])
+                    all_content['scraped_pages'].append(page_content)
+                    
+                    # 제품/솔루션 관련 정보 추가 추출
+                    extract_product_solution_info(page['soup'], page['url'], all_content)
+                    
+                    # 진행률 표시 (하나의 프로그레스바만 갱신)
+                    progress = (i + 1) / len(links_to_scrape)
+                    progress_bar.progress(progress)
+                    
                 except Exception as e:
-                    st.warning(f"페이지 스크래핑 실패: {link_url} - {str(e)}")
+                    st.warning(f"페이지 스크래핑 실패: {page['url']} - {str(e)}")
                     continue
         
         # 모든 페이지 콘텐츠 통합
@@ -625,42 +625,21 @@ def analyze_content_readability(text_content):
         st.warning(f"가독성 분석 중 오류: {str(e)}")
         return None
 
-def get_ai_response(prompt, model_name="gpt-4o-mini", system_prompt="", enable_thinking=False):
+@llm_cache.cached(temperature=0.7)
+def get_ai_response(prompt, model_name="gpt-4o-mini", system_prompt="", enable_thinking=False, placeholder=None):
     """AI 응답 생성 함수"""
     try:
-        if model_name.startswith("gpt"):
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = openai.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=3000
-            )
-            
-            return {
-                'content': response.choices[0].message.content,
-                'success': True,
-                'error': None
-            }
-            
-        elif model_name.startswith("claude"):
-            response = anthropic_client.messages.create(
-                model=model_name,
-                max_tokens=3000,
-                temperature=0.7,
-                system=system_prompt,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return {
-                'content': response.content[0].text,
-                'success': True,
-                'error': None
-            }
+        content = llm_service.complete(
+            prompt, model_name, system_prompt,
+            max_tokens=3000,
+            placeholder=placeholder
+        )
+        
+        return {
+            'content': content,
+            'success': True,
+            'error': None
+        }
             
     except Exception as e:
         return {
@@ -1105,7 +1084,7 @@ def synthesize_business_analysis(url, agent_analyses, content_data, model_name="
 def save_website_analysis(url, website_data, agent_analyses, cto_analysis, analysis_date, uploaded_files=None):
     """웹사이트 분석 결과를 데이터베이스에 저장"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 1. website_analyses 테이블에 기본 정보 저장
@@ -1187,7 +1166,7 @@ def save_website_analysis(url, website_data, agent_analyses, cto_analysis, analy
 def migrate_website_content_data():
     """기존 website_content_data 테이블에 Perplexity 요약 컬럼 추가"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 기존 테이블에 perplexity_summary 컬럼이 있는지 확인
@@ -1223,7 +1202,7 @@ def migrate_website_content_data():
 def create_website_analysis_tables():
     """웹사이트 분석을 위한 데이터베이스 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 1. 웹사이트 분석 기본 정보 테이블
@@ -1289,7 +1268,7 @@ def create_website_analysis_tables():
 def get_saved_website_analyses():
     """저장된 웹사이트 분석 목록 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute('''
@@ -1321,7 +1300,7 @@ def get_saved_website_analyses():
 def get_analysis_detail(analysis_id):
     """특정 분석의 상세 정보 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         # 1. 기본 정보
         cursor.execute('''
@@ -1344,9 +1323,10 @@ def get_analysis_detail(analysis_id):
         ''', (analysis_id,))
         cto = cursor.fetchone()
         
-        # 5. 첨부 파일 조회
+        # 5. 첨부 파일 조회 (원본은 미리보기/다운로드할 때만 읽음)
         cursor.execute('''
-            SELECT * FROM website_analysis_files WHERE analysis_id = %s
+            SELECT file_id, analysis_id, filename, file_type, file_content, file_size
+            FROM website_analysis_files WHERE analysis_id = %s
         ''', (analysis_id,))
         files = cursor.fetchall()
         
@@ -1366,7 +1346,7 @@ def get_analysis_detail(analysis_id):
 def delete_analysis(analysis_id):
     """특정 분석 삭제"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 삭제 전 확인
@@ -2269,102 +2249,20 @@ def extract_page_content(soup, page_url):
     
     return page_data
 
-def display_file_preview(file_data, file_type, filename):
-    """파일 미리보기 표시 (PDF 페이징 포함)"""
-    import base64
-    import tempfile
-    from PyPDF2 import PdfReader, PdfWriter
-    import os
-    try:
-        file_type_lower = file_type.lower()
-        if file_type_lower in ['jpg', 'jpeg', 'png', 'gif']:
-            if file_data.get('binary_data'):
-                st.image(
-                    file_data['binary_data'],
-                    caption=f"🖼️ {filename}",
-                    use_container_width=True
-                )
-                return True
-        elif file_type_lower == 'pdf':
-            if file_data.get('binary_data'):
-                key = f"pdf_preview_page_start_{filename}"
-                # PDF 전체 페이지 수 구하기
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                    tmp_in.write(file_data['binary_data'])
-                    tmp_in_path = tmp_in.name
-                reader = PdfReader(tmp_in_path)
-                total_pages = len(reader.pages)
-                os.unlink(tmp_in_path)
-                if key not in st.session_state:
-                    st.session_state[key] = 0  # 0-based index
-                page_start = st.session_state[key]
-                page_end = min(page_start + 1, total_pages)
-                col_prev, col_next = st.columns([1, 1])
-                with col_prev:
-                    if st.button("⬅️ 이전", disabled=page_start == 0, key=f"prev_{filename}"):
-                        st.session_state[key] = max(0, page_start - 1)
-                        st.rerun()
-                with col_next:
-                    if st.button("다음 ➡️", disabled=page_end >= total_pages, key=f"next_{filename}"):
-                        st.session_state[key] = min(total_pages - 1, page_start + 1)
-                        st.rerun()
-                # 미리보기 PDF 생성 (1페이지)
-                try:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                        tmp_in.write(file_data['binary_data'])
-                        tmp_in_path = tmp_in.name
-                    reader = PdfReader(tmp_in_path)
-                    writer = PdfWriter()
-                    for i in range(page_start, page_end):
-                        writer.add_page(reader.pages[i])
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_out:
-                        writer.write(tmp_out)
-                        tmp_out_path = tmp_out.name
-                    with open(tmp_out_path, "rb") as f:
-                        preview_pdf_bytes = f.read()
-                    os.unlink(tmp_in_path)
-                    os.unlink(tmp_out_path)
-                    st.markdown(f"**페이지 {page_start+1} / {total_pages}**")
-                    pdf_base64 = base64.b64encode(preview_pdf_bytes).decode('utf-8')
-                    pdf_display = f"""
-                    <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                            width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                        <p>PDF를 표시할 수 없습니다. 
-                        <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                        여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                    </iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
-                except Exception as e:
-                    st.error(f"PDF 미리보기 생성 중 오류: {e}")
-                st.download_button(
-                    label="💾 전체 PDF 다운로드",
-                    data=file_data['binary_data'],
-                    file_name=filename,
-                    mime="application/pdf"
-                )
-                return True
-        elif file_type_lower in ['txt', 'md']:
-            if file_data.get('binary_data'):
-                try:
-                    text_content = file_data['binary_data'].decode('utf-8')
-                    st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
-                    st.text_area(
-                        "파일 내용",
-                        value=text_content,
-                        height=400,
-                        disabled=True
-                    )
-                    return True
-                except Exception as e:
-                    st.error(f"텍스트 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-        else:
-            st.info(f"{file_type.upper()} 파일 미리보기는 지원되지 않습니다. 다운로드 후 확인하세요.")
-            return False
-    except Exception as e:
-        st.error(f"파일 미리보기 오류: {str(e)}")
-        return False
+def get_file_source(file_info):
+    """목록 메타데이터로 만든 첨부파일 핸들 - 원본은 미리보기/다운로드할 때만 읽음"""
+    file_id = file_info['file_id']
+    return attachment_preview.make_source(
+        file_info['filename'],
+        file_info['file_type'],
+        file_info.get('file_size'),
+        loader=lambda: (get_file_binary_data(file_id) or {}).get('binary_data')
+    )
+
+def display_file_preview(source, key='preview'):
+    """파일 미리보기 표시 - 선택한 파일만 렌더링하고 결과는 파일 해시 기준으로 캐시"""
+    return attachment_preview.render_preview(source, key)
+
 
 def main():
     # 데이터베이스 테이블 생성
@@ -2771,20 +2669,14 @@ def main():
                                     with col2:
                                         if st.button(f"👁️ 미리보기", key=f"detail_preview_{file_info['file_id']}"):
                                             st.session_state.preview_file_id = file_info['file_id']
-                                            st.session_state.preview_filename = file_info['filename']
-                                            st.session_state.preview_file_type = file_info['file_type']
+                                            st.session_state.preview_file = dict(file_info)
                                     
                                     with col3:
-                                        file_data = get_file_binary_data(file_info['file_id'])
-                                        if file_data:
-                                            mime_type = get_file_mime_type(file_data['file_type'])
-                                            st.download_button(
-                                                label="💾 다운로드",
-                                                data=file_data['binary_data'],
-                                                file_name=file_data['filename'],
-                                                mime=mime_type,
-                                                key=f"detail_download_{file_info['file_id']}"
-                                            )
+                                        attachment_preview.download_button(
+                                            get_file_source(file_info),
+                                            key=f"detail_download_{file_info['file_id']}",
+                                            mime=get_file_mime_type(file_info['file_type'])
+                                        )
                                 
                                 # 전체 화면 파일 미리보기
                                 if st.session_state.get('preview_file_id'):
@@ -2795,19 +2687,13 @@ def main():
                                     with col_preview_2:
                                         if st.button("❌ 닫기", key=f"close_detail_preview_{file_id}"):
                                             del st.session_state.preview_file_id
-                                            del st.session_state.preview_filename
-                                            del st.session_state.preview_file_type
+                                            del st.session_state.preview_file
                                             st.rerun()
                                     with col_preview_1:
-                                        file_data = get_file_binary_data(file_id)
-                                        if file_data:
-                                            display_file_preview(
-                                                file_data, 
-                                                st.session_state.preview_file_type, 
-                                                st.session_state.preview_filename
-                                            )
-                                        else:
-                                            st.error("파일 데이터를 불러올 수 없습니다.")
+                                        display_file_preview(
+                                            get_file_source(st.session_state.preview_file),
+                                            key=f"detail_preview_file_{file_id}"
+                                        )
                             else:
                                 st.info("첨부된 파일이 없습니다.")
                         
@@ -2940,7 +2826,7 @@ def get_file_mime_type(file_type):
 
 def get_file_binary_data(file_id):
     """파일의 원본 바이너리 데이터 조회"""
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     cursor = conn.cursor(dictionary=True)
     try:
         cursor.execute(
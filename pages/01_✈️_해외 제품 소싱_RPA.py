@@ -2,6 +2,9 @@ import streamlit as st
 import os
 import pandas as pd
 import mysql.connector
+import db_pool
+import blob_store
+import attachment_preview
 from datetime import datetime, timedelta
 import time
 import re
@@ -1080,7 +1083,7 @@ def connect_to_db():
             st.caption("필요한 환경 변수: SQL_HOST, SQL_USER, SQL_PASSWORD, SQL_DATABASE_NEWBIZ")
             return None
         
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=host,
             user=user,
             password=password,
@@ -1615,15 +1618,13 @@ def main():
                                 if st.button("미리보기", key=f"preview_{file['file_id']}_{supplier_id}_{index}"):
                                     st.session_state[f'preview_file_{supplier_id}_{index}'] = file['file_id']
                             with colf3:
-                                file_bin = get_supplier_file_binary(file['file_id'])
-                                if file_bin:
-                                    st.download_button(
-                                        label="다운로드",
-                                        data=file_bin['file_binary_data'],
-                                        file_name=file_bin['filename'],
-                                        mime=get_file_mime_type(file_bin['file_type']),
-                                        key=f"download_{file['file_id']}_{supplier_id}_{index}"
-                                    )
+                                # 누른 파일만 원본을 읽음
+                                attachment_preview.download_button(
+                                    get_supplier_file_source(file),
+                                    label="다운로드",
+                                    key=f"download_{file['file_id']}_{supplier_id}_{index}",
+                                    mime=get_file_mime_type(file['file_type'])
+                                )
                     else:
                         st.info("업로드된 파일이 없습니다.")
                     
@@ -1633,7 +1634,11 @@ def main():
                         if file:
                             st.markdown("---")
                             st.markdown(f"#### 📄 미리보기: {file['filename']}")
-                            display_file_preview(file, file['file_type'], file['filename'])
+                            # 목록은 메타데이터만 있으므로 원본은 미리보기 결과가 캐시에 없을 때만 읽음
+                            display_file_preview(
+                                get_supplier_file_source(file),
+                                key=f"supplier_preview_{file['file_id']}_{supplier_id}_{index}"
+                            )
                             if st.button("미리보기 닫기", key=f"close_preview_{supplier_id}_{index}"):
                                 del st.session_state[f'preview_file_{supplier_id}_{index}']
                 
@@ -2188,14 +2193,18 @@ def ensure_supplier_files_table():
                 file_type VARCHAR(50),
                 file_content LONGTEXT,
                 file_binary_data LONGBLOB,
+                blob_sha256 CHAR(64),
                 file_size BIGINT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (supplier_id) REFERENCES sourcing_suppliers(id) ON DELETE CASCADE,
                 INDEX idx_supplier_id (supplier_id),
                 INDEX idx_file_type (file_type),
-                INDEX idx_filename (filename)
+                INDEX idx_filename (filename),
+                INDEX idx_blob_sha256 (blob_sha256)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """)
+        # 기존 테이블에 blob 해시 컬럼 추가 (원본은 blob 저장소에 보관)
+        blob_store.ensure_schema(cursor, 'supplier_files')
         connection.commit()
         cursor.close()
         connection.close()
@@ -2211,8 +2220,7 @@ def parse_uploaded_file(uploaded_file):
         file_extension = uploaded_file.name.split('.')[-1].lower()
         content = ""
         uploaded_file.seek(0)
-        binary_data = uploaded_file.read()
-        binary_base64 = binary_data  # 바이너리 그대로 저장
+        blob_sha256, file_size = blob_store.put_stream(uploaded_file)  # 원본은 blob 저장소에 저장
         uploaded_file.seek(0)
         if file_extension == 'pdf':
             import PyPDF2
@@ -2259,8 +2267,8 @@ def parse_uploaded_file(uploaded_file):
             'filename': uploaded_file.name,
             'file_type': file_extension,
             'content': content,
-            'binary_data': binary_base64,
-            'size': len(binary_data)
+            'blob_sha256': blob_sha256,
+            'size': file_size
         }
     except Exception as e:
         st.error(f"파일 파싱 오류: {str(e)}")
@@ -2274,14 +2282,14 @@ def save_supplier_file(supplier_id, file_data):
         cursor = connection.cursor()
         cursor.execute("""
             INSERT INTO supplier_files 
-            (supplier_id, filename, file_type, file_content, file_binary_data, file_size)
+            (supplier_id, filename, file_type, file_content, blob_sha256, file_size)
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (
             supplier_id,
             file_data['filename'],
             file_data['file_type'],
             file_data['content'],
-            file_data['binary_data'],
+            file_data['blob_sha256'],
             file_data['size']
         ))
         connection.commit()
@@ -2299,7 +2307,8 @@ def get_supplier_files(supplier_id):
             return []
         cursor = connection.cursor(dictionary=True)
         cursor.execute("""
-            SELECT * FROM supplier_files WHERE supplier_id = %s ORDER BY uploaded_at DESC
+            SELECT file_id, supplier_id, filename, file_type, file_size, blob_sha256, uploaded_at
+            FROM supplier_files WHERE supplier_id = %s ORDER BY uploaded_at DESC
         """, (supplier_id,))
         files = cursor.fetchall()
         cursor.close()
@@ -2316,11 +2325,14 @@ def get_supplier_file_binary(file_id):
             return None
         cursor = connection.cursor(dictionary=True)
         cursor.execute("""
-            SELECT filename, file_type, file_binary_data, file_size FROM supplier_files WHERE file_id = %s
+            SELECT filename, file_type, blob_sha256, file_binary_data, file_size FROM supplier_files WHERE file_id = %s
         """, (file_id,))
         result = cursor.fetchone()
         cursor.close()
         connection.close()
+        if result:
+            # blob 저장소에서 읽고, 이전 전 행은 DB 원본 사용
+            result['file_binary_data'] = blob_store.read_attachment(result, 'file_binary_data', False)
         return result
     except Exception as e:
         st.error(f"파일 데이터 조회 오류: {str(e)}")
@@ -2341,136 +2353,21 @@ def get_file_mime_type(file_type):
     }
     return mime_types.get(file_type.lower(), 'application/octet-stream')
 
-def display_file_preview(file, file_type, filename):
-    """파일 미리보기 표시 (Archives 파일 참고)"""
-    try:
-        import base64
-        import tempfile
-        import os
-        from PyPDF2 import PdfReader, PdfWriter
-        
-        file_type_lower = file_type.lower()
-        
-        if file_type_lower in ['jpg', 'jpeg', 'png', 'gif']:
-            st.image(file['file_binary_data'], caption=f"🖼️ {filename}", use_container_width=True)
-            return True
-        
-        elif file_type_lower == 'pdf':
-            if file.get('file_binary_data'):
-                total_size = file.get('file_size', 0)
-                
-                # 1MB 초과시 페이징 미리보기 (1페이지씩)
-                if total_size > 1 * 1024 * 1024:
-                    key = f"pdf_preview_page_start_{filename}"
-                    if key not in st.session_state:
-                        st.session_state[key] = 0  # 0-based index
-
-                    # PDF 전체 페이지 수 구하기
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                        tmp_in.write(file['file_binary_data'])
-                        tmp_in_path = tmp_in.name
-                    reader = PdfReader(tmp_in_path)
-                    total_pages = len(reader.pages)
-                    os.unlink(tmp_in_path)
-
-                    page_start = st.session_state[key]
-                    page_end = min(page_start + 1, total_pages)
-
-                    col_prev, col_next = st.columns([1, 1])
-                    with col_prev:
-                        if st.button("⬅️ 이전", disabled=page_start == 0, key=f"prev_{filename}"):
-                            st.session_state[key] = max(0, page_start - 1)
-                            st.rerun()
-                    with col_next:
-                        if st.button("다음 ➡️", disabled=page_end >= total_pages, key=f"next_{filename}"):
-                            st.session_state[key] = min(total_pages - 1, page_start + 1)
-                            st.rerun()
-
-                    # 미리보기 PDF 생성 (1페이지)
-                    try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                            tmp_in.write(file['file_binary_data'])
-                            tmp_in_path = tmp_in.name
-                        reader = PdfReader(tmp_in_path)
-                        writer = PdfWriter()
-                        for i in range(page_start, page_end):
-                            writer.add_page(reader.pages[i])
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_out:
-                            writer.write(tmp_out)
-                            tmp_out_path = tmp_out.name
-                        with open(tmp_out_path, "rb") as f:
-                            preview_pdf_bytes = f.read()
-                        os.unlink(tmp_in_path)
-                        os.unlink(tmp_out_path)
-                        st.markdown(f"**페이지 {page_start+1} / {total_pages}**")
-                        pdf_base64 = base64.b64encode(preview_pdf_bytes).decode('utf-8')
-                        pdf_display = f"""
-                        <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                                width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                            <p>PDF를 표시할 수 없습니다. 
-                            <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                            여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                        </iframe>
-                        """
-                        st.markdown(pdf_display, unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"PDF 미리보기 생성 중 오류: {e}")
+def get_supplier_file_source(file):
+    """목록 메타데이터로 만든 첨부파일 핸들 - 원본은 미리보기/다운로드할 때만 읽음"""
+    file_id = file['file_id']
+    return attachment_preview.make_source(
+        file['filename'],
+        file['file_type'],
+        file.get('file_size'),
+        file.get('blob_sha256'),
+        loader=lambda: (get_supplier_file_binary(file_id) or {}).get('file_binary_data')
+    )
+
+def display_file_preview(source, key='preview'):
+    """파일 미리보기 표시 (Archives 파일 참고) - 선택한 파일만 렌더링하고 결과는 파일 해시 기준으로 캐시"""
+    return attachment_preview.render_preview(source, key)
 
-                    st.download_button(
-                        label="💾 전체 PDF 다운로드",
-                        data=file['file_binary_data'],
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                    return True
-                else:
-                    st.subheader(f"📄 PDF 미리보기: {filename}")
-                    pdf_base64 = base64.b64encode(file['file_binary_data']).decode('utf-8')
-                    pdf_display = f"""
-                    <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                            width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                        <p>PDF를 표시할 수 없습니다. 
-                        <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                        여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                    </iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
-                    return True
-        
-        elif file_type_lower in ['txt', 'md']:
-            try:
-                text_content = file['file_binary_data'].decode('utf-8')
-                st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
-                
-                if file_type_lower == 'md':
-                    st.markdown(text_content)
-                else:
-                    st.text_area(
-                        "파일 내용",
-                        value=text_content,
-                        height=400,
-                        disabled=True
-                    )
-                return True
-            except Exception as e:
-                st.error(f"텍스트 파일을 읽는 중 오류 발생: {str(e)}")
-                return False
-        
-        elif file_type_lower == 'xlsx':
-            return display_excel_preview(file, filename)
-        
-        elif file_type_lower == 'pptx':
-            return display_powerpoint_preview(file, filename)
-        
-        elif file_type_lower == 'docx':
-            return display_word_preview(file, filename)
-        
-        # 기타 파일은 다운로드만 지원
-        return False
-        
-    except Exception as e:
-        st.error(f"파일 미리보기 오류: {str(e)}")
-        return False
 
 def get_supplier_files_with_content(supplier_id):
     """공급업체의 파일 목록과 내용을 함께 조회"""
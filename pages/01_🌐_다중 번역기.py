@@ -1,89 +1,48 @@
 import streamlit as st
 import os
-from openai import OpenAI
-from langchain_anthropic import ChatAnthropic
 import threading
 from concurrent.futures import ThreadPoolExecutor
 import time
-import base64
+import llm_cache
+import llm_service
+import tts_service
+import translation_memory
 
 st.set_page_config(page_title="다중 번역기", page_icon="🌐", layout="wide")
 
-def get_ai_response(prompt, model_name, system_prompt=""):
+@llm_cache.cached(temperature=0.7, error_prefixes=("오류 발생:",))
+def get_ai_response(prompt, model_name, system_prompt="", placeholder=None):
     """AI 모델로부터 응답을 받는 함수"""
     try:
-        if model_name.startswith('claude'):
-            client = ChatAnthropic(
-                model=model_name, 
-                api_key=os.getenv('ANTHROPIC_API_KEY'), 
-                temperature=0.7, 
-                max_tokens=8192
-            )
-            response = client.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ])
-            return response.content if hasattr(response, 'content') else str(response)
-        else:
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key or openai_key.strip() == '' or openai_key == 'NA':
-                raise ValueError("OpenAI API 키가 올바르지 않습니다.")
-            
-            client = OpenAI(api_key=openai_key)
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=8192,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+        return llm_service.complete(prompt, model_name, system_prompt, placeholder=placeholder)
     except Exception as e:
         return f"오류 발생: {str(e)}"
 
 def text_to_speech(text, voice_type):
-    """텍스트를 음성으로 변환하는 함수"""
+    """텍스트를 음성(mp3 bytes)으로 변환하는 함수 - 문장 단위로 나눠 동시에 합성하고 구간별로 캐시"""
     try:
         # OpenAI API 키 검증
         openai_key = os.getenv('OPENAI_API_KEY')
         if not openai_key or openai_key.strip() == '' or openai_key == 'NA':
             return None
-            
-        client = OpenAI(api_key=openai_key)
-        
-        # 음성 설정
-        voice_settings = {
-            "남성 (깊은 목소리)": "onyx",
-            "남성 (중간 톤)": "echo", 
-            "여성 (밝은 목소리)": "nova",
-            "여성 (차분한 목소리)": "shimmer",
-            "중성적인 목소리": "alloy"
-        }
         
-        selected_voice = voice_settings.get(voice_type, "alloy")
-        
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice=selected_voice,
-            input=text
-        )
-        
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        audio_html = f'''
-            <audio controls>
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-        '''
-        return audio_html
+        return tts_service.synthesize(text, voice=tts_service.voice_for_label(voice_type))
     except Exception as e:
         return None
 
-def translate_or_answer(model_name, source_text, prompt, source_language, target_language, is_question=False):
-    """텍스트를 번역하거나 질문에 답변하는 함수"""
+def complete_or_raise(user_message, model_name, system_prompt):
+    """get_ai_response()의 오류 문자열을 예외로 바꿔 번역 메모리에 오류가 저장되지 않도록 함"""
+    response = get_ai_response(user_message, model_name, system_prompt)
+    if response.startswith("오류 발생:"):
+        raise RuntimeError(response[len("오류 발생:"):].strip())
+    return response
+
+def translate_or_answer(model_name, source_text, prompt, source_language, target_language, is_question=False, stats=None):
+    """텍스트를 번역하거나 질문에 답변하는 함수
+
+    번역은 번역 메모리를 거쳐 바뀐 문단만 모델에 보냅니다. stats dict를 넘기면
+    목표 언어별 구간 수/재사용 수/요청 수를 기록합니다.
+    """
     try:
         # 언어 이름 매핑
         language_names = {
@@ -121,27 +80,33 @@ def translate_or_answer(model_name, source_text, prompt, source_language, target
             elif source_language == target_language:
                 return source_text  # 원문 그대로 반환
                 
-            # 실제 번역이 필요한 경우
+            # 실제 번역이 필요한 경우 - 문단 단위 번역 메모리 사용
             else:
-                system_prompt = f"You are a professional translator. Always translate to {language_names[target_language]}."
-                user_message = f"Translate the following text from {language_names[source_language]} to {language_names[target_language]}. Keep the original meaning and nuance"
-                
-                if prompt and prompt.strip():
-                    user_message += f"\n\n[Important: Please follow these additional instructions]\n{prompt.strip()}"
-                
-                user_message += f":\n\n{source_text}"
+                result = translation_memory.translate(
+                    source_text,
+                    source_language,
+                    target_language,
+                    model_name,
+                    complete=lambda user_message, system_prompt: complete_or_raise(user_message, model_name, system_prompt),
+                    source_name=language_names[source_language],
+                    target_name=language_names[target_language],
+                    instructions=prompt or ""
+                )
+                if stats is not None:
+                    stats[target_language] = result
+                return result['text']
         
         return get_ai_response(user_message, model_name, system_prompt)
         
     except Exception as e:
         return f"오류 발생: {str(e)}"
 
-def translate_to_multiple_languages(model_name, source_text, prompt, source_language, target_languages, is_question=False):
+def translate_to_multiple_languages(model_name, source_text, prompt, source_language, target_languages, is_question=False, stats=None):
     """여러 언어로 동시 번역/답변하는 함수"""
     results = {}
     
     def translate_single(target_lang):
-        result = translate_or_answer(model_name, source_text, prompt, source_language, target_lang, is_question)
+        result = translate_or_answer(model_name, source_text, prompt, source_language, target_lang, is_question, stats)
         return target_lang, result
     
     # ThreadPoolExecutor를 사용하여 동시에 번역 요청
@@ -318,8 +283,10 @@ def main():
                 start_time = time.time()
                 
                 # 번역/답변 수행
+                memory_stats = {}
                 results = translate_to_multiple_languages(
-                    selected_model, source_text, prompt_input, source_language, target_languages, is_question_mode
+                    selected_model, source_text, prompt_input, source_language, target_languages, is_question_mode,
+                    stats=memory_stats
                 )
                 
                 end_time = time.time()
@@ -345,10 +312,10 @@ def main():
                                 # 음성 생성
                                 if enable_tts and voice_type and result_text and not result_text.startswith("오류"):
                                     with st.spinner(f"{lang} 음성 생성 중..."):
-                                        audio_html = text_to_speech(result_text, voice_type)
-                                        if audio_html:
+                                        audio_data = text_to_speech(result_text, voice_type)
+                                        if audio_data:
                                             st.markdown(f"### 🎙️ {lang} 음성")
-                                            st.markdown(audio_html, unsafe_allow_html=True)
+                                            st.audio(audio_data, format="audio/mp3")
                                         else:
                                             st.warning("음성 생성 실패 (OpenAI API 키 확인 필요)")
                     else:
@@ -365,10 +332,10 @@ def main():
                         # 음성 생성
                         if enable_tts and voice_type and result_text and not result_text.startswith("오류"):
                             with st.spinner(f"{lang} 음성 생성 중..."):
-                                audio_html = text_to_speech(result_text, voice_type)
-                                if audio_html:
+                                audio_data = text_to_speech(result_text, voice_type)
+                                if audio_data:
                                     st.markdown(f"### 🎙️ {lang} 음성")
-                                    st.markdown(audio_html, unsafe_allow_html=True)
+                                    st.audio(audio_data, format="audio/mp3")
                                 else:
                                     st.warning("음성 생성 실패 (OpenAI API 키 확인 필요)")
                     
@@ -386,6 +353,15 @@ def main():
                                 st.metric("원문 길이", f"{len(source_text)}자")
                             else:
                                 st.metric("프롬프트 길이", f"{len(prompt_input)}자")
+                        
+                        if memory_stats:
+                            total_segments = sum(stat['segments'] for stat in memory_stats.values())
+                            reused_segments = sum(stat['reused'] for stat in memory_stats.values())
+                            total_requests = sum(stat['requests'] for stat in memory_stats.values())
+                            st.caption(
+                                f"번역 메모리: 문단 {total_segments}개 중 {reused_segments}개 재사용, "
+                                f"모델 요청 {total_requests}회"
+                            )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
 import os
-from openai import OpenAI
-import base64
+import llm_service
+import tts_service
 
 st.set_page_config(page_title="음성 번역 생성기", page_icon="🎙️", layout="wide")
 
@@ -55,42 +55,23 @@ def translate_text(client, text, source_language, target_language, custom_prompt
         return None
 
 def text_to_speech(text, voice_type):
-    """텍스트를 음성으로 변환하는 함수"""
+    """텍스트를 음성(mp3 bytes)으로 변환하는 함수 - 문장 단위로 나눠 동시에 합성하고 구간별로 캐시"""
     try:
         # OpenAI API 키 검증
         openai_key = os.getenv('OPENAI_API_KEY')
         if not openai_key or openai_key.strip() == '' or openai_key == 'NA':
             st.error("OpenAI API 키가 올바르지 않습니다.")
             return None
-            
-        client = OpenAI(api_key=openai_key)
-        
-        # 음성 설정
-        voice_settings = {
-            "남성 (깊은 목소리)": "onyx",
-            "남성 (중간 톤)": "echo",
-            "여성 (밝은 목소리)": "nova",
-            "여성 (차분한 목소리)": "shimmer",
-            "중성적인 목소리": "alloy"
-        }
-        
-        selected_voice = voice_settings.get(voice_type, "alloy")
         
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice=selected_voice,
-            input=text
-        )
-        
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        audio_html = f'''
-            <audio controls>
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-        '''
-        return audio_html
+        progress_bar = st.progress(0)
+        try:
+            return tts_service.synthesize(
+                text,
+                voice=tts_service.voice_for_label(voice_type),
+                on_progress=lambda done, total: progress_bar.progress(done / total, text=f"음성 합성 중... ({done}/{total})")
+            )
+        finally:
+            progress_bar.empty()
     except Exception as e:
         st.error(f"음성 변환 중 오류 발생: {str(e)}")
         return None
@@ -175,7 +156,7 @@ def main():
             st.error("OpenAI API 키가 올바르지 않습니다.")
             return
             
-        client = OpenAI(api_key=openai_key)
+        client = llm_service.get_client('openai')
         
         with st.spinner("번역 및 음성을 생성하고 있습니다..."):
             # 번역 수행
@@ -189,10 +170,11 @@ def main():
                 )
                 
                 # 음성 생성
-                audio_html = text_to_speech(translated_text, voice_type)
-                if audio_html:
-                    audio_placeholder.markdown("### 생성된 음성")
-                    audio_placeholder.markdown(audio_html, unsafe_allow_html=True)
+                audio_data = text_to_speech(translated_text, voice_type)
+                if audio_data:
+                    with audio_placeholder.container():
+                        st.markdown("### 생성된 음성")
+                        st.audio(audio_data, format="audio/mp3")
                     st.success("번역 및 음성이 성공적으로 생성되었습니다!")
 
 if __name__ == "__main__":
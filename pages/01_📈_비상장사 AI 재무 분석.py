@@ -15,6 +15,7 @@ import graphviz
 import plotly.express as px
 import plotly.graph_objects as go
 import mysql.connector
+import db_pool
 import dart_fss as dart_fss
 import concurrent.futures
 
@@ -686,7 +687,7 @@ def analyze_evebitda_valuation(industry, ebitda, net_debt, current_multiple, gro
 def save_valuation_analysis(company_info, financial_data, market_data, analysis_results, valuation_results):
     """기업 가치 평가 결과를 데이터베이스에 저장"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 1. valuation_analyses 테이블에 기본 정보 저장
@@ -788,7 +789,7 @@ def extract_mermaid_chart(text):
 def get_saved_analyses():
     """저장된 가치 평가 분석 목록 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute('''
@@ -829,7 +830,7 @@ def get_saved_analyses():
 def get_analysis_detail(analysis_id):
     """특정 가치 평가 분석의 상세 정보 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         # 기본 정보 조회
@@ -885,7 +886,7 @@ def get_analysis_detail(analysis_id):
 def delete_valuation_analysis(analysis_id):
     """기업 가치 평가 분석 삭제"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 관련 테이블에서 순차적으로 데이터 삭제
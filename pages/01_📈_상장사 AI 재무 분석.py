@@ -7,9 +7,7 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 import anthropic
-from langchain_anthropic import ChatAnthropic
 import time
 import json
 import requests
@@ -25,6 +23,10 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error
 from scipy import stats
 import warnings
 import re 
+import llm_cache
+import llm_service
+import market_data_cache
+import price_simulation
 
 warnings.filterwarnings('ignore')
 
@@ -1040,127 +1042,21 @@ ESG 요소가 기업 가치에 미치는 영향을 분석해주세요."""
     }
 }
 
-def get_ai_response(prompt, model_name, system_prompt="", enable_thinking=False, thinking_budget=4000):
-    """AI 모델로부터 응답을 받는 함수 (reasoning 과정 표시 지원)"""
-    try:
-        if model_name.startswith('claude'):
-            is_reasoning_model = (
-                model_name == 'claude-3-7-sonnet-latest' or
-                model_name == 'claude-3-5-sonnet-latest'
-            )
-            
-            if is_reasoning_model and enable_thinking:
-                import anthropic
-                direct_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-                
-                messages = [{"role": "user", "content": prompt}]
-                
-                response = direct_client.messages.create(
-                    model=model_name,
-                    max_tokens=8192,
-                    system=system_prompt if system_prompt else None,
-                    thinking={
-                        "type": "enabled",
-                        "budget_tokens": thinking_budget
-                    },
-                    messages=messages
-                )
-                
-                thinking_content = ""
-                final_content = ""
-                
-                for block in response.content:
-                    if hasattr(block, 'type'):
-                        if block.type == "thinking":
-                            thinking_content = block.thinking
-                        elif block.type == "text":
-                            final_content = block.text
-                        elif block.type == "redacted_thinking":
-                            thinking_content += "\n[일부 사고 과정이 보안상 암호화되었습니다]"
-                
-                return {
-                    "content": final_content,
-                    "thinking": thinking_content,
-                    "has_thinking": True
-                }
-            else:
-                client = ChatAnthropic(
-                    model=model_name, 
-                    api_key=os.getenv('ANTHROPIC_API_KEY'), 
-                    temperature=0.7, 
-                    max_tokens=8192
-                )
-                
-                if system_prompt:
-                    full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-                    response = client.invoke(full_prompt)
-                else:
-                    response = client.invoke(prompt)
-                
-                content = response.content if hasattr(response, 'content') else str(response)
-                return {
-                    "content": content,
-                    "thinking": "",
-                    "has_thinking": False
-                }
-                
-        else:
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key:
-                st.error("❌ OpenAI API 키가 설정되지 않았습니다!")
-                return {
-                    "content": "OpenAI API 키가 필요합니다.",
-                    "thinking": "",
-                    "has_thinking": False
-                }
-            
-            openai_client = OpenAI(api_key=openai_key)
-            
-            is_o1_model = model_name.startswith('o1')
-            
-            if is_o1_model:
-                response = openai_client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {"role": "user", "content": f"{system_prompt}\n\n{prompt}" if system_prompt else prompt}
-                    ],
-                    max_completion_tokens=8192
-                )
-                
-                content = response.choices[0].message.content
-                
-                return {
-                    "content": content,
-                    "thinking": "🧠 이 모델은 내부적으로 복잡한 reasoning 과정을 거쳐 답변을 생성했습니다.",
-                    "has_thinking": True
-                }
-            else:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = openai_client.chat.completions.create(
-                    model=model_name,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=8192
-                )
-                
-                content = response.choices[0].message.content
-                return {
-                    "content": content,
-                    "thinking": "",
-                    "has_thinking": False
-                }
-            
-    except Exception as e:
-        st.error(f"❌ AI 응답 생성 중 오류가 발생했습니다: {str(e)}")
-        return {
-            "content": f"오류가 발생했습니다: {str(e)}",
-            "thinking": "",
-            "has_thinking": False
-        }
+@llm_cache.cached(temperature=0.7, error_prefixes=(llm_service.ERROR_PREFIX,))
+def get_ai_response(prompt, model_name, system_prompt="", enable_thinking=False, thinking_budget=4000, placeholder=None):
+    """AI 모델로부터 응답을 받는 함수 (reasoning 과정 표시 지원)
+
+    placeholder를 주면 응답을 토큰 단위로 스트리밍하여 표시합니다.
+    """
+    response = llm_service.get_ai_response(
+        prompt, model_name, system_prompt,
+        enable_thinking=enable_thinking,
+        thinking_budget=thinking_budget,
+        placeholder=placeholder
+    )
+    if response.get('error'):
+        st.error(f"❌ AI 응답 생성 중 오류가 발생했습니다: {response['error']}")
+    return response
 
 def analyze_with_agent(args):
     """개별 에이전트 분석 함수 (멀티프로세싱용)"""
@@ -1986,176 +1882,58 @@ def run_multi_agent_analysis(company_name, analysis_data, selected_agents, model
     
     return agent_analyses, cfo_analysis
 
-@st.cache_data(ttl=300)  # 5분 캐시 (실시간 데이터)
-def get_stock_data(symbol, period="1y", retry_count=1):
-    """주식 데이터 가져오기 - 초보수적 접근"""
+# 캐시에 데이터가 없을 때 백그라운드 수집을 기다리는 최대 시간 (초)
+FIRST_FETCH_WAIT = 8
+
+
+def _make_stock_info(symbol, hist):
+    """히스토리에서 최소 종목 정보 생성 (추가 API 요청 없음)"""
+    return {
+        "symbol": symbol,
+        "shortName": symbol.replace('.KS', ''),
+        "regularMarketPrice": float(hist['Close'].iloc[-1]) if not hist.empty else 0,
+        "currency": "KRW"
+    }
+
+
+def get_stock_data(symbol, period="1y"):
+    """주식 데이터 가져오기 - 공유 시세 캐시 우선, 부족한 날짜는 백그라운드에서 수집
+
+    일봉은 market_data_cache에 (종목, 날짜) 단위로 저장되어 세션/재시작 간에 공유됩니다.
+    화면 스레드는 대기하지 않고, 요청 속도 제한은 백그라운드 수집기의 토큰 버킷이 담당합니다.
+    """
+    fetcher = market_data_cache.get_fetcher()
+    start = market_data_cache.period_start(period)
     
-    # 마지막 요청 시간 추적 초기화
-    if 'last_api_request' not in st.session_state:
-        st.session_state.last_api_request = 0
+    done = fetcher.request(symbol, period)
+    hist = fetcher.store.get_history(symbol, start)
     
-    # 네이버 증권 우선 모드에서는 대기 시간 단축
-    if st.session_state.get('use_naver_first', True):
-        required_wait = random.uniform(1, 3)  # 네이버는 1-3초만 대기
-        mode_name = "🇰🇷 네이버 증권 우선 모드"
-    else:
-        required_wait = random.uniform(60, 120)  # Yahoo Finance는 1-2분 대기
-        mode_name = "⏳ Yahoo Finance 모드"
+    # 처음 조회하는 종목은 짧게만 기다림
+    if hist is None and done is not None:
+        with st.spinner(f"📡 {symbol} 시세 수집 중..."):
+            done.wait(FIRST_FETCH_WAIT)
+        hist = fetcher.store.get_history(symbol, start)
     
-    # 대기 시간 체크 및 실행
-    time_since_last = time.time() - st.session_state.last_api_request
-    if time_since_last < required_wait:
-        wait_time = required_wait - time_since_last
-        st.warning(f"{mode_name}: API 안정성을 위해 {wait_time:.1f}초 대기 중...")
-        
-        # 진행바로 대기 시간 시각화
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i in range(int(wait_time)):
-            time.sleep(1)
-            progress_bar.progress((i + 1) / wait_time)
-            status_text.text(f"대기 중... {wait_time - i - 1:.0f}초 남음")
-        
-        progress_bar.empty()
-        status_text.empty()
+    if hist is not None and not hist.empty:
+        if fetcher.is_pending(symbol):
+            st.caption(f"🔄 {symbol} 최신 시세를 백그라운드에서 갱신 중입니다. 잠시 후 다시 조회하면 반영됩니다.")
+        return hist, _make_stock_info(symbol, hist)
     
-    # 1. 먼저 네이버 증권 시도 (한국 주식에 최적화)
+    # 캐시에 아직 없으면 네이버 증권으로 대체
     st.info(f"🇰🇷 네이버 증권으로 {symbol} 데이터 수집 시도 중...")
-    
     naver_result = get_naver_stock_data(symbol, period)
     if naver_result[0] is not None:
+        if fetcher.is_pending(symbol):
+            st.caption("🔄 Yahoo Finance 일봉을 백그라운드에서 수집 중입니다. 완료되면 실제 시세로 대체됩니다.")
         return naver_result
     
-    # 2. 네이버 증권 실패 시 Yahoo Finance API 시도 (백업)
-    st.warning("네이버 증권 실패, Yahoo Finance API 백업 시도...")
-    st.info(f"🐌 Yahoo Finance API로 {symbol} 데이터 수집 중... (시도 {retry_count}/3)")
-    
-    try:
-        # 극도로 다양한 User-Agent 및 환경 시뮬레이션
-        user_agents = [
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36 Edg/119.0.0.0',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
-            'Mozilla/5.0 (iPad; CPU OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
-            'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
-            'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/119.0'
-        ]
-        
-        # 시간대별 헤더 조합
-        current_hour = datetime.now().hour
-        accept_languages = [
-            'en-US,en;q=0.9,ko;q=0.8',
-            'ko-KR,ko;q=0.9,en;q=0.8',
-            'en-US,en;q=0.5',
-            'ko;q=0.9,en-US;q=0.8,en;q=0.7'
-        ]
-        
-        # 요청 전 긴 준비 (초기 대기)
-        prep_delay = random.uniform(30, 90)
-        st.info(f"🔄 새로운 요청 세션 준비 중... ({prep_delay:.1f}초)")
-        
-        # 준비 시간도 진행바로 표시
-        prep_progress = st.progress(0)
-        for i in range(int(prep_delay)):
-            time.sleep(1)
-            prep_progress.progress((i + 1) / prep_delay)
-        prep_progress.empty()
-        
-        # 완전히 새로운 세션 생성 (매번 재생성)
-        session = requests.Session()
-        
-        # 극도로 다양한 헤더 조합
-        selected_ua = random.choice(user_agents)
-        selected_lang = random.choice(accept_languages)
-        
-        # 브라우저별 헤더 차별화
-        if 'Chrome' in selected_ua:
-            accept_header = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8'
-        elif 'Firefox' in selected_ua:
-            accept_header = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-        elif 'Safari' in selected_ua:
-            accept_header = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        else:
-            accept_header = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-        
-        # 랜덤 헤더 조합
-        headers = {
-            'User-Agent': selected_ua,
-            'Accept': accept_header,
-            'Accept-Language': selected_lang,
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1',
-        }
-        
-        # 시간대별 추가 헤더
-        if 9 <= current_hour <= 18:  # 업무시간
-            headers['Sec-Ch-Ua-Platform'] = '"macOS"' if 'Mac' in selected_ua else '"Windows"'
-        
-        session.headers.update(headers)
-        st.info(f"🔄 새 세션 생성: {selected_ua[:50]}...")
-        
-        # yfinance Ticker 생성
-        stock = yf.Ticker(symbol, session=session)
-        
-        # 1. 히스토리 데이터 요청 (최우선)
-        st.info("📈 주가 히스토리 데이터 수집 중...")
-        hist = stock.history(period=period)
-        
-        # 요청 시간 기록
-        st.session_state.last_api_request = time.time()
-        
-        if hist.empty:
-            raise Exception("히스토리 데이터가 비어있습니다")
-        
-        # 최소 정보만 생성 (추가 API 요청 없음)
-        info = {
-            "symbol": symbol, 
-            "shortName": symbol.replace('.KS', ''),
-            "regularMarketPrice": float(hist['Close'].iloc[-1]) if not hist.empty else 0,
-            "currency": "KRW"
-        }
-        
-        current_price = info.get('regularMarketPrice', hist['Close'].iloc[-1] if not hist.empty else 0)
-        st.success(f"✅ Yahoo Finance API 성공: {symbol} (현재가: {current_price:,.0f}원)")
-        return hist, info
-        
-    except Exception as e:
-        error_msg = str(e)
-        st.error(f"Yahoo Finance API 실패: {error_msg}")
-        
-        # 재시도 로직 (지수적 백오프 - 매우 긴 대기)
-        if retry_count < 3:
-            failure_delay = 300 * retry_count  # 5분, 10분, 15분
-            st.error(f"💥 실패 후 극장기 대기: {failure_delay/60:.0f}분 후 재시도 ({retry_count + 1}/3)")
-            
-            # 실패 대기 시간 시각화
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i in range(failure_delay):
-                time.sleep(1)
-                progress_bar.progress((i + 1) / failure_delay)
-                remaining_mins = (failure_delay - i - 1) / 60
-                status_text.text(f"대기 중... {remaining_mins:.1f}분 남음")
-            
-            progress_bar.empty()
-            status_text.empty()
-            
-            return get_stock_data(symbol, period, retry_count + 1)
-        
-        # 모든 재시도 실패 시 실제 데이터 없음
-        st.error("❌ 모든 Yahoo Finance 시도 실패. 실제 데이터를 가져올 수 없습니다.")
-        st.warning("⚠️ 샘플 데이터는 사용하지 않습니다. 실제 데이터만으로 분석을 수행합니다.")
-        return None, None
+    coverage = fetcher.store.coverage(symbol)
+    if fetcher.is_pending(symbol):
+        st.warning(f"⏳ {symbol} 데이터를 백그라운드에서 수집 중입니다. 잠시 후 다시 시도해주세요.")
+    elif coverage and coverage['last_error']:
+        st.error(f"❌ {symbol} 데이터 수집 실패: {coverage['last_error']}")
+    st.warning("⚠️ 샘플 데이터는 사용하지 않습니다. 실제 데이터만으로 분석을 수행합니다.")
+    return None, None
 
 
 
@@ -2281,6 +2059,13 @@ def create_financial_dataframes_from_naver(financial_data, stock_code):
 def get_financial_statements(symbol, retry_count=1):
     """재무제표 가져오기 - 네이버 증권 + Perplexity AI 보충, Yahoo Finance 백업"""
     
+    # 0차: 공유 재무제표 캐시 (세션/재시작 간 유지)
+    store = market_data_cache.get_store()
+    cached = store.get_financials(symbol)
+    if cached is not None:
+        st.info("💾 저장된 재무제표를 사용합니다.")
+        return cached.get('income'), cached.get('balance'), cached.get('cash_flow')
+    
     # 회사명 추출 (symbol에서)
     company_name = symbol.replace('.KS', '').replace('.KQ', '')
     
@@ -2311,6 +2096,7 @@ def get_financial_statements(symbol, retry_count=1):
                 balance_sheet = ai_balance
                 
             st.success("✅ Perplexity AI 데이터 보충 완료!")
+            store.put_financials(symbol, {'income': income_stmt, 'balance': balance_sheet, 'cash_flow': cash_flow})
             return income_stmt, balance_sheet, cash_flow
         else:
             st.warning("⚠️ Perplexity AI 데이터 수집 실패, 기존 데이터 사용")
@@ -2322,21 +2108,8 @@ def get_financial_statements(symbol, retry_count=1):
         st.warning("⚠️ 기존 데이터 부족, Yahoo Finance 백업 시도...")
         
         try:
-            # 마지막 요청으로부터 긴 대기 시간
-            if 'last_api_request' in st.session_state:
-                time_since_last = time.time() - st.session_state.last_api_request
-                required_wait = random.uniform(20, 40)  # 20-40초 대기
-                
-                if time_since_last < required_wait:
-                    wait_time = required_wait - time_since_last
-                    st.warning(f"🛡️ Yahoo Finance 안전 로드를 위해 {wait_time:.1f}초 대기 중...")
-                    
-                    # 진행바로 시각화
-                    progress_bar = st.progress(0)
-                    for i in range(int(wait_time)):
-                        time.sleep(1)
-                        progress_bar.progress((i + 1) / wait_time)
-                    progress_bar.empty()
+            # 요청 간격은 모든 세션이 공유하는 토큰 버킷으로 제한
+            bucket = market_data_cache.get_fetcher().bucket
             
             # 보수적 세션 설정
             user_agents = [
@@ -2360,12 +2133,11 @@ def get_financial_statements(symbol, retry_count=1):
             
             # 손익계산서
             st.info("📈 Yahoo Finance 손익계산서 수집 중...")
-            prep_delay = random.uniform(10, 20)
-            time.sleep(prep_delay)
             
             try:
+                if not bucket.acquire(timeout=FIRST_FETCH_WAIT):
+                    raise Exception("요청 한도 초과 - 잠시 후 다시 시도해주세요")
                 yf_income_stmt = stock.income_stmt
-                st.session_state.last_api_request = time.time()
                 
                 # 데이터 검증
                 if yf_income_stmt is not None and not yf_income_stmt.empty:
@@ -2379,16 +2151,12 @@ def get_financial_statements(symbol, retry_count=1):
                 st.warning(f"❌ Yahoo Finance 손익계산서 수집 실패: {str(e)}")
                 st.info(f"🔍 오류 상세: {type(e).__name__}")
             
-            # 요청 간 긴 지연
-            inter_delay = random.uniform(15, 30)
-            st.info(f"⏳ 안전한 간격 유지... ({inter_delay:.1f}초)")
-            time.sleep(inter_delay)
-            
             # 재무상태표
             st.info("📊 Yahoo Finance 재무상태표 수집 중...")
             try:
+                if not bucket.acquire(timeout=FIRST_FETCH_WAIT):
+                    raise Exception("요청 한도 초과 - 잠시 후 다시 시도해주세요")
                 yf_balance_sheet = stock.balance_sheet
-                st.session_state.last_api_request = time.time()
                 
                 # 데이터 검증
                 if yf_balance_sheet is not None and not yf_balance_sheet.empty:
@@ -2413,6 +2181,7 @@ def get_financial_statements(symbol, retry_count=1):
             
             if success_count > 0:
                 st.success(f"✅ Yahoo Finance 재무제표 수집 완료! ({success_count}/2개 성공)")
+                store.put_financials(symbol, {'income': income_stmt, 'balance': balance_sheet, 'cash_flow': cash_flow})
                 return income_stmt, balance_sheet, cash_flow
             else:
                 st.error("❌ Yahoo Finance도 모든 재무제표 수집 실패")
@@ -2694,33 +2463,29 @@ def format_currency_krw(amount):
         return f"{amount:,.0f}원"
 
 # 주가 예측 관련 함수들
-def random_walk_prediction(prices, days=252):
-    """Random Walk 모델을 사용한 주가 예측"""
+def random_walk_prediction(prices, days=252, n_paths=price_simulation.DEFAULT_PATHS, method='gbm',
+                           seed=None, percentiles=price_simulation.DEFAULT_PERCENTILES):
+    """Random Walk 모델을 사용한 주가 예측 - Monte-Carlo 경로 분포 (GBM / 부트스트랩)"""
     try:
         # 수익률 계산
-        returns = np.diff(np.log(prices))
+        returns = price_simulation.log_returns(prices)
         
         # 평균 수익률과 변동성
         mean_return = np.mean(returns)
         volatility = np.std(returns)
         
-        # 예측
-        last_price = prices[-1]
-        predictions = [last_price]
-        
-        for i in range(days):
-            # 랜덤 워크: S(t+1) = S(t) * exp(μ*dt + σ*√dt*Z)
-            random_shock = np.random.normal(0, 1)
-            next_price = predictions[-1] * np.exp(mean_return + volatility * random_shock)
-            predictions.append(next_price)
+        # 랜덤 워크: S(t+1) = S(t) * exp(μ*dt + σ*√dt*Z) 를 n_paths개 동시에 생성
+        paths = price_simulation.simulate_returns(prices, days, n_paths, method=method, seed=seed)
+        simulation = price_simulation.summarize(paths, prices[-1], percentiles)
         
-        return predictions[1:], mean_return, volatility
+        return simulation['median'].tolist(), mean_return, volatility, simulation
     except Exception as e:
         st.error(f"Random Walk 예측 오류: {str(e)}")
-        return None, None, None
+        return None, None, None, None
 
-def moving_average_prediction(prices, window=20, days=252):
-    """이동평균 기반 주가 예측"""
+def moving_average_prediction(prices, window=20, days=252, n_paths=price_simulation.DEFAULT_PATHS,
+                              seed=None, percentiles=price_simulation.DEFAULT_PERCENTILES):
+    """이동평균 기반 주가 예측 - 추세선 + 잡음 경로 분포"""
     try:
         # 이동평균 계산
         ma = pd.Series(prices).rolling(window=window).mean()
@@ -2730,22 +2495,16 @@ def moving_average_prediction(prices, window=20, days=252):
         x = np.arange(len(recent_ma))
         slope, intercept, _, _, _ = stats.linregress(x, recent_ma)
         
-        # 예측
-        last_price = prices[-1]
+        # 예측: 이동평균 추세 + 작은 노이즈
         last_ma = ma.iloc[-1]
+        center = last_ma + slope * np.arange(1, days + 1)
+        paths = price_simulation.simulate_around(center, np.std(prices) * 0.1, n_paths, seed=seed)
+        simulation = price_simulation.summarize(paths, prices[-1], percentiles)
         
-        predictions = []
-        for i in range(1, days + 1):
-            # 이동평균 추세 + 작은 노이즈
-            predicted_ma = last_ma + slope * i
-            noise = np.random.normal(0, np.std(prices) * 0.1)
-            predicted_price = predicted_ma + noise
-            predictions.append(predicted_price)
-        
-        return predictions, slope, last_ma
+        return simulation['median'].tolist(), slope, last_ma, simulation
     except Exception as e:
         st.error(f"Moving Average 예측 오류: {str(e)}")
-        return None, None, None
+        return None, None, None, None
 
 def linear_regression_prediction(prices, days=252):
     """선형 회귀 모델을 사용한 주가 예측"""
@@ -2770,33 +2529,26 @@ def linear_regression_prediction(prices, days=252):
         st.error(f"Linear Regression 예측 오류: {str(e)}")
         return None, None, None
 
-def exponential_smoothing_prediction(prices, alpha=0.3, days=252):
-    """지수평활법을 사용한 주가 예측"""
+def exponential_smoothing_prediction(prices, alpha=0.3, days=252, n_paths=price_simulation.DEFAULT_PATHS,
+                                     seed=None, percentiles=price_simulation.DEFAULT_PERCENTILES):
+    """지수평활법을 사용한 주가 예측 - 평활값 추세 + 잡음 경로 분포"""
     try:
-        # 단순 지수평활
-        smoothed = [prices[0]]
-        
-        for i in range(1, len(prices)):
-            smoothed_value = alpha * prices[i] + (1 - alpha) * smoothed[-1]
-            smoothed.append(smoothed_value)
+        # 단순 지수평활 (s0 = x0, s_t = α·x_t + (1-α)·s_{t-1})
+        smoothed = pd.Series(prices, dtype=float).ewm(alpha=alpha, adjust=False).mean().values
         
         # 추세 계산
         recent_trend = np.mean(np.diff(smoothed[-10:]))
         
-        # 예측
+        # 예측: 지수평활값 + 추세 + 노이즈
         last_smoothed = smoothed[-1]
-        predictions = []
-        
-        for i in range(1, days + 1):
-            # 지수평활값 + 추세 + 노이즈
-            noise = np.random.normal(0, np.std(prices) * 0.05)
-            predicted_price = last_smoothed + recent_trend * i + noise
-            predictions.append(predicted_price)
+        center = last_smoothed + recent_trend * np.arange(1, days + 1)
+        paths = price_simulation.simulate_around(center, np.std(prices) * 0.05, n_paths, seed=seed)
+        simulation = price_simulation.summarize(paths, prices[-1], percentiles)
         
-        return predictions, alpha, recent_trend
+        return simulation['median'].tolist(), alpha, recent_trend, simulation
     except Exception as e:
         st.error(f"Exponential Smoothing 예측 오류: {str(e)}")
-        return None, None, None
+        return None, None, None, None
 
 def simple_arima_prediction(prices, days=252):
     """간단한 ARIMA 스타일 예측 (statsmodels 없이)"""
@@ -2856,8 +2608,8 @@ def calculate_prediction_metrics(actual, predicted):
         st.error(f"성능 지표 계산 오류: {str(e)}")
         return None
 
-def create_prediction_chart(historical_data, predictions_dict, company_name):
-    """예측 결과 차트 생성"""
+def create_prediction_chart(historical_data, predictions_dict, company_name, simulations_dict=None):
+    """예측 결과 차트 생성 (시뮬레이션 모델은 백분위 팬 밴드 포함)"""
     try:
         fig = go.Figure()
         
@@ -2874,14 +2626,41 @@ def create_prediction_chart(historical_data, predictions_dict, company_name):
         last_date = historical_data.index[-1]
         last_price = historical_data['Close'].iloc[-1]
         
-        # 미래 날짜 생성 (252 거래일 = 약 1년)
-        future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=252, freq='B')
+        # 미래 날짜 생성 (예측 기간만큼의 거래일)
+        horizon = max((len(p) for p in predictions_dict.values() if p is not None), default=252)
+        future_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon, freq='B')
         
         # 각 모델의 예측 결과
         colors = ['red', 'green', 'orange', 'purple', 'brown']
+        fill_colors = ['255,0,0', '0,128,0', '255,165,0', '128,0,128', '165,42,42']
+        simulations_dict = simulations_dict or {}
         
         for i, (model_name, predictions) in enumerate(predictions_dict.items()):
             if predictions is not None:
+                # 시뮬레이션 분포 팬 밴드 (바깥: 신뢰구간, 안쪽: 사분위)
+                simulation = simulations_dict.get(model_name)
+                if simulation is not None:
+                    percentiles = sorted(simulation['bands'])
+                    for (low, high), opacity in [((percentiles[0], percentiles[-1]), 0.12), ((percentiles[1], percentiles[-2]), 0.25)]:
+                        fig.add_trace(go.Scatter(
+                            x=future_dates,
+                            y=simulation['bands'][high],
+                            mode='lines',
+                            line=dict(width=0),
+                            showlegend=False,
+                            hoverinfo='skip'
+                        ))
+                        fig.add_trace(go.Scatter(
+                            x=future_dates,
+                            y=simulation['bands'][low],
+                            mode='lines',
+                            line=dict(width=0),
+                            fill='tonexty',
+                            fillcolor=f"rgba({fill_colors[i % len(fill_colors)]},{opacity})",
+                            name=f'{model_name} {low:g}~{high:g}% 구간',
+                            hoverinfo='skip'
+                        ))
+                
                 # 연결점 추가 (마지막 실제 가격과 첫 예측 가격 연결)
                 connection_x = [last_date, future_dates[0]]
                 connection_y = [last_price, predictions[0]]
@@ -2904,7 +2683,7 @@ def create_prediction_chart(historical_data, predictions_dict, company_name):
                 ))
         
         fig.update_layout(
-            title=f"{company_name} - 1년 주가 예측",
+            title=f"{company_name} - {horizon}거래일 주가 예측",
             xaxis_title="날짜",
             yaxis_title="주가 (원)",
             hovermode='x unified',
@@ -4460,6 +4239,28 @@ with tab6:
                 
             with col3:
                 confidence_level = st.slider("신뢰구간 (%)", 80, 99, 95, 1, help="예측 신뢰구간")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                n_paths = st.select_slider(
+                    "시뮬레이션 경로 수",
+                    options=[1000, 2000, 5000, 10000, 20000],
+                    value=price_simulation.DEFAULT_PATHS,
+                    help="Random Walk / 이동평균 / 지수평활 모델의 Monte-Carlo 경로 수"
+                )
+            
+            with col2:
+                simulation_method = st.selectbox(
+                    "Random Walk 방식",
+                    ["gbm", "bootstrap"],
+                    format_func=lambda m: "GBM (정규 수익률)" if m == "gbm" else "부트스트랩 (과거 수익률 재추출)",
+                    help="부트스트랩은 과거 수익률 분포의 두꺼운 꼬리를 그대로 반영합니다"
+                )
+            
+            with col3:
+                simulation_seed = st.number_input("난수 시드 (0 = 매번 다름)", min_value=0, value=42, step=1,
+                                                  help="같은 시드면 같은 시뮬레이션 결과를 재현합니다")
         
         # 예측 실행
         if st.button("🚀 주가 예측 실행", type="primary"):
@@ -4488,12 +4289,19 @@ with tab6:
                         
                         # 각 모델별 예측 실행
                         predictions_dict = {}
+                        simulations_dict = {}
                         model_info = {}
                         
+                        seed = int(simulation_seed) or None
+                        percentiles = price_simulation.fan_percentiles(confidence_level)
+                        
                         if "Random Walk (랜덤 워크)" in selected_models:
-                            pred, mean_ret, vol = random_walk_prediction(prices, prediction_days)
+                            pred, mean_ret, vol, simulation = random_walk_prediction(
+                                prices, prediction_days, n_paths, simulation_method, seed, percentiles
+                            )
                             if pred is not None:
                                 predictions_dict["Random Walk"] = pred
+                                simulations_dict["Random Walk"] = simulation
                                 model_info["Random Walk"] = {
                                     "평균 수익률": f"{mean_ret*252:.2%} (연율)",
                                     "변동성": f"{vol*np.sqrt(252):.2%} (연율)"
@@ -4509,18 +4317,24 @@ with tab6:
                                 }
                         
                         if "Moving Average (이동평균)" in selected_models:
-                            pred, slope, last_ma = moving_average_prediction(prices, ma_window, prediction_days)
+                            pred, slope, last_ma, simulation = moving_average_prediction(
+                                prices, ma_window, prediction_days, n_paths, seed, percentiles
+                            )
                             if pred is not None:
                                 predictions_dict["Moving Average"] = pred
+                                simulations_dict["Moving Average"] = simulation
                                 model_info["Moving Average"] = {
                                     "MA 윈도우": f"{ma_window}일",
                                     "추세 기울기": f"{slope:.2f}원/일"
                                 }
                         
                         if "Exponential Smoothing (지수평활)" in selected_models:
-                            pred, alpha_used, trend = exponential_smoothing_prediction(prices, alpha, prediction_days)
+                            pred, alpha_used, trend, simulation = exponential_smoothing_prediction(
+                                prices, alpha, prediction_days, n_paths, seed, percentiles
+                            )
                             if pred is not None:
                                 predictions_dict["Exponential Smoothing"] = pred
+                                simulations_dict["Exponential Smoothing"] = simulation
                                 model_info["Exponential Smoothing"] = {
                                     "Alpha": f"{alpha_used:.1f}",
                                     "추세": f"{trend:.2f}원/일"
@@ -4538,10 +4352,30 @@ with tab6:
                         # 결과 표시
                         if predictions_dict:
                             # 예측 차트
-                            fig = create_prediction_chart(hist_data, predictions_dict, prediction_company)
+                            fig = create_prediction_chart(hist_data, predictions_dict, prediction_company, simulations_dict)
                             if fig:
                                 st.plotly_chart(fig, use_container_width=True)
                             
+                            # 시뮬레이션 분포 요약 (만기 시점 기준)
+                            if simulations_dict:
+                                st.subheader(f"🎲 시뮬레이션 분포 및 VaR ({n_paths:,}개 경로)")
+                                low_pct, high_pct = percentiles[0], percentiles[-1]
+                                risk_data = []
+                                for model_name, simulation in simulations_dict.items():
+                                    risk_data.append({
+                                        "모델": model_name,
+                                        f"하단 {low_pct:g}%": f"{simulation['bands'][low_pct][-1]:,.0f}원",
+                                        "중앙값": f"{simulation['median'][-1]:,.0f}원",
+                                        f"상단 {high_pct:g}%": f"{simulation['bands'][high_pct][-1]:,.0f}원",
+                                        "상승 확률": f"{simulation['prob_up']:.1%}",
+                                        "VaR 95%": f"{simulation['var'][95]:.1%}",
+                                        "CVaR 95%": f"{simulation['cvar'][95]:.1%}",
+                                        "VaR 99%": f"{simulation['var'][99]:.1%}"
+                                    })
+                                st.dataframe(pd.DataFrame(risk_data), use_container_width=True, hide_index=True)
+                                st.caption(f"VaR/CVaR는 {prediction_days}거래일 후 현재가 대비 손실률입니다. "
+                                           f"예측가는 경로 분포의 중앙값입니다.")
+                            
                             # 예측 요약 테이블
                             st.subheader("📊 예측 요약")
                             
@@ -4623,7 +4457,8 @@ with tab6:
                                 st.markdown("""
                                 **🎲 Random Walk (랜덤 워크)**
                                 - 주가가 무작위로 움직인다는 가정
-                                - 과거 수익률의 평균과 변동성을 이용한 확률적 예측
+                                - 과거 수익률의 평균과 변동성(GBM) 또는 과거 수익률 재추출(부트스트랩)로 수천 개 경로를 시뮬레이션
+                                - 경로 분포의 중앙값을 예측가로, 백분위 밴드와 VaR로 위험 범위를 제시
                                 - 효율적 시장 가설의 기본 모델
                                 
                                 **📈 Linear Regression (선형 회귀)**
@@ -4665,17 +4500,13 @@ with st.sidebar:
     # 큰 버튼으로 만들기
     if st.button("🗑️ 캐시 초기화 (여기!)", type="primary", use_container_width=True, help="API 에러 시 이 버튼을 클릭하세요!"):
         st.cache_data.clear()
-        # 세션 상태도 초기화
-        if 'last_api_request' in st.session_state:
-            del st.session_state.last_api_request
         st.success("✅ 캐시가 초기화되었습니다!")
         st.success("🔄 페이지를 새로고침하거나 다시 시도해보세요!")
         st.rerun()
     
-    if st.button("⏰ API 대기시간 리셋", use_container_width=True, help="API 요청 간격을 리셋합니다"):
-        if 'last_api_request' in st.session_state:
-            del st.session_state.last_api_request
-        st.success("✅ API 대기시간이 리셋되었습니다!")
+    if st.button("💾 저장된 시세/재무제표 삭제", use_container_width=True, help="디스크에 저장된 시세와 재무제표를 모두 삭제하고 다시 수집합니다"):
+        market_data_cache.get_store().clear()
+        st.success("✅ 저장된 시세/재무제표가 삭제되었습니다!")
         st.rerun()
     
     st.markdown("---")
@@ -4691,14 +4522,14 @@ with st.sidebar:
         - 캐시를 활용하여 요청 수 최소화
         """)
     
-    # Rate Limit 상태 표시
-    if 'last_api_request' in st.session_state:
-        time_since_last = time.time() - st.session_state.last_api_request
-        if time_since_last < 60:  # 1분 이내
-            st.warning(f"⏰ 마지막 API 요청: {time_since_last:.0f}초 전")
-            st.info("💡 API 안정성을 위해 요청 간격을 조절하고 있습니다.")
-        else:
-            st.success("✅ API 상태 안정")
+    # 시세 캐시/수집기 상태 표시
+    fetcher_stats = market_data_cache.get_fetcher().stats()
+    store_stats = market_data_cache.get_store().stats()
+    st.caption(f"💾 저장된 시세: {store_stats['symbols']}종목 / {store_stats['rows']:,}일, 재무제표 {store_stats['financials']}건")
+    if fetcher_stats['pending']:
+        st.warning(f"🔄 백그라운드 수집 대기: {fetcher_stats['pending']}종목 (가용 요청 {fetcher_stats['tokens']})")
+    else:
+        st.success("✅ API 상태 안정")
     
     # 실제 데이터 전용 모드 안내
     st.markdown("**✅ 실제 데이터 전용**")
@@ -1,13 +1,15 @@
 import streamlit as st
 import os
 import tempfile
+import shutil
 import base64
 from datetime import datetime
 from openai import OpenAI
 from pydub import AudioSegment
 import json
 from dotenv import load_dotenv
-import mysql.connector
+import db_pool
+import transcription_pipeline
 import google.generativeai as genai
 import anthropic  # Anthropic 라이브러리 추가
 
@@ -40,7 +42,7 @@ anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
 def create_tables():
     """데이터베이스 테이블 생성"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -72,7 +74,7 @@ def create_tables():
 def save_meeting_record(title, participants, audio_path, full_text, summary, action_items):
     """회의 기록 저장"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -107,7 +109,7 @@ def save_meeting_record(title, participants, audio_path, full_text, summary, act
 def get_meeting_records(search_query=None):
     """회의 기록 조회"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -135,20 +137,6 @@ def get_meeting_records(search_query=None):
         st.error(f"데이터베이스 조회 중 오류 발생: {str(e)}")
         return []
 
-def transcribe_audio(audio_file):
-    """음성을 텍스트로 변환"""
-    try:
-        with open(audio_file, "rb") as audio:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio,
-                language="ko"
-            )
-        return transcript.text
-    except Exception as e:
-        st.error(f"음성 변환 중 오류가 발생했습니다: {str(e)}")
-        return None
-
 def split_audio(audio_file, chunk_duration=300):
     """긴 오디오 파일을 작은 청크로 분할"""
     try:
@@ -177,172 +165,43 @@ def split_audio(audio_file, chunk_duration=300):
         return None
 
 def transcribe_large_audio(audio_file):
-    """큰 오디오 파일을 분할하여 텍스트로 변환"""
+    """오디오 파일을 무음 구간 기준으로 분할하여 동시에 텍스트로 변환 (결과는 오디오 해시로 캐시)"""
+    # 진행 상태 표시
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    def on_progress(done, total):
+        progress_bar.progress(done / total)
+        status_text.text(f"구간 변환 중... ({done}/{total})")
+    
     try:
-        # 파일 크기 확인
-        file_size = os.path.getsize(audio_file) / (1024 * 1024)  # MB 단위
+        result = transcription_pipeline.transcribe_file(audio_file, language="ko", on_progress=on_progress)
         
-        if file_size <= 24:  # 25MB 미만으로 안전하게 설정
-            # 작은 파일은 기존 방식으로 처리
-            return transcribe_audio(audio_file)
+        if result['cached']:
+            st.info("이전에 변환한 오디오입니다. 저장된 변환 결과를 사용합니다.")
+        elif result['chunks'] > 1:
+            st.info(f"오디오를 {result['chunks']}개 구간으로 나눠 동시에 변환했습니다.")
         
-        # 파일 확장자 확인
-        file_extension = os.path.splitext(audio_file)[1].lower()
-        
-        # 큰 파일은 분할 처리
-        st.warning(f"파일 크기가 {file_size:.2f}MB로 OpenAI 제한(25MB)을 초과합니다. 파일을 분할하여 처리합니다.")
+        if result['failed']:
+            failed_ranges = ', '.join(
+                f"{transcription_pipeline.format_timestamp(start)}~{transcription_pipeline.format_timestamp(end)}"
+                for start, end in result['failed']
+            )
+            st.warning(f"일부 구간 변환에 실패하여 제외했습니다: {failed_ranges}")
         
-        # 진행 상태 표시
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        return result['text']
         
-        try:
-            from pydub import AudioSegment
-            
-            # 오디오 파일 로드 시도
-            try:
-                if file_extension == '.m4a':
-                    audio = AudioSegment.from_file(audio_file, format="m4a")
-                elif file_extension == '.wav':
-                    audio = AudioSegment.from_file(audio_file, format="wav")
-                else:
-                    audio = AudioSegment.from_file(audio_file)
-            except Exception as load_error:
-                # FFmpeg 오류 발생 시 명확한 메시지 표시 후 종료
-                if "ffprobe" in str(load_error).lower() or "ffmpeg" in str(load_error).lower():
-                    st.error("FFmpeg가 설치되어 있지 않아 오디오 파일을 처리할 수 없습니다.")
-                    st.info("FFmpeg를 설치하거나 25MB 이하의 WAV 파일로 변환한 후 다시 시도해주세요.")
-                    progress_bar.empty()
-                    status_text.empty()
-                    return None
-                else:
-                    # 기타 오류 재발생
-                    raise load_error
-            
-            # 오디오 압축 (모노로 변환, 샘플레이트 낮춤)
-            compressed_audio = audio.set_channels(1).set_frame_rate(16000)
-            
-            # 오디오 길이 확인
-            duration_ms = len(compressed_audio)
-            
-            # 필요한 청크 수 계산 (파일 크기 기반)
-            # 원본 파일 크기를 기준으로 청크 수 결정 (안전하게 10MB 단위로 분할)
-            chunk_size_target = 10  # MB (안전하게 10MB로 설정)
-            num_chunks = max(5, int(file_size / chunk_size_target) + 1)
-            
-            st.info(f"파일 크기: {file_size:.1f}MB, 분할할 청크 수: {num_chunks}개")
-            status_text.text(f"파일을 {num_chunks}개 청크로 분할합니다.")
-            
-            # 청크 지속 시간 계산
-            chunk_duration = duration_ms // num_chunks
-            
-            # 청크 분할 및 처리
-            transcripts = []
-            for i in range(num_chunks):
-                start_ms = i * chunk_duration
-                end_ms = min((i + 1) * chunk_duration, duration_ms)
-                
-                chunk = compressed_audio[start_ms:end_ms]
-                
-                status_text.text(f"청크 변환 중... ({i+1}/{num_chunks})")
-                
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as chunk_file:
-                    # 추가 압축 설정 (비트레이트 낮춤)
-                    chunk.export(chunk_file.name, format='wav', 
-                                parameters=["-ac", "1", "-ar", "16000", "-b:a", "32k"])
-                    
-                    # 청크 크기 확인
-                    chunk_size = os.path.getsize(chunk_file.name) / (1024 * 1024)
-                    
-                    # 청크가 여전히 너무 크면 더 작게 분할
-                    if chunk_size > 24:
-                        st.warning(f"청크 {i+1} 크기가 {chunk_size:.1f}MB로 여전히 큽니다. 추가 분할합니다.")
-                        
-                        # 임시 파일 삭제
-                        os.unlink(chunk_file.name)
-                        
-                        # 청크를 2개로 추가 분할
-                        sub_duration = len(chunk)
-                        half_duration = sub_duration // 2
-                        
-                        # 첫 번째 하위 청크
-                        sub_chunk1 = chunk[:half_duration]
-                        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as sub_file1:
-                            sub_chunk1.export(sub_file1.name, format='wav', 
-                                            parameters=["-ac", "1", "-ar", "16000", "-b:a", "24k"])
-                            
-                            sub_size1 = os.path.getsize(sub_file1.name) / (1024 * 1024)
-                            st.info(f"하위 청크 {i+1}.1 크기: {sub_size1:.1f}MB")
-                            
-                            if sub_size1 <= 24:
-                                # 하위 청크 변환
-                                sub_transcript1 = transcribe_audio(sub_file1.name)
-                                if sub_transcript1:
-                                    transcripts.append(sub_transcript1)
-                            else:
-                                st.error(f"하위 청크 {i+1}.1도 너무 큽니다({sub_size1:.1f}MB). 이 부분은 건너뜁니다.")
-                            
-                            os.unlink(sub_file1.name)
-                        
-                        # 두 번째 하위 청크
-                        sub_chunk2 = chunk[half_duration:]
-                        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as sub_file2:
-                            sub_chunk2.export(sub_file2.name, format='wav', 
-                                            parameters=["-ac", "1", "-ar", "16000", "-b:a", "24k"])
-                            
-                            sub_size2 = os.path.getsize(sub_file2.name) / (1024 * 1024)
-                            st.info(f"하위 청크 {i+1}.2 크기: {sub_size2:.1f}MB")
-                            
-                            if sub_size2 <= 24:
-                                # 하위 청크 변환
-                                sub_transcript2 = transcribe_audio(sub_file2.name)
-                                if sub_transcript2:
-                                    transcripts.append(sub_transcript2)
-                            else:
-                                st.error(f"하위 청크 {i+1}.2도 너무 큽니다({sub_size2:.1f}MB). 이 부분은 건너뜁니다.")
-                            
-                            os.unlink(sub_file2.name)
-                    else:
-                        # 청크 크기 표시
-                        st.info(f"청크 {i+1} 크기: {chunk_size:.1f}MB")
-                        
-                        # 청크 변환
-                        chunk_transcript = transcribe_audio(chunk_file.name)
-                        if chunk_transcript:
-                            transcripts.append(chunk_transcript)
-                        
-                        # 임시 파일 삭제
-                        os.unlink(chunk_file.name)
-                
-                # 진행률 업데이트
-                progress_bar.progress((i + 1) / num_chunks)
-            
-            # 모든 텍스트 결합
-            status_text.text("텍스트 결합 중...")
-            full_transcript = ' '.join(transcripts)
-            
-            progress_bar.progress(100)
-            status_text.empty()
-            progress_bar.empty()
-            
-            return full_transcript
-            
-        except Exception as e:
-            st.error(f"오디오 처리 중 오류 발생: {str(e)}")
-            
-            # FFmpeg 관련 오류인 경우
-            if "ffprobe" in str(e).lower() or "ffmpeg" in str(e).lower():
-                st.warning("FFmpeg가 설치되어 있지 않아 오디오 파일을 처리할 수 없습니다.")
-                st.info("FFmpeg를 설치하거나 25MB 이하의 WAV 파일로 변환한 후 다시 시도해주세요.")
-            
-            # 진행 표시 제거
-            progress_bar.empty()
-            status_text.empty()
-            return None
-            
     except Exception as e:
         st.error(f"음성 변환 중 오류 발생: {str(e)}")
+        
+        # FFmpeg 관련 오류인 경우
+        if "ffprobe" in str(e).lower() or "ffmpeg" in str(e).lower():
+            st.info("FFmpeg를 설치하거나 25MB 이하의 파일로 변환한 후 다시 시도해주세요.")
         return None
+    finally:
+        progress_bar.empty()
+        status_text.empty()
+
 
 def summarize_text(text, model_choice=None, reference_notes=None):
     """텍스트 요약 및 Action Items 추출"""
@@ -612,7 +471,7 @@ def generate_markdown(title, date, participants, summary, action_items, full_tex
 def delete_meeting_record(meeting_id):
     """회의 기록 삭제"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -792,7 +651,8 @@ def main():
                         if file_extension in ['m4a', 'wav']:
                             # 음성 파일 처리
                             with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as tmp_file:
-                                tmp_file.write(uploaded_file.getvalue())
+                                uploaded_file.seek(0)
+                                shutil.copyfileobj(uploaded_file, tmp_file)
                                 temp_path = tmp_file.name
                             with st.spinner(f"{file_extension.upper()} 파일을 텍스트로 변환 중..."):
                                 text = transcribe_large_audio(temp_path)
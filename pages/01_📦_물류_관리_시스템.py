@@ -1,5 +1,7 @@
 import streamlit as st
-import mysql.connector
+import db_pool
+import inventory_ledger
+import lead_time_facts
 import pandas as pd
 from datetime import datetime, date, timedelta
 import os
@@ -7,8 +9,6 @@ from dotenv import load_dotenv
 import plotly.express as px
 import plotly.graph_objects as go
 import time
-import numpy as np
-from scipy import stats
 
 # 환경 변수 로드
 load_dotenv()
@@ -22,7 +22,7 @@ st.set_page_config(
 
 # 데이터베이스 연결
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         host=os.getenv('SQL_HOST'),
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
@@ -32,13 +32,13 @@ def connect_to_db():
 
 # --- 재고 관련 기본 함수들 ---
 def get_stock(product_id):
-    """제품의 현재 재고 조회"""
+    """제품의 현재 재고 조회 (재고는 원장 기준, 인증 정보는 inventory_logistics)"""
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
+        stock = inventory_ledger.stock_levels(conn, [product_id]).get(product_id, 0)
         cursor.execute("""
-            SELECT COALESCE(stock, 0) as stock, 
-                   is_certified, 
+            SELECT is_certified, 
                    certificate_number
             FROM inventory_logistics 
             WHERE product_id = %s
@@ -47,11 +47,11 @@ def get_stock(product_id):
         # 결과를 명시적으로 읽고 반환
         if result:
             return {
-                'stock': int(result['stock']),
+                'stock': stock,
                 'is_certified': bool(result['is_certified']),
                 'certificate_number': result['certificate_number']
             }
-        return {'stock': 0, 'is_certified': False, 'certificate_number': None}
+        return {'stock': stock, 'is_certified': False, 'certificate_number': None}
     finally:
         # 커서를 닫기 전에 모든 결과를 읽었는지 확인
         while cursor.nextset():
@@ -60,30 +60,14 @@ def get_stock(product_id):
         conn.close()
 
 def update_stock(product_id, quantity_change, change_type, reference_number, notes='', destination=''):
-    """재고 업데이트 및 이력 기록"""
+    """재고 원장에 변동 기록"""
     conn = connect_to_db()
     cursor = conn.cursor()
     try:
-        # 1. 재고 업데이트
-        cursor.execute("""
-            INSERT INTO inventory_logistics 
-            (product_id, stock, is_certified)
-            VALUES (%s, %s, TRUE)
-            ON DUPLICATE KEY UPDATE 
-            stock = stock + %s
-        """, (product_id, quantity_change, quantity_change))
-        
-        # 2. 재고 이력 기록
-        cursor.execute("""
-            INSERT INTO inventory_transactions 
-            (product_id, change_type, quantity, 
-             destination, notes, reference_number, date)
-            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-        """, (
-            product_id, change_type, quantity_change,
-            destination, notes, reference_number
-        ))
-        
+        inventory_ledger.record_change(
+            cursor, product_id, change_type, quantity_change,
+            reference_number, notes, destination
+        )
         conn.commit()
         return True
     except Exception as e:
@@ -149,40 +133,27 @@ def get_suppliers():
         conn.close()
 
 def get_products(supplier_id=None):
-    """제품 목록 조회"""
+    """제품 목록 조회 (현재 재고는 원장 기준)"""
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
+        query = """
+            SELECT p.product_id, p.supplier_id, p.model_name, p.moq, p.lead_time, p.notes, p.created_at, p.updated_at, s.supplier_name,
+                   i.is_certified, 
+                   i.certificate_number
+            FROM products_logistics p
+            JOIN suppliers s ON p.supplier_id = s.supplier_id
+            LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
+        """
         if supplier_id:
-            cursor.execute("""
-                SELECT p.product_id, p.supplier_id, p.model_name, p.moq, p.lead_time, p.notes, p.created_at, p.updated_at, s.supplier_name,
-                       COALESCE(i.stock, 0) as current_stock,
-                       i.is_certified, 
-                       i.certificate_number
-                FROM products_logistics p
-                JOIN suppliers s ON p.supplier_id = s.supplier_id
-                LEFT JOIN (
-                    SELECT product_id, stock, is_certified, certificate_number
-                    FROM inventory_logistics
-                ) i ON p.product_id = i.product_id
-                WHERE p.supplier_id = %s 
-                ORDER BY p.product_id
-            """, (supplier_id,))
+            cursor.execute(query + " WHERE p.supplier_id = %s ORDER BY p.product_id", (supplier_id,))
         else:
-            cursor.execute("""
-                SELECT p.product_id, p.supplier_id, p.model_name, p.moq, p.lead_time, p.notes, p.created_at, p.updated_at, s.supplier_name,
-                       COALESCE(i.stock, 0) as current_stock,
-                       i.is_certified, 
-                       i.certificate_number
-                FROM products_logistics p
-                JOIN suppliers s ON p.supplier_id = s.supplier_id
-                LEFT JOIN (
-                    SELECT product_id, stock, is_certified, certificate_number
-                    FROM inventory_logistics
-                ) i ON p.product_id = i.product_id
-                ORDER BY p.product_id
-            """)
-        return cursor.fetchall()
+            cursor.execute(query + " ORDER BY p.product_id")
+        products = cursor.fetchall()
+        levels = inventory_ledger.stock_levels(conn)
+        for product in products:
+            product['current_stock'] = levels.get(product['product_id'], 0)
+        return products
     finally:
         cursor.close()
         conn.close()
@@ -301,109 +272,129 @@ def get_pi_by_number(pi_number):
         cursor.close()
         conn.close()
 
-def create_pi(pi_data, items_data):
-    """PI 생성 또는 업데이트"""
+# PI/CI 항목 일괄 쓰기 시 한 문장에 넣는 최대 행 수
+BULK_WRITE_BATCH_SIZE = 500
+
+PI_HEADER_COLUMNS = [
+    'pi_number', 'supplier_id', 'issue_date', 'expected_delivery_date',
+    'payment_terms', 'shipping_terms', 'project_name', 'notes'
+]
+
+def _bulk_insert(cursor, table, columns, rows, on_duplicate=None):
+    """다중 행 INSERT (BULK_WRITE_BATCH_SIZE 행씩 한 문장으로 실행)"""
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    for start in range(0, len(rows), BULK_WRITE_BATCH_SIZE):
+        batch = rows[start:start + BULK_WRITE_BATCH_SIZE]
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([placeholders] * len(batch))
+        if on_duplicate:
+            query += " ON DUPLICATE KEY UPDATE " + on_duplicate
+        cursor.execute(query, [value for row in batch for value in row])
+
+def _upsert_pi_headers(cursor, pi_list):
+    """PI 기본 정보 일괄 등록/갱신 (PI 번호 기준) 후 {pi_number: pi_id} 반환"""
+    rows = [
+        (
+            pi_data['pi_number'], pi_data['supplier_id'],
+            pi_data['issue_date'], pi_data['expected_delivery_date'],
+            pi_data['payment_terms'], pi_data['shipping_terms'],
+            pi_data.get('project_name', ''), pi_data['notes']
+        )
+        for pi_data, _ in pi_list
+    ]
+    _bulk_insert(
+        cursor, "proforma_invoices", PI_HEADER_COLUMNS, rows,
+        on_duplicate=", ".join(f"{col} = VALUES({col})" for col in PI_HEADER_COLUMNS[1:])
+    )
+    pi_numbers = [row[0] for row in rows]
+    cursor.execute(f"""
+        SELECT pi_id, pi_number FROM proforma_invoices
+        WHERE pi_number IN ({', '.join(['%s'] * len(pi_numbers))})
+    """, pi_numbers)
+    return {row['pi_number']: row['pi_id'] for row in cursor.fetchall()}
+
+def _write_pi_items(cursor, items_by_pi, strict=False):
+    """여러 PI의 항목을 한 번에 반영
+
+    - 요청 항목은 다중 행 INSERT ... ON DUPLICATE KEY UPDATE (pi_id, product_id 기준)로 추가/수량 변경
+    - 요청에 없는 기존 항목은 집합 차이로 찾아, 입고 이력이 없으면 한 문장으로 삭제
+    - 입고 이력이 있는 항목: strict=True면 예외, 아니면 입고 수량으로 마감
+
+    items_by_pi: {pi_id: [{'product_id', 'quantity', 'expected_production_date'(선택)}]}
+    """
+    pi_ids = list(items_by_pi.keys())
+    if not pi_ids:
+        return
+    cursor.execute(f"""
+        SELECT pi_items.pi_id, pi_items.pi_item_id, pi_items.product_id, pi_items.quantity, 
+               COALESCE(SUM(ci_items.quantity), 0) as received_qty
+        FROM pi_items
+        LEFT JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
+        WHERE pi_items.pi_id IN ({', '.join(['%s'] * len(pi_ids))})
+        GROUP BY pi_items.pi_item_id
+    """, pi_ids)
+    existing = {(row['pi_id'], row['product_id']): row for row in cursor.fetchall()}
+
+    # 같은 PI에 같은 제품이 여러 번 있으면 마지막 값 사용
+    wanted = {
+        (pi_id, item['product_id']): item
+        for pi_id, items in items_by_pi.items()
+        for item in items
+    }
+
+    if strict:
+        for key, item in wanted.items():
+            existing_item = existing.get(key)
+            if existing_item and item['quantity'] < existing_item['received_qty']:
+                raise Exception(f"제품 {key[1]}의 수량은 이미 입고된 수량({existing_item['received_qty']}개)보다 작을 수 없습니다.")
+
+    rows = [
+        (pi_id, product_id, item['quantity'], item.get('expected_production_date'))
+        for (pi_id, product_id), item in wanted.items()
+    ]
+    if rows:
+        # 기존 항목은 수량만 변경 (예상 생산일 등은 유지)
+        _bulk_insert(
+            cursor, "pi_items", ['pi_id', 'product_id', 'quantity', 'expected_production_date'], rows,
+            on_duplicate="quantity = VALUES(quantity)"
+        )
+
+    removed = [existing[key] for key in existing.keys() - wanted.keys()]
+    received = [item for item in removed if item['received_qty'] > 0]
+    if received and strict:
+        raise Exception(f"이미 입고된 항목은 삭제할 수 없습니다. (입고 수량: {received[0]['received_qty']}개)")
+    to_delete = [item['pi_item_id'] for item in removed if item['received_qty'] <= 0]
+    if to_delete:
+        cursor.execute(
+            f"DELETE FROM pi_items WHERE pi_item_id IN ({', '.join(['%s'] * len(to_delete))})",
+            to_delete
+        )
+    if received:
+        # 더 이상 필요하지 않지만 입고된 항목은 입고 수량으로 마감 (미입고 0)
+        cursor.executemany(
+            "UPDATE pi_items SET quantity = %s WHERE pi_item_id = %s",
+            [(int(item['received_qty']), item['pi_item_id']) for item in received]
+        )
+
+def create_pis(pi_list):
+    """여러 PI를 한 트랜잭션으로 생성 또는 업데이트 (PI 번호 기준)
+
+    pi_list: [(pi_data, items_data)]
+    반환: (성공 여부, {pi_number: pi_id} 또는 오류 메시지)
+    """
+    if not pi_list:
+        return True, {}
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
-        # 1. PI 번호로 기존 PI 상세 정보 확인
-        cursor.execute("""
-            SELECT pi.*, s.supplier_name
-            FROM proforma_invoices pi
-            JOIN suppliers s ON pi.supplier_id = s.supplier_id
-            WHERE pi.pi_number = %s
-        """, (pi_data['pi_number'],))
-        existing_pi = cursor.fetchone()
-
-        if existing_pi:
-            # 기존 PI 업데이트
-            cursor.execute("""
-                UPDATE proforma_invoices 
-                SET supplier_id = %s,
-                    issue_date = %s,
-                    expected_delivery_date = %s,
-                    payment_terms = %s,
-                    shipping_terms = %s,
-                    project_name = %s,
-                    notes = %s
-                WHERE pi_id = %s
-            """, (
-                pi_data['supplier_id'],
-                pi_data['issue_date'],
-                pi_data['expected_delivery_date'],
-                pi_data['payment_terms'],
-                pi_data['shipping_terms'],
-                pi_data.get('project_name', ''),
-                pi_data['notes'],
-                existing_pi['pi_id']
-            ))
-            pi_id = existing_pi['pi_id']
-            # 기존 PI 항목 조회
-            cursor.execute("""
-                SELECT pi_items.pi_item_id, pi_items.product_id, pi_items.quantity, 
-                       COALESCE(SUM(ci_items.quantity), 0) as received_qty
-                FROM pi_items
-                LEFT JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-                WHERE pi_items.pi_id = %s
-                GROUP BY pi_items.pi_item_id
-            """, (pi_id,))
-            existing_items = {item['product_id']: item for item in cursor.fetchall()}
-            # PI 항목 업데이트 또는 추가
-            for item in items_data:
-                if item['product_id'] in existing_items:
-                    # 기존 항목 업데이트
-                    existing_item = existing_items[item['product_id']]
-                    cursor.execute("""
-                        UPDATE pi_items 
-                        SET quantity = %s
-                        WHERE pi_item_id = %s
-                    """, (
-                        item['quantity'],
-                        existing_item['pi_item_id']
-                    ))
-                else:
-                    # 새로운 항목 추가
-                    cursor.execute("""
-                        INSERT INTO pi_items 
-                        (pi_id, product_id, quantity)
-                        VALUES (%s, %s, %s)
-                    """, (
-                        pi_id, item['product_id'], item['quantity']
-                    ))
-            # 더 이상 필요하지 않은 항목은 수량을 0으로 설정
-            for existing_item in existing_items.values():
-                if not any(item['product_id'] == existing_item['product_id'] for item in items_data):
-                    cursor.execute("""
-                        UPDATE pi_items 
-                        SET quantity = 0
-                        WHERE pi_item_id = %s
-                    """, (existing_item['pi_item_id'],))
-        else:
-            # 새로운 PI 생성
-            cursor.execute("""
-                INSERT INTO proforma_invoices 
-                (pi_number, supplier_id, issue_date, expected_delivery_date, 
-                 payment_terms, shipping_terms, 
-                 project_name, notes)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                pi_data['pi_number'], pi_data['supplier_id'],
-                pi_data['issue_date'], pi_data['expected_delivery_date'],
-                pi_data['payment_terms'],
-                pi_data['shipping_terms'], pi_data.get('project_name', ''), pi_data['notes']
-            ))
-            pi_id = cursor.lastrowid
-            # 새로운 PI 항목 추가
-            for item in items_data:
-                cursor.execute("""
-                    INSERT INTO pi_items 
-                    (pi_id, product_id, quantity)
-                    VALUES (%s, %s, %s)
-                """, (
-                    pi_id, item['product_id'], item['quantity']
-                ))
+        pi_ids = _upsert_pi_headers(cursor, pi_list)
+        _write_pi_items(cursor, {
+            pi_ids[pi_data['pi_number']]: items_data
+            for pi_data, items_data in pi_list
+        })
+        # 기존 PI의 발행일/납기일이 바뀌었을 수 있으므로 리드타임 팩트 갱신
+        lead_time_facts.refresh_pis(cursor, pi_ids.values())
         conn.commit()
-        return True, pi_id
+        return True, pi_ids
     except Exception as e:
         conn.rollback()
         return False, str(e)
@@ -411,6 +402,13 @@ def create_pi(pi_data, items_data):
         cursor.close()
         conn.close()
 
+def create_pi(pi_data, items_data):
+    """PI 생성 또는 업데이트"""
+    success, result = create_pis([(pi_data, items_data)])
+    if success:
+        return True, result[pi_data['pi_number']]
+    return False, result
+
 def update_pi(pi_id, pi_data, items_data):
     """PI 수정"""
     conn = connect_to_db()
@@ -433,47 +431,9 @@ def update_pi(pi_id, pi_data, items_data):
             pi_data['notes'],
             pi_id
         ))
-        # 2. 기존 PI 항목 조회
-        cursor.execute("""
-            SELECT pi_items.pi_item_id, pi_items.product_id, pi_items.quantity, 
-                   COALESCE(SUM(ci_items.quantity), 0) as received_qty
-            FROM pi_items
-            LEFT JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-            WHERE pi_items.pi_id = %s
-            GROUP BY pi_items.pi_item_id
-        """, (pi_id,))
-        existing_items = {item['product_id']: item for item in cursor.fetchall()}
-        # 3. PI 항목 업데이트
-        for item in items_data:
-            if item['product_id'] in existing_items:
-                # 기존 항목 업데이트
-                existing_item = existing_items[item['product_id']]
-                if item['quantity'] < existing_item['received_qty']:
-                    raise Exception(f"제품 {item['product_id']}의 수량은 이미 입고된 수량({existing_item['received_qty']}개)보다 작을 수 없습니다.")
-                cursor.execute("""
-                    UPDATE pi_items 
-                    SET quantity = %s
-                    WHERE pi_item_id = %s
-                """, (
-                    item['quantity'],
-                    existing_item['pi_item_id']
-                ))
-                del existing_items[item['product_id']]
-            else:
-                # 새로운 항목 추가
-                cursor.execute("""
-                    INSERT INTO pi_items 
-                    (pi_id, product_id, quantity, expected_production_date)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    pi_id, item['product_id'], item['quantity'],
-                    item['expected_production_date']
-                ))
-        # 4. 삭제된 항목 처리
-        for existing_item in existing_items.values():
-            if existing_item['received_qty'] > 0:
-                raise Exception(f"이미 입고된 항목은 삭제할 수 없습니다. (입고 수량: {existing_item['received_qty']}개)")
-            cursor.execute("DELETE FROM pi_items WHERE pi_item_id = %s", (existing_item['pi_item_id'],))
+        # 2. PI 항목 일괄 반영 (입고 수량보다 줄이거나 입고된 항목 삭제 시 오류)
+        _write_pi_items(cursor, {pi_id: items_data}, strict=True)
+        lead_time_facts.refresh_pis(cursor, [pi_id])
         conn.commit()
         return True, "PI가 성공적으로 수정되었습니다."
     except Exception as e:
@@ -483,11 +443,135 @@ def update_pi(pi_id, pi_data, items_data):
         cursor.close()
         conn.close()
 
+# PI 일괄 등록 파일 컬럼 (한 행 = PI 항목 하나, 같은 PI 번호 행은 하나의 PI로 묶음)
+PI_IMPORT_COLUMNS = {
+    'pi_number': 'PI 번호',
+    'supplier_name': '공급업체',
+    'issue_date': '발행일',
+    'expected_delivery_date': '예상 납기일',
+    'model_name': '모델명',
+    'quantity': '수량',
+    'payment_terms': '지불 조건',
+    'shipping_terms': '선적 조건',
+    'project_name': '프로젝트명',
+    'notes': '비고'
+}
+PI_IMPORT_REQUIRED = ['pi_number', 'supplier_name', 'issue_date', 'model_name', 'quantity']
+
+def parse_pi_import_file(uploaded_file):
+    """엑셀/CSV 파일을 create_pis() 입력으로 변환
+
+    컬럼은 PI_IMPORT_COLUMNS의 영문 키 또는 한글 이름을 사용합니다.
+    반환: (pi_list, 오류 메시지 목록)
+    """
+    if uploaded_file.name.lower().endswith('.csv'):
+        df = pd.read_csv(uploaded_file, dtype=str)
+    else:
+        df = pd.read_excel(uploaded_file, dtype=str)
+    # 헤더 앞뒤 공백을 먼저 제거해야 한글 이름이 영문 키로 바뀜
+    df.columns = [str(col).strip() for col in df.columns]
+    df = df.rename(columns={label: key for key, label in PI_IMPORT_COLUMNS.items()})
+    missing = [PI_IMPORT_COLUMNS[col] for col in PI_IMPORT_REQUIRED if col not in df.columns]
+    if missing:
+        return [], [f"필수 컬럼이 없습니다: {', '.join(missing)}"]
+    df = df.dropna(how='all')
+    df = df.where(pd.notna(df), None)
+
+    # 공급업체/제품은 한 번씩만 조회하여 이름 -> id 매핑
+    suppliers = {s['supplier_name'].strip(): s['supplier_id'] for s in get_suppliers()}
+    products = {(p['supplier_id'], p['model_name'].strip()): p['product_id'] for p in get_products()}
+
+    errors = []
+    pis = {}
+    for idx, row in df.iterrows():
+        line = idx + 2  # 헤더 다음 행부터
+        pi_number = (row['pi_number'] or '').strip()
+        supplier_name = (row['supplier_name'] or '').strip()
+        model_name = (row['model_name'] or '').strip()
+        if not pi_number or not supplier_name or not model_name:
+            errors.append(f"{line}행: PI 번호/공급업체/모델명이 비어 있습니다.")
+            continue
+        supplier_id = suppliers.get(supplier_name)
+        if supplier_id is None:
+            errors.append(f"{line}행: 등록되지 않은 공급업체입니다 ({supplier_name}).")
+            continue
+        product_id = products.get((supplier_id, model_name))
+        if product_id is None:
+            errors.append(f"{line}행: {supplier_name}에 등록되지 않은 모델입니다 ({model_name}).")
+            continue
+        issue_value = (row['issue_date'] or '').strip()
+        if not issue_value:
+            errors.append(f"{line}행: 발행일이 비어 있습니다.")
+            continue
+        try:
+            quantity = int(float(row['quantity']))
+            issue_date = pd.to_datetime(issue_value).date()
+            expected = (row.get('expected_delivery_date') or '').strip()
+            expected_delivery_date = pd.to_datetime(expected).date() if expected else issue_date
+        except (TypeError, ValueError, AttributeError) as e:
+            errors.append(f"{line}행: 수량 또는 날짜 형식 오류 ({e})")
+            continue
+        if quantity <= 0:
+            errors.append(f"{line}행: 수량은 1 이상이어야 합니다.")
+            continue
+
+        if pi_number not in pis:
+            pis[pi_number] = ({
+                'pi_number': pi_number,
+                'supplier_id': supplier_id,
+                'issue_date': issue_date,
+                'expected_delivery_date': expected_delivery_date,
+                'payment_terms': row.get('payment_terms') or '',
+                'shipping_terms': row.get('shipping_terms') or '',
+                'project_name': row.get('project_name') or '',
+                'notes': row.get('notes') or ''
+            }, [])
+        elif pis[pi_number][0]['supplier_id'] != supplier_id:
+            errors.append(f"{line}행: PI {pi_number}에 서로 다른 공급업체가 섞여 있습니다.")
+            continue
+        # 같은 PI에 같은 제품이 여러 행이면 수량을 합산
+        items = pis[pi_number][1]
+        existing = next((item for item in items if item['product_id'] == product_id), None)
+        if existing:
+            existing['quantity'] += quantity
+        else:
+            items.append({'product_id': product_id, 'quantity': quantity})
+
+    return list(pis.values()), errors
+
 # --- CI 관련 함수들 ---
+def _pending_pi_items_query(supplier_id=None):
+    """미입고 PI 항목 조회 쿼리와 파라미터"""
+    query = """
+        SELECT 
+            pi.pi_id,
+            pi.pi_number,
+            pi.issue_date,
+            pi.expected_delivery_date,
+            s.supplier_name,
+            p.model_name,
+            pi_items.pi_item_id,
+            pi_items.product_id,
+            pi_items.quantity as ordered_qty,
+            pi_items.expected_production_date,
+            COALESCE(SUM(ci_items.quantity), 0) as received_qty
+        FROM pi_items
+        JOIN proforma_invoices pi ON pi_items.pi_id = pi.pi_id
+        JOIN suppliers s ON pi.supplier_id = s.supplier_id
+        JOIN products_logistics p ON pi_items.product_id = p.product_id
+        LEFT JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
+    """
+    params = []
+    if supplier_id:
+        query += " WHERE pi.supplier_id = %s"
+        params.append(supplier_id)
+    query += " GROUP BY pi_items.pi_item_id HAVING ordered_qty > received_qty ORDER BY pi.expected_delivery_date"
+    return query, params
+
 def create_ci(ci_data, items_data):
     """CI 생성 및 재고 등록 (FIFO로 여러 PI 미입고분 자동 소진)"""
     conn = connect_to_db()
-    cursor = conn.cursor()
+    cursor = conn.cursor(dictionary=True)
     try:
         # 1. CI 기본 정보 저장
         cursor.execute("""
@@ -503,41 +587,49 @@ def create_ci(ci_data, items_data):
         ))
         ci_id = cursor.lastrowid
         
-        # 2. FIFO 매칭: 동일 제품의 미입고 PI 항목을 오래된 순으로 소진
-        from decimal import Decimal
+        # 2. 미입고 PI 항목을 한 번만 조회하여 제품별 대기열 구성 (오래된 순)
+        query, params = _pending_pi_items_query(ci_data['supplier_id'])
+        cursor.execute(query, params)
+        pending_by_product = {}
+        for pi_item in sorted(cursor.fetchall(), key=lambda x: x['issue_date']):
+            pending_by_product.setdefault(pi_item['product_id'], []).append(
+                [pi_item['pi_item_id'], int(pi_item['ordered_qty'] - pi_item['received_qty'])]
+            )
+        
+        # 3. FIFO 매칭: 메모리에서 배분 (같은 제품이 여러 줄이어도 중복 배분되지 않음)
+        ci_item_rows = []
+        stock_changes = []
         for item in items_data:
             product_id = item['product_id']
-            total_quantity = int(item['quantity'])
             notes = item.get('notes', '')
-            supplier_id = ci_data['supplier_id']
-            # 미입고 PI 항목 조회 (오래된 순)
-            pending_items = get_pending_pi_items(supplier_id)
-            pending_items = [pi for pi in pending_items if pi['product_id'] == product_id and (pi['ordered_qty'] - pi['received_qty']) > 0]
-            pending_items.sort(key=lambda x: x['issue_date'])
-            remaining_qty = total_quantity
-            for pi_item in pending_items:
+            remaining_qty = int(item['quantity'])
+            for pending in pending_by_product.get(product_id, []):
                 if remaining_qty == 0:
                     break
-                available = int(pi_item['ordered_qty'] - pi_item['received_qty'])
-                to_receive = min(remaining_qty, available)
+                to_receive = min(remaining_qty, pending[1])
                 if to_receive > 0:
-                    cursor.execute("""
-                        INSERT INTO ci_items 
-                        (ci_id, pi_item_id, product_id, quantity, shipping_date, notes)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (
-                        ci_id, pi_item['pi_item_id'], product_id, to_receive, ci_data['shipping_date'], notes
+                    ci_item_rows.append((
+                        ci_id, pending[0], product_id, to_receive, ci_data['shipping_date'], notes
                     ))
-                    # 재고 등록
-                    update_stock(
-                        product_id=product_id,
-                        quantity_change=to_receive,
-                        change_type='입고',
-                        reference_number=ci_data['ci_number'],
-                        notes=f"CI 등록: {ci_data['ci_number']}",
-                        destination=ci_data.get('shipping_details', '')
-                    )
+                    stock_changes.append({'product_id': product_id, 'quantity': to_receive})
+                    pending[1] -= to_receive
                     remaining_qty -= to_receive
+        
+        # 4. CI 항목과 재고 원장을 일괄 기록 (CI와 같은 트랜잭션)
+        if ci_item_rows:
+            _bulk_insert(
+                cursor, "ci_items",
+                ['ci_id', 'pi_item_id', 'product_id', 'quantity', 'shipping_date', 'notes'],
+                ci_item_rows
+            )
+            inventory_ledger.record_changes(
+                cursor, stock_changes, '입고',
+                ci_data['ci_number'],
+                f"CI 등록: {ci_data['ci_number']}",
+                ci_data.get('shipping_details', '')
+            )
+        # 도착일이 있으면 리드타임 팩트 추가
+        lead_time_facts.refresh_cis(cursor, [ci_id])
         conn.commit()
         return True, ci_id
     except Exception as e:
@@ -586,63 +678,85 @@ def get_ci_list(supplier_id=None, start_date=None, end_date=None):
 
 # --- 재고 분석 관련 함수들 ---
 def get_stock_statistics():
-    """재고 통계 데이터 조회"""
+    """재고 통계 데이터 조회 (원장 스냅샷 기준)"""
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
-        # 전체 재고 현황
         cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT p.product_id) as total_products,
-                COALESCE(SUM(COALESCE(i.stock, 0)), 0) as total_stock,
-                COUNT(CASE WHEN COALESCE(i.stock, 0) = 0 THEN 1 END) as out_of_stock
+            SELECT p.product_id, s.supplier_id, s.supplier_name
             FROM products_logistics p
-            LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
+            LEFT JOIN suppliers s ON p.supplier_id = s.supplier_id
         """)
-        overall_stats = cursor.fetchone()
+        products = cursor.fetchall()
+        levels = inventory_ledger.stock_levels(conn)
+        
+        # 전체 재고 현황
+        overall_stats = {
+            'total_products': len(products),
+            'total_stock': sum(levels.get(p['product_id'], 0) for p in products),
+            'out_of_stock': sum(1 for p in products if levels.get(p['product_id'], 0) == 0)
+        }
         
         # 공급업체별 재고 현황
-        cursor.execute("""
-            SELECT 
-                s.supplier_name,
-                COUNT(DISTINCT p.product_id) as product_count,
-                COALESCE(SUM(COALESCE(i.stock, 0)), 0) as total_stock,
-                COUNT(CASE WHEN COALESCE(i.stock, 0) = 0 THEN 1 END) as out_of_stock
-            FROM suppliers s
-            JOIN products_logistics p ON s.supplier_id = p.supplier_id
-            LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
-            GROUP BY s.supplier_id, s.supplier_name
-        """)
-        supplier_stats = cursor.fetchall()
+        supplier_stats = {}
+        for product in products:
+            if product['supplier_id'] is None:
+                continue
+            entry = supplier_stats.setdefault(product['supplier_id'], {
+                'supplier_name': product['supplier_name'],
+                'product_count': 0,
+                'total_stock': 0,
+                'out_of_stock': 0
+            })
+            stock = levels.get(product['product_id'], 0)
+            entry['product_count'] += 1
+            entry['total_stock'] += stock
+            if stock == 0:
+                entry['out_of_stock'] += 1
         
         return {
             'overall': overall_stats,
-            'suppliers': supplier_stats
+            'suppliers': list(supplier_stats.values())
         }
     finally:
         cursor.close()
         conn.close()
 
 def get_stock_movements(days=30):
-    """재고 이동 추이 분석"""
+    """재고 이동 추이 분석 (지난 날짜는 일별 스냅샷, 오늘은 원장에서 집계)"""
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
+        movements = inventory_ledger.daily_movements(conn, date.today() - timedelta(days=days))
+        if not movements:
+            return []
         cursor.execute("""
-            SELECT 
-                DATE(t.date) as date,
-                p.model_name,
-                s.supplier_name,
-                SUM(CASE WHEN t.change_type = '입고' THEN t.quantity ELSE 0 END) as in_qty,
-                SUM(CASE WHEN t.change_type = '출고' THEN t.quantity ELSE 0 END) as out_qty
-            FROM inventory_transactions t
-            JOIN products_logistics p ON t.product_id = p.product_id
+            SELECT p.product_id, p.model_name, s.supplier_name
+            FROM products_logistics p
             JOIN suppliers s ON p.supplier_id = s.supplier_id
-            WHERE t.date >= DATE_SUB(CURRENT_DATE, INTERVAL %s DAY)
-            GROUP BY DATE(t.date), p.model_name, s.supplier_name
-            ORDER BY date DESC, p.model_name
-        """, (days,))
-        return cursor.fetchall()
+        """)
+        names = {row['product_id']: row for row in cursor.fetchall()}
+        
+        # 일자/제품명/공급업체별 합계 (같은 모델명이 여러 제품에 있을 수 있음)
+        grouped = {}
+        for movement in movements:
+            product = names.get(movement['product_id'])
+            if product is None:
+                continue
+            key = (movement['date'], product['model_name'], product['supplier_name'])
+            entry = grouped.setdefault(key, {
+                'date': movement['date'],
+                'model_name': product['model_name'],
+                'supplier_name': product['supplier_name'],
+                'in_qty': 0,
+                'out_qty': 0
+            })
+            entry['in_qty'] += movement['in_qty']
+            entry['out_qty'] += movement['out_qty']
+        
+        result = sorted(grouped.values(), key=lambda row: row['model_name'])
+        result.sort(key=lambda row: row['date'], reverse=True)
+        return result
     finally:
         cursor.close()
         conn.close()
@@ -652,30 +766,7 @@ def get_pending_pi_items(supplier_id=None):
     conn = connect_to_db()
     cursor = conn.cursor(dictionary=True)
     try:
-        query = """
-            SELECT 
-                pi.pi_id,
-                pi.pi_number,
-                pi.issue_date,
-                pi.expected_delivery_date,
-                s.supplier_name,
-                p.model_name,
-                pi_items.pi_item_id,
-                pi_items.product_id,
-                pi_items.quantity as ordered_qty,
-                pi_items.expected_production_date,
-                COALESCE(SUM(ci_items.quantity), 0) as received_qty
-            FROM pi_items
-            JOIN proforma_invoices pi ON pi_items.pi_id = pi.pi_id
-            JOIN suppliers s ON pi.supplier_id = s.supplier_id
-            JOIN products_logistics p ON pi_items.product_id = p.product_id
-            LEFT JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-        """
-        params = []
-        if supplier_id:
-            query += " WHERE pi.supplier_id = %s"
-            params.append(supplier_id)
-        query += " GROUP BY pi_items.pi_item_id HAVING ordered_qty > received_qty ORDER BY pi.expected_delivery_date"
+        query, params = _pending_pi_items_query(supplier_id)
         cursor.execute(query, params)
         return cursor.fetchall()
     finally:
@@ -779,31 +870,21 @@ def delete_ci(ci_id, handle_stock=True):
         ci_items = cursor.fetchall()
         
         if handle_stock:
-            # 재고 차감
+            # 재고 차감 (원장에 출고 기록)
             for item in ci_items:
-                cursor.execute("""
-                    UPDATE inventory_logistics 
-                    SET stock = stock - %s
-                    WHERE product_id = %s
-                """, (item['quantity'], item['product_id']))
-                
-                # 재고 이력 기록
-                cursor.execute("""
-                    INSERT INTO inventory_transactions 
-                    (product_id, change_type, quantity, reference_number, 
-                     notes, date, destination)
-                    VALUES (%s, %s, %s, %s, %s, NOW(), %s)
-                """, (
+                inventory_ledger.record_change(
+                    cursor,
                     item['product_id'],
                     '출고',
                     -item['quantity'],
                     f"CI_DELETE_{ci_id}",
                     f"CI 삭제로 인한 재고 차감 - {item['model_name']}",
                     "CI 삭제"
-                ))
+                )
         
         # CI 삭제 (CASCADE로 인해 관련 항목도 자동 삭제)
         cursor.execute("DELETE FROM commercial_invoices WHERE ci_id = %s", (ci_id,))
+        lead_time_facts.refresh_cis(cursor, [ci_id])
         
         conn.commit()
         return True, "CI가 성공적으로 삭제되었습니다."
@@ -866,34 +947,25 @@ def update_product(product_id, product_data):
         cursor.close()
         conn.close()
 
-# --- 재고 보정 함수 ---
+# --- 재고 스냅샷 함수 ---
 def correct_inventory_records():
-    """모든 제품에 대해 inventory_logistics에 1개의 레코드가 있도록 보정 (중복 제거 포함)"""
+    """어제까지의 일별 재고 스냅샷 기록 후 inventory_logistics 재고 값을 원장 기준으로 맞춤"""
     conn = connect_to_db()
-    cursor = conn.cursor()
     try:
-        # 1. 중복된 product_id에 대해 inventory_id가 가장 큰(최근) 레코드만 남기고 삭제
-        cursor.execute('''
-            DELETE il1 FROM inventory_logistics il1
-            INNER JOIN inventory_logistics il2
-              ON il1.product_id = il2.product_id
-              AND il1.inventory_id < il2.inventory_id;
-        ''')
-        # 2. 누락된 product_id에 대해 0 재고로 추가
-        cursor.execute('''
-            INSERT INTO inventory_logistics (product_id, stock, is_certified)
-            SELECT p.product_id, 0, FALSE
-            FROM products_logistics p
-            LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
-            WHERE i.product_id IS NULL
-        ''')
-        conn.commit()
-        return True, "재고 보정이 완료되었습니다. (중복 제거 및 누락된 제품의 재고가 0으로 추가됨)"
+        snapshot_rows = inventory_ledger.refresh_snapshots(conn)
+        synced = inventory_ledger.sync_stock_counters(conn)
+        return True, f"재고 스냅샷 갱신이 완료되었습니다. (스냅샷 {snapshot_rows}건 기록, 재고 값 {synced}건 동기화)"
     except Exception as e:
-        conn.rollback()
         return False, str(e)
     finally:
-        cursor.close()
+        conn.close()
+
+def ledger_migration_pending():
+    """재고 원장 전환(DB 생성 페이지)을 아직 실행하지 않았는지 확인"""
+    conn = connect_to_db()
+    try:
+        return inventory_ledger.migration_pending(conn)
+    finally:
         conn.close()
 
 def main():
@@ -918,6 +990,10 @@ def main():
                 st.error("관리자 권한이 필요합니다")
             st.stop()
     
+    if ledger_migration_pending():
+        st.warning("⚠️ 재고 원장 전환이 아직 실행되지 않아 재고 수량이 기존 값과 다를 수 있습니다. "
+                   "DB 생성 페이지의 '물류 재고 원장 전환(스냅샷 생성)'을 먼저 실행하세요.")
+    
     # 사이드바 메뉴
     menu = st.sidebar.selectbox(
         "메뉴 선택",
@@ -1001,7 +1077,7 @@ def main():
             st.info("등록된 제품이 없습니다.")
         
         # 재고 보정 버튼 추가
-        if st.button('재고 DB 보정 실행', type='secondary'):
+        if st.button('재고 스냅샷 갱신', type='secondary'):
             success, msg = correct_inventory_records()
             if success:
                 st.success(msg)
@@ -1532,28 +1608,16 @@ def main():
                 try:
                     # 트랜잭션 시작
                     conn.start_transaction()
-                    # 1. 재고 업데이트
-                    new_stock = current_stock - quantity
-                    cursor.execute("""
-                        UPDATE inventory_logistics 
-                        SET stock = %s
-                        WHERE product_id = %s
-                    """, (new_stock, selected_product['product_id']))
-                    # 2. 재고 이력 기록
-                    cursor.execute("""
-                        INSERT INTO inventory_transactions 
-                        (product_id, change_type, quantity, reference_number, 
-                         notes, date, destination)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (
+                    # 원장에 출고 기록
+                    inventory_ledger.record_change(
+                        cursor,
                         selected_product['product_id'],
                         '출고',
                         -quantity,
                         reference_number,
                         notes,
-                        datetime.now(),
                         destination
-                    ))
+                    )
                     # 트랜잭션 커밋
                     conn.commit()
                     st.success("재고가 성공적으로 출고되었습니다.")
@@ -1579,29 +1643,20 @@ def main():
             conn = connect_to_db()
             cursor = conn.cursor()
             try:
-                # 1. 재고 이력 기록
-                cursor.execute("""
-                    INSERT INTO inventory_transactions 
-                    (product_id, change_type, quantity, reference_number, notes, date)
-                    SELECT 
-                        p.product_id,
-                        '출고',
-                        COALESCE(i.stock, 0),
-                        'STOCK_RESET',
-                        '재고 초기화 작업',
-                        NOW()
-                    FROM products_logistics p
-                    LEFT JOIN inventory_logistics i ON p.product_id = i.product_id
-                    WHERE COALESCE(i.stock, 0) > 0
-                """)
-                
-                # 2. 재고 초기화
-                cursor.execute("""
-                    UPDATE inventory_logistics 
-                    SET stock = 0
-                """)
+                # 1. 원장에 현재 재고만큼 반대 변동 기록 (재고 0)
+                levels = inventory_ledger.stock_levels(conn)
+                for product_id, stock in levels.items():
+                    if stock != 0:
+                        inventory_ledger.record_change(
+                            cursor,
+                            product_id,
+                            '출고' if stock > 0 else '입고',
+                            -stock,
+                            'STOCK_RESET',
+                            '재고 초기화 작업'
+                        )
                 
-                # 3. 재고가 없는 제품에 대해 새로 레코드 생성
+                # 2. 재고가 없는 제품에 대해 새로 레코드 생성
                 cursor.execute("""
                     INSERT INTO inventory_logistics (product_id, stock, is_certified)
                     SELECT p.product_id, 0, FALSE
@@ -2041,6 +2096,7 @@ def main():
                                 st.write(f"**신뢰구간 하한:** {prediction['confidence_interval'][0]}일")
                                 st.write(f"**신뢰구간 상한:** {prediction['confidence_interval'][1]}일")
                                 st.write(f"**분석 기반 주문 수:** {prediction['data_points']}건")
+                                st.write(f"**개별 주문 예측 구간:** {prediction['prediction_interval'][0]}~{prediction['prediction_interval'][1]}일 (중앙값 {prediction['median_lead_time']}일)")
                             
                             # 최근 추이
                             if len(prediction['recent_trend']) > 1:
@@ -2071,6 +2127,38 @@ def main():
                             st.warning("예측을 위한 충분한 데이터가 없습니다.")
                 else:
                     st.info("공급업체와 제품을 선택한 후 예측을 실행하세요.")
+                
+                # 선택한 공급업체의 전체 제품 예측 (한 번에 계산된 결과)
+                if selected_supplier_pred:
+                    with st.expander("📋 공급업체 전체 제품 예측표"):
+                        forecasts = get_lead_time_forecasts(confidence_level, selected_supplier_pred['supplier_id'])
+                        model_names = {p['product_id']: p['model_name'] for p in get_products(selected_supplier_pred['supplier_id'])}
+                        forecast_rows = [
+                            {
+                                '제품명': model_names.get(product_id, product_id),
+                                '예상 리드타임': forecast['expected_lead_time'],
+                                '중앙값': forecast['median_lead_time'],
+                                '신뢰구간': f"{forecast['confidence_interval'][0]}~{forecast['confidence_interval'][1]}일",
+                                '예측 구간': f"{forecast['prediction_interval'][0]}~{forecast['prediction_interval'][1]}일",
+                                '데이터 수': forecast['data_points']
+                            }
+                            for (_, product_id), forecast in forecasts.items()
+                        ]
+                        if forecast_rows:
+                            st.dataframe(pd.DataFrame(forecast_rows).sort_values('예상 리드타임', ascending=False), hide_index=True)
+                        else:
+                            st.info("입고 이력이 있는 제품이 없습니다.")
+                
+                if st.button("리드타임 집계 전체 재계산", key="lt_rebuild"):
+                    conn = connect_to_db()
+                    try:
+                        with st.spinner("리드타임 팩트/월별 집계 재계산 중..."):
+                            fact_count = lead_time_facts.rebuild(conn)
+                        st.success(f"리드타임 팩트 {fact_count}건을 다시 계산했습니다.")
+                    except Exception as e:
+                        st.error(f"리드타임 집계 재계산 중 오류: {e}")
+                    finally:
+                        conn.close()
             
             with lt_tab3:
                 st.write("### 📅 리드타임 추이 분석")
@@ -2302,7 +2390,7 @@ def main():
         
         pi_submenu = st.radio(
             "PI 관리 메뉴",
-            ["PI 등록", "PI 현황", "미입고 현황"],
+            ["PI 등록", "PI 일괄 등록", "PI 현황", "미입고 현황"],
             horizontal=True
         )
         
@@ -2427,6 +2515,56 @@ def main():
                 else:
                     st.warning("선택한 공급업체에 등록된 제품이 없습니다.")
         
+        elif pi_submenu == "PI 일괄 등록":
+            st.header("PI 일괄 등록 (엑셀/CSV)")
+            st.markdown("""
+            한 행에 PI 항목 하나씩 입력합니다. 같은 PI 번호의 행은 하나의 PI로 묶이며,
+            이미 있는 PI 번호는 파일 내용으로 갱신됩니다 (파일에 없는 미입고 항목은 삭제).
+            전체 파일이 하나의 트랜잭션으로 저장되므로 오류가 있으면 아무것도 저장되지 않습니다.
+            """)
+            template_df = pd.DataFrame(columns=list(PI_IMPORT_COLUMNS.values()))
+            st.download_button(
+                "📄 양식 다운로드 (CSV)",
+                template_df.to_csv(index=False).encode('utf-8-sig'),
+                file_name="pi_import_template.csv",
+                mime="text/csv"
+            )
+            st.caption(f"필수 컬럼: {', '.join(PI_IMPORT_COLUMNS[col] for col in PI_IMPORT_REQUIRED)}")
+            
+            import_file = st.file_uploader("PI 파일 업로드", type=["xlsx", "xls", "csv"], key="pi_import_file")
+            if import_file:
+                try:
+                    pi_import_list, import_errors = parse_pi_import_file(import_file)
+                except Exception as e:
+                    pi_import_list, import_errors = [], [f"파일 읽기 오류: {e}"]
+                
+                if import_errors:
+                    st.error(f"{len(import_errors)}개 행에 오류가 있습니다. 수정 후 다시 업로드해주세요.")
+                    with st.expander("오류 상세", expanded=True):
+                        for error in import_errors:
+                            st.write(f"- {error}")
+                elif pi_import_list:
+                    st.success(f"PI {len(pi_import_list)}건, 항목 {sum(len(items) for _, items in pi_import_list)}건을 읽었습니다.")
+                    st.dataframe(pd.DataFrame([
+                        {
+                            'PI 번호': pi_data['pi_number'],
+                            '발행일': pi_data['issue_date'],
+                            '예상 납기일': pi_data['expected_delivery_date'],
+                            '항목 수': len(items),
+                            '총 수량': sum(item['quantity'] for item in items)
+                        }
+                        for pi_data, items in pi_import_list
+                    ]), hide_index=True)
+                    if st.button("일괄 등록 실행", type="primary"):
+                        with st.spinner("PI 저장 중..."):
+                            success, result = create_pis(pi_import_list)
+                        if success:
+                            st.success(f"PI {len(result)}건이 성공적으로 저장되었습니다.")
+                        else:
+                            st.error(f"PI 일괄 저장 중 오류가 발생했습니다 (저장된 내용 없음): {result}")
+                else:
+                    st.info("파일에 등록할 PI가 없습니다.")
+        
         elif pi_submenu == "PI 현황":
             # 공급업체 선택
             suppliers = get_suppliers()
@@ -3573,54 +3711,11 @@ def main():
 
 # --- 리드타임 분석 관련 함수들 ---
 def get_lead_time_data(supplier_id=None, start_date=None, end_date=None):
-    """리드타임 데이터 조회"""
+    """리드타임 데이터 조회 (리드타임 팩트 테이블)"""
     conn = connect_to_db()
-    cursor = conn.cursor(dictionary=True)
     try:
-        query = """
-            SELECT 
-                pi.pi_id,
-                pi.pi_number,
-                pi.issue_date,
-                pi.expected_delivery_date,
-                s.supplier_name,
-                s.supplier_id,
-                p.model_name,
-                p.product_id,
-                pi_items.quantity as ordered_qty,
-                pi_items.expected_production_date,
-                ci.shipping_date,
-                ci.arrival_date,
-                DATEDIFF(ci.arrival_date, pi.issue_date) as actual_lead_time,
-                DATEDIFF(pi.expected_delivery_date, pi.issue_date) as expected_lead_time,
-                DATEDIFF(ci.arrival_date, pi.expected_delivery_date) as delay_days
-            FROM proforma_invoices pi
-            JOIN suppliers s ON pi.supplier_id = s.supplier_id
-            JOIN pi_items ON pi.pi_id = pi_items.pi_id
-            JOIN products_logistics p ON pi_items.product_id = p.product_id
-            JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-            JOIN commercial_invoices ci ON ci_items.ci_id = ci.ci_id
-            WHERE ci.arrival_date IS NOT NULL
-            AND pi.issue_date IS NOT NULL
-        """
-        params = []
-        
-        if supplier_id:
-            query += " AND pi.supplier_id = %s"
-            params.append(supplier_id)
-        if start_date:
-            query += " AND pi.issue_date >= %s"
-            params.append(start_date)
-        if end_date:
-            query += " AND pi.issue_date <= %s"
-            params.append(end_date)
-            
-        query += " ORDER BY pi.issue_date DESC"
-        
-        cursor.execute(query, params)
-        return cursor.fetchall()
+        return lead_time_facts.get_facts(conn, supplier_id, start_date, end_date)
     finally:
-        cursor.close()
         conn.close()
 
 def calculate_lead_time_statistics(lead_time_data):
@@ -3661,92 +3756,28 @@ def calculate_lead_time_statistics(lead_time_data):
         'raw_data': df
     }
 
-def predict_lead_time(supplier_id, product_id, confidence_level=0.8):
-    """리드타임 예측"""
+def get_lead_time_forecasts(confidence_level=0.8, supplier_id=None):
+    """공급업체/제품 쌍별 리드타임 예측 (전체 쌍을 한 번에 계산)"""
     conn = connect_to_db()
-    cursor = conn.cursor(dictionary=True)
     try:
-        # 해당 공급업체/제품의 과거 리드타임 데이터 조회
-        cursor.execute("""
-            SELECT 
-                DATEDIFF(ci.arrival_date, pi.issue_date) as actual_lead_time
-            FROM proforma_invoices pi
-            JOIN pi_items ON pi.pi_id = pi_items.pi_id
-            JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-            JOIN commercial_invoices ci ON ci_items.ci_id = ci.ci_id
-            WHERE pi.supplier_id = %s 
-            AND pi_items.product_id = %s
-            AND ci.arrival_date IS NOT NULL
-            ORDER BY pi.issue_date DESC
-            LIMIT 20
-        """, (supplier_id, product_id))
-        
-        lead_times = [row['actual_lead_time'] for row in cursor.fetchall()]
-        
-        if len(lead_times) < 2:
-            return None, "예측을 위한 충분한 데이터가 없습니다. (최소 2개 주문 필요)"
-        
-        # 통계 계산
-        mean_lt = np.mean(lead_times)
-        std_lt = np.std(lead_times)
-        
-        # 신뢰구간 계산
-        confidence_interval = stats.norm.interval(confidence_level, loc=mean_lt, scale=std_lt/np.sqrt(len(lead_times)))
-        
-        # 예측 결과
-        prediction = {
-            'expected_lead_time': round(mean_lt, 1),
-            'confidence_interval': (round(confidence_interval[0], 1), round(confidence_interval[1], 1)),
-            'std_deviation': round(std_lt, 1),
-            'data_points': len(lead_times),
-            'min_historical': min(lead_times),
-            'max_historical': max(lead_times),
-            'recent_trend': lead_times[:5] if len(lead_times) >= 5 else lead_times
-        }
-        
-        return prediction, None
-        
+        return lead_time_facts.get_forecasts(conn, confidence_level, supplier_id)
     finally:
-        cursor.close()
         conn.close()
 
+def predict_lead_time(supplier_id, product_id, confidence_level=0.8):
+    """리드타임 예측"""
+    prediction = get_lead_time_forecasts(confidence_level, supplier_id).get((supplier_id, product_id))
+    if not prediction or prediction['data_points'] < 2:
+        return None, "예측을 위한 충분한 데이터가 없습니다. (최소 2개 주문 필요)"
+    return prediction, None
+
 def get_lead_time_trends(supplier_id=None, days=90):
-    """리드타임 추이 분석"""
+    """리드타임 추이 분석 (공급업체 x 제품 x 월 집계, 시작일이 속한 달부터)"""
     conn = connect_to_db()
-    cursor = conn.cursor(dictionary=True)
     try:
-        query = """
-            SELECT 
-                DATE_FORMAT(pi.issue_date, '%%Y-%%m') as month,
-                s.supplier_name,
-                p.model_name,
-                AVG(DATEDIFF(ci.arrival_date, pi.issue_date)) as avg_lead_time,
-                COUNT(*) as order_count,
-                AVG(DATEDIFF(ci.arrival_date, pi.expected_delivery_date)) as avg_delay
-            FROM proforma_invoices pi
-            JOIN suppliers s ON pi.supplier_id = s.supplier_id
-            JOIN pi_items ON pi.pi_id = pi_items.pi_id
-            JOIN products_logistics p ON pi_items.product_id = p.product_id
-            JOIN ci_items ON pi_items.pi_item_id = ci_items.pi_item_id
-            JOIN commercial_invoices ci ON ci_items.ci_id = ci.ci_id
-            WHERE ci.arrival_date IS NOT NULL
-            AND pi.issue_date >= DATE_SUB(CURRENT_DATE, INTERVAL %s DAY)
-        """
-        params = [days]
-        
-        if supplier_id:
-            query += " AND pi.supplier_id = %s"
-            params.append(supplier_id)
-            
-        query += """
-            GROUP BY DATE_FORMAT(pi.issue_date, '%%Y-%%m'), s.supplier_name, p.model_name
-            ORDER BY month DESC, avg_lead_time DESC
-        """
-        
-        cursor.execute(query, params)
-        return cursor.fetchall()
+        since_month = (date.today() - timedelta(days=days)).strftime('%Y-%m')
+        return lead_time_facts.get_monthly(conn, supplier_id, since_month)
     finally:
-        cursor.close()
         conn.close()
 
 if __name__ == "__main__":
@@ -10,9 +10,10 @@ import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
-from openai import OpenAI
-from langchain_anthropic import ChatAnthropic
 import base64
+import llm_cache
+import llm_service
+import transcription_pipeline
 
 # 페이지 설정
 st.set_page_config(
@@ -276,37 +277,11 @@ def get_download_url(url, format_id=None, audio_only=False, min_bitrate=0):
         return None
 
 # AI 기능을 위한 함수들
+@llm_cache.cached(temperature=0.7, error_prefixes=("오류 발생:",))
 def get_ai_response(prompt, model_name, system_prompt="", target_language=None):
     """AI 모델로부터 응답을 받는 함수"""
     try:
-        if model_name.startswith('claude'):
-            client = ChatAnthropic(
-                model=model_name, 
-                api_key=os.getenv('ANTHROPIC_API_KEY'), 
-                temperature=0.7, 
-                max_tokens=8192
-            )
-            response = client.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ])
-            result = response.content if hasattr(response, 'content') else str(response)
-        else:
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key or openai_key.strip() == '' or openai_key == 'NA':
-                raise ValueError("OpenAI API 키가 올바르지 않습니다.")
-            
-            client = OpenAI(api_key=openai_key)
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=8192,
-                temperature=0.7
-            )
-            result = response.choices[0].message.content
+        result = llm_service.complete(prompt, model_name, system_prompt)
         
         # 언어 검증 (선택적)
         if target_language and result:
@@ -314,44 +289,18 @@ def get_ai_response(prompt, model_name, system_prompt="", target_language=None):
             if target_language == "Korean" and not any(char in result for char in ['가', '나', '다', '라', '마', '바', '사', '아', '자', '차', '카', '타', '파', '하']):
                 # 한국어가 아닌 경우 재시도
                 retry_prompt = f"{prompt}\n\n중요: 반드시 한국어로만 응답해주세요. 영어나 다른 언어를 사용하지 마세요."
-                if model_name.startswith('claude'):
-                    retry_response = client.invoke([
-                        {"role": "system", "content": system_prompt + "\n\nCRITICAL: You MUST respond in Korean only."},
-                        {"role": "user", "content": retry_prompt}
-                    ])
-                    result = retry_response.content if hasattr(retry_response, 'content') else str(retry_response)
-                else:
-                    retry_response = client.chat.completions.create(
-                        model=model_name,
-                        messages=[
-                            {"role": "system", "content": system_prompt + "\n\nCRITICAL: You MUST respond in Korean only."},
-                            {"role": "user", "content": retry_prompt}
-                        ],
-                        max_tokens=8192,
-                        temperature=0.7
-                    )
-                    result = retry_response.choices[0].message.content
+                result = llm_service.complete(
+                    retry_prompt, model_name,
+                    system_prompt + "\n\nCRITICAL: You MUST respond in Korean only."
+                )
             
             elif target_language == "English" and any(char in result for char in ['가', '나', '다', '라', '마', '바', '사', '아', '자', '차', '카', '타', '파', '하']):
                 # 영어가 아닌 경우 재시도
                 retry_prompt = f"{prompt}\n\nImportant: Please respond in English only. Do not use Korean or other languages."
-                if model_name.startswith('claude'):
-                    retry_response = client.invoke([
-                        {"role": "system", "content": system_prompt + "\n\nCRITICAL: You MUST respond in English only."},
-                        {"role": "user", "content": retry_prompt}
-                    ])
-                    result = retry_response.content if hasattr(retry_response, 'content') else str(retry_response)
-                else:
-                    retry_response = client.chat.completions.create(
-                        model=model_name,
-                        messages=[
-                            {"role": "system", "content": system_prompt + "\n\nCRITICAL: You MUST respond in English only."},
-                            {"role": "user", "content": retry_prompt}
-                        ],
-                        max_tokens=8192,
-                        temperature=0.7
-                    )
-                    result = retry_response.choices[0].message.content
+                result = llm_service.complete(
+                    retry_prompt, model_name,
+                    system_prompt + "\n\nCRITICAL: You MUST respond in English only."
+                )
         
         return result
     except Exception as e:
@@ -477,25 +426,28 @@ def extract_whisper_transcript(url, video_info):
             st.error("오디오 URL을 가져올 수 없습니다.")
             return None
         
-        # Whisper API 호출
-        client = OpenAI(api_key=openai_key)
+        # 오디오를 임시 파일로 받아 무음 구간 기준으로 나눠 동시에 변환 (결과는 오디오 해시로 캐시)
+        progress_bar = st.progress(0)
         
-        with st.spinner("🎙️ Whisper API로 음성을 분석하는 중..."):
-            # 오디오 다운로드
-            audio_response = requests.get(audio_url)
-            if audio_response.status_code != 200:
-                st.error("오디오 파일을 다운로드할 수 없습니다.")
-                return None
-            
-            # Whisper API 호출
-            response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=("audio.mp3", audio_response.content, "audio/mpeg"),
-                language="auto",  # 자동 언어 감지
-                response_format="text"
-            )
-            
-            return response
+        def on_progress(done, total):
+            progress_bar.progress(done / total, text=f"🎙️ 구간 변환 중... ({done}/{total})")
+        
+        try:
+            with st.spinner("🎙️ Whisper API로 음성을 분석하는 중..."):
+                result = transcription_pipeline.transcribe_url(
+                    audio_url,
+                    language=None,  # 자동 언어 감지
+                    on_progress=on_progress
+                )
+        finally:
+            progress_bar.empty()
+        
+        if result['cached']:
+            st.info("이전에 변환한 오디오입니다. 저장된 변환 결과를 사용합니다.")
+        if result['failed']:
+            st.warning(f"⚠️ {len(result['failed'])}개 구간 변환에 실패하여 제외했습니다.")
+        
+        return result['text']
             
     except Exception as e:
         st.error(f"Whisper API 오류: {e}")
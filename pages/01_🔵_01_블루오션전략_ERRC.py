@@ -7,7 +7,6 @@ from datetime import datetime
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
-import anthropic
 import json
 import base64
 import requests
@@ -16,6 +15,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
 import mysql.connector
+import db_pool
 import concurrent.futures
 import time
 import re
@@ -25,6 +25,8 @@ import requests
 from PIL import Image
 import io
 import hashlib
+import llm_cache
+import llm_service
 
 # 환경 변수 로드
 load_dotenv()
@@ -56,10 +58,6 @@ if not st.session_state.authenticated:
             st.error("관리자 권한이 필요합니다")
         st.stop()
 
-# API 클라이언트 초기화
-openai = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-
 # MySQL Database configuration
 db_config = {
     'user': os.getenv('SQL_USER'),
@@ -245,42 +243,21 @@ ERRC 분석 결과를 바탕으로 전략 캔버스를 작성해주세요."""
 }
 
 # === AI 응답 생성 함수 ===
-def get_ai_response(prompt, model_name="gpt-4o-mini", system_prompt="", enable_thinking=False):
+@llm_cache.cached(temperature=0.7)
+def get_ai_response(prompt, model_name="gpt-4o-mini", system_prompt="", enable_thinking=False, placeholder=None):
     """AI 응답 생성 함수"""
     try:
-        if model_name.startswith("gpt"):
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = openai.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=4000
-            )
-            
-            return {
-                'content': response.choices[0].message.content,
-                'success': True,
-                'error': None
-            }
-            
-        elif model_name.startswith("claude"):
-            response = anthropic_client.messages.create(
-                model=model_name,
-                max_tokens=4000,
-                temperature=0.7,
-                system=system_prompt,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            return {
-                'content': response.content[0].text,
-                'success': True,
-                'error': None
-            }
+        content = llm_service.complete(
+            prompt, model_name, system_prompt,
+            max_tokens=4000,
+            placeholder=placeholder
+        )
+        
+        return {
+            'content': content,
+            'success': True,
+            'error': None
+        }
             
     except Exception as e:
         return {
@@ -1429,7 +1406,7 @@ def display_action_plan(action_plan_data):
 def create_errc_analysis_tables():
     """ERRC 분석을 위한 데이터베이스 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 1. ERRC 분석 기본 정보 테이블
@@ -1469,7 +1446,7 @@ def create_errc_analysis_tables():
 def save_errc_analysis(company_name, industry, company_info, competitors_info, errc_analysis, strategy_canvas):
     """ERRC 분석 결과를 데이터베이스에 저장"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         # 1. 기본 정보 저장
@@ -1500,7 +1477,7 @@ def save_errc_analysis(company_name, industry, company_info, competitors_info, e
 def get_saved_errc_analyses():
     """저장된 ERRC 분석 목록 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute('''
@@ -1529,7 +1506,7 @@ def get_saved_errc_analyses():
 def delete_errc_analysis(analysis_id):
     """ERRC 분석 삭제"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM errc_analyses WHERE analysis_id = %s', (analysis_id,))
@@ -15,7 +15,7 @@ import platform
 from datetime import datetime
 from typing import TypedDict, Annotated, Sequence
 import base64
-import mysql.connector
+import db_pool
 from mysql.connector import Error
 from dotenv import load_dotenv
 import pandas as pd
@@ -82,7 +82,7 @@ def debug_env_vars():
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
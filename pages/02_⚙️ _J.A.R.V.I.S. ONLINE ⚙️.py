@@ -8,6 +8,11 @@ from concurrent.futures import ThreadPoolExecutor
 from langchain_anthropic import ChatAnthropic
 import anthropic
 import mysql.connector
+import db_pool
+import schema_catalogue
+import web_crawler
+import tts_service
+from db_text_index import DBTextIndex
 import json
 from dotenv import load_dotenv
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -58,7 +63,7 @@ class MySQLConnection:
         
     def get_connection(self):
         """MySQL 커넥션 반환"""
-        return mysql.connector.connect(**self.config)
+        return db_pool.connect(**self.config)
     
     def get_engine(self):
         """SQLAlchemy 엔진 반환"""
@@ -94,6 +99,10 @@ class MySQLConnection:
 # --- 전역 MySQL 연결 객체 생성 ---
 mysql_conn = MySQLConnection()
 
+def get_schema_catalogue():
+    """공유 스키마 카탈로그 (DB생성 페이지에서 테이블을 바꾸거나 유효 기간이 지나면 다시 조회)"""
+    return schema_catalogue.get_catalogue(**mysql_conn.config)
+
 # --- Session state initialization (must be at the very top, before any UI or logic) ---
 if 'selected_ai_api' not in st.session_state:
     st.session_state.selected_ai_api = 'Anthropic (Claude)'
@@ -371,10 +380,9 @@ def save_interaction(user_id, speaker, msg, files=None, audio=None):
 
 # --- 기존 함수들의 MySQL 연결 부분 업데이트 ---
 def get_all_table_names():
-    """테이블 목록 조회 함수 (MySQL 연결 통합 버전)"""
+    """테이블 목록 조회 함수 (스키마 카탈로그 사용)"""
     try:
-        result = mysql_conn.execute_query("SHOW TABLES")
-        return [list(row.values())[0] for row in result]
+        return get_schema_catalogue().table_names()
     except Exception as e:
         print(f"Error getting table names: {e}")
         return []
@@ -414,24 +422,16 @@ def text_to_speech(text):
         st.session_state.selected_model = 'claude-3-7-sonnet-latest'
     if 'selected_ai_api' not in st.session_state:
         st.session_state.selected_ai_api = 'Anthropic (Claude)'
-    # 실제 OpenAI TTS 연동 예시 (API 키 필요)
+    # OpenAI TTS 연동 (API 키 필요) - mp3 bytes를 반환하므로 st.audio()로 재생
     try:
-        from openai import OpenAI
         openai_key = os.getenv('OPENAI_API_KEY')
         if not openai_key:
             return None
-        client = OpenAI(api_key=openai_key)
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=text
-        )
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        audio_html = f'<audio controls><source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3"></audio>'
-        return audio_html
+        return tts_service.synthesize(text, voice="alloy")
     except Exception as e:
-        return f"[TTS 오류] {e}"
+        # 반환값은 mp3 bytes 또는 None (오류 문자열을 오디오로 넘기지 않도록)
+        st.warning(f"[TTS 오류] {e}")
+        return None
 
 # --- JARVIS 대화에이전트 프롬프트 생성 보조 함수 ---
 def should_attach_history(user_input):
@@ -470,90 +470,52 @@ def extract_text_from_audio(audio_blob):
         return '[음성 파일: 텍스트 변환 결과(예시)]'
     return ''
 
+@st.cache_resource
+def get_db_text_index():
+    """DB 전체 텍스트 인덱스 (프로세스 공유, ./db_text_index/에 저장)"""
+    return DBTextIndex()
+
+def get_refreshed_db_text_index():
+    """워터마크 이후 변경분을 반영한 DB 텍스트 인덱스 (최소 갱신 간격 이내면 그대로 사용)"""
+    index = get_db_text_index()
+    try:
+        index.refresh(mysql_conn.get_connection, catalogue=get_schema_catalogue())
+    except Exception as e:
+        print(f"Error refreshing DB text index: {e}")
+    return index
+
 def search_db_tables_for_relevance(user_input, max_rows=100, topn=2):
-    tables = get_all_table_names()
+    """DB 텍스트 인덱스에서 질문과 관련된 테이블과 상위 행 요약 검색
+
+    max_rows는 이전 버전(테이블별 표본 행 수)과의 호환을 위해 남겨 둔 인자입니다.
+    """
+    hits = get_refreshed_db_text_index().search(user_input, k=1000, min_score=0.01, per_table=topn)
     relevant_tables = []
     table_summaries = []
-    # Prepare SQLAlchemy engine once
-    engine = create_engine(
-        f"mysql+mysqlconnector://{os.getenv('SQL_USER')}:{os.getenv('SQL_PASSWORD')}@{os.getenv('SQL_HOST')}/{os.getenv('SQL_DATABASE_NEWBIZ')}?charset=utf8mb4"
-    )
-    for table in tables:
-        try:
-            query = f"SELECT * FROM {table} LIMIT {max_rows}"
-            df = pd.read_sql(query, engine)
-            if df.empty:
-                continue
-            # 모든 컬럼을 하나의 텍스트로 합침
-            docs = df.astype(str).apply(lambda row: ' '.join(row), axis=1).tolist()
-            vectorizer = TfidfVectorizer().fit(docs + [user_input])
-            doc_vecs = vectorizer.transform(docs)
-            query_vec = vectorizer.transform([user_input])
-            sims = cosine_similarity(query_vec, doc_vecs)[0]
-            top_idx = np.argsort(sims)[::-1][:topn]
-            # 유사도가 0.01 이상인 행만 추출
-            relevant_rows = [(i, sims[i]) for i in top_idx if sims[i] > 0.01]
-            if relevant_rows:
-                relevant_tables.append(table)
-                # 상위 N개 행 요약
-                summary = '\n'.join([f"[{table}] {docs[i][:200]}... (유사도: {sims[i]:.2f})" for i, _ in relevant_rows])
-                table_summaries.append(summary)
-        except Exception as e:
-            continue
+    by_table = {}
+    for hit in hits:
+        by_table.setdefault(hit['table'], []).append(hit)
+    for table, table_hits in by_table.items():
+        relevant_tables.append(table)
+        summary = '\n'.join([
+            f"[{table}] {hit['content'].replace(chr(10), ' ')[:200]}... (유사도: {hit['score']:.2f})"
+            for hit in table_hits
+        ])
+        table_summaries.append(summary)
     return relevant_tables, table_summaries
 
 # --- 웹사이트 RAG: 크롤링 함수 (Virtual Company 참고) ---
 def scrape_website_simple(url, max_pages=5):
-    import requests
-    from bs4 import BeautifulSoup
-    from urllib.parse import urljoin, urlparse
-    import time
     try:
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        visited_urls = set()
         texts = []
-        urls_to_visit = [url]
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        successfully_scraped = 0
-        while urls_to_visit and successfully_scraped < max_pages:
-            current_url = urls_to_visit.pop(0)
-            if current_url in visited_urls:
-                continue
-            try:
-                response = session.get(current_url, timeout=10)
-                response.raise_for_status()
-                visited_urls.add(current_url)
-                soup = BeautifulSoup(response.content, "html.parser")
-                for tag in soup(["script", "style", "nav", "header", "footer"]):
-                    tag.decompose()
-                page_text = soup.get_text(separator="\n", strip=True)
-                lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-                cleaned_text = '\n'.join(lines)
-                if len(cleaned_text) > 50:
-                    page_title = soup.title.string.strip() if soup.title and soup.title.string else f'페이지 {successfully_scraped + 1}'
-                    texts.append({
-                        'content': cleaned_text,
-                        'url': current_url,
-                        'title': page_title
-                    })
-                    successfully_scraped += 1
-                base_domain = urlparse(url).netloc
-                for link in soup.find_all("a", href=True)[:20]:
-                    absolute_link = urljoin(current_url, link['href'])
-                    parsed_link = urlparse(absolute_link)
-                    if (parsed_link.netloc == base_domain and 
-                        absolute_link not in visited_urls and 
-                        absolute_link not in urls_to_visit and
-                        not any(x in absolute_link.lower() for x in ['#', 'javascript:', 'mailto:', 'tel:']) and
-                        len(urls_to_visit) < 50):
-                        urls_to_visit.append(absolute_link)
-                time.sleep(0.5)
-            except Exception:
+        for page in web_crawler.iter_crawl(url, max_pages=max_pages):
+            if page['error'] is not None:
                 continue
+            texts.append({
+                'content': page['data']['content'],
+                'url': page['url'],
+                'title': page['data']['title'] or f'페이지 {len(texts) + 1}'
+            })
         return texts
     except Exception:
         return []
@@ -637,44 +599,22 @@ def extract_rag_sources(user_id, user_input, file_previews=None, website_texts=N
     }
 
 def search_all_db_tables_for_rag(user_input, max_rows=100, topn=2):
-    from sqlalchemy import create_engine
-    import pandas as pd
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    import os
-    import json
-    engine = create_engine(
-        f"mysql+mysqlconnector://{os.getenv('SQL_USER')}:{os.getenv('SQL_PASSWORD')}@{os.getenv('SQL_HOST')}/{os.getenv('SQL_DATABASE_NEWBIZ')}?charset=utf8mb4"
-    )
-    tables = get_all_table_names()
-    rag_results = []
-    for table in tables:
-        try:
-            df = pd.read_sql(f"SELECT * FROM {table} LIMIT {max_rows}", engine)
-            if df.empty:
-                continue
-            docs = df.astype(str).apply(lambda row: ' '.join(row), axis=1).tolist()
-            vectorizer = TfidfVectorizer().fit(docs + [user_input])
-            doc_vecs = vectorizer.transform(docs)
-            query_vec = vectorizer.transform([user_input])
-            sims = cosine_similarity(query_vec, doc_vecs)[0]
-            top_idx = np.argsort(sims)[::-1][:topn]
-            for i in top_idx:
-                if sims[i] > 0.1:
-                    # 구조적으로 컬럼명:값 딕셔너리로 첨부
-                    row_dict = df.iloc[i].to_dict()
-                    rag_results.append({
-                        'table': table,
-                        'row': row_dict,
-                        'similarity': float(sims[i])
-                    })
-        except Exception:
-            continue
-    return rag_results
+    """DB 텍스트 인덱스에서 테이블별 상위 행을 찾아 원본 행(컬럼명:값)과 함께 반환"""
+    try:
+        index = get_refreshed_db_text_index()
+        hits = index.search(user_input, k=1000, min_score=0.1, per_table=topn)
+        index.fetch_rows(mysql_conn.get_connection, hits)
+    except Exception as e:
+        print(f"Error in search_all_db_tables_for_rag: {e}")
+        return []
+    return [
+        {'table': hit['table'], 'row': hit['row'], 'similarity': hit['score']}
+        for hit in hits if hit['row'] is not None
+    ]
 
 def get_meeting_titles(limit=10):
     import mysql.connector
-    conn = mysql.connector.connect(
+    conn = db_pool.connect(
         host=os.getenv('SQL_HOST'),
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
@@ -690,7 +630,7 @@ def get_meeting_titles(limit=10):
 
 def get_meeting_record_by_title(title):
     import mysql.connector
-    conn = mysql.connector.connect(
+    conn = db_pool.connect(
         host=os.getenv('SQL_HOST'),
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
@@ -709,7 +649,7 @@ def get_meeting_records_by_keyword(keyword, limit=10):
     import re
     # 정규화: 소문자, 공백/특수문자(-,_) 제거
     keyword_norm = re.sub(r'[^가-힣a-zA-Z0-9]', '', keyword).lower()
-    conn = mysql.connector.connect(
+    conn = db_pool.connect(
         host=os.getenv('SQL_HOST'),
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
@@ -738,7 +678,7 @@ def get_meeting_records_by_keyword(keyword, limit=10):
 # --- 모든 테이블의 컬럼 정보와 샘플 row를 DataFrame 기반으로 반환 ---
 def get_all_table_columns_and_samples(sample_n=2, keyword=None):
     import mysql.connector
-    conn = mysql.connector.connect(
+    conn = db_pool.connect(
         host=os.getenv('SQL_HOST'),
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
@@ -746,12 +686,10 @@ def get_all_table_columns_and_samples(sample_n=2, keyword=None):
         charset='utf8mb4'
     )
     cursor = conn.cursor()
-    cursor.execute("SHOW TABLES")
-    tables = [row[0] for row in cursor.fetchall()]
+    catalogue = get_schema_catalogue()
     all_info = {}
-    for table in tables:
-        cursor.execute(f"SHOW COLUMNS FROM {table}")
-        columns = [row['Field'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+    for table in catalogue.table_names():
+        columns = catalogue.column_names(table)
         rows = []
         col_names = []
         # 1. keyword가 있으면, keyword가 포함되고 summary/full_text/action_items가 채워진 row 우선
@@ -803,29 +741,15 @@ def get_all_table_columns_and_samples(sample_n=2, keyword=None):
 def get_table_schema_info(table_name):
     """테이블의 스키마 정보를 가져오는 함수"""
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv('SQL_HOST'),
-            user=os.getenv('SQL_USER'),
-            password=os.getenv('SQL_PASSWORD'),
-            database=os.getenv('SQL_DATABASE_NEWBIZ'),
-            charset='utf8mb4'
-        )
+        columns = [
+            {k: col[k] for k in ('COLUMN_NAME', 'DATA_TYPE', 'CHARACTER_MAXIMUM_LENGTH',
+                                 'IS_NULLABLE', 'COLUMN_DEFAULT', 'COLUMN_COMMENT')}
+            for col in get_schema_catalogue().columns(table_name)
+        ]
+
+        conn = mysql_conn.get_connection()
         cursor = conn.cursor(dictionary=True)
         
-        # 테이블 컬럼 정보 가져오기
-        cursor.execute(f"""
-            SELECT 
-                COLUMN_NAME, 
-                DATA_TYPE,
-                CHARACTER_MAXIMUM_LENGTH,
-                IS_NULLABLE,
-                COLUMN_DEFAULT,
-                COLUMN_COMMENT
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        """, (os.getenv('SQL_DATABASE_NEWBIZ'), table_name))
-        columns = cursor.fetchall()
-        
         # 테이블 통계 정보 가져오기
         cursor.execute(f"SELECT COUNT(*) as row_count FROM {table_name}")
         row_count = cursor.fetchone()['row_count']
@@ -846,51 +770,21 @@ def get_table_schema_info(table_name):
         return {'error': str(e)}
 
 def get_semantic_table_matches(query, tables=None):
-    """쿼리와 의미적으로 관련된 테이블을 찾는 함수"""
+    """쿼리와 의미적으로 관련된 테이블을 찾는 함수 (스키마 카탈로그 사용)"""
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv('SQL_HOST'),
-            user=os.getenv('SQL_USER'),
-            password=os.getenv('SQL_PASSWORD'),
-            database=os.getenv('SQL_DATABASE_NEWBIZ'),
-            charset='utf8mb4'
-        )
-        cursor = conn.cursor(dictionary=True)
-        
-        # 전체 테이블 목록 가져오기
-        cursor.execute("""
-            SELECT 
-                TABLE_NAME,
-                TABLE_COMMENT,
-                TABLE_ROWS,
-                CREATE_TIME,
-                UPDATE_TIME
-            FROM information_schema.TABLES 
-            WHERE TABLE_SCHEMA = %s
-        """, (os.getenv('SQL_DATABASE_NEWBIZ'),))
-        tables = cursor.fetchall()
+        catalogue = get_schema_catalogue()
         
         table_info = []
-        for table in tables:
-            table_name = table['TABLE_NAME']
+        for table_name, table in catalogue.snapshot().items():
+            columns = [
+                {k: col[k] for k in ('COLUMN_NAME', 'DATA_TYPE', 'IS_NULLABLE', 'COLUMN_COMMENT')}
+                for col in table['columns']
+            ]
             
-            # 컬럼 정보 가져오기
-            cursor.execute("""
-                SELECT 
-                    COLUMN_NAME,
-                    DATA_TYPE,
-                    IS_NULLABLE,
-                    COLUMN_COMMENT
-                FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-            """, (os.getenv('SQL_DATABASE_NEWBIZ'), table_name))
-            columns = cursor.fetchall()
-            
-            # 샘플 데이터 가져오기 (에러 방지를 위해 try-except 사용)
+            # 샘플 데이터 가져오기 (카탈로그가 갱신될 때까지 캐시, 에러 방지를 위해 try-except 사용)
             sample_data = None
             try:
-                cursor.execute(f"SELECT * FROM {table_name} LIMIT 1")
-                sample_data = cursor.fetchone()
+                sample_data = catalogue.sample_row(table_name)
             except:
                 pass
             
@@ -915,9 +809,6 @@ def get_semantic_table_matches(query, tables=None):
                 'sample': sample_data
             })
         
-        cursor.close()
-        conn.close()
-        
         if not query or query.lower() in ['all', '전체', '목록']:
             # 전체 테이블 목록 요청시 모든 정보 반환
             return table_info
@@ -946,58 +837,20 @@ def get_semantic_table_matches(query, tables=None):
         return {'error': str(e)}
 
 def get_semantic_row_matches(query, table_name, limit=10):
-    """테이블 내에서 쿼리와 의미적으로 관련된 행을 찾는 함수"""
+    """테이블 내에서 쿼리와 의미적으로 관련된 행을 찾는 함수 (DB 텍스트 인덱스 사용)"""
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv('SQL_HOST'),
-            user=os.getenv('SQL_USER'),
-            password=os.getenv('SQL_PASSWORD'),
-            database=os.getenv('SQL_DATABASE_NEWBIZ'),
-            charset='utf8mb4'
-        )
-        cursor = conn.cursor(dictionary=True)
-        
-        # 테이블의 텍스트 타입 컬럼 찾기
-        cursor.execute(f"""
-            SELECT COLUMN_NAME, DATA_TYPE 
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_SCHEMA = %s 
-            AND TABLE_NAME = %s 
-            AND DATA_TYPE IN ('varchar', 'text', 'longtext')
-        """, (os.getenv('SQL_DATABASE_NEWBIZ'), table_name))
-        text_columns = [row['COLUMN_NAME'] for row in cursor.fetchall()]
-        
-        if not text_columns:
+        index = get_refreshed_db_text_index()
+        if table_name not in index.tables:
             return {'error': '텍스트 컬럼이 없는 테이블입니다.'}
-        
-        # 텍스트 컬럼들의 데이터를 하나의 문자열로 합쳐서 가져오기
-        concat_columns = "CONCAT_WS(' ', " + ", ".join(text_columns) + ")"
-        cursor.execute(f"SELECT *, {concat_columns} as combined_text FROM {table_name}")
-        rows = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        if not rows:
+        if not index.tables[table_name]['rows']:
             return {'error': '테이블에 데이터가 없습니다.'}
-        
-        # 의미적 유사도 계산
-        vectorizer = TfidfVectorizer()
-        texts = [row['combined_text'] for row in rows]
-        vectors = vectorizer.fit_transform(texts + [query])
-        similarities = cosine_similarity(vectors[-1:], vectors[:-1])[0]
-        
-        # 유사도 순으로 정렬
-        matches = []
-        for i, sim in enumerate(similarities):
-            if sim > 0.1:  # 유사도 임계값
-                row_data = {k: v for k, v in rows[i].items() if k != 'combined_text'}
-                matches.append({
-                    'row': row_data,
-                    'similarity': float(sim)
-                })
-        
-        return sorted(matches, key=lambda x: x['similarity'], reverse=True)[:limit]
+
+        hits = index.search(query, k=limit, tables=[table_name], min_score=0.1)
+        index.fetch_rows(mysql_conn.get_connection, hits)
+        return [
+            {'row': hit['row'], 'similarity': hit['score']}
+            for hit in hits if hit['row'] is not None
+        ]
     except Exception as e:
         return {'error': str(e)}
 
@@ -1059,81 +912,27 @@ def estimate_token_count(text):
     return int(korean_chars * 0.7 + english_words * 1.3)
 
 def search_related_content_from_db(keyword, max_total_rows=10000):
-    """키워드와 관련된 모든 DB 내용을 가져오는 함수"""
+    """키워드와 관련된 모든 DB 내용을 가져오는 함수 (DB 텍스트 인덱스에서 키워드 포함 행 검색)"""
     try:
+        index = get_refreshed_db_text_index()
+        # 관련성 높은 순으로 정렬됨 (키워드 출현 빈도 기준)
+        hits = index.match(keyword, per_table=1000)[:max_total_rows]
+        index.fetch_rows(mysql_conn.get_connection, hits)
+
         all_related_content = []
-        tables = get_all_table_names()
-        
-        conn = mysql_conn.get_connection()
-        if not conn:
-            return []
-        
-        cursor = conn.cursor(dictionary=True)
-        
-        for table_name in tables:
-            try:
-                # 테이블의 텍스트 컬럼 찾기
-                cursor.execute(f"""
-                    SELECT COLUMN_NAME, DATA_TYPE 
-                    FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_SCHEMA = %s 
-                    AND TABLE_NAME = %s 
-                    AND DATA_TYPE IN ('varchar', 'text', 'longtext', 'mediumtext', 'tinytext')
-                """, (os.getenv('SQL_DATABASE_NEWBIZ'), table_name))
-                
-                text_columns = [row['COLUMN_NAME'] for row in cursor.fetchall()]
-                
-                if not text_columns:
-                    continue
-                
-                # 키워드가 포함된 모든 행 검색
-                where_conditions = []
-                params = []
-                
-                for col in text_columns:
-                    where_conditions.append(f"{col} LIKE %s")
-                    params.append(f"%{keyword}%")
-                
-                if where_conditions:
-                    query = f"""
-                        SELECT * FROM {table_name} 
-                        WHERE {' OR '.join(where_conditions)}
-                        ORDER BY created_at DESC
-                        LIMIT 1000
-                    """
-                    
-                    cursor.execute(query, params)
-                    rows = cursor.fetchall()
-                    
-                    for row in rows:
-                        # 각 행의 모든 텍스트 컬럼을 하나의 문서로 결합
-                        combined_text = ""
-                        for col in text_columns:
-                            if row.get(col):
-                                combined_text += f"{col}: {row[col]}\n"
-                        
-                        if combined_text.strip():
-                            all_related_content.append({
-                                'table': table_name,
-                                'row_id': row.get('id', 'unknown'),
-                                'content': combined_text.strip(),
-                                'metadata': {k: v for k, v in row.items() if k not in text_columns}
-                            })
-                
-            except Exception as e:
-                print(f"Error searching table {table_name}: {e}")
-                continue
-        
-        cursor.close()
-        
-        # 관련성 높은 순으로 정렬 (키워드 출현 빈도 기준)
-        for item in all_related_content:
-            item['relevance_score'] = item['content'].lower().count(keyword.lower())
-        
-        all_related_content.sort(key=lambda x: x['relevance_score'], reverse=True)
-        
-        return all_related_content[:max_total_rows]
-        
+        for hit in hits:
+            row = hit['row'] or {}
+            text_columns = index.tables[hit['table']]['text_columns']
+            pk = index.primary_key(hit['table'])
+            all_related_content.append({
+                'table': hit['table'],
+                'row_id': row.get('id', hit['key'] if pk else 'unknown'),
+                'content': hit['content'],
+                'metadata': {k: v for k, v in row.items() if k not in text_columns},
+                'relevance_score': hit['score']
+            })
+        return all_related_content
+
     except Exception as e:
         print(f"Error in search_related_content_from_db: {e}")
         return []
@@ -2347,7 +2146,7 @@ with st.expander('💬 JARVIS 대화 히스토리/검색/다운로드', expanded
             # --- 화자별 대화 기록 전체 삭제 버튼 ---
             if st.button(f'⚠️ {selected_speaker}의 대화 기록 전체 삭제', key='delete_speaker_history'):
                 try:
-                    conn = mysql.connector.connect(
+                    conn = db_pool.connect(
                         host=os.getenv('SQL_HOST'),
                         user=os.getenv('SQL_USER'),
                         password=os.getenv('SQL_PASSWORD'),
@@ -2371,7 +2170,7 @@ with st.expander('💬 JARVIS 대화 히스토리/검색/다운로드', expanded
 def connect_to_db():
     """Virtual Company 스타일의 데이터베이스 연결 함수"""
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -2383,57 +2182,24 @@ def connect_to_db():
         return None
 
 def get_table_schema(table_name):
-    """테이블 스키마 정보를 가져오는 함수"""
+    """테이블 스키마 정보를 가져오는 함수 (스키마 카탈로그 사용)"""
     try:
-        conn = connect_to_db()
-        if not conn:
-            return None
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"""
-            SELECT 
-                COLUMN_NAME,
-                DATA_TYPE,
-                IS_NULLABLE,
-                COLUMN_KEY,
-                COLUMN_COMMENT
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        """, (os.getenv('SQL_DATABASE_NEWBIZ'), table_name))
-        
-        columns = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return columns
+        return [
+            {k: col[k] for k in ('COLUMN_NAME', 'DATA_TYPE', 'IS_NULLABLE', 'COLUMN_KEY', 'COLUMN_COMMENT')}
+            for col in get_schema_catalogue().columns(table_name)
+        ]
     except Exception as e:
         st.error(f"스키마 조회 오류: {e}")
         return None
 
 def get_mysql_tables():
-    """데이터베이스의 모든 테이블 목록을 가져오는 함수"""
+    """데이터베이스의 모든 테이블 목록을 가져오는 함수 (스키마 카탈로그 사용)"""
     try:
-        conn = connect_to_db()
-        if not conn:
-            return []
-        
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                TABLE_NAME,
-                TABLE_COMMENT,
-                TABLE_ROWS,
-                CREATE_TIME,
-                UPDATE_TIME
-            FROM information_schema.TABLES 
-            WHERE TABLE_SCHEMA = %s
-        """, (os.getenv('SQL_DATABASE_NEWBIZ'),))
-        
-        tables = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        return tables
+        return [
+            (table['TABLE_NAME'], table['TABLE_COMMENT'], table['TABLE_ROWS'],
+             table['CREATE_TIME'], table['UPDATE_TIME'])
+            for table in get_schema_catalogue().snapshot().values()
+        ]
     except Exception as e:
         st.error(f"테이블 목록 조회 오류: {e}")
         return []
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import db_pool
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -46,7 +47,7 @@ db_config = {
 # 필요한 테이블 생성 함수
 def ensure_tables_exist():
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # mission_vision 테이블 생성
@@ -106,7 +107,7 @@ with tab1:
     st.header("원칙 관리")
     
     # 원칙 목록 표시
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     principles_df = pd.read_sql("SELECT * FROM principles ORDER BY principle_number", conn)
     conn.close()
     
@@ -122,7 +123,7 @@ with tab1:
     
     if submit_add and principle_title:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO principles (principle_number, principle_title) VALUES (%s, %s)",
@@ -158,7 +159,7 @@ with tab1:
         
         if submit_edit:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE principles SET principle_number = %s, principle_title = %s WHERE principle_id = %s",
@@ -173,7 +174,7 @@ with tab1:
         
         if submit_delete:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 
                 # 관련 실행 항목 삭제
@@ -210,7 +211,7 @@ with tab2:
     st.header("세부 원칙 관리")
     
     # 세부 원칙 목록 표시
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     sub_principles_df = pd.read_sql("""
         SELECT sp.*, p.principle_number, p.principle_title 
         FROM sub_principles sp
@@ -242,7 +243,7 @@ with tab2:
     
     if submit_add_sp and sub_principle_title and sub_principle_number:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO sub_principles (principle_id, sub_principle_number, sub_principle_title) VALUES (%s, %s, %s)",
@@ -286,7 +287,7 @@ with tab2:
         
         if submit_edit_sp:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE sub_principles SET principle_id = %s, sub_principle_number = %s, sub_principle_title = %s WHERE sub_principle_id = %s",
@@ -301,7 +302,7 @@ with tab2:
         
         if submit_delete_sp:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 
                 # 관련 실행 항목 삭제
@@ -328,7 +329,7 @@ with tab3:
     st.header("실행 항목 관리")
     
     # 실행 항목 목록 표시
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     action_items_df = pd.read_sql("""
         SELECT ai.*, sp.sub_principle_number, sp.sub_principle_title, 
                p.principle_number, p.principle_title
@@ -366,7 +367,7 @@ with tab3:
     
     if submit_add_ai and action_item_text:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO action_items (sub_principle_id, action_item_text) VALUES (%s, %s)",
@@ -409,7 +410,7 @@ with tab3:
         
         if submit_edit_ai:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE action_items SET sub_principle_id = %s, action_item_text = %s WHERE action_item_id = %s",
@@ -424,7 +425,7 @@ with tab3:
         
         if submit_delete_ai:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "DELETE FROM action_items WHERE action_item_id = %s",
@@ -442,7 +443,7 @@ with tab4:
     st.header("서문 관리")
     
     # 서문 데이터 가져오기
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     cursor = conn.cursor(dictionary=True)
     cursor.execute("SELECT * FROM introduction")
     intro_data = cursor.fetchone()
@@ -463,7 +464,7 @@ with tab4:
     
     if submit_intro:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             
             if intro_data:
@@ -491,7 +492,7 @@ with tab5:
     st.header("요약 관리")
     
     # 요약 목록 표시
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     summary_df = pd.read_sql("SELECT * FROM summary ORDER BY summary_id", conn)
     conn.close()
     
@@ -507,7 +508,7 @@ with tab5:
     
     if submit_add_summary and summary_title and summary_text:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO summary (summary_title, summary_text) VALUES (%s, %s)",
@@ -543,7 +544,7 @@ with tab5:
         
         if submit_edit_summary:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE summary SET summary_title = %s, summary_text = %s WHERE summary_id = %s",
@@ -558,7 +559,7 @@ with tab5:
         
         if submit_delete_summary:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "DELETE FROM summary WHERE summary_id = %s",
@@ -576,7 +577,7 @@ with tab6:
     st.header("미션 & 비전 관리")
     
     # 미션 & 비전 데이터 가져오기
-    conn = mysql.connector.connect(**db_config)
+    conn = db_pool.connect(**db_config)
     cursor = conn.cursor(dictionary=True)
     
     # 미션 & 비전 데이터
@@ -614,7 +615,7 @@ with tab6:
     
     if submit_mission_vision:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             
             if mission_vision_data:
@@ -655,7 +656,7 @@ with tab6:
     
     if submit_add_objective and objective_category and objective_text:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO key_objectives (category, objective_text, sort_order) VALUES (%s, %s, %s)",
@@ -696,7 +697,7 @@ with tab6:
         
         if submit_edit_objective:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE key_objectives SET category = %s, objective_text = %s, sort_order = %s WHERE id = %s",
@@ -711,7 +712,7 @@ with tab6:
         
         if submit_delete_objective:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "DELETE FROM key_objectives WHERE id = %s",
@@ -742,7 +743,7 @@ with tab6:
     
     if submit_add_value and value_title and value_description:
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO core_values (value_title, value_description, sort_order) VALUES (%s, %s, %s)",
@@ -783,7 +784,7 @@ with tab6:
         
         if submit_edit_value:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "UPDATE core_values SET value_title = %s, value_description = %s, sort_order = %s WHERE id = %s",
@@ -798,7 +799,7 @@ with tab6:
         
         if submit_delete_value:
             try:
-                conn = mysql.connector.connect(**db_config)
+                conn = db_pool.connect(**db_config)
                 cursor = conn.cursor()
                 cursor.execute(
                     "DELETE FROM core_values WHERE id = %s",
@@ -816,7 +817,7 @@ with tab6:
     
     if st.button("신사업실 미션 & 비전 데이터 로드", type="primary"):
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor()
             
             # 기존 데이터 삭제
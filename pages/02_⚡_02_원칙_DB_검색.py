@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import db_pool
 import json
 import re
 import html
@@ -169,7 +170,7 @@ st.markdown("""
 def get_actual_columns(table_name, db_config):
     """테이블의 실제 컬럼명을 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
 
         cursor.execute(f"SHOW COLUMNS FROM {table_name}")
@@ -185,7 +186,7 @@ def get_actual_columns(table_name, db_config):
 def search_principles_data(table_name, keyword=None, db_config=None, search_type="AND"):
     """원칙 DB의 특정 테이블에서 키워드로 데이터를 검색합니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
 
         # 테이블의 실제 컬럼 가져오기
@@ -267,14 +268,26 @@ def highlight_keywords_in_dataframe(df, keyword, search_type="AND"):
 
     return highlighted_df
 
-def get_joined_principles_data(keyword=None, search_type="AND"):
-    """원칙, 세부 원칙, 실행 항목을 조인하여 계층적 데이터를 가져옵니다."""
-    try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor(dictionary=True)
+# FULLTEXT(ngram) 검색에 사용하는 인덱스 컬럼 - 02_💾_DB생성.py의 "원칙 DB 검색 FULLTEXT 인덱스 생성"으로 생성
+FULLTEXT_INDEX_COLUMNS = {
+    'principles': ['principle_title'],
+    'sub_principles': ['sub_principle_title'],
+    'action_items': ['action_item_text'],
+    'summary': ['summary_title', 'summary_text'],
+    'introduction': ['intro_text'],
+}
+
+# MySQL ngram_token_size 기본값 - 이보다 짧은 검색어는 FULLTEXT 인덱스로 찾을 수 없음
+NGRAM_TOKEN_SIZE = 2
 
-        # 기본 원칙 데이터 쿼리
-        principles_query = """
+# FULLTEXT 인덱스 존재 여부 캐시 시간 (초) - DB 생성 페이지에서 만든 인덱스가 이 시간 안에 검색에 반영됨
+FULLTEXT_CHECK_TTL = 60
+
+# BOOLEAN MODE 연산자 문자
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+# 원칙/세부 원칙/실행 항목, 요약, 서문 기본 쿼리 ({relevance}: 관련도 계산식)
+PRINCIPLES_SELECT = """
         SELECT 
             p.principle_id, 
             p.principle_number, 
@@ -283,7 +296,8 @@ def get_joined_principles_data(keyword=None, search_type="AND"):
             sp.sub_principle_number,
             sp.sub_principle_title,
             ai.action_item_id,
-            ai.action_item_text
+            ai.action_item_text,
+            {relevance} as relevance
         FROM 
             principles p
         LEFT JOIN 
@@ -291,9 +305,8 @@ def get_joined_principles_data(keyword=None, search_type="AND"):
         LEFT JOIN 
             action_items ai ON sp.sub_principle_id = ai.sub_principle_id
         """
-        
-        # 요약 데이터 쿼리
-        summary_query = """
+
+SUMMARY_SELECT = """
         SELECT 
             NULL as principle_id,
             999 as principle_number, 
@@ -302,13 +315,13 @@ def get_joined_principles_data(keyword=None, search_type="AND"):
             'S' as sub_principle_number,
             s.summary_title as sub_principle_title,
             NULL as action_item_id,
-            s.summary_text as action_item_text
+            s.summary_text as action_item_text,
+            {relevance} as relevance
         FROM 
             summary s
         """
-        
-        # 서문 데이터 쿼리
-        intro_query = """
+
+INTRO_SELECT = """
         SELECT 
             NULL as principle_id,
             998 as principle_number, 
@@ -317,10 +330,138 @@ def get_joined_principles_data(keyword=None, search_type="AND"):
             'I' as sub_principle_number,
             '서문' as sub_principle_title,
             NULL as action_item_id,
-            i.intro_text as action_item_text
+            i.intro_text as action_item_text,
+            {relevance} as relevance
         FROM 
             introduction i
         """
+
+@st.cache_data(ttl=FULLTEXT_CHECK_TTL, show_spinner=False)
+def has_fulltext_indexes():
+    """원칙 DB 테이블에 검색용 FULLTEXT 인덱스가 모두 있는지 확인합니다."""
+    try:
+        conn = db_pool.connect(**db_config)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT TABLE_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT'
+            GROUP BY TABLE_NAME, INDEX_NAME
+        """)
+        existing = set(cursor.fetchall())
+        
+        cursor.close()
+        conn.close()
+    except mysql.connector.Error:
+        return False
+    
+    return all((table, ','.join(columns)) in existing for table, columns in FULLTEXT_INDEX_COLUMNS.items())
+
+def get_fulltext_terms(keyword, search_type="AND"):
+    """검색어를 BOOLEAN MODE 구문 목록으로 변환합니다. (FULLTEXT로 찾을 수 없는 검색어면 None)"""
+    if search_type == "Exact Match":
+        words = [_BOOLEAN_OPERATORS.sub(' ', keyword).strip()]
+    else:
+        words = [_BOOLEAN_OPERATORS.sub('', word) for word in keyword.split()]
+    
+    if not words or any(len(word.replace(' ', '')) < NGRAM_TOKEN_SIZE for word in words):
+        return None
+    
+    # ngram 파서는 구문 검색 시 연속된 ngram을 찾으므로 부분 문자열 검색과 같은 효과
+    return [f'"{word}"' for word in words]
+
+def search_joined_principles_fulltext(terms, search_type="AND"):
+    """FULLTEXT 인덱스로 원칙 데이터를 검색하고 관련도 순으로 정렬합니다.
+    
+    AND 검색은 단어마다 (원칙 OR 세부 원칙 OR 실행 항목) 중 하나에 포함되어야 하며,
+    원칙 단위의 최대 관련도 순으로 정렬하되 원칙 내부의 계층 순서는 유지합니다.
+    """
+    conn = db_pool.connect(**db_config)
+    cursor = conn.cursor(dictionary=True)
+    
+    try:
+        groups = terms if search_type == "AND" else [' '.join(terms)]
+        query_text = ' '.join(terms)
+        
+        principles_relevance = """
+            MATCH(p.principle_title) AGAINST (%s IN BOOLEAN MODE)
+            + COALESCE(MATCH(sp.sub_principle_title) AGAINST (%s IN BOOLEAN MODE), 0)
+            + COALESCE(MATCH(ai.action_item_text) AGAINST (%s IN BOOLEAN MODE), 0)
+        """
+        principles_condition = """
+            (
+                p.principle_id IN (SELECT principle_id FROM principles
+                                   WHERE MATCH(principle_title) AGAINST (%s IN BOOLEAN MODE)) OR
+                sp.sub_principle_id IN (SELECT sub_principle_id FROM sub_principles
+                                        WHERE MATCH(sub_principle_title) AGAINST (%s IN BOOLEAN MODE)) OR
+                ai.action_item_id IN (SELECT action_item_id FROM action_items
+                                      WHERE MATCH(action_item_text) AGAINST (%s IN BOOLEAN MODE))
+            )
+        """
+        summary_match = "MATCH(s.summary_title, s.summary_text) AGAINST (%s IN BOOLEAN MODE)"
+        intro_match = "MATCH(i.intro_text) AGAINST (%s IN BOOLEAN MODE)"
+        
+        combined_query = f"""
+        {PRINCIPLES_SELECT.format(relevance=principles_relevance)}
+        WHERE {" AND ".join([principles_condition] * len(groups))}
+        UNION ALL
+        {SUMMARY_SELECT.format(relevance=summary_match)}
+        WHERE {" AND ".join([summary_match] * len(groups))}
+        UNION ALL
+        {INTRO_SELECT.format(relevance=intro_match)}
+        WHERE {" AND ".join([intro_match] * len(groups))}
+        """
+        params = [query_text] * 3
+        for group in groups:
+            params.extend([group] * 3)
+        params.append(query_text)
+        params.extend(groups)
+        params.append(query_text)
+        params.extend(groups)
+        
+        cursor.execute(combined_query, tuple(params))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df, rows
+    
+    df['principle_relevance'] = df.groupby('principle_number')['relevance'].transform('max')
+    df = df.sort_values(
+        ['principle_relevance', 'principle_number', 'sub_principle_number'],
+        ascending=[False, True, True]
+    ).drop(columns='principle_relevance')
+    
+    # 행 목록은 LIKE 검색과 같이 원래 행(NULL은 None)을 정렬 순서대로 반환 (to_dict는 NaN으로 바꿈)
+    sorted_rows = [rows[i] for i in df.index]
+    return df.reset_index(drop=True), sorted_rows
+
+def get_joined_principles_data(keyword=None, search_type="AND", use_fulltext=True):
+    """원칙, 세부 원칙, 실행 항목을 조인하여 계층적 데이터를 가져옵니다.
+    
+    FULLTEXT 인덱스가 있으면 MATCH ... AGAINST 검색(관련도 순)을 사용하고,
+    인덱스가 없거나 검색어가 너무 짧으면 LIKE 검색을 사용합니다.
+    """
+    if keyword and use_fulltext and has_fulltext_indexes():
+        terms = get_fulltext_terms(keyword, search_type)
+        if terms:
+            try:
+                return search_joined_principles_fulltext(terms, search_type)
+            except mysql.connector.Error:
+                # 인덱스가 삭제된 경우 등 - 인덱스 상태를 다시 확인하도록 하고 LIKE 검색으로 대체
+                has_fulltext_indexes.clear()
+    
+    try:
+        conn = db_pool.connect(**db_config)
+        cursor = conn.cursor(dictionary=True)
+
+        principles_query = PRINCIPLES_SELECT.format(relevance="0")
+        summary_query = SUMMARY_SELECT.format(relevance="0")
+        intro_query = INTRO_SELECT.format(relevance="0")
         
         # 키워드 검색 조건 추가
         if keyword:
@@ -412,7 +553,7 @@ def get_joined_principles_data(keyword=None, search_type="AND"):
 def get_introduction_text():
     """서문 텍스트를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("SELECT intro_text FROM introduction LIMIT 1")
@@ -429,7 +570,7 @@ def get_introduction_text():
 def get_summary_data():
     """요약 데이터를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("SELECT summary_title, summary_text FROM summary")
@@ -446,7 +587,7 @@ def get_summary_data():
 def get_principles_stats():
     """원칙 데이터의 통계 정보를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         # 원칙 수
@@ -486,6 +627,11 @@ with col1:
 with col2:
     search_type = st.radio("검색 방식", ["AND", "OR", "Exact Match"], 
                           help="AND: 모든 단어 포함, OR: 하나 이상의 단어 포함, Exact Match: 정확한 구문 일치")
+    use_fulltext = st.checkbox("FULLTEXT 검색 (관련도 순)", value=True,
+                               help="FULLTEXT(ngram) 인덱스가 있으면 인덱스 검색 후 관련도 순으로 정렬합니다.")
+
+if keyword and use_fulltext and not has_fulltext_indexes():
+    st.caption("FULLTEXT 인덱스가 없어 LIKE 검색을 사용합니다. (DB 생성 페이지 > 원칙 DB 검색 FULLTEXT 인덱스 생성)")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -550,7 +696,7 @@ with tab2:
         st.markdown('<h2 class="sub-header">검색 결과</h2>', unsafe_allow_html=True)
         
         # 조인된 데이터에서 검색
-        df, json_data = get_joined_principles_data(keyword, search_type)
+        df, json_data = get_joined_principles_data(keyword, search_type, use_fulltext)
         
         if not df.empty:
             # 결과 수 표시
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import time
@@ -145,7 +146,7 @@ st.markdown("""
 def get_mission_vision_data():
     """미션 & 비전 데이터를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM mission_vision LIMIT 1")
         data = cursor.fetchone()
@@ -159,7 +160,7 @@ def get_mission_vision_data():
 def get_key_objectives_data():
     """핵심 목표 데이터를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM key_objectives ORDER BY category, sort_order")
         data = cursor.fetchall()
@@ -173,7 +174,7 @@ def get_key_objectives_data():
 def get_core_values_data():
     """핵심 가치 데이터를 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT * FROM core_values ORDER BY sort_order")
         data = cursor.fetchall()
@@ -187,7 +188,7 @@ def get_core_values_data():
 def search_mission_vision_data(keyword):
     """미션 & 비전 데이터에서 키워드를 검색합니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         
         # 미션 & 비전 검색
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import random
@@ -154,7 +155,7 @@ EMBEDDING_MODEL = "nomic-embed-text:latest"  # 274MB - 텍스트 임베딩 전
 def get_all_principles():
     """DB에서 모든 원칙과 세부원칙을 가져옵니다."""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor(dictionary=True)
         cursor.execute("""
             SELECT 
@@ -1,5 +1,5 @@
 import streamlit as st
-import mysql.connector
+import db_pool
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -18,7 +18,7 @@ st.set_page_config(
 
 # MySQL 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
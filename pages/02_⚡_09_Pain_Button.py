@@ -3,7 +3,7 @@ import pandas as pd
 import plotly.express as px
 from datetime import datetime
 from langchain.chat_models import ChatOllama, ChatOpenAI
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 
@@ -19,7 +19,7 @@ default_model = "gpt-4o-mini"
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -3,7 +3,7 @@ import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime, timedelta
-import mysql.connector
+import db_pool
 from mysql.connector import Error
 import numpy as np
 import os
@@ -36,15 +36,15 @@ sheet = gc.open_by_key(ISSUE_LOGS_SPREADSHEET_ID).worksheet(ISSUE_LOGS_WORKSHEET
 # Get current date and time
 current_time = datetime.now()
 # MySQL 연결 설정
-conn = mysql.connector.connect(
+conn = db_pool.connect(
     user=os.getenv('SQL_USER'),
     password=os.getenv('SQL_PASSWORD'),
     host=os.getenv('SQL_HOST'),
     database=os.getenv('SQL_DATABASE_NEWBIZ'),
     charset='utf8mb4',
-    collation='utf8mb4_general_ci'
+    collation='utf8mb4_general_ci',
+    autocommit=True
 )
-conn.autocommit = True
 cursor = conn.cursor()
 
 # MySQL에서 동일한 unique key를 가진 데이터 검색 함수를 상단으로 이동
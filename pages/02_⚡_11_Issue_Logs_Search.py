@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import mysql.connector
+import db_pool
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
@@ -12,7 +12,7 @@ st.set_page_config(page_title="Issue Logs 검색", page_icon="🔍", layout="wid
 
 def connect_to_db():
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
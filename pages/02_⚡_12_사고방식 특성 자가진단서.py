@@ -3,7 +3,7 @@ import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import requests
@@ -19,7 +19,7 @@ st.subheader("자신의 사고방식과 성향을 파악하여 AI와의 효과
 
 # DB 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import gspread
@@ -17,7 +17,7 @@ st.subheader("저장된 자가진단 결과를 조회합니다.")
 
 # DB 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,5 +1,6 @@
 import streamlit as st
 import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -20,7 +21,7 @@ st.set_page_config(
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -21,7 +22,7 @@ st.set_page_config(
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -6,6 +6,7 @@ import plotly.graph_objects as go
 import os
 from datetime import datetime, timedelta
 import mysql.connector
+import db_pool
 from mysql.connector import Error
 from dotenv import load_dotenv
 import sys
@@ -18,7 +19,7 @@ load_dotenv()
 def get_connection():
     """MySQL database connection creation"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -4,9 +4,7 @@ from datetime import datetime
 import time
 import random
 from dotenv import load_dotenv
-from openai import OpenAI
 import anthropic
-from langchain_anthropic import ChatAnthropic
 import json
 import asyncio
 import threading
@@ -14,11 +12,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # RAG 관련 import 추가
 import mysql.connector
+import db_pool
 import pandas as pd
 from sqlalchemy import create_engine
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
 from urllib.robotparser import RobotFileParser
 import nltk
 import logging
@@ -31,6 +27,9 @@ from langchain.vectorstores.faiss import FAISS
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.document_loaders import UnstructuredFileLoader
 from langchain.schema import Document
+import llm_cache
+import llm_service
+import web_crawler
 
 # 환경 변수 로드
 load_dotenv()
@@ -39,7 +38,7 @@ load_dotenv()
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -871,69 +870,20 @@ def load_mysql_data(selected_tables):
         return {}
 
 def scrape_website_simple(url, max_pages=5):
-    """간단한 웹사이트 크롤링"""
+    """간단한 웹사이트 크롤링 (공유 비동기 크롤러 사용)"""
     try:
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        visited_urls = set()
         texts = []
-        urls_to_visit = [url]
-        
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
-        page_count = 0
-        while urls_to_visit and page_count < max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in visited_urls:
-                continue
-                
-            try:
-                response = session.get(current_url, timeout=10)
-                response.raise_for_status()
-                
-                visited_urls.add(current_url)
-                page_count += 1
-                
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                # 불필요한 태그 제거
-                for tag in soup(["script", "style", "nav", "header", "footer"]):
-                    tag.decompose()
-                
-                page_text = soup.get_text(separator="\n", strip=True)
-                lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-                cleaned_text = '\n'.join(lines)
-                
-                if len(cleaned_text) > 200:
-                    page_title = soup.title.string.strip() if soup.title and soup.title.string else 'No Title'
-                    texts.append({
-                        'content': cleaned_text,
-                        'url': current_url,
-                        'title': page_title
-                    })
-                
-                # 새로운 링크 찾기 (같은 도메인만)
-                base_domain = urlparse(url).netloc
-                if page_count < max_pages:
-                    for link in soup.find_all("a", href=True)[:10]:
-                        absolute_link = urljoin(current_url, link['href'])
-                        parsed_link = urlparse(absolute_link)
-                        
-                        if (parsed_link.netloc == base_domain and 
-                            absolute_link not in visited_urls and 
-                            absolute_link not in urls_to_visit):
-                            urls_to_visit.append(absolute_link)
-                
-                time.sleep(1)  # 지연시간
-                
-            except Exception as e:
-                logger.error(f"페이지 크롤링 오류 {current_url}: {e}")
+        for page in web_crawler.iter_crawl(
+                url, max_pages=max_pages, max_links_per_page=10,
+                extract=lambda page: web_crawler.extract_text(page, min_length=200)):
+            if page['error'] is not None:
+                logger.error(f"페이지 크롤링 오류 {page['url']}: {page['error']}")
                 continue
+            texts.append({
+                'content': page['data']['content'],
+                'url': page['url'],
+                'title': page['data']['title'] or 'No Title'
+            })
         
         return texts
         
@@ -1632,37 +1582,11 @@ def create_rag_context():
     return context_text
 
 # AI 분석 함수
-def get_ai_response(prompt, model_name, system_prompt=""):
+@llm_cache.cached(temperature=0.7)
+def get_ai_response(prompt, model_name, system_prompt="", placeholder=None):
     """AI 모델로부터 응답을 받는 함수"""
     try:
-        if model_name.startswith('claude'):
-            client = ChatAnthropic(
-                model=model_name, 
-                api_key=os.getenv('ANTHROPIC_API_KEY'), 
-                temperature=0.7, 
-                max_tokens=8192
-            )
-            response = client.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ])
-            return response.content if hasattr(response, 'content') else str(response)
-        else:
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key or openai_key.strip() == '' or openai_key == 'NA':
-                raise ValueError("OpenAI API 키가 올바르지 않습니다.")
-            
-            client = OpenAI(api_key=openai_key)
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=8192,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+        return llm_service.complete(prompt, model_name, system_prompt, placeholder=placeholder)
     except Exception as e:
         st.error(f"AI 응답 중 오류: {str(e)}")
         return None
@@ -19,6 +19,7 @@ import asyncio
 import queue
 import random
 import mysql.connector
+import db_pool
 
 load_dotenv()
 
@@ -1404,7 +1405,7 @@ def initialize_session_state():
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -1,5 +1,5 @@
 import streamlit as st
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import pandas as pd
@@ -30,7 +30,7 @@ if not st.session_state.authenticated:
         st.stop()
 
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,5 +1,12 @@
 import streamlit as st
 import mysql.connector
+import db_pool
+import llm_cache
+import llm_service
+import schema_catalogue
+import inventory_ledger
+import lead_time_facts
+import blob_store
 import os
 from dotenv import load_dotenv
 import pandas as pd
@@ -18,7 +25,7 @@ st.title("💾 DB 테이블 관리 시스템")
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -63,7 +70,7 @@ db_config = {
 def get_existing_tables():
     """기존 테이블 목록 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         cursor.execute("SHOW TABLES")
         tables = [table[0] for table in cursor.fetchall()]
@@ -77,7 +84,7 @@ def get_existing_tables():
 def get_table_schema(table_name):
     """테이블 스키마 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         cursor.execute(f"DESCRIBE {table_name}")
         columns = cursor.fetchall()
@@ -88,10 +95,11 @@ def get_table_schema(table_name):
         st.error(f"Error: {err}")
         return []
 
+@schema_catalogue.invalidates_schema
 def create_or_modify_table(table_name, columns, unique_keys, mode="migrate"):
     """테이블 생성 또는 수정 (mode: migrate=기존 데이터 보존, reset=기존 데이터 삭제)"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         if mode == "reset":
@@ -159,10 +167,11 @@ def create_or_modify_table(table_name, columns, unique_keys, mode="migrate"):
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def delete_table(table_name):
     """테이블 삭제"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
         conn.commit()
@@ -176,7 +185,7 @@ def delete_table(table_name):
 def get_table_data(table_name, search_term=None):
     """테이블 데이터 조회"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 먼저 테이블의 컬럼 정보를 가져옴
@@ -208,10 +217,11 @@ def get_table_data(table_name, search_term=None):
         st.error(f"Error: {err}")
         return pd.DataFrame()
 
+@schema_catalogue.invalidates_schema
 def create_rayleigh_skylights_tables():
     """Rayleigh skylights 관련 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 외래 키 체크 비활성화
@@ -341,10 +351,11 @@ def create_rayleigh_skylights_tables():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_self_introduction_table():
     """자기소개서 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 기존 테이블 삭제
@@ -378,10 +389,11 @@ def create_self_introduction_table():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_toc_analysis_tables():
     """TOC 분석 관련 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 외래 키 체크 비활성화
@@ -446,10 +458,11 @@ def create_toc_analysis_tables():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_valuation_tables():
     """기업 가치 평가 관련 테이블 생성"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         cursor = conn.cursor()
         
         # 외래 키 체크 비활성화
@@ -550,6 +563,7 @@ def create_valuation_tables():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_vote_tables():
     conn = connect_to_db()
     cursor = conn.cursor()
@@ -607,6 +621,7 @@ def create_vote_tables():
         cursor.close()
         conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_subjective_tables():
     """주관식 질문 관련 테이블 생성"""
     conn = connect_to_db()
@@ -709,6 +724,7 @@ def create_subjective_tables():
         if conn:
             conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_subjective_llm_tables():
     """주관식 LLM 응답 테이블 생성"""
     conn = connect_to_db()
@@ -786,6 +802,7 @@ def get_supplier_names():
         print(f"공급업체 목록 조회 중 오류 발생: {err}")
         return []
 
+@schema_catalogue.invalidates_schema
 def create_logistics_tables(mode="migrate"):
     conn = connect_to_db()
     cursor = conn.cursor()
@@ -797,6 +814,9 @@ def create_logistics_tables(mode="migrate"):
             cursor.execute("DROP TABLE IF EXISTS commercial_invoices")
             cursor.execute("DROP TABLE IF EXISTS pi_items")
             cursor.execute("DROP TABLE IF EXISTS proforma_invoices")
+            cursor.execute(f"DROP TABLE IF EXISTS {inventory_ledger.SNAPSHOT_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {lead_time_facts.MONTHLY_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {lead_time_facts.FACT_TABLE}")
             cursor.execute("DROP TABLE IF EXISTS inventory_transactions")
             cursor.execute("DROP TABLE IF EXISTS inventory_logistics")
             cursor.execute("DROP TABLE IF EXISTS products_logistics")
@@ -863,17 +883,21 @@ def create_logistics_tables(mode="migrate"):
             CREATE TABLE IF NOT EXISTS inventory_transactions (
                 transaction_id INT AUTO_INCREMENT PRIMARY KEY,
                 product_id INT NOT NULL,
-                change_type ENUM('입고', '출고', '폐기') NOT NULL,
+                change_type ENUM('입고', '출고', '폐기', '조정') NOT NULL,
                 quantity INT NOT NULL,
                 date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 certificate_number VARCHAR(100),
                 destination VARCHAR(200),
                 notes TEXT,
                 reference_number VARCHAR(50),
+                INDEX idx_transactions_date (date),
                 FOREIGN KEY (product_id) REFERENCES products_logistics(product_id)
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
 
+        # 일별 재고 스냅샷 테이블 (원장에서 계산)
+        inventory_ledger.ensure_schema(cursor, force=True)
+
         # Proforma Invoice 테이블
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS proforma_invoices (
@@ -985,6 +1009,9 @@ def create_logistics_tables(mode="migrate"):
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
 
+        # 리드타임 팩트/월별 집계 테이블 (PI/CI에서 계산, 물류 페이지에서 처음 조회 시 채움)
+        lead_time_facts.ensure_schema(cursor, force=True)
+
         # 배송 추적 테이블
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS shipment_tracking (
@@ -1007,7 +1034,7 @@ def create_logistics_tables(mode="migrate"):
         # --- 기존 테이블의 문자셋 변경 ---
         tables = [
             'suppliers', 'products_logistics', 'inventory_logistics', 
-            'inventory_transactions', 'proforma_invoices', 'pi_items',
+            'inventory_transactions', inventory_ledger.SNAPSHOT_TABLE, 'proforma_invoices', 'pi_items',
             'commercial_invoices', 'ci_items', 'shipment_tracking'
         ]
         for table in tables:
@@ -1024,6 +1051,7 @@ def create_logistics_tables(mode="migrate"):
         cursor.close()
         conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_mcp_analysis_table():
     """MCP 분석 결과 테이블 생성/수정"""
     conn = None
@@ -1080,6 +1108,7 @@ def create_mcp_analysis_table():
         if conn:
             conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_decision_tree_tables():
     """비즈니스 의사결정 트리 테이블 생성"""
     conn = connect_to_db()
@@ -1202,6 +1231,7 @@ def create_decision_tree_tables():
         cursor.close()
         conn.close()
 
+@schema_catalogue.invalidates_schema
 def drop_decision_tree_tables():
     """의사결정 트리 테이블 삭제"""
     conn = connect_to_db()
@@ -1226,6 +1256,7 @@ def drop_decision_tree_tables():
         cursor.close()
         conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_meeting_records_table(mode="migrate"):
     """회의록 테이블 생성/업데이트"""
     conn = connect_to_db()
@@ -1286,6 +1317,7 @@ def create_meeting_records_table(mode="migrate"):
         cursor.close()
         conn.close()
 
+@schema_catalogue.invalidates_schema
 def create_ai_tool_expenses_table():
     """AI 툴 사용비용 기록 테이블 생성"""
     try:
@@ -1310,6 +1342,7 @@ def create_ai_tool_expenses_table():
         st.error(f"AI 사용비용 테이블 생성 오류: {e}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_project_review_tables():
     """프로젝트 리뷰 시스템 관련 테이블 생성"""
     try:
@@ -1359,9 +1392,12 @@ def create_project_review_tables():
                 filename VARCHAR(255) NOT NULL,
                 file_type VARCHAR(50) NOT NULL,
                 file_content LONGTEXT,
+                file_binary_data LONGTEXT,
+                blob_sha256 CHAR(64),
                 file_size INT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (review_id) REFERENCES project_reviews(review_id) ON DELETE CASCADE
+                FOREIGN KEY (review_id) REFERENCES project_reviews(review_id) ON DELETE CASCADE,
+                INDEX idx_blob_sha256 (blob_sha256)
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
         
@@ -1408,6 +1444,7 @@ def create_project_review_tables():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def add_revenue_to_project_reviews():
     """프로젝트 리뷰 테이블에 매출액 컬럼 추가 (기존 데이터 보존)"""
     try:
@@ -1442,6 +1479,50 @@ def add_revenue_to_project_reviews():
         st.error(f"Error: {err}")
         return False
 
+# 원칙 DB 검색용 FULLTEXT 인덱스 (테이블, 인덱스 이름, 컬럼)
+PRINCIPLES_FULLTEXT_INDEXES = [
+    ('principles', 'ft_principle_title', ['principle_title']),
+    ('sub_principles', 'ft_sub_principle_title', ['sub_principle_title']),
+    ('action_items', 'ft_action_item_text', ['action_item_text']),
+    ('summary', 'ft_summary', ['summary_title', 'summary_text']),
+    ('introduction', 'ft_intro_text', ['intro_text']),
+]
+
+@schema_catalogue.invalidates_schema
+def add_principles_fulltext_indexes():
+    """원칙 DB 테이블에 ngram 파서 FULLTEXT 인덱스 추가 (이미 있으면 건너뜀)"""
+    try:
+        conn = connect_to_db()
+        cursor = conn.cursor()
+        created = []
+        
+        for table, index_name, columns in PRINCIPLES_FULLTEXT_INDEXES:
+            cursor.execute("SHOW TABLES LIKE %s", (table,))
+            if not cursor.fetchone():
+                st.warning(f"{table} 테이블이 존재하지 않아 건너뜁니다.")
+                continue
+            
+            cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+            if cursor.fetchall():
+                st.info(f"{table}.{index_name} 인덱스가 이미 존재합니다.")
+                continue
+            
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD FULLTEXT INDEX {index_name} ({', '.join(columns)}) WITH PARSER ngram
+            """)
+            created.append(f"{table}.{index_name}")
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return created
+        
+    except mysql.connector.Error as err:
+        st.error(f"Error: {err}")
+        return None
+
+@schema_catalogue.invalidates_schema
 def add_value_metrics_to_project_reviews():
     """프로젝트 리뷰 테이블에 가치 지표 컬럼들 추가 (기존 데이터 보존)"""
     try:
@@ -1483,6 +1564,7 @@ def add_value_metrics_to_project_reviews():
         st.error(f"Error: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_virtual_company_tables():
     """Virtual Company AI 멀티에이전트 분석 결과 저장용 테이블 생성"""
     try:
@@ -1609,6 +1691,7 @@ def create_virtual_company_tables():
         print(f"❌ Virtual Company 테이블 생성 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_work_diary_tables():
     """업무일지 관련 테이블 생성"""
     try:
@@ -1645,10 +1728,12 @@ def create_work_diary_tables():
                 work_type ENUM('PO', '통관', '재고 관리', '파트너 관리', '기타') NOT NULL,
                 filename VARCHAR(255) NOT NULL,
                 file_type VARCHAR(50) NOT NULL,
-                file_content LONGBLOB NOT NULL,
+                file_content LONGBLOB,
+                blob_sha256 CHAR(64),
                 file_size INT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (diary_id) REFERENCES work_diary(diary_id) ON DELETE CASCADE
+                FOREIGN KEY (diary_id) REFERENCES work_diary(diary_id) ON DELETE CASCADE,
+                INDEX idx_blob_sha256 (blob_sha256)
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
         
@@ -1664,6 +1749,7 @@ def create_work_diary_tables():
         st.error(f"업무일지 테이블 생성 오류: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def add_todo_list_to_work_diary():
     """work_diary 테이블에 todo_list 컬럼 추가"""
     try:
@@ -1697,6 +1783,7 @@ def add_todo_list_to_work_diary():
         st.error(f"컬럼 추가 오류: {err}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_jarvis_interactions_table():
     """JARVIS 대화 저장용 테이블 생성"""
     try:
@@ -1723,6 +1810,7 @@ def create_jarvis_interactions_table():
         st.error(f"JARVIS 대화 테이블 생성 오류: {e}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_reading_discussion_records_table():
     """독서토론 AI 생성 콘텐츠 및 음성 기록 테이블 생성"""
     try:
@@ -1759,6 +1847,7 @@ def create_reading_discussion_records_table():
         st.error(f"❌ 독서토론 기록 테이블 생성 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def update_reading_discussion_records_table():
     """기존 독서토론 기록 테이블에 'application' content_type 추가"""
     try:
@@ -1792,6 +1881,7 @@ def update_reading_discussion_records_table():
         st.error(f"❌ 독서토론 기록 테이블 업데이트 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_wisdom_discussion_tables():
     """위인들의 조언 토론 시스템용 테이블 생성"""
     try:
@@ -1881,6 +1971,7 @@ def create_wisdom_discussion_tables():
         st.error(f"❌ 위인들의 조언 토론 테이블 생성 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_oem_odm_tables():
     """OEM-ODM 제조사 비교 시스템용 테이블 생성"""
     try:
@@ -1984,6 +2075,7 @@ def create_oem_odm_tables():
         st.error(f"❌ OEM-ODM 테이블 생성 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_sourcing_rpa_tables():
     """Sourcing RPA 시스템 테이블 생성"""
     try:
@@ -2123,6 +2215,7 @@ def create_sourcing_rpa_tables():
         st.error(f"❌ Sourcing RPA 테이블 생성 중 오류: {str(e)}")
         return False
 
+@schema_catalogue.invalidates_schema
 def create_scm_system_tables():
     """SCM (Supply Chain Management) 시스템 테이블 생성"""
     try:
@@ -2522,6 +2615,7 @@ def main():
          "Rayleigh Skylights 테이블 생성", "자기소개서 테이블 생성", 
          "TOC 분석 테이블 생성", "기업 가치 평가 테이블 생성", 
          "주관식 질문 관련 테이블 생성", "물류 관리(PI/CI) 테이블 생성", 
+         "물류 재고 원장 전환(스냅샷 생성)",
          "MCP 분석 테이블 생성", "의사결정 트리 테이블 생성",
          "회의록 테이블 생성/업데이트",
          "decision_options 컬럼 추가(데이터 보호)",
@@ -2538,7 +2632,11 @@ def main():
          "위인들의 조언 토론 시스템 테이블 생성",
          "OEM-ODM 제조사 비교 시스템 테이블 생성",
          "AI Sourcing RPA 시스템 테이블 생성",
-         "SCM 공급업체 관리 시스템 테이블 생성"]
+         "SCM 공급업체 관리 시스템 테이블 생성",
+         "원칙 DB 검색 FULLTEXT 인덱스 생성",
+         "첨부파일 Blob 저장소 전환",
+         "DB 커넥션 풀 상태",
+         "LLM 호출 지표 및 응답 캐시"]
     )
     
     if menu == "테이블 목록":
@@ -2804,6 +2902,29 @@ def main():
             else:
                 st.error(f"테이블 생성/업데이트 중 오류가 발생했습니다: {message}")
 
+    elif menu == "물류 재고 원장 전환(스냅샷 생성)":
+        st.header("물류 재고 원장 전환")
+        st.markdown("""
+        재고 수량의 기준을 `inventory_logistics.stock` 카운터에서 `inventory_transactions` 원장으로 바꿉니다.
+        - `change_type`에 '조정' 추가, 원장 날짜 인덱스 추가
+        - 카운터와 원장 합계가 다른 제품은 차이만큼 '조정' 행을 추가 (현재 재고는 그대로 유지)
+        - `inventory_daily_snapshots` 테이블을 만들고 어제까지의 일별 마감 재고 기록
+        - 완료 기록은 `inventory_ledger_migrations`에 남습니다
+        
+        여러 번 실행해도 안전합니다. 실행 전에는 물류 화면에 경고가 표시되고 재고 값 동기화가 막히며,
+        이후 스냅샷은 재고 조회 시 자동으로 하루치씩 추가됩니다.
+        """)
+        if st.button("재고 원장 전환 실행", type="primary"):
+            conn = connect_to_db()
+            try:
+                with st.spinner("원장 보정 및 스냅샷 생성 중..."):
+                    result = inventory_ledger.migrate(conn)
+                st.success(f"✅ 완료 - 조정 행 {result['adjusted']}건 추가, 스냅샷 {result['snapshot_rows']}건 기록")
+            except mysql.connector.Error as err:
+                st.error(f"재고 원장 전환 중 오류가 발생했습니다: {err}")
+            finally:
+                conn.close()
+
     elif menu == "MCP 분석 테이블 생성":
         st.header("MCP 분석 테이블 생성")
         
@@ -2838,6 +2959,7 @@ def main():
                             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
                         """)
                         conn.commit()
+                        schema_catalogue.invalidate()
                         st.success("✅ MCP 분석 테이블이 새로 생성되었습니다!")
                     except Exception as e:
                         st.error(f"테이블 생성 중 오류가 발생했습니다: {str(e)}")
@@ -2863,6 +2985,7 @@ def main():
                     cursor = conn.cursor()
                     cursor.execute("DROP TABLE IF EXISTS mcp_analysis_results")
                     conn.commit()
+                    schema_catalogue.invalidate()
                     st.success("✅ MCP 분석 테이블이 삭제되었습니다!")
                 except Exception as e:
                     st.error(f"테이블 삭제 중 오류가 발생했습니다: {str(e)}")
@@ -2898,6 +3021,7 @@ def main():
                     if cursor.fetchone():
                         cursor.execute("ALTER TABLE decision_options MODIFY COLUMN decision_node_id INT NULL DEFAULT NULL")
                         conn.commit()
+                        schema_catalogue.invalidate()
                         st.success("decision_node_id 컬럼이 NULL 허용 및 DEFAULT NULL로 변경되었습니다.")
                     else:
                         st.warning("decision_node_id 컬럼이 존재하지 않습니다.")
@@ -2959,6 +3083,7 @@ def main():
                         cursor.execute(f"ALTER TABLE decision_options ADD COLUMN {col} {coltype}")
                         added.append(col)
                 conn.commit()
+                schema_catalogue.invalidate()
                 if added:
                     st.success(f"다음 컬럼이 추가되었습니다: {', '.join(added)}")
                 else:
@@ -3557,6 +3682,122 @@ def main():
                 """)
             else:
                 st.error("❌ SCM 공급업체 관리 테이블 생성에 실패했습니다.")
+    
+    elif menu == "원칙 DB 검색 FULLTEXT 인덱스 생성":
+        st.header("원칙 DB 검색 FULLTEXT 인덱스 생성")
+        st.markdown("""
+        원칙 DB 검색 페이지는 FULLTEXT 인덱스가 있으면 `MATCH ... AGAINST` 검색과 관련도 정렬을 사용하고,
+        인덱스가 없으면 기존 `LIKE` 검색으로 동작합니다. 한글 부분 일치를 위해 ngram 파서를 사용합니다.
+        """)
+        st.table(pd.DataFrame(
+            [(table, index_name, ', '.join(columns)) for table, index_name, columns in PRINCIPLES_FULLTEXT_INDEXES],
+            columns=['테이블', '인덱스', '컬럼']
+        ))
+        
+        if st.button("FULLTEXT 인덱스 생성", type="primary"):
+            with st.spinner("인덱스 생성 중... (데이터 양에 따라 시간이 걸릴 수 있습니다)"):
+                created = add_principles_fulltext_indexes()
+            if created is not None:
+                st.success(f"✅ 완료 - 새로 생성된 인덱스: {', '.join(created) if created else '없음'}")
+            else:
+                st.error("FULLTEXT 인덱스 생성에 실패했습니다.")
+    
+    elif menu == "첨부파일 Blob 저장소 전환":
+        st.header("첨부파일 Blob 저장소 전환")
+        st.markdown(f"""
+        첨부파일 원본을 DB 컬럼(base64/LONGBLOB) 대신 로컬 디스크의 SHA-256 내용 주소 저장소(`{blob_store.DEFAULT_ROOT}`, 환경 변수 BLOB_STORE_DIR)에 보관합니다.
+        DB에는 파일 메타데이터와 `{blob_store.HASH_COLUMN}`만 남고, 같은 내용의 파일은 한 번만 저장됩니다.
+        - 기존 행의 원본을 저장소로 옮긴 뒤 DB 원본 컬럼은 NULL로 비움
+        - 여러 번 실행해도 안전하며, 이전 전 행도 각 페이지에서 그대로 열람 가능
+        """)
+        st.table(pd.DataFrame(
+            [(table, id_column, legacy_column, 'base64' if encoded else 'binary')
+             for table, id_column, legacy_column, encoded in blob_store.ATTACHMENT_TABLES],
+            columns=['테이블', 'PK', '기존 원본 컬럼', '기존 형식']
+        ))
+        
+        stats = blob_store.get_stats()
+        col1, col2 = st.columns(2)
+        col1.metric("저장된 Blob", f"{stats['blobs']:,}")
+        col2.metric("저장소 크기", f"{stats['size_bytes'] / 1024 / 1024:.1f}MB")
+        
+        if st.button("Blob 저장소로 이전 실행", type="primary"):
+            conn = connect_to_db()
+            try:
+                with st.spinner("첨부파일 원본 이전 중... (파일 양에 따라 시간이 걸릴 수 있습니다)"):
+                    results = blob_store.migrate_all(conn)
+                st.success("✅ 이전 완료")
+                st.dataframe(pd.DataFrame(results), use_container_width=True)
+            except mysql.connector.Error as err:
+                st.error(f"첨부파일 이전 중 오류가 발생했습니다: {err}")
+            finally:
+                conn.close()
+        
+        if st.button("참조 없는 Blob 정리"):
+            conn = connect_to_db()
+            try:
+                removed, freed = blob_store.collect_garbage(conn)
+                st.success(f"✅ {removed}개 삭제 ({freed / 1024 / 1024:.1f}MB 확보)")
+            except mysql.connector.Error as err:
+                st.error(f"Blob 정리 중 오류가 발생했습니다: {err}")
+            finally:
+                conn.close()
+    
+    elif menu == "DB 커넥션 풀 상태":
+        st.header("DB 커넥션 풀 상태")
+        st.caption(f"풀 크기: {db_pool.DEFAULT_POOL_SIZE} (환경 변수 SQL_POOL_SIZE로 변경)")
+        
+        if st.button("상태 확인 (SELECT 1)"):
+            for pool_name, result in db_pool.health_check().items():
+                if result['ok']:
+                    st.success(f"{pool_name}: 정상 ({result['latency_ms']:.1f}ms)")
+                else:
+                    st.error(f"{pool_name}: 오류 - {result['error']}")
+        
+        stats = db_pool.get_pool_stats()
+        if stats:
+            st.dataframe(pd.DataFrame(stats), use_container_width=True)
+        else:
+            st.info("아직 생성된 커넥션 풀이 없습니다.")
+
+        st.subheader("스키마 카탈로그")
+        st.caption(f"유효 기간: {schema_catalogue.DEFAULT_TTL:.0f}초 (환경 변수 SCHEMA_CATALOGUE_TTL로 변경), 이 페이지의 테이블 생성/수정 시 자동 갱신")
+        if st.button("스키마 카탈로그 새로고침"):
+            schema_catalogue.invalidate()
+            st.success("다음 조회 시 스키마를 다시 읽습니다.")
+        catalogue_stats = schema_catalogue.get_all_stats()
+        if catalogue_stats:
+            st.dataframe(pd.DataFrame(catalogue_stats), use_container_width=True)
+
+    elif menu == "LLM 호출 지표 및 응답 캐시":
+        st.header("LLM 호출 지표")
+        summary = llm_service.get_metrics_summary()
+        if summary:
+            st.caption(f"최근 {llm_service.METRICS_HISTORY}회 호출 기준 (현재 프로세스)")
+            st.dataframe(pd.DataFrame(summary), use_container_width=True)
+            with st.expander("최근 호출 상세"):
+                st.dataframe(pd.DataFrame(llm_service.get_metrics()), use_container_width=True)
+        else:
+            st.info("아직 기록된 LLM 호출이 없습니다.")
+        
+        st.header("LLM 응답 캐시")
+        stats = llm_cache.get_stats()
+        st.caption(f"유효 기간: {stats['ttl_hours']:.0f}시간 (LLM_CACHE_TTL_HOURS), "
+                   f"최대 크기: {stats['max_bytes'] / 1024 / 1024:.0f}MB (LLM_CACHE_MAX_MB)")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("저장된 응답", f"{stats['entries']:,}")
+        col2.metric("캐시 크기", f"{stats['size_bytes'] / 1024 / 1024:.1f}MB")
+        col3.metric("적중률 (현재 프로세스)", f"{stats['hit_rate']:.0%}", f"{stats['hits']} hit / {stats['misses']} miss")
+        col4.metric("누적 재사용 횟수", f"{stats['total_hits']:,}")
+        
+        if stats['by_model']:
+            st.dataframe(pd.DataFrame(stats['by_model']), use_container_width=True)
+        
+        if st.button("캐시 비우기"):
+            llm_cache.get_cache().clear()
+            st.success("LLM 응답 캐시를 비웠습니다.")
+            st.rerun()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
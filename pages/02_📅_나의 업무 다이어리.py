@@ -1,14 +1,15 @@
 import streamlit as st
 import mysql.connector
+import db_pool
+import blob_store
+import attachment_preview
 import pandas as pd
 import os
 from dotenv import load_dotenv
 from datetime import datetime, date
-import base64
 import io
 from PIL import Image
 import json
-import tempfile
 import re
 
 load_dotenv()
@@ -44,7 +45,7 @@ if not st.session_state.authenticated:
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -163,9 +164,11 @@ def save_work_diary_file(diary_id, work_type, file_data):
             return False
         
         cursor = conn.cursor()
+        blob_store.ensure_schema(cursor, 'work_diary_files')
         
-        # 파일 내용을 바이너리로 읽기
-        file_content = file_data.read()
+        # 원본은 SHA-256 주소의 blob 저장소에 저장 (DB에는 해시만 기록)
+        file_data.seek(0)
+        blob_sha256, file_size = blob_store.put_stream(file_data)
         file_data.seek(0)  # 파일 포인터 리셋
         
         # file_type 처리 - 길이 제한 및 기본값 설정
@@ -199,15 +202,15 @@ def save_work_diary_file(diary_id, work_type, file_data):
         
         cursor.execute("""
             INSERT INTO work_diary_files 
-            (diary_id, work_type, filename, file_type, file_content, file_size)
+            (diary_id, work_type, filename, file_type, blob_sha256, file_size)
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (
             diary_id,
             work_type,
             file_data.name,
             file_type,
-            file_content,
-            len(file_content)
+            blob_sha256,
+            file_size
         ))
         
         conn.commit()
@@ -279,16 +282,17 @@ def get_work_diary_files(diary_id):
             return pd.DataFrame()
         
         cursor = conn.cursor()
+        blob_store.ensure_schema(cursor, 'work_diary_files')
         
         cursor.execute("""
-            SELECT file_id, work_type, filename, file_type, file_size, uploaded_at
+            SELECT file_id, work_type, filename, file_type, file_size, blob_sha256, uploaded_at
             FROM work_diary_files 
             WHERE diary_id = %s
             ORDER BY work_type, uploaded_at
         """, (diary_id,))
         
         data = cursor.fetchall()
-        columns = ['file_id', 'work_type', 'filename', 'file_type', 'file_size', 'uploaded_at']
+        columns = ['file_id', 'work_type', 'filename', 'file_type', 'file_size', 'blob_sha256', 'uploaded_at']
         
         cursor.close()
         conn.close()
@@ -306,10 +310,11 @@ def get_file_binary_data(file_id):
         if not conn:
             return None
         
-        cursor = conn.cursor()
+        cursor = conn.cursor(dictionary=True)
+        blob_store.ensure_schema(cursor, 'work_diary_files')
         
         cursor.execute("""
-            SELECT filename, file_type, file_content
+            SELECT filename, file_type, blob_sha256, file_content
             FROM work_diary_files 
             WHERE file_id = %s
         """, (file_id,))
@@ -319,10 +324,11 @@ def get_file_binary_data(file_id):
         conn.close()
         
         if result:
+            # blob 저장소에서 읽고, 이전 전 행은 DB 원본 사용
             return {
-                'filename': result[0],
-                'file_type': result[1],
-                'binary_data': result[2]
+                'filename': result['filename'],
+                'file_type': result['file_type'],
+                'binary_data': blob_store.read_attachment(result, 'file_content', False)
             }
         return None
         
@@ -330,183 +336,21 @@ def get_file_binary_data(file_id):
         st.error(f"파일 데이터 조회 오류: {err}")
         return None
 
-def display_file_preview(file_data, file_type, filename):
-    """파일 미리보기 표시 - 프로젝트 리뷰와 동일한 방식"""
-    try:
-        file_type_lower = file_type.lower()
-        # 파일 확장자 추출
-        file_extension = filename.lower().split('.')[-1] if '.' in filename else ''
-        
-        # 이미지 파일 미리보기
-        if (file_type_lower in ['jpg', 'jpeg', 'png', 'gif'] or 'image' in file_type_lower or 
-            file_extension in ['jpg', 'jpeg', 'png', 'gif']):
-            if file_data.get('binary_data'):
-                st.image(
-                    file_data['binary_data'],
-                    caption=f"🖼️ {filename}",
-                    use_column_width=True
-                )
-                return True
-            else:
-                st.info("이미지 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # PDF 파일 미리보기 (iframe 사용)
-        elif file_type_lower == 'pdf' or 'pdf' in file_type_lower or file_extension == 'pdf':
-            if file_data.get('binary_data'):
-                # PDF를 base64로 인코딩하여 iframe에 표시
-                pdf_base64 = base64.b64encode(file_data['binary_data']).decode('utf-8')
-                pdf_display = f"""
-                <iframe src="data:application/pdf;base64,{pdf_base64}" 
-                        width="100%" height="600px" type="application/pdf">
-                    <p>PDF를 표시할 수 없습니다. 
-                    <a href="data:application/pdf;base64,{pdf_base64}" target="_blank">
-                    여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                </iframe>
-                """
-                st.markdown(pdf_display, unsafe_allow_html=True)
-                return True
-            else:
-                st.info("PDF 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # Excel 파일 미리보기
-        elif (file_type_lower in ['xlsx', 'xls'] or 'excel' in file_type_lower or 'spreadsheet' in file_type_lower or
-              file_extension in ['xlsx', 'xls']):
-            if file_data.get('binary_data'):
-                try:
-                    # 파일 확장자 결정
-                    if file_extension in ['xlsx', 'xls']:
-                        temp_suffix = f'.{file_extension}'
-                    elif 'xlsx' in file_type_lower or 'openxml' in file_type_lower:
-                        temp_suffix = '.xlsx'
-                    else:
-                        temp_suffix = '.xls'
-                    
-                    # 바이너리 데이터를 임시 파일로 저장하여 pandas로 읽기
-                    with tempfile.NamedTemporaryFile(suffix=temp_suffix, delete=False) as tmp_file:
-                        tmp_file.write(file_data['binary_data'])
-                        tmp_file_path = tmp_file.name
-                    
-                    # Excel 파일 읽기
-                    df = pd.read_excel(tmp_file_path)
-                    
-                    # 임시 파일 삭제
-                    os.unlink(tmp_file_path)
-                    
-                    st.subheader(f"📊 Excel 파일 미리보기: {filename}")
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # 기본 통계 정보
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("행 수", len(df))
-                    with col2:
-                        st.metric("열 수", len(df.columns))
-                    with col3:
-                        st.metric("데이터 타입", len(df.dtypes.unique()))
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"Excel 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("Excel 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # CSV 파일 미리보기
-        elif file_type_lower == 'csv' or 'csv' in file_type_lower or file_extension == 'csv':
-            if file_data.get('binary_data'):
-                try:
-                    # CSV 데이터를 문자열로 변환
-                    csv_content = file_data['binary_data'].decode('utf-8')
-                    
-                    # StringIO를 사용하여 pandas로 읽기
-                    from io import StringIO
-                    df = pd.read_csv(StringIO(csv_content))
-                    
-                    st.subheader(f"📈 CSV 파일 미리보기: {filename}")
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # 기본 통계 정보
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("행 수", len(df))
-                    with col2:
-                        st.metric("열 수", len(df.columns))
-                    with col3:
-                        st.metric("데이터 타입", len(df.dtypes.unique()))
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"CSV 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("CSV 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # JSON 파일 미리보기
-        elif file_type_lower == 'json' or 'json' in file_type_lower or file_extension == 'json':
-            if file_data.get('binary_data'):
-                try:
-                    json_content = file_data['binary_data'].decode('utf-8')
-                    json_data = json.loads(json_content)
-                    
-                    st.subheader(f"📋 JSON 파일 미리보기: {filename}")
-                    st.json(json_data)
-                    return True
-                except Exception as e:
-                    st.error(f"JSON 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("JSON 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # 텍스트 파일 미리보기 (TXT, MD, XML, HTML 등)
-        elif (file_type_lower in ['txt', 'md', 'xml', 'html', 'markdown'] or 
-              'text' in file_type_lower or 'html' in file_type_lower or 'xml' in file_type_lower or
-              file_extension in ['txt', 'md', 'markdown', 'xml', 'html']):
-            if file_data.get('binary_data'):
-                try:
-                    text_content = file_data['binary_data'].decode('utf-8')
-                    
-                    st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
-                    
-                    if file_type_lower == 'md' or file_extension in ['md', 'markdown']:
-                        # Markdown 파일은 렌더링하여 표시
-                        st.markdown(text_content)
-                    elif file_type_lower == 'html' or file_extension == 'html':
-                        # HTML 파일은 코드로 표시 (보안상 렌더링하지 않음)
-                        st.code(text_content, language='html')
-                    elif file_type_lower == 'xml' or file_extension == 'xml':
-                        # XML 파일은 코드로 표시
-                        st.code(text_content, language='xml')
-                    else:
-                        # 일반 텍스트
-                        st.text_area(
-                            "파일 내용",
-                            value=text_content,
-                            height=400,
-                            disabled=True
-                        )
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"텍스트 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("텍스트 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # 지원하지 않는 파일 형식
-        else:
-            st.info(f"📁 {file_type.upper()} 파일은 미리보기를 지원하지 않습니다.")
-            st.caption("다운로드하여 해당 프로그램에서 열어보세요.")
-            return False
-            
-    except Exception as e:
-        st.error(f"파일 미리보기 중 오류 발생: {str(e)}")
-        return False
+def get_file_source(file_row):
+    """목록 메타데이터로 만든 첨부파일 핸들 - 원본은 미리보기/다운로드할 때만 읽음"""
+    file_id = file_row['file_id']
+    return attachment_preview.make_source(
+        file_row['filename'],
+        file_row['file_type'],
+        file_row['file_size'],
+        file_row['blob_sha256'],
+        loader=lambda: (get_file_binary_data(file_id) or {}).get('binary_data')
+    )
+
+def display_file_preview(source, key='preview'):
+    """파일 미리보기 표시 - 프로젝트 리뷰와 동일한 방식 (선택한 파일만, 결과는 파일 해시 기준 캐시)"""
+    return attachment_preview.render_preview(source, key)
+
 
 def get_work_diary_by_id(diary_id):
     """특정 업무일지 조회"""
@@ -1409,15 +1253,12 @@ def main():
                                     st.caption(f"크기: {file_row['file_size']:,} bytes | 업로드: {file_row['uploaded_at']}")
                                 
                                 with col_file2:
-                                    # 다운로드 버튼
-                                    file_data = get_file_binary_data(file_row['file_id'])
-                                    if file_data:
-                                        st.download_button(
-                                            "💾 다운로드",
-                                            data=file_data['binary_data'],
-                                            file_name=file_data['filename'],
-                                            key=f"download_{file_row['file_id']}"
-                                        )
+                                    # 다운로드 버튼 (누른 파일만 원본을 읽음)
+                                    attachment_preview.download_button(
+                                        get_file_source(file_row),
+                                        key=f"download_{file_row['file_id']}",
+                                        mime=file_row['file_type'] if '/' in (file_row['file_type'] or '') else None
+                                    )
                                 
                                 with col_file3:
                                     # 미리보기 버튼 (토글 방식)
@@ -1428,22 +1269,16 @@ def main():
                                 if st.session_state.get(f"show_preview_{file_row['file_id']}", False):
                                     st.subheader("📖 파일 미리보기")
                                     
-                                    # 원본 파일 데이터 가져오기
-                                    file_binary = get_file_binary_data(file_row['file_id'])
+                                    # 디버깅 정보 표시 (파일 타입 확인용)
+                                    st.caption(f"🔍 파일 정보: 타입={file_row['file_type']}, 이름={file_row['filename']}")
                                     
-                                    if file_binary:
-                                        # 디버깅 정보 표시 (파일 타입 확인용)
-                                        st.caption(f"🔍 파일 정보: 타입={file_binary['file_type']}, 이름={file_binary['filename']}")
-                                        
-                                        # 파일 미리보기 함수 호출
-                                        preview_success = display_file_preview(file_binary, file_binary['file_type'], file_binary['filename'])
-                                        
-                                        # 미리보기가 실패하거나 지원하지 않는 형식인 경우 기본 정보 표시
-                                        if not preview_success:
-                                            st.info(f"파일 형식: {file_binary['file_type']}")
-                                            st.info(f"파일 크기: {file_row['file_size']:,} bytes")
-                                    else:
-                                        st.error("파일 데이터를 불러올 수 없습니다.")
+                                    # 파일 미리보기 함수 호출 (원본은 미리보기 결과가 캐시에 없을 때만 읽음)
+                                    preview_success = display_file_preview(get_file_source(file_row), key=f"diary_preview_{file_row['file_id']}")
+                                    
+                                    # 미리보기가 실패하거나 지원하지 않는 형식인 경우 기본 정보 표시
+                                    if not preview_success:
+                                        st.info(f"파일 형식: {file_row['file_type']}")
+                                        st.info(f"파일 크기: {file_row['file_size']:,} bytes")
                                     
                                     # 미리보기 숨기기 버튼
                                     if st.button("🙈 미리보기 숨기기", key=f"hide_preview_{file_row['file_id']}"):
@@ -1,5 +1,8 @@
 import streamlit as st
 import mysql.connector
+import db_pool
+import blob_store
+import attachment_preview
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -9,7 +12,6 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import json
-import base64
 import io
 from io import StringIO
 from openai import OpenAI
@@ -94,7 +96,7 @@ if not available_models:
 def connect_to_db():
     """MySQL DB 연결"""
     try:
-        return mysql.connector.connect(
+        return db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -161,11 +163,15 @@ def create_project_review_tables():
                 file_type VARCHAR(50) NOT NULL,
                 file_content LONGTEXT,
                 file_binary_data LONGTEXT,
+                blob_sha256 CHAR(64),
                 file_size INT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (review_id) REFERENCES project_reviews(review_id) ON DELETE CASCADE
+                FOREIGN KEY (review_id) REFERENCES project_reviews(review_id) ON DELETE CASCADE,
+                INDEX idx_blob_sha256 (blob_sha256)
             ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
         """)
+        # 기존 테이블에 blob 해시 컬럼 추가 (원본은 blob 저장소에 보관)
+        blob_store.ensure_schema(cursor, 'project_review_files')
         
         # AI 분석 결과 테이블
         cursor.execute("""
@@ -218,9 +224,8 @@ def parse_uploaded_file(uploaded_file):
         # 파일을 처음부터 읽기 위해 포인터를 처음으로 이동
         uploaded_file.seek(0)
         
-        # 원본 바이너리 데이터 저장 (Base64 인코딩)
-        binary_data = uploaded_file.read()
-        binary_base64 = base64.b64encode(binary_data).decode('utf-8')
+        # 원본은 SHA-256 주소의 blob 저장소에 저장 (같은 파일은 한 번만 저장)
+        blob_sha256, file_size = blob_store.put_stream(uploaded_file)
         
         # 텍스트 추출을 위해 다시 파일 포인터를 처음으로 이동
         uploaded_file.seek(0)
@@ -290,8 +295,8 @@ def parse_uploaded_file(uploaded_file):
             'filename': uploaded_file.name,
             'file_type': file_extension,
             'content': content,
-            'binary_data': binary_base64,
-            'size': len(binary_data)
+            'blob_sha256': blob_sha256,
+            'size': file_size
         }
         
     except Exception as e:
@@ -365,14 +370,14 @@ def save_project_file(review_id, file_data):
     try:
         cursor.execute("""
             INSERT INTO project_review_files 
-            (review_id, filename, file_type, file_content, file_binary_data, file_size)
+            (review_id, filename, file_type, file_content, blob_sha256, file_size)
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (
             review_id,
             file_data['filename'],
             file_data['file_type'],
             file_data['content'],
-            file_data['binary_data'],
+            file_data['blob_sha256'],
             file_data['size']
         ))
         
@@ -440,8 +445,10 @@ def get_project_files(review_id):
     cursor = conn.cursor(dictionary=True)
     
     try:
+        # 목록에는 원본을 제외한 컬럼만 조회 (원본은 다운로드/미리보기 시에만)
         cursor.execute("""
-            SELECT * FROM project_review_files 
+            SELECT file_id, review_id, filename, file_type, file_content, file_size, blob_sha256, uploaded_at
+            FROM project_review_files 
             WHERE review_id = %s
             ORDER BY uploaded_at
         """, (review_id,))
@@ -631,7 +638,8 @@ def search_files(search_term=None, file_type=None):
     
     try:
         query = """
-            SELECT f.*, p.project_name, p.project_type, p.created_by
+            SELECT f.file_id, f.review_id, f.filename, f.file_type, f.file_content, f.file_size,
+                   f.blob_sha256, f.uploaded_at, p.project_name, p.project_type, p.created_by
             FROM project_review_files f
             JOIN project_reviews p ON f.review_id = p.review_id
             WHERE 1=1
@@ -688,15 +696,15 @@ def get_file_binary_data(file_id):
     
     try:
         cursor.execute("""
-            SELECT filename, file_type, file_binary_data, file_size
+            SELECT filename, file_type, blob_sha256, file_binary_data, file_size
             FROM project_review_files 
             WHERE file_id = %s
         """, (file_id,))
         result = cursor.fetchone()
         
-        if result and result['file_binary_data']:
-            # Base64 디코딩하여 원본 바이너리 데이터 반환
-            binary_data = base64.b64decode(result['file_binary_data'])
+        # blob 저장소에서 읽고, 이전 전 행은 DB의 base64 원본을 디코딩
+        binary_data = blob_store.read_attachment(result, 'file_binary_data', True) if result else None
+        if binary_data:
             return {
                 'filename': result['filename'],
                 'file_type': result['file_type'],
@@ -735,238 +743,21 @@ def get_file_mime_type(file_type):
     }
     return mime_types.get(file_type.lower(), 'application/octet-stream')
 
-def display_file_preview(file_data, file_type, filename):
-    """파일 미리보기 표시"""
-    try:
-        file_type_lower = file_type.lower()
-        
-        # 이미지 파일 미리보기
-        if file_type_lower in ['jpg', 'jpeg', 'png', 'gif']:
-            if file_data.get('binary_data'):
-                st.image(
-                    file_data['binary_data'],
-                    caption=f"🖼️ {filename}",
-                    use_column_width=True
-                )
-                return True
-            else:
-                st.info("이미지 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # PDF 파일 미리보기 (1MB 초과시 1페이지씩)
-        elif file_type_lower == 'pdf':
-            if file_data.get('binary_data'):
-                import math
-                from PyPDF2 import PdfReader, PdfWriter
-                import tempfile, os
-
-                total_size = file_data['file_size'] if 'file_size' in file_data else len(file_data['binary_data'])
-                if total_size > 1 * 1024 * 1024:
-                    key = f"pdf_preview_page_start_{filename}"
-                    if key not in st.session_state:
-                        st.session_state[key] = 0  # 0-based index
+def get_file_source(file):
+    """목록 메타데이터로 만든 첨부파일 핸들 - 원본은 미리보기/다운로드할 때만 읽음"""
+    file_id = file['file_id']
+    return attachment_preview.make_source(
+        file['filename'],
+        file['file_type'],
+        file.get('file_size'),
+        file.get('blob_sha256'),
+        loader=lambda: (get_file_binary_data(file_id) or {}).get('binary_data')
+    )
 
-                    # PDF 전체 페이지 수 구하기
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                        tmp_in.write(file_data['binary_data'])
-                        tmp_in_path = tmp_in.name
-                    reader = PdfReader(tmp_in_path)
-                    total_pages = len(reader.pages)
-                    os.unlink(tmp_in_path)
+def display_file_preview(source, key='preview'):
+    """파일 미리보기 표시 - 선택한 파일만 렌더링하고 결과는 파일 해시 기준으로 캐시"""
+    return attachment_preview.render_preview(source, key)
 
-                    page_start = st.session_state[key]
-                    page_end = min(page_start + 1, total_pages)
-
-                    col_prev, col_next = st.columns([1, 1])
-                    with col_prev:
-                        if st.button("⬅️ 이전", disabled=page_start == 0, key=f"prev_{filename}"):
-                            st.session_state[key] = max(0, page_start - 1)
-                            st.rerun()
-                    with col_next:
-                        if st.button("다음 ➡️", disabled=page_end >= total_pages, key=f"next_{filename}"):
-                            st.session_state[key] = min(total_pages - 1, page_start + 1)
-                            st.rerun()
-
-                    # 미리보기 PDF 생성 (1페이지)
-                    try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                            tmp_in.write(file_data['binary_data'])
-                            tmp_in_path = tmp_in.name
-                        reader = PdfReader(tmp_in_path)
-                        writer = PdfWriter()
-                        for i in range(page_start, page_end):
-                            writer.add_page(reader.pages[i])
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_out:
-                            writer.write(tmp_out)
-                            tmp_out_path = tmp_out.name
-                        with open(tmp_out_path, "rb") as f:
-                            preview_pdf_bytes = f.read()
-                        os.unlink(tmp_in_path)
-                        os.unlink(tmp_out_path)
-                        st.markdown(f"**페이지 {page_start+1} / {total_pages}**")
-                        pdf_base64 = base64.b64encode(preview_pdf_bytes).decode('utf-8')
-                        pdf_display = f"""
-                        <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                                width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                            <p>PDF를 표시할 수 없습니다. 
-                            <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                            여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                        </iframe>
-                        """
-                        st.markdown(pdf_display, unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"PDF 미리보기 생성 중 오류: {e}")
-
-                    st.download_button(
-                        label="💾 전체 PDF 다운로드",
-                        data=file_data['binary_data'],
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                    return True
-                else:
-                    # PDF를 base64로 인코딩하여 iframe에 표시 (전체 미리보기)
-                    pdf_base64 = base64.b64encode(file_data['binary_data']).decode('utf-8')
-                    pdf_display = f"""
-                    <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                            width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                        <p>PDF를 표시할 수 없습니다. 
-                        <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                        여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                    </iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
-                    return True
-            else:
-                st.info("PDF 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # Excel 파일 미리보기
-        elif file_type_lower in ['xlsx', 'xls']:
-            if file_data.get('binary_data'):
-                try:
-                    # 바이너리 데이터를 임시 파일로 저장하여 pandas로 읽기
-                    with tempfile.NamedTemporaryFile(suffix=f'.{file_type_lower}', delete=False) as tmp_file:
-                        tmp_file.write(file_data['binary_data'])
-                        tmp_file_path = tmp_file.name
-                    
-                    # Excel 파일 읽기
-                    df = pd.read_excel(tmp_file_path)
-                    
-                    # 임시 파일 삭제
-                    os.unlink(tmp_file_path)
-                    
-                    st.subheader(f"📊 Excel 파일 미리보기: {filename}")
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # 기본 통계 정보
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("행 수", len(df))
-                    with col2:
-                        st.metric("열 수", len(df.columns))
-                    with col3:
-                        st.metric("데이터 타입", len(df.dtypes.unique()))
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"Excel 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("Excel 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # CSV 파일 미리보기
-        elif file_type_lower == 'csv':
-            if file_data.get('binary_data'):
-                try:
-                    # CSV 데이터를 문자열로 변환
-                    csv_content = file_data['binary_data'].decode('utf-8')
-                    
-                    # StringIO를 사용하여 pandas로 읽기
-                    from io import StringIO
-                    df = pd.read_csv(StringIO(csv_content))
-                    
-                    st.subheader(f"📈 CSV 파일 미리보기: {filename}")
-                    st.dataframe(df, use_container_width=True)
-                    
-                    # 기본 통계 정보
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("행 수", len(df))
-                    with col2:
-                        st.metric("열 수", len(df.columns))
-                    with col3:
-                        st.metric("데이터 타입", len(df.dtypes.unique()))
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"CSV 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("CSV 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # JSON 파일 미리보기
-        elif file_type_lower == 'json':
-            if file_data.get('binary_data'):
-                try:
-                    json_content = file_data['binary_data'].decode('utf-8')
-                    json_data = json.loads(json_content)
-                    
-                    st.subheader(f"📋 JSON 파일 미리보기: {filename}")
-                    st.json(json_data)
-                    return True
-                except Exception as e:
-                    st.error(f"JSON 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("JSON 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # 텍스트 파일 미리보기 (TXT, MD, XML, HTML 등)
-        elif file_type_lower in ['txt', 'md', 'xml', 'html']:
-            if file_data.get('binary_data'):
-                try:
-                    text_content = file_data['binary_data'].decode('utf-8')
-                    
-                    st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
-                    
-                    if file_type_lower == 'md':
-                        # Markdown 파일은 렌더링하여 표시
-                        st.markdown(text_content)
-                    elif file_type_lower == 'html':
-                        # HTML 파일은 코드로 표시 (보안상 렌더링하지 않음)
-                        st.code(text_content, language='html')
-                    elif file_type_lower == 'xml':
-                        # XML 파일은 코드로 표시
-                        st.code(text_content, language='xml')
-                    else:
-                        # 일반 텍스트
-                        st.text_area(
-                            "파일 내용",
-                            value=text_content,
-                            height=400,
-                            disabled=True
-                        )
-                    
-                    return True
-                except Exception as e:
-                    st.error(f"텍스트 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-            else:
-                st.info("텍스트 데이터를 찾을 수 없습니다.")
-                return False
-        
-        # 지원하지 않는 파일 형식
-        else:
-            st.info(f"📁 {file_type.upper()} 파일은 미리보기를 지원하지 않습니다.")
-            st.caption("다운로드하여 해당 프로그램에서 열어보세요.")
-            return False
-            
-    except Exception as e:
-        st.error(f"파일 미리보기 중 오류 발생: {str(e)}")
-        return False
 
 def get_agent_tools(agent_type):
     """에이전트별 특화 도구 반환"""
@@ -2449,32 +2240,26 @@ def main():
                                 st.write(f"**업로드 시간:** {file['uploaded_at'].strftime('%Y-%m-%d %H:%M:%S')}")
                             
                             with col2:
-                                # 원본 파일 다운로드
-                                file_binary = get_file_binary_data(file['file_id'])
-                                if file_binary:
-                                    mime_type = get_file_mime_type(file['file_type'])
+                                # 원본 파일 다운로드 (누른 파일만 원본을 읽음)
+                                attachment_preview.download_button(
+                                    get_file_source(file),
+                                    label="📥 원본 파일",
+                                    key=f"download_original_{file['file_id']}",
+                                    mime=get_file_mime_type(file['file_type']),
+                                    help="원본 파일 형식으로 다운로드"
+                                )
+                                
+                                # 텍스트 내용 다운로드 (AI 분석용)
+                                if file['file_content'] and not file['file_content'].startswith('['):
+                                    file_content = file['file_content'].encode('utf-8')
                                     st.download_button(
-                                        label="📥 원본 파일",
-                                        data=file_binary['binary_data'],
-                                        file_name=file['filename'],
-                                        mime=mime_type,
-                                        key=f"download_original_{file['file_id']}",
-                                        help="원본 파일 형식으로 다운로드"
+                                        label="📄 텍스트 내용",
+                                        data=file_content,
+                                        file_name=f"{file['filename']}_content.txt",
+                                        mime="text/plain",
+                                        key=f"download_content_{file['file_id']}",
+                                        help="추출된 텍스트 내용 다운로드"
                                     )
-                                    
-                                    # 텍스트 내용 다운로드 (AI 분석용)
-                                    if file['file_content'] and not file['file_content'].startswith('['):
-                                        file_content = file['file_content'].encode('utf-8')
-                                        st.download_button(
-                                            label="📄 텍스트 내용",
-                                            data=file_content,
-                                            file_name=f"{file['filename']}_content.txt",
-                                            mime="text/plain",
-                                            key=f"download_content_{file['file_id']}",
-                                            help="추출된 텍스트 내용 다운로드"
-                                        )
-                                else:
-                                    st.error("원본 파일 데이터를 찾을 수 없습니다.")
                             
                             with col3:
                                 # 파일 미리보기 버튼
@@ -2492,12 +2277,12 @@ def main():
                             if st.session_state.get(f"show_preview_{file['file_id']}", False):
                                 st.subheader("📖 파일 미리보기")
                                 
-                                # 원본 파일 데이터 가져오기
-                                file_binary = get_file_binary_data(file['file_id'])
+                                # 원본 파일 핸들 (원본은 미리보기 결과가 캐시에 없을 때만 읽음)
+                                file_source = get_file_source(file)
                                 
-                                if file_binary:
+                                if attachment_preview.has_content(file_source):
                                     # 파일 미리보기 함수 호출
-                                    preview_success = display_file_preview(file_binary, file['file_type'], file['filename'])
+                                    preview_success = display_file_preview(file_source, key=f"review_preview_{file['file_id']}")
                                     
                                     # 미리보기가 실패하거나 지원하지 않는 형식인 경우 텍스트 내용 표시
                                     if not preview_success and file['file_content']:
@@ -3941,19 +3726,14 @@ def main():
                             col_download, col_preview = st.columns(2)
                             
                             with col_download:
-                                # 다운로드 버튼
-                                file_binary = get_file_binary_data(file['file_id'])
-                                if file_binary and file_binary.get('binary_data'):
-                                    st.download_button(
-                                        label="⬇️",
-                                        data=file_binary['binary_data'],
-                                        file_name=file['filename'],
-                                        mime=get_file_mime_type(file['file_type']),
-                                        key=f"download_search_{file['file_id']}",
-                                        help="다운로드"
-                                    )
-                                else:
-                                    st.button("⬇️", disabled=True, key=f"download_disabled_{file['file_id']}", help="다운로드 불가")
+                                # 다운로드 버튼 (누른 파일만 원본을 읽음)
+                                attachment_preview.download_button(
+                                    get_file_source(file),
+                                    label="⬇️",
+                                    key=f"download_search_{file['file_id']}",
+                                    mime=get_file_mime_type(file['file_type']),
+                                    help="다운로드"
+                                )
                             
                             with col_preview:
                                 # 미리보기 버튼
@@ -3992,9 +3772,9 @@ def main():
                             st.markdown("---")
                             st.subheader("🔍 파일 미리보기")
                             
-                            file_binary = get_file_binary_data(file['file_id'])
-                            if file_binary:
-                                preview_success = display_file_preview(file_binary, file['file_type'], file['filename'])
+                            file_source = get_file_source(file)
+                            if attachment_preview.has_content(file_source):
+                                preview_success = display_file_preview(file_source, key=f"search_preview_{file['file_id']}")
                                 
                                 if not preview_success and file.get('file_content'):
                                     st.subheader("📄 추출된 텍스트 내용")
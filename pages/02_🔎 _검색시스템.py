@@ -1,6 +1,7 @@
 import streamlit as st
 import os
-import mysql.connector
+import db_pool
+import schema_catalogue
 from dotenv import load_dotenv
 from openai import OpenAI
 import anthropic
@@ -10,9 +11,10 @@ import pandas as pd
 import time
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import json
 from datetime import datetime
+from row_embedding_cache import RowEmbeddingCache
+from parallel_search import run_parallel, DEFAULT_TIME_BUDGET
 
 # 페이지 설정
 st.set_page_config(page_title="MySQL DB RAG 검색 챗봇", layout="wide")
@@ -22,10 +24,17 @@ st.title("🔎 MySQL DB RAG 검색 챗봇 🔎")
 # 환경 변수 로드
 load_dotenv()
 
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
 # 임베딩 모델 초기화
 @st.cache_resource
 def get_embedding_model():
-    return SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+# 행 임베딩 캐시 (프로세스 전역, 디스크에 영구 저장)
+@st.cache_resource
+def get_row_embedding_cache():
+    return RowEmbeddingCache(model_name=EMBEDDING_MODEL_NAME)
 
 # 텍스트 임베딩 생성
 def get_text_embedding(text, model):
@@ -33,49 +42,53 @@ def get_text_embedding(text, model):
         return np.zeros(384)  # 모델의 임베딩 차원
     return model.encode(str(text))
 
-# 텍스트 유사도 계산
-def calculate_similarity(query_embedding, text_embedding):
-    return cosine_similarity([query_embedding], [text_embedding])[0][0]
-
 # DB 연결 함수 (00_💾_01_DB생성.py 참고)
+DB_CONFIG = {
+    'user': os.getenv('SQL_USER'),
+    'password': os.getenv('SQL_PASSWORD'),
+    'host': os.getenv('SQL_HOST'),
+    'database': os.getenv('SQL_DATABASE_NEWBIZ'),
+    'charset': 'utf8mb4',
+    'collation': 'utf8mb4_unicode_ci'
+}
+
 def connect_to_db():
-    return mysql.connector.connect(
-        user=os.getenv('SQL_USER'),
-        password=os.getenv('SQL_PASSWORD'),
-        host=os.getenv('SQL_HOST'),
-        database=os.getenv('SQL_DATABASE_NEWBIZ'),
-        charset='utf8mb4',
-        collation='utf8mb4_unicode_ci'
-    )
+    return db_pool.connect(**DB_CONFIG)
+
+# 스키마 카탈로그 (공유 스냅샷 - DB생성 페이지에서 테이블을 바꾸거나 유효 기간이 지나면 다시 조회)
+def get_schema_catalogue():
+    return schema_catalogue.get_catalogue(**DB_CONFIG)
 
 def get_table_names():
-    conn = connect_to_db()
-    cursor = conn.cursor()
-    cursor.execute("SHOW TABLES")
-    tables = [row[0] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return tables
+    return get_schema_catalogue().table_names()
 
 def get_table_columns(table):
     """테이블의 컬럼 목록 가져오기"""
+    return get_schema_catalogue().column_names(table)
+
+def _max_execution_hint(time_budget):
+    """SELECT 문 실행 시간 제한 힌트 (MySQL 5.7.8+)"""
+    return f"/*+ MAX_EXECUTION_TIME({int(time_budget * 1000)}) */ " if time_budget else ""
+
+def _fetch_rows(sql, params):
+    """SELECT 결과를 읽고 바로 연결을 풀로 반환
+
+    시간 제한을 넘긴 작업은 run_parallel이 기다리지 않고 넘어가므로, 쿼리는
+    MAX_EXECUTION_TIME 힌트로 서버에서 끊기고 오류가 나도 연결은 여기서 반환됩니다.
+    """
     conn = connect_to_db()
-    cursor = conn.cursor()
     try:
-        cursor.execute(f"DESCRIBE {table}")
-        columns = [row[0] for row in cursor.fetchall()]
-        return columns
-    except Exception as e:
-        print(f"Error getting columns for table {table}: {str(e)}")
-        return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
     finally:
-        cursor.close()
         conn.close()
 
 # --- 검색 모드별 멀티컬럼 검색 함수 ---
-def search_table_multicolumn_mode(table, query, mode="OR", limit=10):
-    conn = connect_to_db()
-    cursor = conn.cursor(dictionary=True)
+def search_table_multicolumn_mode(table, query, mode="OR", limit=10, time_budget=None):
     columns = get_table_columns(table)
     keywords = [w for w in query.split() if w]
     if not keywords:
@@ -103,25 +116,23 @@ def search_table_multicolumn_mode(table, query, mode="OR", limit=10):
         where_sql = " OR ".join(where_clauses)
     else:
         where_sql = "1=0"
-    sql = f"SELECT * FROM `{table}` WHERE {where_sql} LIMIT %s"
+    sql = f"SELECT {_max_execution_hint(time_budget)}* FROM `{table}` WHERE {where_sql} LIMIT %s"
     params.append(limit)
-    cursor.execute(sql, params)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    return _fetch_rows(sql, params)
 
-def search_all_tables_multicolumn_mode(query, mode="OR", limit=5):
+def search_all_tables_multicolumn_mode(query, mode="OR", limit=5, time_budget=DEFAULT_TIME_BUDGET, progress_callback=None):
+    """모든 테이블을 동시에 검색 (테이블별 시간 제한, 완료 순서대로 결과 수집)"""
     results = []
-    tables = get_table_names()
-    for t in tables:
-        try:
-            partial = search_table_multicolumn_mode(t, query, mode, limit)
-            if partial:
-                for row in partial:
-                    results.append({'table': t, **row})
-        except Exception as e:
-            continue
+    tasks = {
+        t: (lambda t=t: search_table_multicolumn_mode(t, query, mode, limit, time_budget))
+        for t in get_table_names()
+    }
+    for done, (t, status, partial, elapsed) in enumerate(run_parallel(tasks, time_budget=time_budget), 1):
+        if status == 'ok' and partial:
+            for row in partial:
+                results.append({'table': t, **row})
+        if progress_callback:
+            progress_callback(t, status, len(partial) if status == 'ok' and partial else 0, done, len(tasks))
     return results
 
 def get_table_schema_definitions():
@@ -315,30 +326,38 @@ def get_column_definition(table, column):
         'preprocessing': lambda x: str(x) if x is not None else None
     })
 
-def preprocess_value(table, column, value):
-    """칼럼 특성에 따른 값 전처리"""
+def preprocess_value(table, column, value, col_def=None):
+    """칼럼 특성에 따른 값 전처리 (col_def를 넘기면 스키마 정의 조회 생략)"""
     if value is None:
         return None
         
-    col_def = get_column_definition(table, column)
+    if col_def is None:
+        col_def = get_column_definition(table, column)
     if col_def['preprocessing']:
         return col_def['preprocessing'](value)
     return value
 
-def search_table_hybrid_mode(table, query, embedding_model, mode="OR", limit=None, semantic_weight=0.5):
-    """키워드 검색과 의미론적 검색을 결합한 하이브리드 검색"""
-    conn = connect_to_db()
-    cursor = conn.cursor(dictionary=True)
-    
+def search_table_hybrid_mode(table, query, embedding_model, mode="OR", limit=None, semantic_weight=0.5, time_budget=None):
+    """키워드 검색과 의미론적 검색을 결합한 하이브리드 검색
+
+    행 임베딩은 (테이블, 기본키, 내용 해시) 기준으로 캐시되며, 캐시에 없는 행만
+    배치로 인코딩한 뒤 행렬 곱 한 번으로 유사도를 계산합니다. 연결은 행을 읽은 직후
+    반환하므로 임베딩 계산이 시간 제한을 넘겨도 풀 연결을 붙잡지 않습니다.
+    """
     try:
-        # 1. 테이블 구조 파악
-        cursor.execute(f"DESCRIBE {table}")
-        columns = [row['Field'] for row in cursor.fetchall()]
+        # 1. 테이블 구조 파악 (캐시된 스키마 카탈로그 사용)
+        describe_rows = get_schema_catalogue().describe(table)
+        columns = [row['Field'] for row in describe_rows]
+        primary_keys = [row['Field'] for row in describe_rows if row['Key'] == 'PRI']
+        
+        # 칼럼 정의와 테이블 가중치는 행 루프 밖에서 한 번만 계산
+        schema_defs = get_table_schema_definitions()
+        table_weight = schema_defs.get(table, {'weight': 0.7})['weight']
+        col_defs = {col: get_column_definition(table, col) for col in columns}
         
         # 2. 검색할 컬럼 결정 및 가중치 계산
         column_weights = {}
-        for col in columns:
-            col_def = get_column_definition(table, col)
+        for col, col_def in col_defs.items():
             if col_def['type'] in ['text', 'long_text', 'category']:
                 column_weights[col] = col_def['search_weight']
         
@@ -361,107 +380,114 @@ def search_table_hybrid_mode(table, query, embedding_model, mode="OR", limit=Non
                 params.append(f"%{query}%")
         
         # 4. 날짜 정렬을 위한 컬럼 찾기
-        date_columns = []
-        for col in columns:
-            col_def = get_column_definition(table, col)
-            if col_def['type'] == 'date':
-                date_columns.append(col)
+        date_columns = [col for col, col_def in col_defs.items() if col_def['type'] == 'date']
         
         order_by = f"ORDER BY {date_columns[0] if date_columns else '1'} DESC"
         
         # 5. SQL 실행 - 모든 결과를 가져옴
         sql = f"""
-        SELECT * 
+        SELECT {_max_execution_hint(time_budget)}* 
         FROM {table}
         WHERE {" OR ".join(where_clauses) if mode == "OR" else " AND ".join(where_clauses)}
         {order_by}
         """
         
-        cursor.execute(sql, params)
-        results = cursor.fetchall()
+        results = _fetch_rows(sql, params)
         
-        # 6. 의미론적 검색 및 결과 스코어링
-        if results:
-            query_embedding = get_text_embedding(query, embedding_model)
-            scored_results = []
-            
-            for row in results:
-                # 각 칼럼의 특성을 고려한 텍스트 결합
-                text_parts = []
-                for col, value in row.items():
-                    col_def = get_column_definition(table, col)
-                    if col_def['type'] in ['text', 'long_text']:
-                        processed_value = preprocess_value(table, col, value)
-                        if processed_value:
-                            text_parts.append(processed_value)
-                
-                text_content = " ".join(text_parts)
-                
-                if text_content.strip():
-                    # 의미론적 유사도 계산
-                    text_embedding = get_text_embedding(text_content, embedding_model)
-                    semantic_score = calculate_similarity(query_embedding, text_embedding)
-                    
-                    # 키워드 매칭 점수 계산 (칼럼 가중치 적용)
-                    keyword_score = 0
-                    for col, value in row.items():
-                        if value and col in column_weights:
-                            processed_value = preprocess_value(table, col, value)
-                            if processed_value and any(kw.lower() in processed_value.lower() for kw in query.split()):
-                                keyword_score += column_weights[col]
-                    
-                    # 최종 점수 계산
-                    schema_defs = get_table_schema_definitions()
-                    table_weight = schema_defs.get(table, {'weight': 0.7})['weight']
-                    
-                    final_score = table_weight * (
-                        semantic_weight * semantic_score + 
-                        (1 - semantic_weight) * keyword_score
-                    )
-                    
-                    scored_results.append((final_score, row))
+        if not results:
+            return []
+        
+        # 6. 행별 텍스트 결합 및 키워드 점수 계산
+        text_columns = [col for col, col_def in col_defs.items() if col_def['type'] in ['text', 'long_text']]
+        keywords = [kw.lower() for kw in query.split()]
+        
+        candidates = []
+        for row in results:
+            # 각 칼럼의 특성을 고려한 텍스트 결합
+            text_parts = []
+            for col in text_columns:
+                processed_value = preprocess_value(table, col, row.get(col), col_defs[col])
+                if processed_value:
+                    text_parts.append(processed_value)
             
-            # 점수에 따라 정렬
-            scored_results.sort(reverse=True, key=lambda x: x[0])
+            text_content = " ".join(text_parts)
+            if not text_content.strip():
+                continue
             
-            # 각 결과에 점수 포함
-            results = []
-            for score, row in scored_results:
-                results.append({**row, '_score': score})
+            # 키워드 매칭 점수 계산 (칼럼 가중치 적용)
+            keyword_score = 0
+            for col, weight in column_weights.items():
+                value = row.get(col)
+                if value:
+                    processed_value = preprocess_value(table, col, value, col_defs[col])
+                    if processed_value and any(kw in processed_value.lower() for kw in keywords):
+                        keyword_score += weight
             
-            return results
+            pk = "|".join(str(row.get(col)) for col in primary_keys) if primary_keys else None
+            candidates.append((pk, text_content, keyword_score, row))
         
-        return []
+        if not candidates:
+            return []
+        
+        # 7. 의미론적 유사도 (캐시된 정규화 임베딩 · 쿼리 벡터)
+        row_embeddings = get_row_embedding_cache().encode_rows(
+            table,
+            [(pk, text) for pk, text, _, _ in candidates],
+            lambda texts: embedding_model.encode(texts, batch_size=64, show_progress_bar=False)
+        )
+        query_embedding = np.asarray(get_text_embedding(query, embedding_model), dtype=np.float32)
+        query_norm = np.linalg.norm(query_embedding)
+        if query_norm > 0:
+            query_embedding = query_embedding / query_norm
+        semantic_scores = row_embeddings @ query_embedding
+        keyword_scores = np.array([c[2] for c in candidates], dtype=np.float32)
+        
+        # 최종 점수 계산
+        final_scores = table_weight * (
+            semantic_weight * semantic_scores +
+            (1 - semantic_weight) * keyword_scores
+        )
+        
+        # 점수에 따라 정렬 후 각 결과에 점수 포함
+        order = np.argsort(-final_scores, kind='stable')
+        return [{**candidates[i][3], '_score': float(final_scores[i])} for i in order]
         
     except Exception as e:
         print(f"Error searching table {table}: {str(e)}")
         return []
-    finally:
-        cursor.close()
-        conn.close()
 
-def search_all_tables_hybrid_mode(query, embedding_model, mode="OR", limit=None, semantic_weight=0.5):
-    """모든 테이블에 대해 하이브리드 검색 수행"""
+def search_all_tables_hybrid_mode(query, embedding_model, mode="OR", limit=None, semantic_weight=0.5,
+                                  time_budget=DEFAULT_TIME_BUDGET, progress_callback=None):
+    """모든 테이블에 대해 하이브리드 검색을 동시에 수행
+
+    테이블별 검색은 스레드 풀에서 병렬로 실행되며, time_budget(초)을 넘긴 테이블은
+    결과에서 제외됩니다. progress_callback(테이블, 상태, 건수, 완료 수, 전체 수)은
+    테이블이 끝날 때마다 메인 스레드에서 호출됩니다.
+    """
     all_results = []
-    tables = get_table_names()
     table_importance = get_table_schema_definitions()
     
     # 각 테이블 검색 (limit 제한 없이)
-    for table in tables:
-        try:
-            results = search_table_hybrid_mode(table, query, embedding_model, mode, None, semantic_weight)
-            if results:
-                # 테이블 메타데이터 추가
-                for row in results:
-                    score = row.pop('_score', 0)  # 점수를 임시로 제거
-                    all_results.append({
-                        'table': table,
-                        'importance': table_importance.get(table, {'weight': 0.7})['weight'],
-                        '_score': score,  # 점수 저장
-                        **row
-                    })
-        except Exception as e:
-            continue
+    tasks = {
+        table: (lambda table=table: search_table_hybrid_mode(
+            table, query, embedding_model, mode, None, semantic_weight, time_budget))
+        for table in get_table_names()
+    }
+    for done, (table, status, results, elapsed) in enumerate(run_parallel(tasks, time_budget=time_budget), 1):
+        count = 0
+        if status == 'ok' and results:
+            count = len(results)
+            # 테이블 메타데이터 추가
+            for row in results:
+                score = row.pop('_score', 0)  # 점수를 임시로 제거
+                all_results.append({
+                    'table': table,
+                    'importance': table_importance.get(table, {'weight': 0.7})['weight'],
+                    '_score': score,  # 점수 저장
+                    **row
+                })
+        if progress_callback:
+            progress_callback(table, status, count, done, len(tasks))
     
     # 전체 결과를 점수에 따라 정렬
     all_results.sort(key=lambda x: x['_score'], reverse=True)
@@ -839,12 +865,28 @@ def main():
         
         # 검색 및 답변 생성
         with st.spinner('검색 중...'):
+            progress_bar = st.progress(0.0)
+            progress_text = st.empty()
+            timed_out_tables = []
+            
+            def show_progress(table, status, count, done, total):
+                progress_bar.progress(done / total)
+                if status == 'timeout':
+                    timed_out_tables.append(table)
+                progress_text.caption(f"테이블 검색 {done}/{total} 완료 - {table}: {count}건" +
+                                      (" (시간 초과)" if status == 'timeout' else ""))
+            
             results = search_all_tables_hybrid_mode(
                 query=user_query,
                 embedding_model=embedding_model,
                 mode=search_mode,
-                limit=search_limit
+                limit=search_limit,
+                progress_callback=show_progress
             )
+            progress_bar.empty()
+            progress_text.empty()
+            if timed_out_tables:
+                st.caption(f"⏱️ 시간 제한({DEFAULT_TIME_BUDGET:.0f}초)을 넘겨 제외된 테이블: {', '.join(timed_out_tables)}")
             
             if results:
                 # 결과를 데이터프레임으로 변환
@@ -1,5 +1,8 @@
 import streamlit as st
 import mysql.connector
+import db_pool
+import blob_store
+import attachment_preview
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -8,7 +11,6 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import json
-import base64
 import io
 from io import StringIO
 from openai import OpenAI
@@ -17,12 +19,10 @@ import requests
 import traceback
 import re
 from typing import Dict, List, Any, Optional
-import tempfile
 import PyPDF2
 import docx
 from pptx import Presentation
 import openpyxl
-import pandas as pd
 from langchain_anthropic import ChatAnthropic
 import time
 import math
@@ -62,7 +62,7 @@ if not st.session_state.authenticated:
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -109,14 +109,18 @@ def create_file_storage_tables():
                 file_type VARCHAR(50),
                 file_content LONGTEXT,
                 file_binary_data LONGBLOB,
+                blob_sha256 CHAR(64),
                 file_size BIGINT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (storage_id) REFERENCES file_storage(file_id) ON DELETE CASCADE,
                 INDEX idx_storage_id (storage_id),
                 INDEX idx_file_type (file_type),
-                INDEX idx_filename (filename)
+                INDEX idx_filename (filename),
+                INDEX idx_blob_sha256 (blob_sha256)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """)
+        # 기존 테이블에 blob 해시 컬럼 추가 (원본은 blob 저장소에 보관)
+        blob_store.ensure_schema(cursor, 'file_storage_files')
         
         # AI 분석 결과 테이블
         cursor.execute("""
@@ -152,9 +156,9 @@ def parse_uploaded_file(uploaded_file):
         file_extension = uploaded_file.name.split('.')[-1].lower()
         content = ""
         
+        # 원본은 SHA-256 주소의 blob 저장소에 저장 (같은 파일은 한 번만 저장)
         uploaded_file.seek(0)
-        binary_data = uploaded_file.read()
-        binary_base64 = base64.b64encode(binary_data).decode('utf-8')
+        blob_sha256, file_size = blob_store.put_stream(uploaded_file)
         
         uploaded_file.seek(0)
         
@@ -206,8 +210,8 @@ def parse_uploaded_file(uploaded_file):
             'filename': uploaded_file.name,
             'file_type': file_extension,
             'content': content,
-            'binary_data': binary_base64,
-            'size': len(binary_data)
+            'blob_sha256': blob_sha256,
+            'size': file_size
         }
         
     except Exception as e:
@@ -257,14 +261,14 @@ def save_file_data(storage_id, file_data):
     try:
         cursor.execute("""
             INSERT INTO file_storage_files 
-            (storage_id, filename, file_type, file_content, file_binary_data, file_size)
+            (storage_id, filename, file_type, file_content, blob_sha256, file_size)
             VALUES (%s, %s, %s, %s, %s, %s)
         """, (
             storage_id,
             file_data['filename'],
             file_data['file_type'],
             file_data['content'],
-            file_data['binary_data'],
+            file_data['blob_sha256'],
             file_data['size']
         ))
         
@@ -339,8 +343,10 @@ def get_storage_files(storage_id):
     cursor = conn.cursor(dictionary=True)
     
     try:
+        # 목록에는 메타데이터만 조회 (원본은 다운로드/미리보기 시에만)
         cursor.execute("""
-            SELECT * FROM file_storage_files 
+            SELECT file_data_id, storage_id, filename, file_type, file_size, blob_sha256, uploaded_at
+            FROM file_storage_files 
             WHERE storage_id = %s
             ORDER BY uploaded_at
         """, (storage_id,))
@@ -378,14 +384,15 @@ def get_file_binary_data(file_data_id):
     
     try:
         cursor.execute("""
-            SELECT filename, file_type, file_binary_data, file_size
+            SELECT filename, file_type, blob_sha256, file_binary_data, file_size
             FROM file_storage_files 
             WHERE file_data_id = %s
         """, (file_data_id,))
         result = cursor.fetchone()
         
-        if result and result['file_binary_data']:
-            binary_data = base64.b64decode(result['file_binary_data'])
+        # 이전 전 행은 DB의 base64 원본을 사용
+        binary_data = blob_store.read_attachment(result, 'file_binary_data', True) if result else None
+        if binary_data:
             return {
                 'filename': result['filename'],
                 'file_type': result['file_type'],
@@ -476,397 +483,21 @@ def ai_analyze_files(files_content, model_name):
         st.error(f"AI 분석 중 오류 발생: {str(e)}")
         return None
 
-def display_file_preview(file_data, file_type, filename):
-    """파일 미리보기 표시"""
-    try:
-        file_type_lower = file_type.lower()
-        
-        if file_type_lower in ['jpg', 'jpeg', 'png', 'gif']:
-            if file_data.get('binary_data'):
-                st.image(
-                    file_data['binary_data'],
-                    caption=f"🖼️ {filename}",
-                    use_container_width=True
-                )
-                return True
-        
-        elif file_type_lower == 'pdf':
-            if file_data.get('binary_data'):
-                import math
-                from PyPDF2 import PdfReader, PdfWriter
-                import tempfile, os
-
-                total_size = file_data['file_size']
-                # 1MB 초과시 페이징 미리보기 (1페이지씩)
-                if total_size > 1 * 1024 * 1024:
-                    key = f"pdf_preview_page_start_{filename}"
-                    if key not in st.session_state:
-                        st.session_state[key] = 0  # 0-based index
-
-                    # PDF 전체 페이지 수 구하기
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                        tmp_in.write(file_data['binary_data'])
-                        tmp_in_path = tmp_in.name
-                    reader = PdfReader(tmp_in_path)
-                    total_pages = len(reader.pages)
-                    os.unlink(tmp_in_path)
-
-                    page_start = st.session_state[key]
-                    page_end = min(page_start + 1, total_pages)
-
-                    col_prev, col_next = st.columns([1, 1])
-                    with col_prev:
-                        if st.button("⬅️ 이전", disabled=page_start == 0, key=f"prev_{filename}"):
-                            st.session_state[key] = max(0, page_start - 1)
-                            st.rerun()
-                    with col_next:
-                        if st.button("다음 ➡️", disabled=page_end >= total_pages, key=f"next_{filename}"):
-                            st.session_state[key] = min(total_pages - 1, page_start + 1)
-                            st.rerun()
-
-                    # 미리보기 PDF 생성 (1페이지)
-                    try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_in:
-                            tmp_in.write(file_data['binary_data'])
-                            tmp_in_path = tmp_in.name
-                        reader = PdfReader(tmp_in_path)
-                        writer = PdfWriter()
-                        for i in range(page_start, page_end):
-                            writer.add_page(reader.pages[i])
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_out:
-                            writer.write(tmp_out)
-                            tmp_out_path = tmp_out.name
-                        with open(tmp_out_path, "rb") as f:
-                            preview_pdf_bytes = f.read()
-                        os.unlink(tmp_in_path)
-                        os.unlink(tmp_out_path)
-                        st.markdown(f"**페이지 {page_start+1} / {total_pages}**")
-                        pdf_base64 = base64.b64encode(preview_pdf_bytes).decode('utf-8')
-                        pdf_display = f"""
-                        <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                                width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                            <p>PDF를 표시할 수 없습니다. 
-                            <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                            여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                        </iframe>
-                        """
-                        st.markdown(pdf_display, unsafe_allow_html=True)
-                    except Exception as e:
-                        st.error(f"PDF 미리보기 생성 중 오류: {e}")
+def get_file_source(file_info):
+    """목록 메타데이터로 만든 첨부파일 핸들 - 원본은 미리보기/다운로드할 때만 읽음"""
+    file_data_id = file_info['file_data_id']
+    return attachment_preview.make_source(
+        file_info['filename'],
+        file_info['file_type'],
+        file_info.get('file_size'),
+        file_info.get('blob_sha256'),
+        loader=lambda: (get_file_binary_data(file_data_id) or {}).get('binary_data')
+    )
 
-                    st.download_button(
-                        label="💾 전체 PDF 다운로드",
-                        data=file_data['binary_data'],
-                        file_name=filename,
-                        mime="application/pdf"
-                    )
-                    return True
-                else:
-                    st.subheader(f"📄 PDF 미리보기: {filename}")
-                    pdf_base64 = base64.b64encode(file_data['binary_data']).decode('utf-8')
-                    pdf_display = f"""
-                    <iframe src=\"data:application/pdf;base64,{pdf_base64}\" 
-                            width=\"100%\" height=\"600px\" type=\"application/pdf\">
-                        <p>PDF를 표시할 수 없습니다. 
-                        <a href=\"data:application/pdf;base64,{pdf_base64}\" target=\"_blank\">
-                        여기를 클릭하여 새 탭에서 열어보세요.</a></p>
-                    </iframe>
-                    """
-                    st.markdown(pdf_display, unsafe_allow_html=True)
-                    return True
-        
-        elif file_type_lower in ['txt', 'md']:
-            if file_data.get('binary_data'):
-                try:
-                    text_content = file_data['binary_data'].decode('utf-8')
-                    st.subheader(f"📄 텍스트 파일 미리보기: {filename}")
-                    
-                    if file_type_lower == 'md':
-                        st.markdown(text_content)
-                    else:
-                        st.text_area(
-                            "파일 내용",
-                            value=text_content,
-                            height=400,
-                            disabled=True
-                        )
-                    return True
-                except Exception as e:
-                    st.error(f"텍스트 파일을 읽는 중 오류 발생: {str(e)}")
-                    return False
-        
-        elif file_type_lower == 'xlsx':
-            return display_excel_preview(file_data, filename)
-        
-        elif file_type_lower == 'pptx':
-            return display_powerpoint_preview(file_data, filename)
-        
-        elif file_type_lower == 'docx':
-            return display_word_preview(file_data, filename)
-        
-        return False
-        
-    except Exception as e:
-        st.error(f"파일 미리보기 오류: {str(e)}")
-        return False
+def display_file_preview(source, key='preview'):
+    """파일 미리보기 표시 - 선택한 파일만 렌더링하고 결과는 파일 해시 기준으로 캐시"""
+    return attachment_preview.render_preview(source, key)
 
-def display_excel_preview(file_data, filename):
-    """엑셀 파일 미리보기"""
-    try:
-        st.subheader(f"📊 Excel 미리보기: {filename}")
-        
-        if file_data.get('binary_data'):
-            # 바이너리 데이터를 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                tmp_file.write(file_data['binary_data'])
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # 엑셀 파일 읽기
-                workbook = openpyxl.load_workbook(tmp_file_path, data_only=True)
-                
-                # 시트 탭 생성
-                sheet_names = workbook.sheetnames
-                if len(sheet_names) > 1:
-                    selected_sheet = st.selectbox("시트 선택", sheet_names, key=f"sheet_select_{filename}")
-                else:
-                    selected_sheet = sheet_names[0]
-                
-                # 선택된 시트 표시
-                sheet = workbook[selected_sheet]
-                
-                # 데이터를 pandas DataFrame으로 변환
-                data = []
-                for row in sheet.iter_rows(values_only=True):
-                    data.append(row)
-                
-                if data:
-                    # 첫 번째 행을 헤더로 사용
-                    df = pd.DataFrame(data[1:], columns=data[0])
-                    
-                    # NaN 값을 빈 문자열로 변경
-                    df = df.fillna('')
-                    
-                    st.write(f"**시트: {selected_sheet}**")
-                    st.write(f"행 수: {len(df)}, 열 수: {len(df.columns)}")
-                    
-                    # 테이블 표시 (최대 100행)
-                    if len(df) > 100:
-                        st.warning("⚠️ 데이터가 많아서 상위 100행만 표시합니다.")
-                        st.dataframe(df.head(100), use_container_width=True)
-                    else:
-                        st.dataframe(df, use_container_width=True)
-                else:
-                    st.info("빈 시트입니다.")
-                
-                workbook.close()
-                return True
-                
-            finally:
-                # 임시 파일 삭제
-                import os
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
-        
-        return False
-    except Exception as e:
-        st.error(f"Excel 미리보기 오류: {str(e)}")
-        return False
-
-def display_powerpoint_preview(file_data, filename):
-    """PowerPoint 파일 미리보기"""
-    try:
-        st.subheader(f"📋 PowerPoint 미리보기: {filename}")
-        
-        if file_data.get('binary_data'):
-            # 바이너리 데이터를 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pptx') as tmp_file:
-                tmp_file.write(file_data['binary_data'])
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # PowerPoint 파일 읽기
-                prs = Presentation(tmp_file_path)
-                
-                st.write(f"총 슬라이드 수: {len(prs.slides)}")
-                st.markdown("---")
-                
-                # 모든 슬라이드를 순서대로 표시
-                for i, slide in enumerate(prs.slides, 1):
-                    # 슬라이드 헤더
-                    st.markdown(f"## 📋 슬라이드 {i}")
-                    
-                    slide_content = []
-                    slide_titles = []
-                    
-                    # 슬라이드 내용 추출 (텍스트와 이미지를 위치 순서대로)
-                    slide_elements = []  # 텍스트와 이미지를 순서대로 저장
-                    
-                    # shape의 위치 정보를 기준으로 정렬하여 처리
-                    sorted_shapes = []
-                    for shape in slide.shapes:
-                        try:
-                            # shape의 top 위치를 기준으로 정렬
-                            top_position = shape.top if hasattr(shape, 'top') else 0
-                            sorted_shapes.append((top_position, shape))
-                        except:
-                            sorted_shapes.append((0, shape))
-                    
-                    # 위치 순서대로 정렬
-                    sorted_shapes.sort(key=lambda x: x[0])
-                    
-                    for top_pos, shape in sorted_shapes:
-                        # 텍스트 처리
-                        if hasattr(shape, "text") and shape.text.strip():
-                            is_title = False
-                            try:
-                                # placeholder인지 확인
-                                if hasattr(shape, 'is_placeholder') and shape.is_placeholder:
-                                    if hasattr(shape, 'placeholder_format') and shape.placeholder_format:
-                                        if shape.placeholder_format.type == 1:  # 제목 placeholder
-                                            is_title = True
-                                # 또는 간단한 휴리스틱으로 제목 감지
-                                elif len(shape.text.strip()) < 100 and '\n' not in shape.text.strip():
-                                    is_title = True
-                            except:
-                                pass
-                            
-                            if is_title:
-                                slide_elements.append({
-                                    'type': 'title',
-                                    'content': shape.text,
-                                    'position': top_pos
-                                })
-                            else:
-                                slide_elements.append({
-                                    'type': 'text',
-                                    'content': shape.text,
-                                    'position': top_pos
-                                })
-                        
-                        # 이미지 처리
-                        try:
-                            from pptx.enum.shapes import MSO_SHAPE_TYPE
-                            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                                image = shape.image
-                                image_bytes = image.blob
-                                slide_elements.append({
-                                    'type': 'image',
-                                    'content': {
-                                        'data': image_bytes,
-                                        'filename': getattr(image, 'filename', f'slide_{i}_image_{len([e for e in slide_elements if e["type"] == "image"])+1}')
-                                    },
-                                    'position': top_pos
-                                })
-                        except Exception as e:
-                            pass
-                    
-                    # 슬라이드 요소들을 위치 순서대로 표시
-                    if slide_elements:
-                        for element in slide_elements:
-                            if element['type'] == 'title':
-                                st.markdown(f"### 🎯 {element['content']}")
-                                
-                            elif element['type'] == 'text':
-                                content = element['content']
-                                if content.strip():
-                                    # 줄바꿈을 기준으로 나누어서 표시
-                                    lines = content.split('\n')
-                                    for line in lines:
-                                        if line.strip():
-                                            st.markdown(f"• {line.strip()}")
-                                    st.markdown("")  # 텍스트 블록 사이 여백
-                                    
-                            elif element['type'] == 'image':
-                                img = element['content']
-                                st.image(
-                                    img['data'], 
-                                    caption=f"📷 {img['filename']}", 
-                                    use_container_width=True
-                                )
-                                st.markdown("")  # 이미지 사이 여백
-                    else:
-                        st.info("이 슬라이드에는 내용이 없습니다.")
-                    
-                    # 슬라이드 구분선 (마지막 슬라이드가 아닌 경우)
-                    if i < len(prs.slides):
-                        st.markdown("---")
-                        st.markdown("")  # 여백 추가
-                
-                return True
-                
-            finally:
-                # 임시 파일 삭제
-                import os
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
-        
-        return False
-    except Exception as e:
-        st.error(f"PowerPoint 미리보기 오류: {str(e)}")
-        return False
-
-def display_word_preview(file_data, filename):
-    """Word 문서 미리보기"""
-    try:
-        st.subheader(f"📝 Word 문서 미리보기: {filename}")
-        
-        if file_data.get('binary_data'):
-            # 바이너리 데이터를 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.docx') as tmp_file:
-                tmp_file.write(file_data['binary_data'])
-                tmp_file_path = tmp_file.name
-            
-            try:
-                # Word 문서 읽기
-                doc = docx.Document(tmp_file_path)
-                
-                st.write(f"총 단락 수: {len(doc.paragraphs)}")
-                
-                # 문서 내용 표시
-                for i, paragraph in enumerate(doc.paragraphs):
-                    if paragraph.text.strip():
-                        # 스타일에 따라 다른 형식으로 표시
-                        text = paragraph.text.strip()
-                        
-                        # 제목 스타일 감지 (간단한 휴리스틱)
-                        if len(text) < 100 and (text.isupper() or any(keyword in text.lower() for keyword in ['제목', '장', '절', 'chapter', 'section'])):
-                            st.markdown(f"### {text}")
-                        elif paragraph.style.name.startswith('Heading') if hasattr(paragraph, 'style') else False:
-                            st.markdown(f"### {text}")
-                        else:
-                            st.markdown(text)
-                        
-                        st.markdown("---")  # 단락 구분선
-                
-                # 표 내용 표시
-                if doc.tables:
-                    st.subheader("📊 문서 내 표")
-                    for i, table in enumerate(doc.tables, 1):
-                        st.write(f"**표 {i}**")
-                        
-                        # 표 데이터를 DataFrame으로 변환
-                        table_data = []
-                        for row in table.rows:
-                            row_data = [cell.text.strip() for cell in row.cells]
-                            table_data.append(row_data)
-                        
-                        if table_data:
-                            df = pd.DataFrame(table_data)
-                            st.dataframe(df, use_container_width=True)
-                
-                return True
-                
-            finally:
-                # 임시 파일 삭제
-                import os
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
-        
-        return False
-    except Exception as e:
-        st.error(f"Word 문서 미리보기 오류: {str(e)}")
-        return False
 
 def get_file_mime_type(file_type):
     """파일 타입에 따른 MIME 타입 반환"""
@@ -1115,13 +746,13 @@ def replace_storage_file(file_data_id, new_file_data):
         cursor.execute("""
             UPDATE file_storage_files SET
             filename = %s, file_type = %s, file_content = %s, 
-            file_binary_data = %s, file_size = %s, uploaded_at = CURRENT_TIMESTAMP
+            blob_sha256 = %s, file_binary_data = NULL, file_size = %s, uploaded_at = CURRENT_TIMESTAMP
             WHERE file_data_id = %s
         """, (
             new_file_data['filename'],
             new_file_data['file_type'],
             new_file_data['content'],
-            new_file_data['binary_data'],
+            new_file_data['blob_sha256'],
             new_file_data['size'],
             file_data_id
         ))
@@ -1150,14 +781,14 @@ def add_files_to_storage(storage_id, new_files_data):
         for file_data in new_files_data:
             cursor.execute("""
                 INSERT INTO file_storage_files 
-                (storage_id, filename, file_type, file_content, file_binary_data, file_size)
+                (storage_id, filename, file_type, file_content, blob_sha256, file_size)
                 VALUES (%s, %s, %s, %s, %s, %s)
             """, (
                 storage_id,
                 file_data['filename'],
                 file_data['file_type'],
                 file_data['content'],
-                file_data['binary_data'],
+                file_data['blob_sha256'],
                 file_data['size']
             ))
         
@@ -1336,20 +967,11 @@ def main():
             with col_preview_2:
                 if st.button("❌ 닫기", key="close_preview"):
                     del st.session_state.preview_file_id
-                    del st.session_state.preview_filename
-                    del st.session_state.preview_file_type
+                    del st.session_state.preview_file
                     st.rerun()
             
             with col_preview_1:
-                file_data = get_file_binary_data(st.session_state.preview_file_id)
-                if file_data:
-                    display_file_preview(
-                        file_data, 
-                        st.session_state.preview_file_type, 
-                        st.session_state.preview_filename
-                    )
-                else:
-                    st.error("파일 데이터를 불러올 수 없습니다.")
+                display_file_preview(get_file_source(st.session_state.preview_file), key="archive_preview")
             
             st.markdown("---")
         
@@ -1392,22 +1014,16 @@ def main():
                             with col2:
                                 if st.button(f"👁️ 미리보기", key=f"preview_{file_info['file_data_id']}"):
                                     st.session_state.preview_file_id = file_info['file_data_id']
-                                    st.session_state.preview_filename = file_info['filename']
-                                    st.session_state.preview_file_type = file_info['file_type']
+                                    st.session_state.preview_file = dict(file_info)
                             
                             with col3:
-                                # 버튼들을 가로로 배치
-                                file_data = get_file_binary_data(file_info['file_data_id'])
-                                if file_data:
-                                    mime_type = get_file_mime_type(file_data['file_type'])
-                                    st.download_button(
-                                        label="💾 다운로드",
-                                        data=file_data['binary_data'],
-                                        file_name=file_data['filename'],
-                                        mime=mime_type,
-                                        key=f"download_{file_info['file_data_id']}",
-                                        use_container_width=True
-                                    )
+                                # 버튼들을 가로로 배치 (원본은 다운로드를 누른 파일만 읽음)
+                                attachment_preview.download_button(
+                                    get_file_source(file_info),
+                                    key=f"download_{file_info['file_data_id']}",
+                                    mime=get_file_mime_type(file_info['file_type']),
+                                    use_container_width=True
+                                )
                                 
                                 if st.button("🔄 교체", key=f"replace_btn_{file_info['file_data_id']}", use_container_width=True):
                                     st.session_state[f'replace_file_{file_info["file_data_id"]}'] = True
@@ -1613,20 +1229,11 @@ def main():
             with col_preview_2:
                 if st.button("❌ 닫기", key="close_search_preview"):
                     del st.session_state.preview_file_id
-                    del st.session_state.preview_filename
-                    del st.session_state.preview_file_type
+                    del st.session_state.preview_file
                     st.rerun()
             
             with col_preview_1:
-                file_data = get_file_binary_data(st.session_state.preview_file_id)
-                if file_data:
-                    display_file_preview(
-                        file_data, 
-                        st.session_state.preview_file_type, 
-                        st.session_state.preview_filename
-                    )
-                else:
-                    st.error("파일 데이터를 불러올 수 없습니다.")
+                display_file_preview(get_file_source(st.session_state.preview_file), key="archive_search_preview")
             
             st.markdown("---")
 
@@ -1683,20 +1290,14 @@ def main():
                                 with col2:
                                     if st.button(f"👁️ 미리보기", key=f"search_preview_{file_info['file_data_id']}"):
                                         st.session_state.preview_file_id = file_info['file_data_id']
-                                        st.session_state.preview_filename = file_info['filename']
-                                        st.session_state.preview_file_type = file_info['file_type']
+                                        st.session_state.preview_file = dict(file_info)
                                 
                                 with col3:
-                                    file_data = get_file_binary_data(file_info['file_data_id'])
-                                    if file_data:
-                                        mime_type = get_file_mime_type(file_data['file_type'])
-                                        st.download_button(
-                                            label="💾 다운로드",
-                                            data=file_data['binary_data'],
-                                            file_name=file_data['filename'],
-                                            mime=mime_type,
-                                            key=f"search_download_{file_info['file_data_id']}"
-                                        )
+                                    attachment_preview.download_button(
+                                        get_file_source(file_info),
+                                        key=f"search_download_{file_info['file_data_id']}",
+                                        mime=get_file_mime_type(file_info['file_type'])
+                                    )
                         
                         # AI 분석 결과 표시
                         analyses = get_ai_analysis(selected_storage['file_id'])
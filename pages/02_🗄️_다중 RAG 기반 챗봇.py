@@ -14,6 +14,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # RAG 관련 import 추가
 import mysql.connector
+import db_pool
 import pandas as pd
 from sqlalchemy import create_engine
 import requests
@@ -33,7 +34,10 @@ from langchain.document_loaders import UnstructuredFileLoader
 from langchain.schema import Document
 
 # 청크 처리 함수 import
-from chunk_processor import process_chunked_rag
+from chunk_processor import process_chunked_rag, ChunkProcessingError
+import llm_cache
+import llm_service
+import web_crawler
 
 # 환경 변수 로드
 load_dotenv()
@@ -70,7 +74,7 @@ st.markdown("RAG 기반 AI 어시스턴트 - MySQL DB, 웹사이트, 문서 분
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             host=os.getenv('SQL_HOST'),
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
@@ -188,83 +192,45 @@ def load_mysql_data(selected_tables):
         st.error(f"MySQL 데이터 로드 오류: {str(e)}")
         return mysql_data
 
+def extract_page_summary(page):
+    """페이지 제목과 본문 앞부분 2000자 (본문이 50자 이하이면 None)"""
+    soup = page['soup']
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else ""
+    
+    # 불필요한 태그 제거
+    for script in soup(["script", "style", "nav", "header", "footer"]):
+        script.decompose()
+    
+    # 본문 텍스트 추출
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    content = ' '.join(chunk for chunk in chunks if chunk)
+    
+    if len(content) <= 50:
+        return None
+    return {'title': title_text, 'content': content[:2000]}  # 처음 2000자만
+
 def scrape_website_simple(url, max_pages=5):
-    """간단한 웹사이트 스크래핑 - 개선된 버전"""
+    """간단한 웹사이트 스크래핑 - 공유 비동기 크롤러 사용 (동시 요청, 변경되지 않은 페이지는 재사용)"""
     try:
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        visited_urls = set()
         scraped_data = []
-        urls_to_visit = [url]
-        
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        
         successfully_scraped = 0  # 실제로 스크래핑된 페이지 수
         
-        while urls_to_visit and successfully_scraped < max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in visited_urls:
-                continue
-                
-            try:
-                response = session.get(current_url, timeout=10)
-                response.raise_for_status()
-                
-                visited_urls.add(current_url)
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 페이지 제목 추출
-                title = soup.find('title')
-                title_text = title.get_text().strip() if title else f"페이지 {successfully_scraped + 1}"
-                
-                # 불필요한 태그 제거
-                for script in soup(["script", "style", "nav", "header", "footer"]):
-                    script.decompose()
-                
-                # 본문 텍스트 추출
-                text = soup.get_text()
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                content = ' '.join(chunk for chunk in chunks if chunk)
-                
-                # 콘텐츠가 있으면 추가 (길이 제한 완화)
-                if len(content) > 50:  # 50자로 기준 낮춤
-                    scraped_data.append({
-                        'url': current_url,
-                        'title': title_text,
-                        'content': content[:2000]  # 처음 2000자만
-                    })
-                    
-                    successfully_scraped += 1
-                    st.success(f"✅ 페이지 {successfully_scraped}/{max_pages} 스크래핑 완료: {title_text}")
-                
-                # 더 많은 링크 찾기 (제한 완화)
-                base_domain = urlparse(url).netloc
-                
-                # 링크 탐색을 더 적극적으로
-                for link in soup.find_all("a", href=True)[:20]:  # 20개로 증가
-                    absolute_link = urljoin(current_url, link['href'])
-                    parsed_link = urlparse(absolute_link)
-                    
-                    # 조건 완화: 같은 도메인 + 기본적인 필터링
-                    if (parsed_link.netloc == base_domain and 
-                        absolute_link not in visited_urls and 
-                        absolute_link not in urls_to_visit and
-                        not any(x in absolute_link.lower() for x in ['#', 'javascript:', 'mailto:', 'tel:']) and
-                        len(urls_to_visit) < 50):  # 대기 큐 크기 제한
-                        urls_to_visit.append(absolute_link)
-                
-                time.sleep(0.5)  # 지연시간 단축 (1초 → 0.5초)
-                
-            except Exception as e:
-                st.warning(f"⚠️ 페이지 크롤링 실패 ({current_url}): {str(e)}")
+        for page in web_crawler.iter_crawl(url, max_pages=max_pages, extract=extract_page_summary):
+            if page['error'] is not None:
+                st.warning(f"⚠️ 페이지 크롤링 실패 ({page['url']}): {page['error']}")
                 continue
+            
+            successfully_scraped += 1
+            title_text = page['data']['title'] or f"페이지 {successfully_scraped}"
+            scraped_data.append({
+                'url': page['url'],
+                'title': title_text,
+                'content': page['data']['content']
+            })
+            st.success(f"✅ 페이지 {successfully_scraped}/{max_pages} 스크래핑 완료: {title_text}")
         
         # 결과 메시지 개선
         if scraped_data:
@@ -457,133 +423,21 @@ def create_rag_context(mysql_data=None, website_data=None, files_data=None, mode
     
     return context_text, rag_sources_used
 
-def get_ai_response(prompt, model_name, system_prompt="", enable_thinking=False, thinking_budget=4000):
-    """AI 모델로부터 응답을 받는 함수 (reasoning 과정 표시 지원)"""
-    try:
-        if model_name.startswith('claude'):
-            # Reasoning 모델인지 확인 (참조 파일 기준)
-            is_reasoning_model = (
-                model_name == 'claude-3-7-sonnet-latest' or
-                model_name == 'claude-3-5-sonnet-latest'
-            )
-            
-            if is_reasoning_model and enable_thinking:
-                # Extended Thinking 사용 (직접 Anthropic 클라이언트 사용)
-                import anthropic
-                direct_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-                
-                messages = [{"role": "user", "content": prompt}]
-                
-                response = direct_client.messages.create(
-                    model=model_name,
-                    max_tokens=8192,
-                    system=system_prompt if system_prompt else None,
-                    thinking={
-                        "type": "enabled",
-                        "budget_tokens": thinking_budget
-                    },
-                    messages=messages
-                )
-                
-                thinking_content = ""
-                final_content = ""
-                
-                for block in response.content:
-                    if hasattr(block, 'type'):
-                        if block.type == "thinking":
-                            thinking_content = block.thinking
-                        elif block.type == "text":
-                            final_content = block.text
-                        elif block.type == "redacted_thinking":
-                            thinking_content += "\n[일부 사고 과정이 보안상 암호화되었습니다]"
-                
-                return {
-                    "content": final_content,
-                    "thinking": thinking_content,
-                    "has_thinking": True
-                }
-            else:
-                # 일반 모드 (LangChain 사용)
-                from langchain_anthropic import ChatAnthropic
-                client = ChatAnthropic(
-                    model=model_name, 
-                    api_key=os.getenv('ANTHROPIC_API_KEY'), 
-                    temperature=0.7, 
-                    max_tokens=8192
-                )
-                
-                if system_prompt:
-                    full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-                    response = client.invoke(full_prompt)
-                else:
-                    response = client.invoke(prompt)
-                
-                content = response.content if hasattr(response, 'content') else str(response)
-                return {
-                    "content": content,
-                    "thinking": "",
-                    "has_thinking": False
-                }
-                
-        else:
-            # OpenAI 모델들
-            openai_key = os.getenv('OPENAI_API_KEY')
-            if not openai_key:
-                st.error("❌ OpenAI API 키가 설정되지 않았습니다!")
-                return {
-                    "content": "OpenAI API 키가 필요합니다.",
-                    "thinking": "",
-                    "has_thinking": False
-                }
-            
-            from openai import OpenAI
-            openai_client = OpenAI(api_key=openai_key)
-            
-            is_o1_model = model_name.startswith('o1')
-            
-            if is_o1_model:
-                response = openai_client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {"role": "user", "content": f"{system_prompt}\n\n{prompt}" if system_prompt else prompt}
-                    ],
-                    max_completion_tokens=8192
-                )
-                
-                content = response.choices[0].message.content
-                
-                return {
-                    "content": content,
-                    "thinking": "🧠 이 모델은 내부적으로 복잡한 reasoning 과정을 거쳐 답변을 생성했습니다.",
-                    "has_thinking": True
-                }
-            else:
-                messages = []
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": prompt})
-                
-                response = openai_client.chat.completions.create(
-                    model=model_name,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=8192
-                )
-                
-                content = response.choices[0].message.content
-                return {
-                    "content": content,
-                    "thinking": "",
-                    "has_thinking": False
-                }
-            
-    except Exception as e:
-        st.error(f"❌ AI 응답 생성 중 오류가 발생했습니다: {str(e)}")
-        return {
-            "content": f"오류가 발생했습니다: {str(e)}",
-            "thinking": "",
-            "has_thinking": False
-        } 
+@llm_cache.cached(temperature=0.7, error_prefixes=(llm_service.ERROR_PREFIX,))
+def get_ai_response(prompt, model_name, system_prompt="", enable_thinking=False, thinking_budget=4000, placeholder=None):
+    """AI 모델로부터 응답을 받는 함수 (reasoning 과정 표시 지원)
+
+    placeholder를 주면 응답을 토큰 단위로 스트리밍하여 표시합니다.
+    """
+    response = llm_service.get_ai_response(
+        prompt, model_name, system_prompt,
+        enable_thinking=enable_thinking,
+        thinking_budget=thinking_budget,
+        placeholder=placeholder
+    )
+    if response.get('error'):
+        st.error(f"❌ AI 응답 생성 중 오류가 발생했습니다: {response['error']}")
+    return response
 
 def save_conversation(session_title, user_query, assistant_response, model_name, has_reasoning=False, reasoning_content="", rag_sources_used=None, execution_time_seconds=None):
     """대화 내용을 데이터베이스에 저장"""
@@ -796,14 +650,18 @@ with tab1:
             with st.spinner(f"🤖 {selected_model}이 RAG 데이터를 분석하고 있습니다..."):
                 
                 # 청크 처리가 필요한지 확인 (청크 처리 함수에서 판단)
-                chunked_result = process_chunked_rag(
-                    user_query=user_query,
-                    mysql_data=st.session_state.mysql_data if st.session_state.mysql_data else None,
-                    website_data=st.session_state.website_data if st.session_state.website_data else None,
-                    files_data=st.session_state.files_data if st.session_state.files_data else None,
-                    model_name=selected_model,
-                    get_ai_response_func=get_ai_response
-                )
+                try:
+                    chunked_result = process_chunked_rag(
+                        user_query=user_query,
+                        mysql_data=st.session_state.mysql_data if st.session_state.mysql_data else None,
+                        website_data=st.session_state.website_data if st.session_state.website_data else None,
+                        files_data=st.session_state.files_data if st.session_state.files_data else None,
+                        model_name=selected_model,
+                        get_ai_response_func=get_ai_response
+                    )
+                except ChunkProcessingError as e:
+                    st.error(f"❌ 청크 처리 실패: {e}")
+                    st.stop()
                 
                 if chunked_result:
                     # 청크 처리 결과
@@ -838,13 +696,16 @@ with tab1:
                     else:
                         prompt = f"질문: {user_query}\n\n컨텍스트 정보가 없습니다. 일반적인 지식을 바탕으로 답변해주세요."
                     
-                    # AI 응답 생성
+                    # AI 응답 생성 (생성 중인 답변을 스트리밍으로 표시)
+                    stream_placeholder = st.empty()
                     response = get_ai_response(
                         prompt=prompt,
                         model_name=selected_model,
                         system_prompt=system_prompt,
-                        enable_thinking=st.session_state.get('enable_sidebar_reasoning', False)
+                        enable_thinking=st.session_state.get('enable_sidebar_reasoning', False),
+                        placeholder=stream_placeholder
                     )
+                    stream_placeholder.empty()
             
             end_time = time.time()
             execution_time = int(end_time - start_time)
@@ -865,6 +726,11 @@ with tab1:
                             st.markdown(f"**청크 {chunk_resp['chunk_id']} 결과:**")
                             st.markdown(chunk_resp['content'])
                             st.markdown("---")
+                
+                if response.get('failed_chunks'):
+                    with st.expander(f"⚠️ 실패한 청크 ({len(response['failed_chunks'])}개) - 종합에서 제외됨", expanded=False):
+                        for failed in response['failed_chunks']:
+                            st.markdown(f"**청크 {failed['chunk_id']}:** {failed['error']}")
             else:
                 # 일반 처리 결과 표시
                 st.markdown("### 🤖 AI 응답")
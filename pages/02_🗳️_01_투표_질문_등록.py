@@ -1,5 +1,6 @@
 import streamlit as st
 import mysql.connector
+import db_pool
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -14,7 +15,7 @@ st.title("🗳️ 투표 문제 등록")
 
 # MySQL 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
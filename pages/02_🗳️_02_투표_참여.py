@@ -1,5 +1,6 @@
 import streamlit as st
 import mysql.connector
+import db_pool
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -33,7 +34,7 @@ def connect_to_db():
         if missing_vars:
             raise ValueError(f"Missing environment variables: {', '.join(missing_vars)}")
             
-        conn = mysql.connector.connect(**db_config)
+        conn = db_pool.connect(**db_config)
         return conn
         
     except mysql.connector.Error as err:
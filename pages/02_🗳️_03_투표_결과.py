@@ -1,5 +1,6 @@
 import streamlit as st
 import mysql.connector
+import db_pool
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
@@ -54,7 +55,7 @@ if not st.session_state.authenticated:
 
 # MySQL 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
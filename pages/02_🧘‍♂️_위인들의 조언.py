@@ -1,5 +1,6 @@
 import streamlit as st
 import mysql.connector
+import db_pool
 import os
 import json
 from datetime import datetime
@@ -811,7 +812,7 @@ def generate_ai_response(persona: WisdomPersona, conversation_history: str, topi
 def connect_to_db():
     """데이터베이스 연결"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=SQL_USER,
             password=SQL_PASSWORD,
             host=SQL_HOST,
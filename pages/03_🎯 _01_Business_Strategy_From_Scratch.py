@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, Process
@@ -14,7 +14,7 @@ load_dotenv()
 
 # MySQL 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
@@ -126,7 +126,7 @@ def apply_framework_to_strategy(content, framework_id, framework_name):
 
 # DB 연결 설정
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import mysql.connector
+import db_pool
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -38,7 +38,7 @@ st.markdown("""
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
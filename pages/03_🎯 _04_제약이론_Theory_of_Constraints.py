@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import json
@@ -288,7 +289,7 @@ graph TD
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -1,5 +1,5 @@
 import streamlit as st
-import mysql.connector
+import db_pool
 import os
 from dotenv import load_dotenv
 import pandas as pd
@@ -10,7 +10,7 @@ load_dotenv()
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
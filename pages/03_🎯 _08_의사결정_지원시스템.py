@@ -1,5 +1,5 @@
 import streamlit as st
-import mysql.connector
+import db_pool
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -21,7 +21,7 @@ st.set_page_config(page_title="의사결정 지원 시스템", page_icon="🎯",
 
 def connect_to_db():
     """MySQL DB 연결"""
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 import os
 from datetime import datetime
-import mysql.connector
+import db_pool
+import tts_service
 from dotenv import load_dotenv
 from openai import OpenAI
 import anthropic
@@ -57,7 +58,7 @@ if selected_model != st.session_state.selected_model:
 
 # DB 연결 함수
 def connect_to_db():
-    return mysql.connector.connect(
+    return db_pool.connect(
         user=os.getenv('SQL_USER'),
         password=os.getenv('SQL_PASSWORD'),
         host=os.getenv('SQL_HOST'),
@@ -658,24 +659,8 @@ def ai_generate_application(summary_text, application_text, model_name, extra_pr
             st.error(f"API 키 상태: {openai_key[:10] if openai_key else 'None'}... (길이: {len(openai_key) if openai_key else 0})")
             raise e
 
-def summarize_for_tts(text, max_length=3500):
-    if len(text) <= max_length:
-        return text
-    lines = text.split('\n')
-    summary = []
-    current_length = 0
-    for line in lines:
-        if line.startswith('#') or line.startswith('##'):
-            if current_length + len(line) + 2 <= max_length:
-                summary.append(line)
-                current_length += len(line) + 2
-        elif '[핵심 요약]' in line or '[주요 분석]' in line or '[실행 제안]' in line:
-            if current_length + len(line) + 2 <= max_length:
-                summary.append(line)
-                current_length += len(line) + 2
-    return '\n'.join(summary)
-
 def text_to_speech(text):
+    """텍스트를 음성(mp3 bytes)으로 변환 - 문장 단위로 나눠 동시에 합성하므로 긴 텍스트도 자르지 않음"""
     try:
         # OpenAI API 키 검증
         openai_key = os.getenv('OPENAI_API_KEY')
@@ -683,21 +668,7 @@ def text_to_speech(text):
             st.error(f"OpenAI API 키가 올바르지 않습니다. 현재 값: {openai_key}")
             return None
             
-        client = OpenAI(api_key=openai_key)
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=text
-        )
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        audio_html = f'''
-            <audio controls>
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-        '''
-        return audio_html
+        return tts_service.synthesize(text, voice="alloy")
     except Exception as e:
         st.error(f"음성 변환 중 오류 발생: {str(e)}")
         if 'openai_key' in locals():
@@ -705,7 +676,7 @@ def text_to_speech(text):
         return None
 
 def text_to_speech_fable(text, fable_type):
-    """우화용 다중 화자 음성 생성 함수"""
+    """우화용 다중 화자 음성 생성 함수 (mp3 bytes)"""
     try:
         # OpenAI API 키 검증
         openai_key = os.getenv('OPENAI_API_KEY')
@@ -713,8 +684,6 @@ def text_to_speech_fable(text, fable_type):
             st.error(f"OpenAI API 키가 올바르지 않습니다. 현재 값: {openai_key}")
             return None
             
-        client = OpenAI(api_key=openai_key)
-        
         # 우화 스타일별 voice 및 속도 설정
         voice_settings = {
             "예수님과 12사도": {"voice": "onyx", "speed": 0.85},  # 경건하고 깊이 있는 목소리
@@ -736,21 +705,7 @@ def text_to_speech_fable(text, fable_type):
         # 기본값 설정
         setting = voice_settings.get(fable_type, {"voice": "alloy", "speed": 1.0})
         
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice=setting["voice"],
-            input=text,
-            speed=setting["speed"]
-        )
-        audio_data = response.content
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-        audio_html = f'''
-            <audio controls>
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-                Your browser does not support the audio element.
-            </audio>
-        '''
-        return audio_html
+        return tts_service.synthesize(text, voice=setting["voice"], speed=setting["speed"])
     except Exception as e:
         st.error(f"우화 음성 변환 중 오류 발생: {str(e)}")
         if 'openai_key' in locals():
@@ -1379,8 +1334,7 @@ def main():
                             if st.session_state.get('ai_summary_result'):
                                 full_text += f"\n\n비즈니스 실전 적용 핵심 내용입니다.\n{st.session_state['ai_summary_result']}"
                             full_text += "\n\n즐거운 독서 토론 되세요."
-                            summarized_text = summarize_for_tts(full_text)
-                            tts_audio = text_to_speech(summarized_text)
+                            tts_audio = text_to_speech(full_text)
                             if tts_audio:
                                 st.session_state['tts_audio'] = tts_audio
                                 # 백업도 함께 저장
@@ -1388,14 +1342,10 @@ def main():
                                 # 영구 백업도 함께 저장
                                 st.session_state['tts_audio_permanent_backup'] = tts_audio
                                 
-                                # 음성 데이터를 base64에서 추출하여 DB 저장
+                                # 음성 데이터를 DB에 저장 (합성 결과 mp3를 그대로 사용)
                                 try:
-                                    # HTML에서 base64 데이터 추출
-                                    import re
-                                    base64_match = re.search(r'data:audio/mp3;base64,([^"]+)', tts_audio)
-                                    if base64_match:
-                                        audio_base64 = base64_match.group(1)
-                                        audio_binary = base64.b64decode(audio_base64)
+                                    audio_binary = tts_audio
+                                    if audio_binary:
                                         
                                         # DB에 음성 데이터와 함께 저장 (원본 + AI 요약 포함)
                                         ai_summary_content = st.session_state.get('ai_summary_result', '')
@@ -1417,7 +1367,7 @@ def main():
                         except Exception as e:
                             st.error(f"음성 생성 중 오류: {str(e)}")
                 if st.session_state['tts_audio']:
-                    st.markdown(st.session_state['tts_audio'], unsafe_allow_html=True)
+                    st.audio(st.session_state['tts_audio'], format="audio/mp3")
                     # Tiro 녹음기능 알림 추가
                     st.markdown(get_obsidian_notification_js_scoped(), unsafe_allow_html=True)
                     st.markdown("<script>showObsidianNotification();</script>", unsafe_allow_html=True)
@@ -1459,8 +1409,7 @@ def main():
                             opening_ment = "즐거운 독서토론 되셨는지요. 이번 독서토론의 적용 파일에 대한 AI 요약과 총평을 해 드리겠습니다."
                             closing_ment = f"다음 시간에는 {next_topic if next_topic else '다음 주제'}에 대한 독서 토론을 진행할 예정입니다."
                             tts_text = f"{opening_ment}\n" + (st.session_state.get('ai_app_summary_result') or '') + f"\n{closing_ment}"
-                            summarized_text = summarize_for_tts(tts_text)
-                            tts_app_audio = text_to_speech(summarized_text)
+                            tts_app_audio = text_to_speech(tts_text)
                             if tts_app_audio:
                                 st.session_state['tts_app_audio'] = tts_app_audio
                                 # 백업도 함께 저장
@@ -1468,13 +1417,10 @@ def main():
                                 # 영구 백업도 함께 저장
                                 st.session_state['tts_app_audio_permanent_backup'] = tts_app_audio
                                 
-                                # 적용 파일 음성 데이터를 base64에서 추출하여 DB 저장
+                                # 적용 파일 음성 데이터를 DB에 저장 (합성 결과 mp3를 그대로 사용)
                                 try:
-                                    import re
-                                    base64_match = re.search(r'data:audio/mp3;base64,([^"]+)', tts_app_audio)
-                                    if base64_match:
-                                        audio_base64 = base64_match.group(1)
-                                        audio_binary = base64.b64decode(audio_base64)
+                                    audio_binary = tts_app_audio
+                                    if audio_binary:
                                         
                                         # DB에 적용 파일 음성 데이터와 함께 저장
                                         # 원본 적용 파일 + AI 요약을 함께 저장
@@ -1499,7 +1445,7 @@ def main():
                         except Exception as e:
                             st.error(f"음성 생성 중 오류: {str(e)}")
                 if st.session_state['tts_app_audio']:
-                    st.markdown(st.session_state['tts_app_audio'], unsafe_allow_html=True)
+                    st.audio(st.session_state['tts_app_audio'], format="audio/mp3")
             else:
                 st.info("등록된 적용 파일이 없습니다.")
         
@@ -1576,8 +1522,7 @@ def main():
                                     tts_parts.append(closing_ment)
                                 
                                 tts_text = "\n".join(tts_parts)
-                                summarized_text = summarize_for_tts(tts_text, max_length=4000)  # 1분 30초 분량으로 길이 조정
-                                tts_fable_audio = text_to_speech_fable(summarized_text, selected_fable_type)
+                                tts_fable_audio = text_to_speech_fable(tts_text, selected_fable_type)
                                 if tts_fable_audio:
                                     st.session_state['tts_fable_audio'] = tts_fable_audio
                                     # 백업도 함께 저장
@@ -1585,13 +1530,10 @@ def main():
                                     # 영구 백업도 함께 저장
                                     st.session_state['tts_fable_audio_permanent_backup'] = tts_fable_audio
                                     
-                                    # 우화 음성 데이터를 base64에서 추출하여 DB 저장
+                                    # 우화 음성 데이터를 DB에 저장 (합성 결과 mp3를 그대로 사용)
                                     try:
-                                        import re
-                                        base64_match = re.search(r'data:audio/mp3;base64,([^"]+)', tts_fable_audio)
-                                        if base64_match:
-                                            audio_base64 = base64_match.group(1)
-                                            audio_binary = base64.b64decode(audio_base64)
+                                        audio_binary = tts_fable_audio
+                                        if audio_binary:
                                             
                                             # DB에 우화 음성 데이터와 함께 저장
                                             save_success = save_reading_discussion_record(
@@ -1615,7 +1557,7 @@ def main():
                                 st.error(f"음성 생성 중 오류: {str(e)}")
                 
                 if st.session_state['tts_fable_audio']:
-                    st.markdown(st.session_state['tts_fable_audio'], unsafe_allow_html=True)
+                    st.audio(st.session_state['tts_fable_audio'], format="audio/mp3")
             else:
                 st.info("등록된 요약 파일이 없습니다.")
     
@@ -10,6 +10,7 @@ from datetime import datetime
 import threading
 from dotenv import load_dotenv
 import mysql.connector
+import db_pool
 from mysql.connector import Error
 import queue
 
@@ -39,7 +40,7 @@ if 'local_server_type' not in st.session_state:
 def init_database():
     """데이터베이스 초기화 및 테이블 생성"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -98,7 +99,7 @@ def init_database():
 def save_query_history(server_name, original_query, executed_query, success, error_message=None, execution_time=None):
     """쿼리 실행 히스토리 저장"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -125,7 +126,7 @@ def save_query_history(server_name, original_query, executed_query, success, err
 def get_query_history(server_name=None, limit=100):
     """쿼리 실행 히스토리 조회"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -292,7 +293,7 @@ class MCPHandler(BaseHTTPRequestHandler):
         
         try:
             db_config = params["db_config"]
-            conn = mysql.connector.connect(**db_config)
+            conn = db_pool.connect(**db_config)
             cursor = conn.cursor(dictionary=True)
             
             cursor.execute(params["query"])
@@ -1091,7 +1092,7 @@ def get_db_config():
 def save_mcp_server_config(server_name, server_type, server_url, config_json):
     """MCP 서버 설정을 DB에 저장"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -1134,7 +1135,7 @@ def save_mcp_server_config(server_name, server_type, server_url, config_json):
 def get_mcp_server_configs():
     """저장된 MCP 서버 설정 목록 조회"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -1161,7 +1162,7 @@ def get_mcp_server_configs():
 def get_mcp_server_config(server_name):
     """특정 MCP 서버 설정 조회"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
@@ -1187,7 +1188,7 @@ def get_mcp_server_config(server_name):
 def delete_mcp_config(server_name):
     """MCP 서버 설정 삭제 (soft delete)"""
     try:
-        conn = mysql.connector.connect(
+        conn = db_pool.connect(
             user=os.getenv('SQL_USER'),
             password=os.getenv('SQL_PASSWORD'),
             host=os.getenv('SQL_HOST'),
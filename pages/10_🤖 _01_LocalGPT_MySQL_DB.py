@@ -6,6 +6,7 @@ from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
 from langchain.callbacks.base import BaseCallbackHandler
 import pandas as pd
 import mysql.connector
+import db_pool
 from sqlalchemy import create_engine
 import os
 from dotenv import load_dotenv
@@ -131,7 +132,7 @@ def paint_history():
 @st.cache_data(show_spinner="Loading data...")
 def load_database_data(tables):
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=db_host,
             database=db_database,
             user=db_user,
@@ -160,7 +161,7 @@ def load_database_data(tables):
 def get_database_tables():
     """데이터베이스에서 테이블 목록을 가져오는 함수"""
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=db_host,
             database=db_database,
             user=db_user,
@@ -203,7 +204,7 @@ def get_database_tables():
 def get_table_row_counts(table_names):
     """각 테이블의 행 수를 가져오는 함수"""
     try:
-        connection = mysql.connector.connect(
+        connection = db_pool.connect(
             host=db_host,
             database=db_database,
             user=db_user,
@@ -327,7 +328,7 @@ def table_selector():
     # 데이터베이스 연결 테스트 버튼
     if st.sidebar.button("🔍 데이터베이스 연결 테스트"):
         try:
-            connection = mysql.connector.connect(
+            connection = db_pool.connect(
                 host=db_host,
                 database=db_database,
                 user=db_user,
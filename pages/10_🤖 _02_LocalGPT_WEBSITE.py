@@ -14,9 +14,12 @@ import requests
 import nltk
 import os
 import time
+import json
+import hashlib
 from urllib.robotparser import RobotFileParser
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import logging
+import web_crawler
 
 # NLTK punkt package download
 nltk.download('punkt')
@@ -174,6 +177,25 @@ def test_url_accessibility(url):
     except Exception as e:
         return False, str(e), None
 
+def extract_quality_text(page):
+    """본문이 200자를 넘고 80% 이상이 일반 텍스트인 페이지만 {'title', 'content', 'length'}로 반환"""
+    content = web_crawler.page_text(
+        page['soup'], ["script", "style", "nav", "header", "footer", "aside", "iframe", "noscript"]
+    )
+    if len(content) <= 200:  # 최소 길이를 200자로 조정
+        logger.info(f"텍스트 길이 부족으로 건너뜀: {page['url']} ({len(content)}자)")
+        return None
+    # 의미있는 텍스트인지 확인 (문자와 공백의 비율)
+    text_chars = sum(1 for c in content if c.isalnum() or c.isspace())
+    if text_chars / len(content) <= 0.8:
+        logger.info(f"텍스트 품질 불량으로 건너뜀: {page['url']}")
+        return None
+    return {
+        'content': content,
+        'title': web_crawler.page_title(page['soup']) or 'No Title',
+        'length': len(content)
+    }
+
 # Function to scrape website pages and extract text
 def scrape_website(url, max_pages=10, respect_robots=True, delay=1.0):
     """개선된 웹사이트 스크래핑 함수"""
@@ -184,24 +206,8 @@ def scrape_website(url, max_pages=10, respect_robots=True, delay=1.0):
     
     st.info(f"🔍 크롤링 시작: {url}")
     
-    # URL 접근 가능성 테스트
-    accessible, status, content_type = test_url_accessibility(url)
-    if not accessible:
-        st.error(f"❌ URL에 접근할 수 없습니다: {status}")
-        return []
-    
-    st.success(f"✅ URL 접근 성공 (상태코드: {status}, 콘텐츠 타입: {content_type})")
-    
-    visited_urls = set()
     base_domain = url
     texts = []
-    urls_to_visit = [url]
-    
-    # 세션 설정
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
     
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -210,108 +216,29 @@ def scrape_website(url, max_pages=10, respect_robots=True, delay=1.0):
     page_count = 0
     failed_urls = []
     
-    while urls_to_visit and page_count < max_pages:
-        current_url = urls_to_visit.pop(0)
-        
-        if current_url in visited_urls:
-            continue
-            
-        # URL 유효성 검사
-        if not is_valid_url(current_url, base_domain):
-            logger.info(f"유효하지 않은 URL 건너뜀: {current_url}")
-            continue
-            
-        # robots.txt 확인
-        if respect_robots and not check_robots_txt(current_url):
-            logger.info(f"robots.txt에 의해 크롤링이 금지된 URL: {current_url}")
-            failed_urls.append((current_url, "robots.txt 차단"))
-            continue
-            
-        try:
-            status_text.text(f"🔄 크롤링 중: {current_url}")
-            debug_info.text(f"📊 진행상황: {page_count}/{max_pages} 페이지, {len(texts)}개 텍스트 수집됨")
-            
-            # 요청 보내기
-            response = session.get(current_url, timeout=10)
-            response.raise_for_status()
-            
-            visited_urls.add(current_url)
-            page_count += 1
-            
-            # Content-Type 확인
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                logger.info(f"HTML이 아닌 콘텐츠 건너뜀: {current_url} ({content_type})")
-                continue
-            
-            # HTML 파싱
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # 불필요한 태그 제거
-            for tag in soup(["script", "style", "nav", "header", "footer", "aside", "iframe", "noscript"]):
-                tag.decompose()
-            
-            # 텍스트 추출 및 정리
-            page_text = soup.get_text(separator="\n", strip=True)
-            
-            # 빈 줄 제거 및 텍스트 정리
-            lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-            cleaned_text = '\n'.join(lines)
-            
-            # 텍스트 길이 및 품질 확인
-            if len(cleaned_text) > 200:  # 최소 길이를 200자로 조정
-                # 의미있는 텍스트인지 확인 (문자와 공백의 비율)
-                text_chars = sum(1 for c in cleaned_text if c.isalnum() or c.isspace())
-                if text_chars / len(cleaned_text) > 0.8:  # 80% 이상이 일반 텍스트
-                    page_title = soup.title.string.strip() if soup.title and soup.title.string else 'No Title'
-                    texts.append({
-                        'content': cleaned_text,
-                        'url': current_url,
-                        'title': page_title,
-                        'length': len(cleaned_text)
-                    })
-                    logger.info(f"텍스트 수집 성공: {current_url} ({len(cleaned_text)}자)")
-                else:
-                    logger.info(f"텍스트 품질 불량으로 건너뜀: {current_url}")
-            else:
-                logger.info(f"텍스트 길이 부족으로 건너뜀: {current_url} ({len(cleaned_text)}자)")
-            
-            # 새로운 링크 찾기 (최대 페이지 수가 남아있는 경우에만)
-            if page_count < max_pages:
-                new_links_found = 0
-                for link in soup.find_all("a", href=True):
-                    absolute_link = urljoin(current_url, link['href'])
-                    # URL 정리 (앵커 제거)
-                    absolute_link = absolute_link.split('#')[0]
-                    
-                    if (absolute_link not in visited_urls and 
-                        absolute_link not in urls_to_visit and 
-                        is_valid_url(absolute_link, base_domain)):
-                        urls_to_visit.append(absolute_link)
-                        new_links_found += 1
-                        if new_links_found >= 10:  # 한 페이지에서 최대 10개 링크만
-                            break
-                
-                logger.info(f"새로운 링크 {new_links_found}개 발견: {current_url}")
-            
-            # 진행률 업데이트
-            progress = min(page_count / max_pages, 1.0)
-            progress_bar.progress(progress)
-            
-            # 지연시간
-            if delay > 0:
-                time.sleep(delay)
-                
-        except requests.RequestException as e:
-            error_msg = f"요청 오류 - {current_url}: {str(e)}"
-            logger.error(error_msg)
-            failed_urls.append((current_url, str(e)))
-            continue
-        except Exception as e:
-            error_msg = f"크롤링 오류 - {current_url}: {str(e)}"
-            logger.error(error_msg)
-            failed_urls.append((current_url, str(e)))
+    # 공유 비동기 크롤러: 여러 페이지를 동시에 요청하되 같은 호스트에는 delay 간격을 지키고,
+    # 이전에 받은 페이지는 조건부 요청(ETag/Last-Modified)으로 변경 여부만 확인
+    crawler = web_crawler.Crawler(
+        rate_per_host=1.0 / delay if delay > 0 else None,
+        respect_robots=respect_robots
+    )
+    status_text.text(f"🔄 크롤링 중: {url}")
+    for page in crawler.iter_crawl(
+            url, max_pages=max_pages, extract=extract_quality_text, allow_subdomains=True,
+            max_links_per_page=10, link_filter=lambda link: is_valid_url(link, base_domain)):
+        if page['error'] is not None:
+            logger.error(f"크롤링 오류 - {page['url']}: {page['error']}")
+            failed_urls.append((page['url'], page['error']))
             continue
+        
+        page_count += 1
+        texts.append({**page['data'], 'url': page['url']})
+        logger.info(f"텍스트 수집 성공: {page['url']} ({page['data']['length']}자, 캐시 재사용: {page['from_cache']})")
+        
+        # 진행률 업데이트
+        status_text.text(f"🔄 크롤링 중: {page['url']}")
+        debug_info.text(f"📊 진행상황: {page_count}/{max_pages} 페이지, {len(texts)}개 텍스트 수집됨")
+        progress_bar.progress(min(page_count / max_pages, 1.0))
     
     progress_bar.empty()
     status_text.empty()
@@ -376,68 +303,205 @@ def scrape_website(url, max_pages=10, respect_robots=True, delay=1.0):
     
     return texts
 
-# Function to embed the website's scraped text
-@st.cache_data(show_spinner="Embedding website content...")
-def embed_website(url, model_name, max_pages=10, respect_robots=True, delay=1.0):
-    # 독립적인 캐시 디렉토리 사용
+# 사이트별 임베딩 저장 경로: ./website_embeddings/<site>/
+#   manifest.json     페이지 URL -> 내용 해시 -> 청크 id 목록
+#   faiss/            FAISS 인덱스 (재시작 후 바로 로드)
+#   embedding_cache/  청크 텍스트별 임베딩 캐시 (CacheBackedEmbeddings)
+WEBSITE_EMBEDDINGS_DIR = "./website_embeddings"
+MANIFEST_VERSION = 1
+CHUNK_SIZE = 800  # 청크 사이즈 증가
+CHUNK_OVERLAP = 200  # 오버랩 증가
+
+def get_site_dir(url):
     safe_url = url.replace('/', '_').replace(':', '_').replace('?', '_').replace('&', '_')
-    cache_dir = LocalFileStore(f"./website_embeddings/{safe_url}")
-    
+    return os.path.join(WEBSITE_EMBEDDINGS_DIR, safe_url)
+
+def load_manifest(site_dir, model_name):
+    """저장된 매니페스트 (모델이나 청크 설정이 다르면 None - 전체 재임베딩)"""
+    try:
+        with open(os.path.join(site_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get('version') != MANIFEST_VERSION or manifest.get('model') != model_name
+            or manifest.get('chunk_size') != CHUNK_SIZE or manifest.get('chunk_overlap') != CHUNK_OVERLAP):
+        return None
+    return manifest
+
+def save_manifest(site_dir, manifest):
+    tmp_path = os.path.join(site_dir, "manifest.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(site_dir, "manifest.json"))
+
+def load_faiss_index(index_dir, embeddings):
+    try:
+        return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    except TypeError:
+        # allow_dangerous_deserialization 인자가 없는 이전 langchain 버전
+        return FAISS.load_local(index_dir, embeddings)
+
+def chunk_ids_for(page_url, content_hash, count):
+    """페이지 URL과 내용 해시로 결정되는 청크 id (같은 내용이면 항상 같은 id)"""
+    return [
+        hashlib.sha256(f"{page_url}\n{content_hash}\n{i}".encode("utf-8")).hexdigest()
+        for i in range(count)
+    ]
+
+def make_retriever(vectorstore):
+    return vectorstore.as_retriever(
+        search_type="similarity",
+        search_kwargs={"k": 5}  # 더 많은 문서 검색
+    )
+
+# 다시 요청했을 때 이 상태 코드면 페이지가 사라진 것으로 보고 벡터를 삭제
+GONE_STATUSES = (404, 410)
+
+def refetch_pages(urls, respect_robots=True, delay=1.0):
+    """이번 크롤링에서 보이지 않은 매니페스트 페이지를 직접 다시 요청
+
+    크롤러는 완료 순서대로 max_pages개까지만 받으므로, 크롤링 결과에 없다고 해서
+    페이지가 사라진 것은 아닙니다. 반환: ({url: 추출 결과}, 404/410으로 확인된 url 집합)
+    """
+    crawler = web_crawler.Crawler(
+        rate_per_host=1.0 / delay if delay > 0 else None,
+        respect_robots=respect_robots
+    )
+    found, gone = {}, set()
+    for page in crawler.iter_fetch(urls, extract=extract_quality_text):
+        if page['status'] in GONE_STATUSES:
+            gone.add(page['url'])
+        elif page['error'] is None and page['data'] is not None:
+            found[page['url']] = {**page['data'], 'url': page['url']}
+        else:
+            # 일시적 오류, robots 차단, 품질 기준 미달 등은 확인할 수 없으므로 기존 벡터 유지
+            logger.info(f"재확인 불가 - 기존 벡터 유지: {page['url']} ({page['error']})")
+    return found, gone
+
+# Function to embed the website's scraped text
+@st.cache_resource(show_spinner="Embedding website content...")
+def embed_website(url, model_name, max_pages=10, respect_robots=True, delay=1.0, refresh=False):
+    """웹사이트 리트리버
+
+    저장된 인덱스가 있으면 크롤링 없이 바로 로드합니다. refresh=True이면 다시 크롤링하여
+    내용이 바뀐 페이지만 다시 임베딩합니다. 이번 크롤링에 없던 기존 페이지는 직접 다시
+    요청해 404/410이 확인된 경우에만 벡터를 삭제합니다.
+    """
+    site_dir = get_site_dir(url)
+    index_dir = os.path.join(site_dir, "faiss")
+    os.makedirs(site_dir, exist_ok=True)
+
+    try:
+        embeddings = OllamaEmbeddings(model=model_name)
+        cached_embeddings = CacheBackedEmbeddings.from_bytes_store(
+            embeddings, LocalFileStore(os.path.join(site_dir, "embedding_cache"))
+        )
+        manifest = load_manifest(site_dir, model_name)
+        vectorstore = None
+        if manifest and os.path.isdir(index_dir):
+            vectorstore = load_faiss_index(index_dir, cached_embeddings)
+            if not refresh:
+                return make_retriever(vectorstore)
+    except Exception as e:
+        st.warning(f"저장된 인덱스를 불러오지 못해 새로 만듭니다: {e}")
+        manifest, vectorstore = None, None
+
+    if vectorstore is None:
+        manifest = None
+    if manifest is None:
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'url': url,
+            'model': model_name,
+            'chunk_size': CHUNK_SIZE,
+            'chunk_overlap': CHUNK_OVERLAP,
+            'pages': {}
+        }
+
     # 텍스트 분할기 설정 개선
     splitter = CharacterTextSplitter.from_tiktoken_encoder(
         separator="\n",
-        chunk_size=800,  # 청크 사이즈 증가
-        chunk_overlap=200,  # 오버랩 증가
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
     )
 
     # 웹사이트 텍스트 스크래핑
     web_data = scrape_website(url, max_pages, respect_robots, delay)
     
     if not web_data:
+        if vectorstore is not None:
+            st.warning("크롤링된 내용이 없어 저장된 인덱스를 그대로 사용합니다.")
+            return make_retriever(vectorstore)
         st.error("크롤링된 내용이 없습니다. URL을 확인해주세요.")
         return None
-    
-    # Document 객체 생성 (메타데이터 포함)
-    docs = []
+
+    # 페이지별 내용 해시를 매니페스트와 비교
+    crawled = {}
     for data in web_data:
-        docs.append(Document(
-            page_content=data['content'], 
-            metadata={
-                "source": data['url'],
-                "title": data['title'],
-                "domain": urlparse(url).netloc
-            }
-        ))
-
-    # 문서 분할
-    split_docs = []
-    for doc in docs:
-        split_texts = splitter.split_text(doc.page_content)
+        crawled[data['url']] = (data, hashlib.sha256(data['content'].encode("utf-8")).hexdigest())
+
+    # 크롤링에서 빠진 기존 페이지는 다시 요청해서 확인 (크롤링 범위는 실행마다 다를 수 있음)
+    unseen = [page_url for page_url in manifest['pages'] if page_url not in crawled]
+    gone = set()
+    if unseen:
+        refetched, gone = refetch_pages(unseen, respect_robots, delay)
+        for page_url, data in refetched.items():
+            crawled[page_url] = (data, hashlib.sha256(data['content'].encode("utf-8")).hexdigest())
+
+    stale_ids = []
+    new_docs, new_ids = [], []
+    unchanged = 0
+    for page_url, entry in list(manifest['pages'].items()):
+        if page_url in gone or (page_url in crawled and crawled[page_url][1] != entry['hash']):
+            # 사라진 것이 확인되었거나 내용이 바뀐 페이지
+            stale_ids.extend(entry['chunk_ids'])
+            del manifest['pages'][page_url]
+        elif page_url not in crawled:
+            # 확인하지 못한 페이지는 기존 벡터 유지
+            unchanged += 1
+
+    for page_url, (data, content_hash) in crawled.items():
+        if page_url in manifest['pages']:
+            unchanged += 1
+            continue
+        # 문서 분할
+        split_texts = splitter.split_text(data['content'])
+        ids = chunk_ids_for(page_url, content_hash, len(split_texts))
         for i, split_text in enumerate(split_texts):
-            split_docs.append(Document(
+            new_docs.append(Document(
                 page_content=split_text, 
                 metadata={
-                    **doc.metadata,
+                    "source": page_url,
+                    "title": data['title'],
+                    "domain": urlparse(url).netloc,
                     "chunk_id": i
                 }
             ))
+        new_ids.extend(ids)
+        manifest['pages'][page_url] = {'hash': content_hash, 'title': data['title'], 'chunk_ids': ids}
 
-    if not split_docs:
+    if not manifest['pages']:
         st.error("분할된 문서가 없습니다.")
         return None
 
-    # 임베딩 및 벡터스토어 생성
+    # 변경분만 임베딩하여 벡터스토어 갱신
     try:
-        embeddings = OllamaEmbeddings(model=model_name)
-        cached_embeddings = CacheBackedEmbeddings.from_bytes_store(embeddings, cache_dir)
-
-        vectorstore = FAISS.from_documents(split_docs, cached_embeddings)
-        retriever = vectorstore.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 5}  # 더 많은 문서 검색
+        if vectorstore is not None and stale_ids:
+            vectorstore.delete(stale_ids)
+        if new_docs:
+            if vectorstore is None:
+                vectorstore = FAISS.from_documents(new_docs, cached_embeddings, ids=new_ids)
+            else:
+                vectorstore.add_documents(new_docs, ids=new_ids)
+
+        vectorstore.save_local(index_dir)
+        manifest['updated_at'] = time.time()
+        save_manifest(site_dir, manifest)
+        st.info(
+            f"📚 임베딩 갱신: 새로 임베딩 {len(manifest['pages']) - unchanged}개 페이지 ({len(new_docs)}개 청크), "
+            f"변경 없음 {unchanged}개, 삭제 {len(gone)}개 페이지"
         )
-
-        return retriever
+        return make_retriever(vectorstore)
     except Exception as e:
         st.error(f"임베딩 생성 중 오류가 발생했습니다: {e}")
         return None
@@ -510,6 +574,11 @@ with st.sidebar:
     st.title("웹사이트 입력")
     website_url = st.text_input("Enter website URL", placeholder="https://example.com")
     
+    # 저장된 인덱스가 있으면 바로 사용 - 다시 크롤링하면 바뀐 페이지만 재임베딩
+    if website_url and st.button("🔄 웹사이트 다시 크롤링", help="내용이 바뀐 페이지만 다시 임베딩하고 사라진 페이지는 인덱스에서 삭제합니다."):
+        embed_website.clear()
+        st.session_state["website_refresh"] = True
+    
     # URL 테스트 기능
     if website_url:
         if st.button("🔍 URL 접근 테스트"):
@@ -569,7 +638,8 @@ if website_url:
             selected_model, 
             max_pages, 
             respect_robots, 
-            delay_between_requests
+            delay_between_requests,
+            refresh=st.session_state.pop("website_refresh", False)
         )
         
         if retriever:
@@ -15,6 +15,8 @@ import pandas as pd
 from pathlib import Path
 import hashlib
 import time
+import json
+import shutil
 import logging
 
 # 로깅 설정
@@ -184,20 +186,142 @@ def analyze_file_content(file_path):
         "preview": content[:500] + "..." if len(content) > 500 else content
     }
 
-@st.cache_data(show_spinner="파일을 임베딩하는 중...")
+# 파일 임베딩 저장 경로: ./file_embeddings/
+#   shards/<key>/      파일별 FAISS 인덱스 + meta.json (파일 내용, 이름, 모델, 청크 설정으로 결정되는 키)
+#   merged/<key>/      선택한 샤드 조합을 합친 FAISS 인덱스 (샤드 키 목록으로 결정되는 키)
+#   embedding_cache/   청크 텍스트별 임베딩 캐시 (모델별 네임스페이스)
+FILE_EMBEDDINGS_DIR = "./file_embeddings"
+SHARD_VERSION = 1
+# 보관할 병합 인덱스 수 (넘으면 오래 사용하지 않은 것부터 삭제)
+MAX_MERGED_INDEXES = 20
+
+def get_shard_key(content_hash, file_name, model_name, chunk_size_val, chunk_overlap_val):
+    """파일 샤드 키 (재시작 후에도 같은 입력이면 항상 같은 키)"""
+    payload = f"{SHARD_VERSION}\n{content_hash}\n{file_name}\n{model_name}\n{chunk_size_val}\n{chunk_overlap_val}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_faiss_index(index_dir, embeddings):
+    try:
+        return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    except TypeError:
+        # allow_dangerous_deserialization 인자가 없는 이전 langchain 버전
+        return FAISS.load_local(index_dir, embeddings)
+
+def save_faiss_index(vectorstore, index_dir, meta=None):
+    """임시 디렉토리에 저장한 뒤 이름을 바꿔, 디렉토리가 있으면 항상 완전한 인덱스가 되도록 저장"""
+    tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    vectorstore.save_local(tmp_dir)
+    if meta is not None:
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    try:
+        os.replace(tmp_dir, index_dir)
+    except OSError:
+        # 다른 세션이 같은 인덱스를 먼저 저장함 - 내용이 같으므로 그대로 사용
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def load_shard_meta(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == SHARD_VERSION else None
+
+def prune_merged_indexes(merged_root, keep):
+    """오래 사용하지 않은 병합 인덱스 삭제 (샤드가 남아 있으므로 언제든 다시 만들 수 있음)"""
+    try:
+        entries = [
+            os.path.join(merged_root, name) for name in os.listdir(merged_root)
+            if ".tmp-" not in name
+        ]
+    except OSError:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def build_file_shard(file, file_content, shard_dir, content_hash, cached_embeddings,
+                     chunk_size_val, chunk_overlap_val):
+    """파일 하나를 분할/임베딩하여 샤드로 저장하고 메타 정보 반환"""
+    # 파일 저장
+    file_path = os.path.join("./file_uploads/", file.name)
+    with open(file_path, "wb") as f:
+        f.write(file_content)
+
+    file_analysis = analyze_file_content(file_path)
+    if "error" in file_analysis:
+        raise ValueError(file_analysis["error"])
+
+    # 향상된 텍스트 분할기 설정
+    splitter = CharacterTextSplitter.from_tiktoken_encoder(
+        separator="\n\n",  # 문단 단위로 분할
+        chunk_size=chunk_size_val,
+        chunk_overlap=chunk_overlap_val,
+    )
+
+    # 문서 로드 및 분할
+    loader = UnstructuredFileLoader(file_path)
+    docs = loader.load()
+
+    file_hash = get_file_hash(file_content)
+    processed_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    # 메타데이터 추가
+    for doc in docs:
+        doc.metadata.update({
+            "filename": file.name,
+            "file_hash": file_hash,
+            "file_size": file.size,
+            "processed_at": processed_at
+        })
+
+    # 문서 분할
+    split_docs = splitter.split_documents(docs)
+    if not split_docs:
+        raise ValueError("추출된 텍스트가 없습니다.")
+
+    vectorstore = FAISS.from_documents(split_docs, cached_embeddings)
+    meta = {
+        "version": SHARD_VERSION,
+        "name": file.name,
+        "size_mb": file.size / (1024 * 1024),
+        "hash": file_hash,
+        "content_sha256": content_hash,
+        "char_count": file_analysis["char_count"],
+        "word_count": file_analysis["word_count"],
+        "line_count": file_analysis["line_count"],
+        "chunk_count": len(split_docs),
+        "processed_at": processed_at
+    }
+    save_faiss_index(vectorstore, shard_dir, meta)
+    return vectorstore, meta
+
+@st.cache_resource(show_spinner="파일을 임베딩하는 중...")
 def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_k_val):
-    """개선된 파일 임베딩 함수"""
-    # 독립적인 디렉토리 경로 사용
-    directory = "./file_uploads/"
-    embeddings_dir = "./file_embeddings/"
-    
-    # 디렉토리 생성
-    for dir_path in [directory, embeddings_dir]:
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
-    
-    all_docs = []
+    """파일 리트리버
+
+    파일마다 내용 해시로 결정되는 샤드(FAISS 인덱스)를 ./file_embeddings/shards/에 저장해 두고,
+    이미 샤드가 있는 파일은 다시 읽거나 임베딩하지 않습니다. 선택한 샤드들을 합친 인덱스도
+    저장해 두어 같은 파일 조합은 재시작 후에도 바로 로드됩니다.
+    """
+    shards_root = os.path.join(FILE_EMBEDDINGS_DIR, "shards")
+    merged_root = os.path.join(FILE_EMBEDDINGS_DIR, "merged")
+    for dir_path in ["./file_uploads/", shards_root, merged_root]:
+        os.makedirs(dir_path, exist_ok=True)
+
+    embeddings = OllamaEmbeddings(model=model_name)
+    cached_embeddings = CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        LocalFileStore(os.path.join(FILE_EMBEDDINGS_DIR, "embedding_cache")),
+        namespace=model_name
+    )
+
     file_info = []
+    shard_keys = []
+    loaded_shards = {}
+    total_chunks = 0
     processing_errors = []
     
     progress_bar = st.progress(0)
@@ -209,56 +333,32 @@ def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_
         try:
             status_text.text(f"📄 처리 중: {file.name} ({idx + 1}/{total_files})")
             
-            # 파일 저장
-            file_path = os.path.join(directory, file.name)
-            file_content = file.read()
-            
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            
-            # 파일 정보 수집
-            file_hash = get_file_hash(file_content)
-            file_analysis = analyze_file_content(file_path)
-            
-            if "error" in file_analysis:
-                processing_errors.append(f"{file.name}: {file_analysis['error']}")
+            file_content = file.getvalue()
+            content_hash = hashlib.sha256(file_content).hexdigest()
+            shard_key = get_shard_key(content_hash, file.name, model_name, chunk_size_val, chunk_overlap_val)
+            if shard_key in shard_keys:
+                # 같은 파일을 두 번 선택한 경우
                 continue
+            shard_dir = os.path.join(shards_root, shard_key)
+
+            meta = load_shard_meta(shard_dir)
+            if meta is None:
+                vectorstore, meta = build_file_shard(
+                    file, file_content, shard_dir, content_hash, cached_embeddings,
+                    chunk_size_val, chunk_overlap_val
+                )
+                loaded_shards[shard_key] = vectorstore
             
             file_info.append({
-                "name": file.name,
-                "size_mb": file.size / (1024 * 1024),
-                "hash": file_hash,
-                "char_count": file_analysis["char_count"],
-                "word_count": file_analysis["word_count"],
-                "line_count": file_analysis["line_count"]
+                "name": meta["name"],
+                "size_mb": meta["size_mb"],
+                "hash": meta["hash"],
+                "char_count": meta["char_count"],
+                "word_count": meta["word_count"],
+                "line_count": meta["line_count"]
             })
-            
-            # 독립적인 임베딩 캐시 디렉토리 사용
-            cache_dir = LocalFileStore(f"./file_embeddings/{file_hash}")
-            
-            # 향상된 텍스트 분할기 설정
-            splitter = CharacterTextSplitter.from_tiktoken_encoder(
-                separator="\n\n",  # 문단 단위로 분할
-                chunk_size=chunk_size_val,
-                chunk_overlap=chunk_overlap_val,
-            )
-            
-            # 문서 로드 및 분할
-            loader = UnstructuredFileLoader(file_path)
-            docs = loader.load()
-            
-            # 메타데이터 추가
-            for doc in docs:
-                doc.metadata.update({
-                    "filename": file.name,
-                    "file_hash": file_hash,
-                    "file_size": file.size,
-                    "processed_at": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
-            
-            # 문서 분할
-            split_docs = splitter.split_documents(docs)
-            all_docs.extend(split_docs)
+            shard_keys.append(shard_key)
+            total_chunks += meta["chunk_count"]
             
             # 진행률 업데이트
             progress_bar.progress((idx + 1) / total_files)
@@ -270,9 +370,9 @@ def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_
             continue
     
     progress_bar.empty()
-    status_text.empty()
     
-    if not all_docs:
+    if not shard_keys:
+        status_text.empty()
         st.error("❌ 처리된 문서가 없습니다.")
         if processing_errors:
             with st.expander("🔍 오류 세부사항"):
@@ -281,15 +381,30 @@ def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_
         return None, None
     
     try:
-        # 임베딩 생성 및 벡터스토어 구성
-        status_text.text("🔄 벡터 데이터베이스 생성 중...")
-        
-        embeddings = OllamaEmbeddings(model=model_name)
-        # 마지막 파일의 해시를 사용하여 캐시 디렉토리 설정
-        cache_dir = LocalFileStore(f"./file_embeddings/combined_{hash(str(file_info))}")
-        cached_embeddings = CacheBackedEmbeddings.from_bytes_store(embeddings, cache_dir)
-        
-        vectorstore = FAISS.from_documents(all_docs, cached_embeddings)
+        status_text.text("🔄 벡터 데이터베이스 불러오는 중...")
+
+        def get_shard(key):
+            if key in loaded_shards:
+                return loaded_shards[key]
+            return load_faiss_index(os.path.join(shards_root, key), cached_embeddings)
+
+        if len(shard_keys) == 1:
+            vectorstore = get_shard(shard_keys[0])
+        else:
+            # 파일 선택 순서와 무관하게 같은 조합이면 같은 병합 인덱스 사용
+            merged_key = hashlib.sha256("\n".join(sorted(shard_keys)).encode("utf-8")).hexdigest()
+            merged_dir = os.path.join(merged_root, merged_key)
+            if os.path.isdir(merged_dir):
+                vectorstore = load_faiss_index(merged_dir, cached_embeddings)
+                os.utime(merged_dir)
+            else:
+                # 첫 샤드에 나머지를 합침 (샤드는 이미 디스크에 저장되어 있으므로 메모리 객체는 변경해도 됨)
+                vectorstore = get_shard(shard_keys[0])
+                for key in shard_keys[1:]:
+                    vectorstore.merge_from(get_shard(key))
+                save_faiss_index(vectorstore, merged_dir)
+                prune_merged_indexes(merged_root, MAX_MERGED_INDEXES)
+
         retriever = vectorstore.as_retriever(
             search_type="similarity",
             search_kwargs={"k": retrieval_k_val}
@@ -300,7 +415,7 @@ def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_
         # 처리 결과 저장
         processing_stats = {
             "total_files": len(file_info),
-            "total_chunks": len(all_docs),
+            "total_chunks": total_chunks,
             "total_chars": sum(info["char_count"] for info in file_info),
             "total_words": sum(info["word_count"] for info in file_info),
             "processing_errors": processing_errors
@@ -309,6 +424,7 @@ def embed_files(files, model_name, chunk_size_val, chunk_overlap_val, retrieval_
         return retriever, {"file_info": file_info, "stats": processing_stats}
         
     except Exception as e:
+        status_text.empty()
         st.error(f"❌ 벡터 데이터베이스 생성 중 오류: {e}")
         return None, None
 
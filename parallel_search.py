@@ -0,0 +1,73 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # streamlit 밖에서 실행되는 경우
+    add_script_run_ctx = get_script_run_ctx = None
+
+# 기본 동시 실행 수 (DB 커넥션 풀 크기보다 작게 유지)
+DEFAULT_MAX_WORKERS = 6
+
+# 테이블 하나에 허용하는 기본 시간 (초)
+DEFAULT_TIME_BUDGET = 5.0
+
+
+def _attach_context(ctx):
+    """워커 스레드에 Streamlit 실행 컨텍스트 연결 (cache_resource 등 사용 가능)"""
+    if ctx is not None and add_script_run_ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def run_parallel(tasks, max_workers=DEFAULT_MAX_WORKERS, time_budget=DEFAULT_TIME_BUDGET):
+    """여러 작업을 동시에 실행하고 끝나는 순서대로 결과를 yield
+
+    Args:
+        tasks: {이름: 인자 없는 callable}
+        max_workers: 최대 동시 실행 수
+        time_budget: 작업 하나가 시작된 뒤 기다리는 최대 시간 (초, None이면 무제한)
+
+    Yields:
+        (이름, 상태, 결과, 소요시간): 상태는 'ok' / 'error' / 'timeout'
+        'error'이면 결과 자리에 예외, 'timeout'이면 None
+    """
+    if not tasks:
+        return
+
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    started = {}
+
+    def wrap(name, func):
+        def runner():
+            started[name] = time.perf_counter()
+            return func()
+        return runner
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(tasks)),
+        initializer=_attach_context,
+        initargs=(ctx,)
+    )
+    try:
+        pending = {executor.submit(wrap(name, func)): name for name, func in tasks.items()}
+        while pending:
+            done, _ = wait(list(pending), timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                elapsed = time.perf_counter() - started.get(name, time.perf_counter())
+                try:
+                    yield name, 'ok', future.result(), elapsed
+                except Exception as e:
+                    yield name, 'error', e, elapsed
+
+            if time_budget is None:
+                continue
+            now = time.perf_counter()
+            for future, name in list(pending.items()):
+                if name in started and now - started[name] > time_budget:
+                    # 실행 중인 스레드는 중단할 수 없으므로 결과를 포기하고 넘어감
+                    pending.pop(future)
+                    yield name, 'timeout', None, now - started[name]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,92 @@
+import numpy as np
+
+# 기본 시뮬레이션 경로 수
+DEFAULT_PATHS = 5000
+
+# 경로 수 상한 (경로 수 x 예측일수 배열이 메모리에 올라감)
+MAX_PATHS = 20000
+
+# 팬 차트 밴드 기본 백분위 (하단 외곽, 하단 내곽, 중앙, 상단 내곽, 상단 외곽)
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# VaR 기본 신뢰수준 (%)
+DEFAULT_VAR_LEVELS = (95, 99)
+
+METHODS = ('gbm', 'bootstrap')
+
+
+def log_returns(prices):
+    """일간 로그 수익률"""
+    prices = np.asarray(prices, dtype=float)
+    return np.diff(np.log(prices))
+
+
+def _rng(seed):
+    return np.random.default_rng(seed)
+
+
+def _n_paths(n_paths):
+    return int(min(max(n_paths, 1), MAX_PATHS))
+
+
+def simulate_returns(prices, days, n_paths=DEFAULT_PATHS, method='gbm', seed=None):
+    """과거 수익률로 n_paths x days 가격 경로를 한 번에 생성
+
+    gbm: 로그 수익률의 평균/표준편차를 쓰는 기하 브라운 운동
+    bootstrap: 과거 일간 로그 수익률을 복원 추출 (분포 꼬리를 그대로 유지)
+    """
+    if method not in METHODS:
+        raise ValueError(f"지원하지 않는 시뮬레이션 방식: {method}")
+    returns = log_returns(prices)
+    if len(returns) < 2:
+        raise ValueError("시뮬레이션에 필요한 가격 데이터가 부족합니다")
+
+    rng = _rng(seed)
+    shape = (_n_paths(n_paths), int(days))
+    if method == 'gbm':
+        steps = returns.mean() + returns.std() * rng.standard_normal(shape)
+    else:
+        steps = rng.choice(returns, size=shape, replace=True)
+    return float(prices[-1]) * np.exp(np.cumsum(steps, axis=1))
+
+
+def simulate_around(center, noise_std, n_paths=DEFAULT_PATHS, seed=None):
+    """결정적 추세선(center)에 정규 잡음을 더한 경로 생성"""
+    center = np.asarray(center, dtype=float)
+    rng = _rng(seed)
+    noise = rng.normal(0.0, noise_std, size=(_n_paths(n_paths), len(center)))
+    return center + noise
+
+
+def summarize(paths, start_price, percentiles=DEFAULT_PERCENTILES, var_levels=DEFAULT_VAR_LEVELS):
+    """경로 배열을 일자별 백분위 밴드와 만기 수익률 분포 지표로 요약
+
+    VaR/CVaR는 만기 시점 수익률 기준 손실률(양수)입니다.
+    """
+    paths = np.asarray(paths, dtype=float)
+    band_values = np.percentile(paths, percentiles, axis=0)
+    horizon_returns = paths[:, -1] / start_price - 1
+
+    var, cvar = {}, {}
+    for level in var_levels:
+        cutoff = np.percentile(horizon_returns, 100 - level)
+        var[level] = float(-cutoff)
+        tail = horizon_returns[horizon_returns <= cutoff]
+        cvar[level] = float(-tail.mean()) if len(tail) else float(-cutoff)
+
+    return {
+        'n_paths': paths.shape[0],
+        'bands': {p: band_values[i] for i, p in enumerate(percentiles)},
+        'median': np.median(paths, axis=0),
+        'mean': paths.mean(axis=0),
+        'var': var,
+        'cvar': cvar,
+        'prob_up': float((horizon_returns > 0).mean()),
+        'expected_return': float(horizon_returns.mean()),
+    }
+
+
+def fan_percentiles(confidence_level):
+    """신뢰수준(%)에 맞는 바깥 밴드와 사분위 밴드 백분위"""
+    tail = (100 - confidence_level) / 2
+    return (tail, 25, 50, 75, 100 - tail)
@@ -0,0 +1,289 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# 파일별 청크/벡터 샤드를 저장하는 기본 경로
+DEFAULT_STORE_DIR = "./rag_index"
+
+# 파일 해시 계산 시 한 번에 읽는 크기 (1MB)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 툼스톤 비율이 이 값을 넘으면 샤드 파일을 정리
+COMPACT_TOMBSTONE_RATIO = 0.3
+
+MANIFEST_VERSION = 1
+
+_store_lock = threading.Lock()
+
+
+def file_sha256(file_path):
+    """파일 내용의 SHA-256 해시 계산 (블록 단위 스트리밍)"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _file_key(file_path):
+    """파일 경로로부터 샤드 파일 이름 생성"""
+    return hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+
+
+def _atomic_write_json(path, data):
+    """임시 파일에 쓴 뒤 교체하여 부분 기록을 방지"""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def _atomic_save_npy(path, array):
+    """임시 파일에 저장한 뒤 교체"""
+    tmp_path = f"{path}.tmp{os.getpid()}.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class RAGIndexStore:
+    """파일 경로 + mtime + 내용 해시 기준의 증분 임베딩 저장소
+
+    파일마다 청크(JSON)와 벡터(.npy) 샤드를 디스크에 보관하고, 새로 추가되었거나
+    내용이 바뀐 파일만 다시 파싱/임베딩합니다. 삭제된 파일은 매니페스트에
+    툼스톤으로 표시되며, 벡터 샤드는 시작 시 메모리 맵으로 읽어들입니다.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, embedding_model=""):
+        self.store_dir = store_dir
+        self.shard_dir = os.path.join(store_dir, "shards")
+        self.artifact_dir = os.path.join(store_dir, "artifacts")
+        self.manifest_path = os.path.join(store_dir, "manifest.json")
+        self.embedding_model = embedding_model or ""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        """매니페스트 로드 (임베딩 모델이 바뀌었으면 새로 시작)"""
+        empty = {
+            'version': MANIFEST_VERSION,
+            'embedding_model': self.embedding_model,
+            'files': {}
+        }
+        if not os.path.exists(self.manifest_path):
+            return empty
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        if manifest.get('version') != MANIFEST_VERSION:
+            return empty
+        if manifest.get('embedding_model') != self.embedding_model:
+            # 다른 모델로 만든 벡터는 재사용할 수 없음
+            return empty
+        return manifest
+
+    def _save_manifest(self):
+        _atomic_write_json(self.manifest_path, self.manifest)
+
+    def _shard_paths(self, key):
+        base = os.path.join(self.shard_dir, key)
+        return f"{base}.json", f"{base}.npy"
+
+    def _is_current(self, file_path, entry):
+        """저장된 항목이 현재 파일과 일치하는지 확인 (mtime/크기 우선, 해시로 확정)
+
+        Returns:
+            (일치 여부, 계산한 내용 해시 또는 None) - 해시는 다시 색인할 때 재사용
+        """
+        if not entry or entry.get('deleted'):
+            return False, None
+        if entry.get('num_chunks') and not all(
+                os.path.exists(path) for path in self._shard_paths(entry['key'])):
+            return False, None
+        stat = os.stat(file_path)
+        if entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size:
+            return True, None
+        # mtime만 바뀌고 내용은 같은 경우 (복사, touch 등)
+        sha256 = file_sha256(file_path)
+        if entry.get('sha256') == sha256:
+            entry['mtime'] = stat.st_mtime
+            entry['size'] = stat.st_size
+            return True, sha256
+        return False, sha256
+
+    def sync(self, file_paths, load_func, embed_func):
+        """파일 목록을 저장소와 동기화
+
+        Args:
+            file_paths: 인덱싱 대상 파일 경로 목록
+            load_func: 파일 경로를 받아 청크 문서 목록(page_content, metadata 보유)을 반환
+            embed_func: 텍스트 목록을 받아 임베딩 벡터 목록을 반환
+
+        Returns:
+            dict: added/updated/unchanged/removed/failed 파일 수
+        """
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': []}
+        with _store_lock:
+            files = self.manifest['files']
+
+            for file_path in file_paths:
+                abs_path = os.path.abspath(file_path)
+                entry = files.get(abs_path)
+                try:
+                    current, sha256 = self._is_current(file_path, entry)
+                except OSError:
+                    continue
+                if current:
+                    stats['unchanged'] += 1
+                    continue
+
+                try:
+                    docs = load_func(file_path) or []
+                    texts = [doc.page_content for doc in docs]
+                    if not texts and os.path.getsize(file_path) > 0:
+                        # 로더가 오류를 직접 처리하고 빈 목록을 돌려준 경우도 실패로 보고 다시 시도
+                        raise ValueError("파일에서 추출된 내용이 없습니다")
+                    vectors = embed_func(texts) if texts else []
+                except Exception as e:
+                    # 실패한 파일은 기록하지 않아 다음 동기화 때 다시 시도
+                    stats['failed'].append((file_path, str(e)))
+                    continue
+
+                key = _file_key(abs_path)
+                chunks_path, vectors_path = self._shard_paths(key)
+                if texts:
+                    _atomic_write_json(chunks_path, [
+                        {'page_content': doc.page_content, 'metadata': doc.metadata}
+                        for doc in docs
+                    ])
+                    _atomic_save_npy(vectors_path, np.asarray(vectors, dtype=np.float32))
+
+                stat = os.stat(file_path)
+                if entry and not entry.get('deleted'):
+                    stats['updated'] += 1
+                else:
+                    stats['added'] += 1
+                files[abs_path] = {
+                    'key': key,
+                    'mtime': stat.st_mtime,
+                    'size': stat.st_size,
+                    'sha256': sha256 or file_sha256(file_path),
+                    'num_chunks': len(texts),
+                    'indexed_at': datetime.now().isoformat(),
+                    'deleted': False
+                }
+                # 청크 수가 변한 경우를 대비하여 매 파일마다 기록
+                self._save_manifest()
+
+            # 디스크에서 사라진 파일은 툼스톤 처리
+            for abs_path, entry in files.items():
+                if not entry.get('deleted') and not os.path.exists(abs_path):
+                    entry['deleted'] = True
+                    entry['deleted_at'] = datetime.now().isoformat()
+                    stats['removed'] += 1
+
+            self._save_manifest()
+            self._compact_if_needed()
+
+        return stats
+
+    def load(self, file_paths):
+        """지정한 파일들의 청크와 벡터를 로드 (벡터는 메모리 맵)
+
+        Returns:
+            (texts, metadatas, vectors): vectors는 (N, dim) float32 배열, 없으면 None
+        """
+        texts, metadatas, shards = [], [], []
+        files = self.manifest['files']
+        for file_path in file_paths:
+            entry = files.get(os.path.abspath(file_path))
+            if not entry or entry.get('deleted') or not entry.get('num_chunks'):
+                continue
+            chunks_path, vectors_path = self._shard_paths(entry['key'])
+            try:
+                with open(chunks_path, 'r', encoding='utf-8') as f:
+                    chunks = json.load(f)
+                vectors = np.load(vectors_path, mmap_mode='r')
+            except (OSError, ValueError):
+                continue
+            if len(chunks) != len(vectors):
+                continue
+            for chunk in chunks:
+                texts.append(chunk['page_content'])
+                metadatas.append(chunk['metadata'])
+            shards.append(vectors)
+
+        if not shards:
+            return texts, metadatas, None
+        # 샤드가 하나면 메모리 맵 배열을 복사 없이 그대로 반환
+        return texts, metadatas, shards[0] if len(shards) == 1 else np.vstack(shards)
+
+    def signature(self, file_paths):
+        """load(file_paths) 결과(청크 순서 포함)를 식별하는 해시
+
+        역색인 등 청크 목록에서 파생된 인덱스를 재사용할 수 있는지 판단할 때 사용합니다.
+        """
+        sha = hashlib.sha1(self.embedding_model.encode('utf-8'))
+        files = self.manifest['files']
+        for file_path in file_paths:
+            entry = files.get(os.path.abspath(file_path))
+            if not entry or entry.get('deleted') or not entry.get('num_chunks'):
+                continue
+            sha.update(f"{entry['key']}:{entry['sha256']}\n".encode('utf-8'))
+        return sha.hexdigest()
+
+    def load_artifact(self, name, signature):
+        """청크 목록에서 파생된 인덱스 로드 (signature가 다르면 None)"""
+        path = os.path.join(self.artifact_dir, f"{name}.pkl")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                saved_signature, artifact = pickle.load(f)
+        except Exception:
+            return None
+        return artifact if saved_signature == signature else None
+
+    def save_artifact(self, name, signature, artifact):
+        """파생 인덱스를 signature와 함께 저장"""
+        path = os.path.join(self.artifact_dir, f"{name}.pkl")
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((signature, artifact), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _compact_if_needed(self):
+        files = self.manifest['files']
+        if not files:
+            return
+        tombstones = sum(1 for entry in files.values() if entry.get('deleted'))
+        if tombstones / len(files) > COMPACT_TOMBSTONE_RATIO:
+            self.compact()
+
+    def compact(self):
+        """툼스톤 처리된 파일의 샤드를 삭제하고 매니페스트에서 제거"""
+        files = self.manifest['files']
+        for abs_path in [p for p, entry in files.items() if entry.get('deleted')]:
+            for path in self._shard_paths(files[abs_path]['key']):
+                if os.path.exists(path):
+                    os.remove(path)
+            del files[abs_path]
+        self._save_manifest()
+
+    def get_stats(self):
+        """저장소 상태 요약"""
+        files = self.manifest['files']
+        active = [entry for entry in files.values() if not entry.get('deleted')]
+        return {
+            'files': len(active),
+            'chunks': sum(entry.get('num_chunks', 0) for entry in active),
+            'tombstones': len(files) - len(active),
+            'embedding_model': self.embedding_model
+        }
@@ -0,0 +1,226 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+# 토큰 추출: 한글/영문/숫자 연속 구간
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+# 개체 추출: 이름(님)/팀/부서 및 업무 관련 키워드
+ENTITY_PATTERN = re.compile(r"[가-힣]{2,4}님|[가-힣]{2,4}팀|[가-힣]{2,4}부서|[가-힣]{2,4}|팀|부서|담당|책임|프로세스|상담|문의|업무|절차|과정|방법|정보|내용")
+
+# 거의 모든 문서에 등장하여 문서 간 연결에 의미가 없는 일반 명사
+ENTITY_STOPWORDS = {
+    "업무", "정보", "내용", "방법", "과정", "절차", "담당", "책임", "문의", "상담",
+    "프로세스", "관련", "경우", "사항", "대한", "있는", "있습니다", "합니다", "입니다",
+    "하는", "위한", "통해", "그리고", "또는", "이는", "해당", "부분", "진행",
+}
+
+
+def tokenize(text):
+    """텍스트를 문자 bigram 단위로 분리
+
+    한국어는 조사/복합명사 때문에 공백 단위 토큰만으로는 부분 일치가 어려우므로
+    각 토큰을 문자 bigram으로 색인합니다. (1글자 토큰은 제외)
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return terms
+
+
+def _query_terms(keyword):
+    """검색 키워드를 bigram 집합으로 변환 (공백은 무시)"""
+    return set(tokenize(keyword))
+
+
+class BM25Index:
+    """청크 단위 역색인 + BM25 스코어링
+
+    postings[term] = (정렬된 문서 번호 배열, 해당 문서의 term 빈도 배열)
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.avg_doc_len = 0.0
+        self.num_docs = 0
+
+    @classmethod
+    def build(cls, texts, **kwargs):
+        """텍스트 목록으로부터 역색인 생성"""
+        index = cls(**kwargs)
+        raw = defaultdict(lambda: ([], []))
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            counts = defaultdict(int)
+            terms = tokenize(text)
+            for term in terms:
+                counts[term] += 1
+            doc_len[doc_id] = len(terms)
+            for term, tf in counts.items():
+                ids, tfs = raw[term]
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        index.postings = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in raw.items()
+        }
+        index.doc_len = doc_len
+        index.num_docs = len(texts)
+        index.avg_doc_len = float(doc_len.mean()) if len(texts) else 0.0
+        return index
+
+    def _idf(self, doc_freq):
+        return np.log(1.0 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _match(self, terms):
+        """모든 term을 포함하는 문서 (posting list 교집합)"""
+        lists = []
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                return None
+            lists.append(posting)
+        # 짧은 목록부터 교집합하여 후보를 빠르게 줄임
+        lists.sort(key=lambda p: len(p[0]))
+        candidates = lists[0][0]
+        for ids, _ in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                return None
+        return candidates
+
+    def score(self, keywords):
+        """키워드 목록에 대한 문서별 BM25 점수 배열 반환
+
+        각 키워드의 bigram을 모두 포함하는 문서만 후보로 삼고(부분 문자열 일치 근사),
+        후보 문서에 대해서만 BM25 점수를 누적합니다.
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+
+        for keyword in keywords:
+            terms = _query_terms(keyword)
+            if not terms:
+                continue
+            candidates = self._match(terms)
+            if candidates is None:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[candidates] / max(self.avg_doc_len, 1.0))
+            for term in terms:
+                ids, tfs = self.postings[term]
+                tf = tfs[np.searchsorted(ids, candidates)]
+                scores[candidates] += self._idf(len(ids)) * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, keywords, k=5):
+        """상위 k개 (문서 번호, 점수) 목록 반환"""
+        if k <= 0:
+            return []
+        scores = self.score(keywords)
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits):
+            return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in hits]
+
+
+def extract_entities(text):
+    """텍스트에서 개체(이름/팀/부서/키워드) 집합 추출"""
+    return set(ENTITY_PATTERN.findall(text))
+
+
+class EntityIndex:
+    """개체 → 문서 이분 그래프를 CSR 희소 행렬로 보관하는 인덱스
+
+    문서 x 개체 행렬 하나로 직접 매칭과 1-hop 확장을 모두 계산합니다.
+    너무 흔한 개체(max_df 초과)와 불용어는 제외하고, 개체 가중치로 IDF를 사용합니다.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+
+    @classmethod
+    def build(cls, texts, max_df=0.2, min_df=1):
+        """텍스트 목록으로부터 개체 인덱스 생성
+
+        Args:
+            max_df: 전체 문서 중 이 비율보다 많이 등장하는 개체는 제외
+            min_df: 이보다 적은 문서에 등장하는 개체는 제외
+        """
+        index = cls()
+        num_docs = len(texts)
+        doc_entities = [extract_entities(text) - ENTITY_STOPWORDS for text in texts]
+
+        doc_freq = defaultdict(int)
+        for entities in doc_entities:
+            for entity in entities:
+                doc_freq[entity] += 1
+
+        # 문서 수가 적을 때도 최소 2개 문서는 연결될 수 있도록 함
+        max_count = max(2, int(max_df * num_docs))
+        vocab = {}
+        for entity, df in doc_freq.items():
+            if min_df <= df <= max_count:
+                vocab[entity] = len(vocab)
+
+        rows, cols = [], []
+        for doc_id, entities in enumerate(doc_entities):
+            for entity in entities:
+                col = vocab.get(entity)
+                if col is not None:
+                    rows.append(doc_id)
+                    cols.append(col)
+
+        df = np.zeros(len(vocab), dtype=np.float32)
+        for entity, col in vocab.items():
+            df[col] = doc_freq[entity]
+
+        index.vocab = vocab
+        index.idf = np.log((1.0 + num_docs) / (1.0 + df)).astype(np.float32) + 1.0
+        index.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(num_docs, len(vocab))
+        )
+        return index
+
+    def search(self, query, k=5, hop_weight=0.5):
+        """쿼리 개체와 직접 매칭된 문서 + 1-hop 연결 문서의 상위 k개 (문서 번호, 점수)
+
+        직접 점수 = 문서 x 개체 행렬 · 쿼리 개체 IDF 벡터
+        확장 점수 = 문서 x 개체 행렬 · (IDF * 개체 x 문서 행렬 · 직접 매칭 여부)
+        """
+        if k <= 0 or not self.vocab:
+            return []
+        cols = [self.vocab[e] for e in extract_entities(query) if e in self.vocab]
+        if not cols:
+            return []
+
+        query_vec = np.zeros(len(self.vocab), dtype=np.float32)
+        query_vec[cols] = self.idf[cols]
+        direct = self.matrix @ query_vec
+
+        # 1-hop: 매칭 문서가 가진 개체를 통해 연결된 문서로 확장
+        seeds = (direct > 0).astype(np.float32)
+        activation = (self.matrix.T @ seeds) * self.idf
+        hop = self.matrix @ activation
+        if hop.max() > 0:
+            hop = hop / hop.max()
+
+        scores = direct + hop_weight * hop
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in hits]
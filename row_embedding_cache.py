@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+# 행 임베딩 캐시 SQLite 파일 경로
+DEFAULT_DB_PATH = "./row_embeddings.db"
+
+# 한 번에 encode 하는 행 수
+DEFAULT_BATCH_SIZE = 64
+
+# SQLite IN 절에 넣는 최대 키 수
+_LOOKUP_CHUNK = 500
+
+
+def content_hash(text):
+    """행 텍스트 내용 해시"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class RowEmbeddingCache:
+    """(모델, 테이블, 기본키) 단위의 영구 행 임베딩 캐시
+
+    각 행의 텍스트 해시를 함께 저장하여, 행 내용이 바뀌면 해당 행만 다시 임베딩합니다.
+    벡터는 L2 정규화하여 저장하므로 코사인 유사도는 행렬 곱 한 번으로 계산됩니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, model_name=""):
+        self.db_path = db_path
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS row_embeddings (
+                model TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                pk TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, table_name, pk)
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, table, keys):
+        """저장된 (content_hash, vector) 조회"""
+        found = {}
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT pk, content_hash, dim, vector FROM row_embeddings "
+                f"WHERE model = ? AND table_name = ? AND pk IN ({placeholders})",
+                [self.model_name, table, *chunk]
+            ).fetchall()
+            for pk, digest, dim, blob in rows:
+                found[pk] = (digest, np.frombuffer(blob, dtype=np.float32, count=dim))
+        return found
+
+    def encode_rows(self, table, items, encode_func, batch_size=DEFAULT_BATCH_SIZE):
+        """행 목록의 정규화된 임베딩 행렬 반환 (캐시에 없는 행만 배치 인코딩)
+
+        Args:
+            table: 테이블 이름
+            items: (기본키, 텍스트) 목록. 기본키가 None이면 텍스트 해시를 키로 사용
+            encode_func: 텍스트 목록을 받아 (N, dim) 배열을 반환하는 함수
+
+        Returns:
+            np.ndarray: (len(items), dim) float32 행렬
+        """
+        if not items:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        digests = [content_hash(text) for _, text in items]
+        keys = [str(pk) if pk is not None else digest for (pk, _), digest in zip(items, digests)]
+
+        with self._lock:
+            cached = self._lookup(table, list(set(keys)))
+
+        vectors = [None] * len(items)
+        missing = []
+        for i, (key, digest) in enumerate(zip(keys, digests)):
+            entry = cached.get(key)
+            if entry is not None and entry[0] == digest:
+                vectors[i] = entry[1]
+            else:
+                missing.append(i)
+
+        self.hits += len(items) - len(missing)
+        self.misses += len(missing)
+
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            encoded = np.asarray(encode_func([items[i][1] for i in batch]), dtype=np.float32)
+            norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+            encoded = encoded / np.where(norms == 0, 1, norms)
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO row_embeddings "
+                    "(model, table_name, pk, content_hash, dim, vector) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (self.model_name, table, keys[i], digests[i], encoded.shape[1], vec.tobytes())
+                        for i, vec in zip(batch, encoded)
+                    ]
+                )
+                self._conn.commit()
+            for i, vec in zip(batch, encoded):
+                vectors[i] = vec
+
+        return np.vstack(vectors)
+
+    def get_stats(self):
+        """캐시 크기 및 적중률"""
+        with self._lock:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM row_embeddings WHERE model = ?", (self.model_name,)
+            ).fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'rows': count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'db_size_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+import functools
+
+import db_pool
+
+# 스냅샷 유효 기간 (초) - DDL이 이 모듈을 거치지 않고 실행된 경우에도 이 시간 안에 반영
+DEFAULT_TTL = float(os.getenv('SCHEMA_CATALOGUE_TTL', '600'))
+
+# 텍스트 검색 대상 컬럼 타입
+TEXT_TYPES = ('char', 'varchar', 'tinytext', 'text', 'mediumtext', 'longtext')
+
+# DDL이 실행될 때마다 증가 - 카탈로그는 스냅샷 시점의 값과 다르면 다시 읽음
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def invalidate():
+    """모든 스키마 카탈로그 스냅샷 무효화 (테이블 생성/수정/삭제 후 호출)"""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+def invalidates_schema(func):
+    """DDL을 실행하는 함수에 붙이는 데코레이터 - 실행 후 (실패해도) 카탈로그 무효화"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate()
+    return wrapper
+
+
+class SchemaCatalogue:
+    """INFORMATION_SCHEMA 스냅샷 (테이블/컬럼/타입/코멘트/예상 행 수)
+
+    한 번의 TABLES, COLUMNS 조회로 전체 스키마를 읽어 두고, invalidate() 호출이나
+    유효 기간 경과 전까지는 DB에 다시 묻지 않습니다. 테이블/컬럼 dict는
+    INFORMATION_SCHEMA의 컬럼 이름(TABLE_NAME, COLUMN_NAME, DATA_TYPE 등)을 그대로 키로 사용합니다.
+    """
+
+    def __init__(self, config, ttl=DEFAULT_TTL):
+        self.config = config
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._tables = None
+        self._samples = {}
+        self._loaded_at = 0.0
+        self._generation = None
+        self.loads = 0
+
+    def _is_stale(self):
+        return (
+            self._tables is None
+            or self._generation != _generation
+            or time.time() - self._loaded_at > self.ttl
+        )
+
+    def _load(self):
+        generation = _generation
+        conn = db_pool.connect(**self.config)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT TABLE_NAME, TABLE_TYPE, TABLE_COMMENT, TABLE_ROWS, CREATE_TIME, UPDATE_TIME
+                FROM INFORMATION_SCHEMA.TABLES
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME
+            """)
+            tables = {row['TABLE_NAME']: {**row, 'columns': []} for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_TYPE, CHARACTER_MAXIMUM_LENGTH,
+                       IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA, COLUMN_COMMENT
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            for row in cursor.fetchall():
+                table = tables.get(row['TABLE_NAME'])
+                if table is not None:
+                    table['columns'].append(row)
+        finally:
+            cursor.close()
+            conn.close()
+
+        self._tables = tables
+        self._samples = {}
+        self._loaded_at = time.time()
+        self._generation = generation
+        self.loads += 1
+
+    def snapshot(self):
+        """{테이블명: {TABLE_NAME, TABLE_COMMENT, TABLE_ROWS, ..., 'columns': [컬럼 dict]}}
+
+        반환값은 공유 스냅샷이므로 수정하지 마세요.
+        """
+        with self._lock:
+            if self._is_stale():
+                self._load()
+            return self._tables
+
+    def table_names(self):
+        return list(self.snapshot().keys())
+
+    def has_table(self, table):
+        return table in self.snapshot()
+
+    def table(self, table):
+        """테이블 정보 dict (없으면 None)"""
+        return self.snapshot().get(table)
+
+    def columns(self, table):
+        """컬럼 dict 목록 (ORDINAL_POSITION 순)"""
+        info = self.table(table)
+        return info['columns'] if info else []
+
+    def column_names(self, table):
+        return [col['COLUMN_NAME'] for col in self.columns(table)]
+
+    def text_columns(self, table):
+        return [col['COLUMN_NAME'] for col in self.columns(table) if col['DATA_TYPE'] in TEXT_TYPES]
+
+    def primary_keys(self, table):
+        return [col['COLUMN_NAME'] for col in self.columns(table) if col['COLUMN_KEY'] == 'PRI']
+
+    def describe(self, table):
+        """DESCRIBE 결과와 같은 형태의 dict 목록 (Field, Type, Null, Key, Default, Extra)"""
+        return [
+            {
+                'Field': col['COLUMN_NAME'],
+                'Type': col['COLUMN_TYPE'],
+                'Null': col['IS_NULLABLE'],
+                'Key': col['COLUMN_KEY'],
+                'Default': col['COLUMN_DEFAULT'],
+                'Extra': col['EXTRA']
+            }
+            for col in self.columns(table)
+        ]
+
+    def sample_row(self, table):
+        """테이블의 임의 한 행 (스냅샷이 갱신될 때까지 캐시, 없으면 None)"""
+        snapshot = self.snapshot()
+        if table not in snapshot:
+            return None
+        with self._lock:
+            if table in self._samples:
+                return self._samples[table]
+        conn = db_pool.connect(**self.config)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(f"SELECT * FROM `{table}` LIMIT 1")
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            if self._tables is snapshot:
+                self._samples[table] = row
+        return row
+
+    def get_stats(self):
+        with self._lock:
+            tables = self._tables or {}
+            return {
+                'database': self.config.get('database'),
+                'tables': len(tables),
+                'columns': sum(len(t['columns']) for t in tables.values()),
+                'loads': self.loads,
+                'age_seconds': time.time() - self._loaded_at if self._tables is not None else None,
+                'stale': self._is_stale()
+            }
+
+
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
+
+def get_catalogue(**config):
+    """db_pool.connect()와 같은 연결 설정별 프로세스 전역 카탈로그"""
+    key = tuple(sorted(config.items()))
+    with _catalogues_lock:
+        catalogue = _catalogues.get(key)
+        if catalogue is None:
+            catalogue = _catalogues[key] = SchemaCatalogue(config)
+        return catalogue
+
+
+def get_all_stats():
+    """생성된 모든 카탈로그의 상태"""
+    with _catalogues_lock:
+        catalogues = list(_catalogues.values())
+    return [catalogue.get_stats() for catalogue in catalogues]
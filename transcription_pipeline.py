@@ -0,0 +1,355 @@
+import os
+import re
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+import llm_service
+from parallel_search import run_parallel
+
+# 음성 변환 결과 캐시 SQLite 파일 경로 (오디오 SHA-256 기준)
+DEFAULT_DB_PATH = "./transcript_cache.db"
+
+WHISPER_MODEL = "whisper-1"
+
+FFMPEG = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+
+# Whisper API 업로드 한도(25MB)보다 여유 있게 설정 (MB)
+MAX_UPLOAD_MB = 24
+
+# 구간 목표 길이 (초) - SEGMENT_BITRATE 기준 약 2.4MB로 업로드 한도를 넘지 않음
+SEGMENT_SECONDS = float(os.getenv('WHISPER_SEGMENT_SECONDS', '600'))
+
+# 목표 길이의 이 비율 이후에 있는 무음 구간에서만 자름 (너무 짧은 구간 방지)
+MIN_SEGMENT_RATIO = 0.5
+
+# 무음 판정 기준
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.6
+
+# 구간 인코딩 (모노 16kHz - Whisper 입력 품질에 충분)
+SEGMENT_BITRATE = '32k'
+SEGMENT_SAMPLE_RATE = 16000
+
+# 동시에 변환하는 구간 수 (OpenAI 분당 요청 한도를 고려해 작게 유지)
+DEFAULT_MAX_WORKERS = int(os.getenv('WHISPER_MAX_WORKERS', '4'))
+
+# 구간별 재시도 횟수와 첫 대기 시간 (초, 시도마다 2배)
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 2.0
+
+# 오디오 다운로드 시 한 번에 쓰는 크기 (bytes)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+
+def has_ffmpeg():
+    return shutil.which(FFMPEG) is not None
+
+
+def file_sha256(path):
+    """파일을 조각 단위로 읽어 SHA-256 계산"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_to_file(url, suffix='.mp3', headers=None, timeout=DOWNLOAD_TIMEOUT):
+    """URL을 메모리에 올리지 않고 임시 파일로 받으며 해시 계산 - (경로, sha256)"""
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+        return path, digest.hexdigest()
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def detect_silences(path):
+    """FFmpeg silencedetect로 전체 길이와 무음 구간 목록을 구함 (오디오는 스트림으로 처리)
+
+    Returns:
+        (길이(초) 또는 None, [(무음 시작, 무음 끝), ...])
+    """
+    result = subprocess.run(
+        [FFMPEG, '-hide_banner', '-nostats', '-i', path, '-vn',
+         '-af', f'silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}',
+         '-f', 'null', '-'],
+        capture_output=True, text=True, errors='replace'
+    )
+    log = result.stderr
+    duration = None
+    match = re.search(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)', log)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    starts = [float(v) for v in re.findall(r'silence_start:\s*(-?\d+(?:\.\d+)?)', log)]
+    ends = [float(v) for v in re.findall(r'silence_end:\s*(\d+(?:\.\d+)?)', log)]
+    return duration, [(max(start, 0.0), end) for start, end in zip(starts, ends)]
+
+
+def plan_segments(duration, silences, target=SEGMENT_SECONDS):
+    """목표 길이 안에서 가장 늦은 무음 구간 중앙을 자르는 지점으로 선택
+
+    무음이 없으면 목표 길이에서 자릅니다.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = [0.0]
+    while duration - cuts[-1] > target:
+        start = cuts[-1]
+        candidates = [m for m in midpoints if start + target * MIN_SEGMENT_RATIO <= m <= start + target]
+        cuts.append(max(candidates) if candidates else start + target)
+    cuts.append(duration)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def export_segment(path, start, end, out_path):
+    """원본의 [start, end) 구간만 모노 16kHz mp3로 추출"""
+    subprocess.run(
+        [FFMPEG, '-hide_banner', '-loglevel', 'error', '-y',
+         '-ss', f'{start:.3f}', '-t', f'{end - start:.3f}', '-i', path,
+         '-vn', '-ac', '1', '-ar', str(SEGMENT_SAMPLE_RATE), '-b:a', SEGMENT_BITRATE, out_path],
+        check=True, capture_output=True
+    )
+    return out_path
+
+
+def _field(item, name, default=None):
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+def transcribe_segment(audio_path, offset=0.0, language=None, prompt=None, model=WHISPER_MODEL):
+    """구간 하나를 변환하고 타임스탬프를 원본 기준으로 옮김 (일시 오류는 재시도)
+
+    Returns:
+        {'text': 텍스트, 'segments': [{'start', 'end', 'text'}, ...]}
+    """
+    client = llm_service.get_client('openai')
+    options = {'model': model, 'response_format': 'verbose_json'}
+    if language:
+        options['language'] = language
+    if prompt:
+        options['prompt'] = prompt
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            with open(audio_path, 'rb') as audio:
+                response = client.audio.transcriptions.create(file=audio, **options)
+            break
+        except Exception:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt))
+
+    segments = [
+        {
+            'start': float(_field(segment, 'start', 0.0)) + offset,
+            'end': float(_field(segment, 'end', 0.0)) + offset,
+            'text': (_field(segment, 'text', '') or '').strip(),
+        }
+        for segment in (_field(response, 'segments') or [])
+    ]
+    return {'text': (_field(response, 'text', '') or '').strip(), 'segments': segments}
+
+
+class TranscriptCache:
+    """오디오 내용(SHA-256) 기준 음성 변환 결과 캐시 (SQLite)
+
+    같은 파일을 다시 올리거나 같은 영상을 다시 분석하면 API를 호출하지 않습니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                audio_sha256 TEXT NOT NULL,
+                model TEXT NOT NULL,
+                language TEXT NOT NULL,
+                text TEXT NOT NULL,
+                segments TEXT NOT NULL,
+                duration REAL,
+                created_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (audio_sha256, model, language)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, audio_sha256, model, language):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, segments, duration FROM transcripts "
+                "WHERE audio_sha256 = ? AND model = ? AND language = ?",
+                (audio_sha256, model, language or '')
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE transcripts SET hit_count = hit_count + 1 "
+                "WHERE audio_sha256 = ? AND model = ? AND language = ?",
+                (audio_sha256, model, language or '')
+            )
+            self._conn.commit()
+        return {'text': row[0], 'segments': json.loads(row[1]), 'duration': row[2]}
+
+    def set(self, audio_sha256, model, language, text, segments, duration):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(audio_sha256, model, language, text, segments, duration, created_at, hit_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (audio_sha256, model, language or '', text,
+                 json.dumps(segments, ensure_ascii=False), duration, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def get_stats(self):
+        with self._lock:
+            entries, seconds, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(hit_count), 0) FROM transcripts"
+            ).fetchone()
+        return {'entries': entries, 'audio_seconds': seconds, 'hits': hits}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 전역 캐시 인스턴스"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptCache()
+        return _cache
+
+
+def transcribe_file(path, language=None, prompt=None, max_workers=DEFAULT_MAX_WORKERS,
+                    on_progress=None, use_cache=True, audio_sha256=None, model=WHISPER_MODEL):
+    """오디오 파일을 무음 구간 기준으로 나눠 동시에 변환하고 타임스탬프를 이어 붙임
+
+    Args:
+        language: Whisper 언어 코드 (None이면 자동 감지)
+        on_progress: (완료 구간 수, 전체 구간 수)를 받는 콜백 - 호출한 스레드에서 실행
+        audio_sha256: 이미 계산한 해시 (없으면 파일에서 계산)
+
+    Returns:
+        {'text', 'segments', 'duration', 'audio_sha256', 'chunks', 'failed', 'cached'}
+        failed는 재시도 후에도 실패한 구간의 (시작, 끝) 목록이며, 실패가 있으면 캐시하지 않습니다.
+    """
+    audio_sha256 = audio_sha256 or file_sha256(path)
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(audio_sha256, model, language)
+        if cached is not None:
+            return dict(cached, audio_sha256=audio_sha256, chunks=0, failed=[], cached=True)
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    duration, silences = detect_silences(path) if has_ffmpeg() else (None, [])
+    if duration is None and size_mb > MAX_UPLOAD_MB:
+        raise RuntimeError(
+            f"파일 크기가 {size_mb:.1f}MB로 업로드 한도({MAX_UPLOAD_MB}MB)를 넘습니다. "
+            "분할하려면 FFmpeg가 필요합니다."
+        )
+
+    work_dir = tempfile.mkdtemp(prefix='whisper_')
+    try:
+        if duration is None or (size_mb <= MAX_UPLOAD_MB and duration <= SEGMENT_SECONDS):
+            # 한 번에 올릴 수 있으면 재인코딩 없이 원본 그대로 변환
+            ranges = [(0.0, duration)]
+            tasks = {0: lambda: transcribe_segment(path, 0.0, language, prompt, model)}
+        else:
+            ranges = plan_segments(duration, silences)
+
+            def make_task(index, start, end):
+                def task():
+                    segment_path = export_segment(
+                        path, start, end, os.path.join(work_dir, f'segment_{index:04d}.mp3')
+                    )
+                    try:
+                        return transcribe_segment(segment_path, start, language, prompt, model)
+                    finally:
+                        os.remove(segment_path)
+                return task
+
+            tasks = {i: make_task(i, start, end) for i, (start, end) in enumerate(ranges)}
+
+        results, failed = {}, []
+        for index, status, result, _ in run_parallel(tasks, max_workers=max_workers, time_budget=None):
+            if status == 'ok':
+                results[index] = result
+            else:
+                failed.append(ranges[index])
+            if on_progress:
+                on_progress(len(results) + len(failed), len(tasks))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if not results:
+        raise RuntimeError("모든 구간의 음성 변환에 실패했습니다.")
+
+    ordered = [results[i] for i in sorted(results)]
+    text = ' '.join(part['text'] for part in ordered if part['text'])
+    segments = [segment for part in ordered for segment in part['segments']]
+    if cache is not None and not failed:
+        cache.set(audio_sha256, model, language, text, segments, duration)
+    return {
+        'text': text,
+        'segments': segments,
+        'duration': duration,
+        'audio_sha256': audio_sha256,
+        'chunks': len(tasks),
+        'failed': sorted(failed),
+        'cached': False,
+    }
+
+
+def transcribe_url(url, suffix='.mp3', headers=None, **kwargs):
+    """원격 오디오를 임시 파일로 스트리밍한 뒤 transcribe_file()로 변환"""
+    path, audio_sha256 = download_to_file(url, suffix=suffix, headers=headers)
+    try:
+        return transcribe_file(path, audio_sha256=audio_sha256, **kwargs)
+    finally:
+        os.remove(path)
+
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_segments(segments):
+    """타임스탬프가 붙은 스크립트 ([HH:MM:SS] 텍스트 줄 단위)"""
+    return '\n'.join(f"[{format_timestamp(s['start'])}] {s['text']}" for s in segments if s['text'])
+
+
+def get_stats():
+    return get_cache().get_stats()
@@ -0,0 +1,262 @@
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+from parallel_search import run_parallel
+
+# 번역 메모리 SQLite 파일 경로
+DEFAULT_DB_PATH = "./translation_memory.db"
+
+# 한 번의 요청에 묶는 최대 글자 수 / 구간 수
+BATCH_CHARS = 3000
+BATCH_SEGMENTS = 20
+
+# 한 언어 안에서 동시에 보내는 요청 수
+DEFAULT_MAX_WORKERS = 4
+
+# 구간 번호 표시 (모델이 그대로 돌려주도록 요청)
+_MARKER = "<<<{}>>>"
+_MARKER_PATTERN = re.compile(r'<<<(\d+)>>>')
+
+# 문단 구분 (빈 줄) - 구분자는 그대로 보존해서 다시 조립
+_PARAGRAPH_BREAK = re.compile(r'(\n[ \t]*\n\s*)')
+
+
+def split_segments(text):
+    """텍스트를 문단 단위 조각으로 나눔 - (조각 목록, 번역 대상 조각의 인덱스 목록)
+
+    조각을 순서대로 이어 붙이면 원문이 됩니다. 공백뿐인 조각과 구분자는 번역하지 않습니다.
+    """
+    pieces = _PARAGRAPH_BREAK.split(text or '')
+    translatable = [i for i, piece in enumerate(pieces) if i % 2 == 0 and piece.strip()]
+    return pieces, translatable
+
+
+def _hash(value):
+    return hashlib.sha256((value or '').encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    """문단 단위 번역 메모리 (SQLite)
+
+    (원문 구간 해시, 원문 언어, 목표 언어, 모델, 추가 지시사항) 조합으로 번역을 저장해
+    문서를 고쳐서 다시 번역할 때 바뀐 문단만 모델에 보냅니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                segment_hash TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                model TEXT NOT NULL,
+                instructions_hash TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (segment_hash, source_lang, target_lang, model, instructions_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, segments, source_lang, target_lang, model, instructions=""):
+        """저장된 번역 {원문 구간: 번역}"""
+        instructions_hash = _hash(instructions)
+        hashes = {_hash(segment): segment for segment in segments}
+        found = {}
+        now = time.time()
+        with self._lock:
+            for segment_hash, segment in hashes.items():
+                row = self._conn.execute(
+                    "SELECT translation FROM translation_memory "
+                    "WHERE segment_hash = ? AND source_lang = ? AND target_lang = ? "
+                    "AND model = ? AND instructions_hash = ?",
+                    (segment_hash, source_lang, target_lang, model, instructions_hash)
+                ).fetchone()
+                if row is not None:
+                    found[segment] = row[0]
+            if found:
+                self._conn.executemany(
+                    "UPDATE translation_memory SET last_used = ?, hit_count = hit_count + 1 "
+                    "WHERE segment_hash = ? AND source_lang = ? AND target_lang = ? "
+                    "AND model = ? AND instructions_hash = ?",
+                    [(now, _hash(segment), source_lang, target_lang, model, instructions_hash) for segment in found]
+                )
+                self._conn.commit()
+        return found
+
+    def store(self, translations, source_lang, target_lang, model, instructions=""):
+        """{원문 구간: 번역} 저장"""
+        instructions_hash = _hash(instructions)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translation_memory "
+                "(segment_hash, source_lang, target_lang, model, instructions_hash, "
+                "source_text, translation, created_at, last_used, hit_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                [
+                    (_hash(segment), source_lang, target_lang, model, instructions_hash,
+                     segment, translation, now, now)
+                    for segment, translation in translations.items()
+                ]
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM translation_memory")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def get_stats(self):
+        with self._lock:
+            entries, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hit_count), 0) FROM translation_memory"
+            ).fetchone()
+            pairs = self._conn.execute(
+                "SELECT source_lang, target_lang, COUNT(*) FROM translation_memory "
+                "GROUP BY source_lang, target_lang ORDER BY COUNT(*) DESC"
+            ).fetchall()
+        return {
+            'entries': entries,
+            'hits': hits,
+            'pairs': [{'source': s, 'target': t, 'entries': n} for s, t, n in pairs]
+        }
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_memory():
+    """프로세스 전역 번역 메모리 인스턴스"""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
+
+
+def make_batches(segments, max_chars=BATCH_CHARS, max_segments=BATCH_SEGMENTS):
+    """짧은 구간 여러 개를 한 요청으로 묶음 (긴 구간은 단독 요청)"""
+    batches, current, size = [], [], 0
+    for segment in segments:
+        if current and (size + len(segment) > max_chars or len(current) >= max_segments):
+            batches.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_prompt(batch, source_name, target_name, instructions=""):
+    """번호 표시가 붙은 구간 묶음 번역 프롬프트 - (system_prompt, user_message)"""
+    system_prompt = f"You are a professional translator. Always translate to {target_name}."
+    user_message = (
+        f"Translate each numbered segment below from {source_name} to {target_name}. "
+        "Keep the original meaning and nuance. Keep every marker line such as "
+        f"{_MARKER.format(1)} exactly as it is, put the translation of that segment after it, "
+        "and output nothing else."
+    )
+    if instructions and instructions.strip():
+        user_message += f"\n\n[Important: Please follow these additional instructions]\n{instructions.strip()}"
+    body = "\n".join(f"{_MARKER.format(i + 1)}\n{segment}" for i, segment in enumerate(batch))
+    return system_prompt, f"{user_message}\n\n{body}"
+
+
+def parse_response(response, count):
+    """번호 표시로 응답을 구간별 번역으로 나눔 (표시가 맞지 않으면 None)"""
+    parts = _MARKER_PATTERN.split(response or '')
+    translations = {}
+    for number, content in zip(parts[1::2], parts[2::2]):
+        translations[int(number)] = content.strip()
+    if sorted(translations) != list(range(1, count + 1)):
+        return None
+    return [translations[i + 1] for i in range(count)]
+
+
+def translate(text, source_lang, target_lang, model, complete, source_name=None, target_name=None,
+              instructions="", max_workers=DEFAULT_MAX_WORKERS, memory=None):
+    """번역 메모리를 이용해 바뀐 문단만 번역하고 원래 문단 구조로 다시 조립
+
+    Args:
+        complete: (user_message, system_prompt) -> 응답 텍스트. 실패 시 예외를 올려야 합니다.
+        source_name, target_name: 프롬프트에 쓰는 언어 이름 (없으면 source_lang/target_lang)
+
+    Returns:
+        {'text': 번역문, 'segments': 번역 대상 구간 수, 'reused': 메모리에서 가져온 구간 수,
+         'requests': 모델 호출 수}
+    """
+    memory = memory or get_memory()
+    source_name = source_name or source_lang
+    target_name = target_name or target_lang
+
+    pieces, translatable = split_segments(text)
+    segments = list(dict.fromkeys(pieces[i].strip() for i in translatable))
+    known = memory.lookup(segments, source_lang, target_lang, model, instructions)
+    missing = [segment for segment in segments if segment not in known]
+    reused = sum(1 for i in translatable if pieces[i].strip() in known)
+
+    requests_made = 0
+
+    def translate_batch(batch):
+        system_prompt, user_message = build_prompt(batch, source_name, target_name, instructions)
+        translations = parse_response(complete(user_message, system_prompt), len(batch))
+        calls = 1
+        if translations is None:
+            # 표시가 깨진 응답은 구간별로 다시 요청
+            translations = []
+            for segment in batch:
+                single_system, single_message = build_prompt([segment], source_name, target_name, instructions)
+                response = complete(single_message, single_system)
+                parsed = parse_response(response, 1)
+                translations.append(parsed[0] if parsed else _MARKER_PATTERN.sub('', response).strip())
+                calls += 1
+        return dict(zip(batch, translations)), calls
+
+    if missing:
+        tasks = {i: (lambda batch=batch: translate_batch(batch)) for i, batch in enumerate(make_batches(missing))}
+        new_translations = {}
+        error = None
+        for _, status, result, _ in run_parallel(tasks, max_workers=max_workers, time_budget=None):
+            if status != 'ok':
+                error = error or result
+                continue
+            translations, calls = result
+            new_translations.update(translations)
+            requests_made += calls
+        # 일부 묶음이 실패해도 성공한 번역은 저장해서 다시 시도할 때 비용을 다시 내지 않음
+        if new_translations:
+            memory.store(new_translations, source_lang, target_lang, model, instructions)
+        if error is not None:
+            raise error
+        known.update(new_translations)
+
+    for i in translatable:
+        piece = pieces[i]
+        # 문단 앞뒤 공백(들여쓰기 등)은 원문 그대로 유지
+        leading = piece[:len(piece) - len(piece.lstrip())]
+        trailing = piece[len(piece.rstrip()):]
+        pieces[i] = f"{leading}{known[piece.strip()]}{trailing}"
+
+    return {
+        'text': ''.join(pieces),
+        'segments': len(translatable),
+        'reused': reused,
+        'requests': requests_made,
+    }
+
+
+def get_stats():
+    return get_memory().get_stats()
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+import llm_service
+from parallel_search import run_parallel
+
+# 구간별 합성 결과(mp3) 캐시 디렉터리 - (텍스트, 음성, 모델, 속도) 해시 기준
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', './tts_cache')
+
+# 캐시 최대 크기 (MB) - 넘으면 오래 사용하지 않은 구간부터 삭제 (사용 시각은 파일 mtime)
+TTS_CACHE_MAX_MB = float(os.getenv('TTS_CACHE_MAX_MB', '500'))
+
+# 정리 후 목표 크기 비율 (매번 정리하지 않도록 여유를 둠)
+EVICT_TARGET_RATIO = 0.9
+
+# 쓰는 중인 임시 파일 접미사 - 통계/정리에서 구간으로 세지 않음
+_PARTIAL_SUFFIX = ".part"
+
+# 이보다 오래된 임시 파일은 중단된 쓰기로 보고 정리 시 삭제 (초)
+_PARTIAL_MAX_AGE = 3600
+
+_evict_lock = threading.Lock()
+
+DEFAULT_MODEL = "tts-1"
+DEFAULT_VOICE = "alloy"
+
+# 구간 최대 글자 수 (API 한도 4096자보다 작게 - 구간이 짧을수록 동시 처리 효과가 큼)
+SEGMENT_CHARS = 1200
+
+# 첫 구간은 짧게 잘라 첫 소리가 빨리 준비되도록 함
+FIRST_SEGMENT_CHARS = 300
+
+# 동시에 합성하는 구간 수
+DEFAULT_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', '4'))
+
+# 화면 표시용 음성 이름 -> OpenAI voice
+VOICE_LABELS = {
+    "남성 (깊은 목소리)": "onyx",
+    "남성 (중간 톤)": "echo",
+    "여성 (밝은 목소리)": "nova",
+    "여성 (차분한 목소리)": "shimmer",
+    "중성적인 목소리": "alloy"
+}
+
+_SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s+|\n+')
+
+
+def voice_for_label(label):
+    return VOICE_LABELS.get(label, DEFAULT_VOICE)
+
+
+def _split_long(sentence, max_chars):
+    """한 문장이 max_chars보다 길면 쉼표/공백 위치에서 나눔"""
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = max(sentence.rfind(', ', 0, max_chars), sentence.rfind(' ', 0, max_chars))
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def split_text(text, max_chars=SEGMENT_CHARS, first_chars=FIRST_SEGMENT_CHARS):
+    """문장 경계에서 텍스트를 구간으로 나눔 (첫 구간은 first_chars 이하)"""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text or ''):
+        sentence = sentence.strip()
+        if sentence:
+            sentences.extend(_split_long(sentence, max_chars))
+
+    segments, current = [], ''
+    for sentence in sentences:
+        limit = first_chars if not segments else max_chars
+        if current and len(current) + 1 + len(sentence) > limit:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        segments.append(current)
+    return segments
+
+
+def segment_key(text, voice, model, speed):
+    payload = json.dumps(
+        {'text': text, 'voice': voice, 'model': model, 'speed': speed},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(TTS_CACHE_DIR, key[:2], f"{key}.mp3")
+
+
+def synthesize_segment(text, voice=DEFAULT_VOICE, model=DEFAULT_MODEL, speed=1.0):
+    """구간 하나를 합성 (캐시에 있으면 API를 호출하지 않음)"""
+    path = _cache_path(segment_key(text, voice, model, speed))
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)  # LRU 정리를 위해 사용 시각 갱신
+            return audio
+        except OSError:
+            pass  # 정리 중 삭제된 경우 다시 합성
+
+    options = {'model': model, 'voice': voice, 'input': text}
+    if speed != 1.0:
+        options['speed'] = speed
+    audio = llm_service.get_client('openai').audio.speech.create(**options).content
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=_PARTIAL_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return audio
+
+
+def _cached_segments():
+    """[(경로, 크기, mtime)] - 완성된 mp3 구간만"""
+    segments = []
+    for dirpath, _, filenames in os.walk(TTS_CACHE_DIR):
+        for filename in filenames:
+            if not filename.endswith('.mp3'):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((path, stat.st_size, stat.st_mtime))
+    return segments
+
+
+def evict(max_mb=TTS_CACHE_MAX_MB):
+    """중단된 임시 파일을 지우고, 크기 한도를 넘으면 오래 사용하지 않은 구간부터 삭제
+
+    반환값은 삭제한 구간 수입니다.
+    """
+    with _evict_lock:
+        cutoff = time.time() - _PARTIAL_MAX_AGE
+        for dirpath, _, filenames in os.walk(TTS_CACHE_DIR):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if filename.endswith(_PARTIAL_SUFFIX) and os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                except OSError:
+                    continue
+
+        max_bytes = int(max_mb * 1024 * 1024)
+        segments = _cached_segments()
+        total = sum(size for _, size, _ in segments)
+        if total <= max_bytes:
+            return 0
+        target = int(max_bytes * EVICT_TARGET_RATIO)
+        removed = 0
+        for path, size, _ in sorted(segments, key=lambda segment: segment[2]):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def synthesize(text, voice=DEFAULT_VOICE, model=DEFAULT_MODEL, speed=1.0,
+               max_workers=DEFAULT_MAX_WORKERS, on_progress=None):
+    """긴 텍스트를 구간별로 동시에 합성하고 순서대로 이어 붙인 mp3 반환
+
+    mp3 프레임은 이어 붙여도 그대로 재생됩니다. 한 구간이라도 실패하면 예외를 올립니다
+    (성공한 구간은 캐시에 남으므로 다시 시도하면 실패한 구간만 합성합니다).
+
+    Args:
+        on_progress: (완료 구간 수, 전체 구간 수)를 받는 콜백 - 호출한 스레드에서 실행
+    """
+    segments = split_text(text)
+    if not segments:
+        raise ValueError("음성으로 변환할 텍스트가 없습니다.")
+
+    tasks = {
+        i: (lambda segment=segment: synthesize_segment(segment, voice, model, speed))
+        for i, segment in enumerate(segments)
+    }
+    results = {}
+    for index, status, result, _ in run_parallel(tasks, max_workers=max_workers, time_budget=None):
+        if status != 'ok':
+            raise result
+        results[index] = result
+        if on_progress:
+            on_progress(len(results), len(tasks))
+    evict()
+    return b''.join(results[i] for i in range(len(segments)))
+
+
+def get_stats():
+    segments = _cached_segments()
+    return {
+        'root': TTS_CACHE_DIR,
+        'segments': len(segments),
+        'size_bytes': sum(size for _, size, _ in segments),
+        'max_bytes': int(TTS_CACHE_MAX_MB * 1024 * 1024)
+    }
@@ -0,0 +1,479 @@
+import os
+import time
+import zlib
+import queue
+import sqlite3
+import asyncio
+import threading
+from collections import deque
+from urllib.parse import urljoin, urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from bs4 import BeautifulSoup
+
+# 페이지 저장소 SQLite 파일 경로
+DEFAULT_DB_PATH = "./web_page_cache.db"
+
+# 페이지 저장소 최대 크기 (MB) - 넘으면 오래 사용하지 않은 페이지부터 삭제
+DEFAULT_MAX_MB = float(os.getenv('WEB_CACHE_MAX_MB', '300'))
+
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+# 동시 요청 수 / 호스트별 초당 요청 수
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_HOST = 4.0
+
+DEFAULT_TIMEOUT = 10.0
+
+# robots.txt 재사용 시간 (초)
+ROBOTS_TTL = 3600
+
+# 링크 대기열 최대 크기
+MAX_FRONTIER = 200
+
+# 수집 대상이 아닌 파일 확장자
+EXCLUDED_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.css', '.js', '.ico',
+    '.xml', '.zip', '.exe', '.mp4', '.mp3'
+)
+
+# 본문 추출 시 제거하는 태그
+DEFAULT_DROP_TAGS = ("script", "style", "nav", "header", "footer")
+
+EVICT_TARGET_RATIO = 0.9
+
+
+class PageStore:
+    """URL별 응답 본문과 ETag/Last-Modified를 보관하는 디스크 저장소 (SQLite)
+
+    다시 크롤링할 때 조건부 요청(If-None-Match / If-Modified-Since)을 보내고,
+    304 응답이면 저장된 본문을 그대로 사용합니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_mb=DEFAULT_MAX_MB):
+        self.db_path = db_path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                final_url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                validated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_validated_at ON pages (validated_at)")
+        self._conn.commit()
+        self.revalidated = 0
+        self.downloaded = 0
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status, content_type, etag, last_modified, body, validated_at "
+                "FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'final_url': row[0],
+            'status': row[1],
+            'content_type': row[2],
+            'etag': row[3],
+            'last_modified': row[4],
+            'body': zlib.decompress(row[5]),
+            'validated_at': row[6]
+        }
+
+    def put(self, url, final_url, status, content_type, etag, last_modified, body):
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url, final_url, status, content_type, etag, last_modified, body, size, fetched_at, validated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, final_url, status, content_type, etag, last_modified, compressed, len(compressed), now, now)
+            )
+            self.downloaded += 1
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """304 응답 - 저장된 본문이 여전히 유효함을 기록"""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET validated_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            self.revalidated += 1
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        removed = []
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY validated_at"):
+            if total <= target:
+                break
+            removed.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", removed)
+
+    def get_stats(self):
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {
+            'pages': count,
+            'size_bytes': total,
+            'max_bytes': self.max_bytes,
+            'downloaded': self.downloaded,
+            'revalidated': self.revalidated
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """프로세스 전역 페이지 저장소"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PageStore()
+        return _store
+
+
+# robots.txt 캐시: {호스트 URL: (RobotFileParser, 가져온 시각)}
+_robots = {}
+_robots_lock = threading.Lock()
+
+
+def _host_of(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def normalize_url(url):
+    """스킴이 없으면 https:// 를 붙이고 #fragment 제거"""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return urldefrag(url)[0]
+
+
+def same_site(url, start_url, allow_subdomains=False):
+    """시작 URL과 같은 도메인인지 (allow_subdomains면 하위 도메인도 허용)"""
+    netloc, base = urlparse(url).netloc, urlparse(start_url).netloc
+    return netloc == base or (allow_subdomains and netloc.endswith('.' + base))
+
+
+def page_text(soup, drop_tags=DEFAULT_DROP_TAGS):
+    """불필요한 태그를 제거하고 빈 줄 없이 줄 단위로 정리한 본문 (soup를 변경함)"""
+    for tag in soup(list(drop_tags)):
+        tag.decompose()
+    text = soup.get_text(separator="\n", strip=True)
+    return '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+
+
+def page_title(soup):
+    return soup.title.string.strip() if soup.title and soup.title.string else ''
+
+
+def extract_text(page, min_length=50, drop_tags=DEFAULT_DROP_TAGS):
+    """기본 추출기: {'title', 'content'} (본문이 min_length 이하이면 None)"""
+    title = page_title(page['soup'])
+    content = page_text(page['soup'], drop_tags)
+    if len(content) <= min_length:
+        return None
+    return {'title': title, 'content': content}
+
+
+class _HostLimiter:
+    """호스트별 최소 요청 간격 유지 (robots.txt Crawl-delay가 더 길면 그 값을 사용)"""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host else 0.0
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, host, crawl_delay=None):
+        interval = max(self.interval, crawl_delay or 0.0)
+        if not interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            ready = self._next.get(host, now)
+            if ready > now:
+                await asyncio.sleep(ready - now)
+            self._next[host] = max(ready, now) + interval
+
+
+class Crawler:
+    """asyncio 기반 웹 크롤러
+
+    - 최대 동시 요청 수와 호스트별 요청 간격을 지키며 여러 페이지를 동시에 가져옵니다.
+    - robots.txt는 호스트별로 한 번만 읽어 재사용합니다.
+    - 저장소에 있는 페이지는 조건부 요청으로 재검증하여 변경이 없으면 다시 받지 않습니다.
+    - 결과는 완료되는 순서대로 스트리밍합니다 (iter_crawl / iter_fetch).
+
+    페이지 dict: url, final_url, status, content_type, html, soup, from_cache, elapsed_ms, error, data
+    (data는 extract 함수의 반환값)
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+                 respect_robots=True, timeout=DEFAULT_TIMEOUT, user_agent=DEFAULT_USER_AGENT,
+                 store=None, max_age=0):
+        """
+        Args:
+            rate_per_host: 호스트별 초당 최대 요청 수 (None/0이면 제한 없음)
+            store: PageStore (None이면 전역 저장소, False이면 저장하지 않음)
+            max_age: 저장소의 페이지를 재검증 없이 그대로 쓰는 시간 (초)
+        """
+        self.max_concurrency = max_concurrency
+        self.rate_per_host = rate_per_host
+        self.respect_robots = respect_robots
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.store = get_store() if store is None else (store or None)
+        self.max_age = max_age
+
+    # ----- robots.txt -----
+    async def _robots(self, client, url):
+        host = _host_of(url)
+        with _robots_lock:
+            cached = _robots.get(host)
+        if cached is not None and time.time() - cached[1] < ROBOTS_TTL:
+            return cached[0]
+
+        parser = RobotFileParser()
+        try:
+            response = await client.get(f"{host}/robots.txt")
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except httpx.HTTPError:
+            # 확인할 수 없는 경우 허용으로 처리
+            parser.allow_all = True
+        with _robots_lock:
+            _robots[host] = (parser, time.time())
+        return parser
+
+    # ----- 단일 페이지 -----
+    async def _fetch(self, client, limiter, url, extract):
+        page = {
+            'url': url, 'final_url': url, 'status': None, 'content_type': '', 'html': None,
+            'soup': None, 'from_cache': False, 'elapsed_ms': 0.0, 'error': None, 'data': None, 'links': []
+        }
+        start = time.perf_counter()
+        try:
+            crawl_delay = None
+            if self.respect_robots:
+                robots = await self._robots(client, url)
+                if not robots.can_fetch('*', url):
+                    page['error'] = "robots.txt 차단"
+                    return page
+                crawl_delay = robots.crawl_delay('*')
+
+            cached = self.store.get(url) if self.store else None
+            if cached and self.max_age and time.time() - cached['validated_at'] < self.max_age:
+                body = cached['body']
+                page.update(final_url=cached['final_url'], status=cached['status'],
+                            content_type=cached['content_type'] or '', from_cache=True)
+            else:
+                headers = {}
+                if cached:
+                    if cached['etag']:
+                        headers['If-None-Match'] = cached['etag']
+                    if cached['last_modified']:
+                        headers['If-Modified-Since'] = cached['last_modified']
+                await limiter.wait(urlparse(url).netloc, float(crawl_delay) if crawl_delay else None)
+                response = await client.get(url, headers=headers)
+
+                if response.status_code == 304 and cached:
+                    self.store.touch(url)
+                    body = cached['body']
+                    page.update(final_url=cached['final_url'], status=cached['status'],
+                                content_type=cached['content_type'] or '', from_cache=True)
+                else:
+                    response.raise_for_status()
+                    body = response.content
+                    page.update(final_url=str(response.url), status=response.status_code,
+                                content_type=response.headers.get('content-type', '').lower())
+                    if self.store:
+                        self.store.put(url, page['final_url'], response.status_code, page['content_type'],
+                                       response.headers.get('etag'), response.headers.get('last-modified'), body)
+
+            if 'html' not in page['content_type']:
+                page['error'] = f"HTML이 아닌 콘텐츠 ({page['content_type'] or 'unknown'})"
+                return page
+
+            page['html'] = body
+            page['soup'] = BeautifulSoup(body, "html.parser")
+            # 추출기가 soup를 변경하기 전에 링크 수집
+            page['links'] = [a['href'] for a in page['soup'].find_all("a", href=True)]
+            if extract is not None:
+                page['data'] = extract(page)
+        except httpx.HTTPStatusError as e:
+            page['status'] = e.response.status_code
+            page['error'] = f"HTTP {e.response.status_code}"
+        except Exception as e:
+            page['error'] = str(e) or e.__class__.__name__
+        finally:
+            page['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return page
+
+    def _client(self):
+        return httpx.AsyncClient(
+            headers={'User-Agent': self.user_agent},
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency)
+        )
+
+    # ----- 사이트 크롤링 (링크 따라가기) -----
+    async def _crawl(self, start_url, max_pages, extract, link_filter, allow_subdomains,
+                     max_links_per_page, emit, stop):
+        start_url = normalize_url(start_url)
+        limiter = _HostLimiter(self.rate_per_host)
+        frontier = deque([start_url])
+        seen = {start_url}
+        in_flight = set()
+        accepted = 0
+        attempts = 0
+        # 추출기가 계속 거절하는 사이트에서 끝없이 요청하지 않도록 제한
+        max_attempts = max_pages * 5
+
+        async with self._client() as client:
+            try:
+                while (frontier or in_flight) and accepted < max_pages and not stop.is_set():
+                    while (frontier and len(in_flight) < self.max_concurrency
+                           and accepted + len(in_flight) < max_pages and attempts < max_attempts):
+                        attempts += 1
+                        in_flight.add(asyncio.ensure_future(
+                            self._fetch(client, limiter, frontier.popleft(), extract)
+                        ))
+                    if not in_flight:
+                        break
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        page = task.result()
+                        added = 0
+                        for href in page.pop('links'):
+                            if added >= max_links_per_page or len(seen) >= MAX_FRONTIER:
+                                break
+                            link = urldefrag(urljoin(page['final_url'], href))[0]
+                            if (link in seen or urlparse(link).scheme not in ('http', 'https')
+                                    or not same_site(link, start_url, allow_subdomains)
+                                    or link.lower().endswith(EXCLUDED_EXTENSIONS)
+                                    or (link_filter is not None and not link_filter(link))):
+                                continue
+                            seen.add(link)
+                            frontier.append(link)
+                            added += 1
+
+                        if page['error'] is not None:
+                            emit(page)
+                        elif extract is None or page['data'] is not None:
+                            if accepted < max_pages:
+                                accepted += 1
+                                emit(page)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+
+    async def _fetch_all(self, urls, extract, emit, stop):
+        limiter = _HostLimiter(self.rate_per_host)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._client() as client:
+            async def bounded(url):
+                async with semaphore:
+                    if stop.is_set():
+                        return None
+                    return await self._fetch(client, limiter, normalize_url(url), extract)
+
+            for future in asyncio.as_completed([bounded(url) for url in urls]):
+                page = await future
+                if page is not None:
+                    page.pop('links')
+                    emit(page)
+
+    # ----- 동기 인터페이스 -----
+    def _stream(self, coro_factory):
+        """코루틴을 별도 스레드의 이벤트 루프에서 실행하고 결과를 도착 순서대로 yield"""
+        results = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def runner():
+            try:
+                asyncio.run(coro_factory(results.put, stop))
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 소비자가 중간에 멈추면 크롤링도 중단
+            stop.set()
+
+    def iter_crawl(self, start_url, max_pages=10, extract=extract_text, link_filter=None,
+                   allow_subdomains=False, max_links_per_page=20):
+        """시작 URL에서 같은 사이트 링크를 따라가며 페이지를 완료 순서대로 yield
+
+        extract(page)가 None을 반환한 페이지는 건너뛰고 max_pages에 포함하지 않습니다.
+        실패한 페이지(page['error'])도 yield 합니다.
+        """
+        return self._stream(lambda emit, stop: self._crawl(
+            start_url, max_pages, extract, link_filter, allow_subdomains, max_links_per_page, emit, stop
+        ))
+
+    def iter_fetch(self, urls, extract=None):
+        """URL 목록을 (링크를 따라가지 않고) 동시에 가져와 완료 순서대로 yield"""
+        return self._stream(lambda emit, stop: self._fetch_all(list(urls), extract, emit, stop))
+
+    def fetch(self, url, extract=None):
+        """페이지 하나 가져오기"""
+        for page in self.iter_fetch([url], extract):
+            return page
+
+
+def iter_crawl(start_url, max_pages=10, extract=extract_text, **options):
+    """Crawler(**options).iter_crawl(...) 단축 함수
+
+    options 중 link_filter, allow_subdomains, max_links_per_page는 크롤링 인자로, 나머지는 Crawler 인자로 전달
+    """
+    crawl_keys = ('link_filter', 'allow_subdomains', 'max_links_per_page')
+    crawl_options = {k: options.pop(k) for k in crawl_keys if k in options}
+    return Crawler(**options).iter_crawl(start_url, max_pages, extract, **crawl_options)
+
+
+def crawl(start_url, max_pages=10, extract=extract_text, **options):
+    """iter_crawl 결과 중 성공한 페이지 목록"""
+    return [page for page in iter_crawl(start_url, max_pages, extract, **options) if page['error'] is None]